@@ -1,6 +1,15 @@
 // Global variable to store all fetched data
 let allData = [];
-const SITE_DATA_URL = 'site_data.json'; // Or directly 'site_data.json' if in the same folder
+let tagNames = new Map(); // tag ID -> canonical tag name
+// Further shows live in their namespace (see data/shows.json), selected with ?show=<id>
+const SHOW_ID = new URLSearchParams(window.location.search).get('show');
+const DATA_BASE = SHOW_ID ? `shows/${encodeURIComponent(SHOW_ID)}/` : '';
+const SITE_DATA_URL = DATA_BASE + 'site_data.json';
+const TAGS_URL = DATA_BASE + 'tags.json'; // Canonical tag vocabulary, referenced by 'tag_ids' in site_data.json
+const RELATED_URL = DATA_BASE + 'related.json'; // Precomputed similar proposals, only loaded when first requested
+let relatedPromise = null;
+const CHAPTERS_BASE = DATA_BASE + 'chapters/'; // Chapter index per episode (<id>_chapters.json), loaded once per episode
+const chapterPromises = new Map(); // episode ID -> promise of its chapter list
 
 // DOMContentLoaded listener
 document.addEventListener('DOMContentLoaded', init);
@@ -34,6 +43,134 @@ async function fetchData() {
         console.error("Fehler beim Laden der Daten:", error);
         allData = []; // Ensure allData is empty on error
     }
+    await fetchTags();
+}
+
+// Fetch tag vocabulary function
+async function fetchTags() {
+    try {
+        const response = await fetch(TAGS_URL);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const vocabulary = await response.json();
+        tagNames = new Map(vocabulary.map(tag => [tag.id, tag.name]));
+    } catch (error) {
+        console.error("Fehler beim Laden der Tags:", error);
+        tagNames = new Map();
+    }
+}
+
+// Fetch related proposals once, on first use
+function fetchRelated() {
+    if (!relatedPromise) {
+        relatedPromise = fetch(RELATED_URL)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .catch(error => {
+                console.error("Fehler beim Laden der ähnlichen Vorschläge:", error);
+                relatedPromise = null; // allow a retry on the next click
+                return {};
+            });
+    }
+    return relatedPromise;
+}
+
+// Fetch the chapter index of an episode once, on first use
+function fetchChapters(episodeId) {
+    if (!chapterPromises.has(episodeId)) {
+        chapterPromises.set(episodeId, fetch(`${CHAPTERS_BASE}${encodeURIComponent(episodeId)}_chapters.json`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(index => index.chapters || [])
+            .catch(error => {
+                console.error(`Fehler beim Laden der Kapitel von Episode ${episodeId}:`, error);
+                chapterPromises.delete(episodeId); // allow a retry on the next rendering
+                return [];
+            }));
+    }
+    return chapterPromises.get(episodeId);
+}
+
+// Seconds as m:ss
+function formatSeconds(seconds) {
+    const total = Math.floor(seconds);
+    return `${Math.floor(total / 60)}:${String(total % 60).padStart(2, '0')}`;
+}
+
+// Show the chapter in which the discussion of a Vorschlag starts (same lookup as chapter_at in transcript_segmentation.py)
+async function showChapter(item, paragraph) {
+    const chapters = await fetchChapters(item.episode_filename_primary_id);
+    if (chapters.length === 0) {
+        return;
+    }
+    let number = 1;
+    chapters.forEach((chapter, index) => {
+        if (chapter.start_seconds <= item.start_zeit_sekunden) {
+            number = index + 1;
+        }
+    });
+    const chapter = chapters[number - 1];
+    const keywords = chapter.keywords.length > 0 ? `: ${chapter.keywords.join(', ')}` : '';
+    paragraph.innerHTML = `<strong>Kapitel:</strong> ${number} von ${chapters.length} `
+        + `(${formatSeconds(chapter.start_seconds)}–${formatSeconds(chapter.end_seconds)}${keywords})`;
+    paragraph.hidden = false;
+}
+
+// Show the similar proposals of other episodes below a Vorschlag
+async function showRelated(item, button) {
+    const list = button.nextElementSibling;
+    if (!list.hidden) {
+        list.hidden = true;
+        return;
+    }
+    button.disabled = true;
+    const related = await fetchRelated();
+    button.disabled = false;
+    const byId = new Map(allData.map(entry => [entry.unique_vorschlag_id, entry]));
+    const neighbours = (related[item.unique_vorschlag_id] || []).filter(([id]) => byId.has(id));
+    list.innerHTML = '';
+    if (neighbours.length === 0) {
+        list.innerHTML = '<li>Keine ähnlichen Vorschläge gefunden.</li>';
+    }
+    neighbours.forEach(([id]) => {
+        const other = byId.get(id);
+        const li = document.createElement('li');
+        const link = document.createElement('a');
+        link.href = `#vorschlag-${id}`;
+        link.textContent = other.vorschlag || 'Unbekannter Vorschlag';
+        link.addEventListener('click', event => {
+            if (!document.getElementById(`vorschlag-${id}`)) {
+                // Hidden by the current filters: show everything again before jumping there
+                event.preventDefault();
+                document.getElementById('search-input').value = '';
+                document.getElementById('filter-proposer').value = '';
+                document.getElementById('filter-tag').value = '';
+                applyFiltersAndSearch();
+                document.getElementById(`vorschlag-${id}`).scrollIntoView();
+            }
+        });
+        li.appendChild(link);
+        li.append(` (${other.episode_title || 'Unbekannter Titel'}, ${other.episode_date || 'Unbekanntes Datum'})`);
+        list.appendChild(li);
+    });
+    list.hidden = false;
+}
+
+// Tag names of a Vorschlag (older data without 'tag_ids' still carries the raw 'tags')
+function getTags(item) {
+    if (Array.isArray(item.tag_ids)) {
+        return item.tag_ids.map(id => tagNames.get(id)).filter(Boolean);
+    }
+    return Array.isArray(item.tags) ? item.tags : [];
 }
 
 // Render Vorschlaege function
@@ -48,7 +185,12 @@ function renderVorschlaege(vorschlaegeArray) {
 
     vorschlaegeArray.forEach(item => {
         const article = document.createElement('article');
+        if (item.unique_vorschlag_id) {
+            article.id = `vorschlag-${item.unique_vorschlag_id}`;
+        }
         
+        const itemTags = getTags(item);
+
         // Basic info
         let htmlContent = `
             <h3>${item.vorschlag || 'Unbekannter Vorschlag'}</h3>
@@ -59,8 +201,9 @@ function renderVorschlaege(vorschlaegeArray) {
                (von: ${item.punkt_von || 'N/A'})
             </p>
             <p><strong>Begründung:</strong> ${item.begruendung || 'Keine'}</p>
-            <p><strong>Tags:</strong> ${item.tags && item.tags.length > 0 ? item.tags.join(', ') : 'Keine'}</p>
+            <p><strong>Tags:</strong> ${itemTags.length > 0 ? itemTags.join(', ') : 'Keine'}</p>
             <p><strong>Diskussion ab Sekunde:</strong> ${item.start_zeit_sekunden !== null ? item.start_zeit_sekunden : 'N/A'}</p>
+            <p class="chapter-info" hidden></p>
             <p><strong>Episode:</strong> ${item.episode_title || 'Unbekannter Titel'} 
                (${item.episode_date || 'Unbekanntes Datum'})
             </p>
@@ -75,7 +218,14 @@ function renderVorschlaege(vorschlaegeArray) {
             htmlContent += `<p><a href="${item.episode_spotify_url}" target="_blank">Auf Spotify anhören</a></p>`;
         }
         
+        htmlContent += `<button type="button" class="related-toggle">Ähnliche Vorschläge</button><ul class="related-list" hidden></ul>`;
+
         article.innerHTML = htmlContent;
+        const relatedButton = article.querySelector('.related-toggle');
+        relatedButton.addEventListener('click', () => showRelated(item, relatedButton));
+        if (item.episode_filename_primary_id && typeof item.start_zeit_sekunden === 'number') {
+            showChapter(item, article.querySelector('.chapter-info'));
+        }
         container.appendChild(article);
     });
 }
@@ -89,9 +239,7 @@ function populateFilters(data) {
         if (item.vorschlagender) {
             proposers.add(item.vorschlagender);
         }
-        if (item.tags && Array.isArray(item.tags)) {
-            item.tags.forEach(tag => tags.add(tag));
-        }
+        getTags(item).forEach(tag => tags.add(tag));
     });
 
     const proposerSelect = document.getElementById('filter-proposer');
@@ -122,10 +270,10 @@ function applyFiltersAndSearch() {
             (item.vorschlag && item.vorschlag.toLowerCase().includes(searchText)) ||
             (item.begruendung && item.begruendung.toLowerCase().includes(searchText)) ||
             (item.episode_title && item.episode_title.toLowerCase().includes(searchText)) ||
-            (item.tags && Array.isArray(item.tags) && item.tags.some(tag => tag.toLowerCase().includes(searchText)))
+            getTags(item).some(tag => tag.toLowerCase().includes(searchText))
         );
         const matchesProposer = !selectedProposer || (item.vorschlagender === selectedProposer);
-        const matchesTag = !selectedTag || (item.tags && Array.isArray(item.tags) && item.tags.includes(selectedTag));
+        const matchesTag = !selectedTag || getTags(item).includes(selectedTag);
 
         return matchesSearchText && matchesProposer && matchesTag;
     });
@@ -172,11 +320,9 @@ function calculateAndDisplayStats(data) {
     // Tag frequency
     const tagFrequency = {};
     data.forEach(item => {
-        if (item.tags && Array.isArray(item.tags)) {
-            item.tags.forEach(tag => {
-                tagFrequency[tag] = (tagFrequency[tag] || 0) + 1;
-            });
-        }
+        getTags(item).forEach(tag => {
+            tagFrequency[tag] = (tagFrequency[tag] || 0) + 1;
+        });
     });
 
     let tagStatsHtml = '<h4>Tag Häufigkeit:</h4><ul>';
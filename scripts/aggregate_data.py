@@ -5,11 +5,22 @@ import logging
 import argparse
 from typing import List, Dict, Any, Optional
 
+import catalog
+import json_writer
+import profiling
+from catalog import CATALOG_DB, analysis_summary, enrich_vorschlag
+from profiling import stage
+from proposal_clusters import CLUSTER_STATE_FILE, assign_clusters
+from related_proposals import RELATED_FILE, related_proposals, save_related
+from tag_canon import TAG_CANON_FILE, TAG_VOCABULARY_FILE, canonicalize_tags, save_vocabulary
+from transcript_segmentation import CHAPTERS_SUFFIX, TRANSCRIPTS_DIR
+
 # 1. Constants
 ANALYSES_DIR = "data/analyses"
 EPISODE_LINKS_FILE = "data/episodes/episode_links.json"
 OUTPUT_DIR = "docs"
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "site_data.json")
+CHAPTERS_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "chapters")  # one <id>_chapters.json per episode, loaded by the website
 
 # 2. Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -47,6 +58,9 @@ def load_episode_links(filepath: str) -> Dict[str, Dict[str, Any]]:
 def process_analyses(analyses_dir: str, episode_lookup: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Processes analysis files, enriches Vorschlaege with episode metadata.
+
+    This is the full directory scan; main() reads the same records from the
+    catalog (see catalog.site_records), which only re-reads changed files.
     """
     all_vorschlaege: List[Dict[str, Any]] = []
     analysis_files = sorted(glob.glob(os.path.join(analyses_dir, "*.json")))
@@ -65,12 +79,10 @@ def process_analyses(analyses_dir: str, episode_lookup: Dict[str, Dict[str, Any]
                 logging.warning(f"Skipping malformed analysis file (not a dict): {file_path}")
                 continue
 
-            # Extract IDs and details from analysis file content
-            filename_primary_id = analysis_data.get('filename_primary_id') # This should be the primary key from the filename
-            analysis_apple_id = str(analysis_data.get('apple_id', ''))
-            analysis_spotify_id = analysis_data.get('spotify_id', '')
-            episode_title_from_analysis = analysis_data.get('episode_title', 'Unknown Title')
-            episode_date_from_analysis = analysis_data.get('episode_date', 'Unknown Date')
+            analysis = analysis_summary(analysis_data, file_path)
+            filename_primary_id = analysis['filename_primary_id']
+            analysis_apple_id = analysis['apple_id']
+            analysis_spotify_id = analysis['spotify_id']
 
             # Determine the best ID to use for lookup in episode_links.json
             # The filename_primary_id (derived from the original zip) is usually the most reliable.
@@ -91,46 +103,7 @@ def process_analyses(analyses_dir: str, episode_lookup: Dict[str, Dict[str, Any]
                 if not isinstance(vorschlag_item, dict):
                     logging.warning(f"Skipping malformed vorschlag_item (not a dict) in {file_path}")
                     continue
-
-                enriched_vorschlag = {**vorschlag_item} # Copy original fields
-
-                # Add/overwrite with episode-level information
-                enriched_vorschlag['episode_title_from_analysis'] = episode_title_from_analysis
-                enriched_vorschlag['episode_date_from_analysis'] = episode_date_from_analysis
-                enriched_vorschlag['episode_apple_id_from_analysis'] = analysis_apple_id
-                enriched_vorschlag['episode_spotify_id_from_analysis'] = analysis_spotify_id
-                enriched_vorschlag['episode_filename_primary_id'] = filename_primary_id
-                
-                # Create a unique ID for the Vorschlag
-                enriched_vorschlag['unique_vorschlag_id'] = f"{filename_primary_id or 'unknown_episode'}_{i}"
-
-
-                if episode_metadata:
-                    enriched_vorschlag['episode_title'] = episode_metadata.get('title', episode_title_from_analysis)
-                    enriched_vorschlag['episode_date'] = episode_metadata.get('release_date', episode_date_from_analysis)
-                    enriched_vorschlag['episode_apple_url'] = episode_metadata.get('apple_url') # Assuming 'apple_url' exists in links
-                    enriched_vorschlag['episode_spotify_url'] = episode_metadata.get('url') # 'url' is spotify URL in combined links
-                    enriched_vorschlag['episode_apple_id'] = str(episode_metadata.get('apple_id', analysis_apple_id))
-                    enriched_vorschlag['episode_spotify_id'] = episode_metadata.get('spotify_id', analysis_spotify_id)
-                else:
-                    enriched_vorschlag['episode_title'] = episode_title_from_analysis
-                    enriched_vorschlag['episode_date'] = episode_date_from_analysis
-                    enriched_vorschlag['episode_apple_url'] = None
-                    enriched_vorschlag['episode_spotify_url'] = None
-                    enriched_vorschlag['episode_apple_id'] = analysis_apple_id
-                    enriched_vorschlag['episode_spotify_id'] = analysis_spotify_id
-
-                # Ensure start_zeit_sekunden is an integer
-                start_zeit_str = vorschlag_item.get('start_zeit')
-                start_zeit_sekunden = None
-                if start_zeit_str is not None:
-                    try:
-                        start_zeit_sekunden = int(str(start_zeit_str).replace('s', ''))
-                    except ValueError:
-                        logging.warning(f"Could not convert start_zeit '{start_zeit_str}' to int for a vorschlag in {file_path}")
-                enriched_vorschlag['start_zeit_sekunden'] = start_zeit_sekunden
-                
-                all_vorschlaege.append(enriched_vorschlag)
+                all_vorschlaege.append(enrich_vorschlag(vorschlag_item, i, analysis, episode_metadata, file_path))
 
         except FileNotFoundError:
             logging.error(f"Analysis file not found during processing: {file_path}")
@@ -147,39 +120,74 @@ def save_output(data: List[Dict[str, Any]], output_path: str) -> None:
     Saves the aggregated data to a JSON file.
     """
     try:
-        output_dir = os.path.dirname(output_path)
-        if output_dir: # Ensure output_dir is not an empty string if output_path is just a filename
-             os.makedirs(output_dir, exist_ok=True)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        logging.info(f"Successfully saved aggregated data to: {output_path}")
+        if json_writer.write_json(output_path, data):
+            logging.info(f"Successfully saved aggregated data to: {output_path}")
+        else:
+            logging.info(f"Aggregated data unchanged, not rewritten: {output_path}")
     except OSError as e:
         logging.error(f"OSError when creating directories or writing file {output_path}: {e}")
     except Exception as e:
         logging.error(f"Unexpected error saving output to {output_path}: {e}")
 
+def publish_chapters(transcripts_dir: str, output_dir: str) -> int:
+    """
+    Copies the chapter index of every transcript into the website directory; returns how many were published.
+    """
+    chapter_files = sorted(glob.glob(os.path.join(transcripts_dir, f"*{CHAPTERS_SUFFIX}")))
+    for file_path in chapter_files:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                chapter_index = json.load(f)
+            json_writer.write_json(os.path.join(output_dir, os.path.basename(file_path)), chapter_index)
+        except json.JSONDecodeError:
+            logging.error(f"Error decoding JSON from chapter file: {file_path}")
+        except OSError as e:
+            logging.error(f"OSError when publishing chapter file {file_path}: {e}")
+    logging.info(f"Published {len(chapter_files)} chapter indexes to: {output_dir}")
+    return len(chapter_files)
+
 # 3. Main Function
 def main(args):
     """
     Main function to orchestrate loading, processing, and saving of data.
     """
     logging.info("Starting data aggregation process...")
+    profiling.configure_from_args("aggregate_data", args)
     
-    episode_lookup = load_episode_links(args.episode_links_file)
-    
-    if not episode_lookup:
-        logging.warning("Episode lookup is empty. Aggregation might be incomplete.")
-        # Decide if to proceed or exit. For now, proceed.
-        
-    all_vorschlaege_data = process_analyses(args.analyses_dir, episode_lookup)
+    conn = catalog.connect(args.catalog_db)
+    try:
+        with stage("sync_catalog"):
+            catalog.sync(conn, args.analyses_dir, args.episode_links_file)
+        if not conn.execute("SELECT COUNT(*) FROM episodes").fetchone()[0]:
+            logging.warning("Episode lookup is empty. Aggregation might be incomplete.")
+        with stage("query_catalog"):
+            all_vorschlaege_data = catalog.site_records(conn)
+    finally:
+        conn.close()
+    profiling.count("vorschlaege", len(all_vorschlaege_data))
     
     if not all_vorschlaege_data:
         logging.warning("No Vorschlaege were processed. Output file will be empty or not created if saving empty is handled.")
         # Depending on requirements, you might want to avoid saving an empty list
+    else:
+        # Group near-duplicate proposals across episodes
+        with stage("cluster_proposals"):
+            assign_clusters(all_vorschlaege_data, args.cluster_state_file)
+        # Replace free-form tags by compact IDs into the canonical vocabulary
+        with stage("canonicalize_tags"):
+            tag_vocabulary = canonicalize_tags(all_vorschlaege_data, args.tag_canon_file)
+            save_vocabulary(tag_vocabulary, args.tags_output_file)
+        # Neighbour lists for the "related proposals" links, loaded by the website on demand
+        with stage("related_proposals"):
+            save_related(related_proposals(all_vorschlaege_data), args.related_output_file)
     
-    save_output(all_vorschlaege_data, args.output_file)
+    with stage("save_output"):
+        save_output(all_vorschlaege_data, args.output_file)
+    # Chapter index per episode, so the website can show the chapter a discussion starts in
+    with stage("publish_chapters"):
+        profiling.count("chapter_files", publish_chapters(args.transcripts_dir, args.chapters_output_dir))
     
+    json_writer.log_summary()
     logging.info("Data aggregation process finished.")
 
 # 7. Script Execution
@@ -191,6 +199,21 @@ if __name__ == "__main__":
                         help=f"Path to the episode links JSON file (default: {EPISODE_LINKS_FILE})")
     parser.add_argument("--output-file", default=OUTPUT_FILE,
                         help=f"Path to the output aggregated JSON file (default: {OUTPUT_FILE})")
+    parser.add_argument("--cluster-state-file", default=CLUSTER_STATE_FILE,
+                        help=f"Path to the stored MinHash signatures for incremental clustering (default: {CLUSTER_STATE_FILE})")
+    parser.add_argument("--tag-canon-file", default=TAG_CANON_FILE,
+                        help=f"Path to the tag synonym and ID mapping table (default: {TAG_CANON_FILE})")
+    parser.add_argument("--tags-output-file", default=TAG_VOCABULARY_FILE,
+                        help=f"Path to the output tag vocabulary JSON file (default: {TAG_VOCABULARY_FILE})")
+    parser.add_argument("--related-output-file", default=RELATED_FILE,
+                        help=f"Path to the output related-proposals JSON file (default: {RELATED_FILE})")
+    parser.add_argument("--transcripts-dir", default=TRANSCRIPTS_DIR,
+                        help=f"Directory containing the chapter indexes next to the transcripts (default: {TRANSCRIPTS_DIR})")
+    parser.add_argument("--chapters-output-dir", default=CHAPTERS_OUTPUT_DIR,
+                        help=f"Output directory for the per-episode chapter indexes (default: {CHAPTERS_OUTPUT_DIR})")
+    parser.add_argument("--catalog-db", default=CATALOG_DB,
+                        help=f"Path to the SQLite catalog synced from the JSON files (default: {CATALOG_DB})")
+    profiling.add_arguments(parser)
     
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,466 @@
+import argparse
+import copy
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from gemini_analyzer import (
+    MODEL_NAME,
+    PROOFREADING_MODEL_NAME,
+    analyze_transcript_with_gemini,
+    analyze_with_model_tiers,
+    create_output_data,
+    load_transcript,
+    proofread_analysis_with_gemini,
+    setup_gemini_client,
+)
+from model_tiering import FAST_MODEL_NAME
+from start_time_alignment import align_start_times, parse_start_zeit, text_ngrams
+
+# 1. Constants
+GOLDEN_DIR = "data/eval/golden"
+RECORDINGS_DIR = "data/eval/recordings"
+TRANSCRIPTS_DIR = "data/transcripts"
+ANALYSES_DIR = "data/analyses"
+NAME_MATCH_THRESHOLD = 0.35  # trigram Jaccard of two proposal names for them to count as the same proposal
+START_TOLERANCE_SECONDS = 60  # a start_zeit this close to the golden one counts as correct
+
+# Analyzer settings compared by default; further ones can be given with --configs-file
+DEFAULT_CONFIGS: List[Dict[str, Any]] = [
+    {"name": "production", "tiering": True, "proofread": True},
+    {"name": "standard-grounded", "model": MODEL_NAME, "grounding": True, "proofread": True},
+    {"name": "fast-single-pass", "model": FAST_MODEL_NAME, "grounding": False, "proofread": False},
+]
+CONFIG_DEFAULTS: Dict[str, Any] = {
+    "tiering": False,
+    "model": MODEL_NAME,
+    "grounding": True,
+    "temperature": 0.1,
+    "top_p": 0.9,
+    "top_k": 40,
+    "proofread": True,
+    "proofreading_model": PROOFREADING_MODEL_NAME,
+    "proofreading_temperature": 0.2,
+    "proofreading_top_p": 0.95,
+    "align_start_times": True,
+}
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class ReplayMiss(Exception):
+    """No recorded response exists for a request."""
+
+
+def request_text(contents: Any) -> str:
+    """
+    The prompt text of request contents (list of Content objects with text parts, or plain strings).
+    """
+    if contents is None:
+        return ""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(request_text(item) for item in contents)
+    parts = getattr(contents, 'parts', None) or []
+    return "\n".join(getattr(part, 'text', None) or "" for part in parts)
+
+
+def request_key(model: str, contents: Any, config: Any) -> str:
+    """
+    Identifies a request by everything that influences the answer: model, prompt and sampling settings.
+    """
+    fields = {
+        'model': model,
+        'prompt': request_text(contents),
+        'temperature': getattr(config, 'temperature', None),
+        'top_p': getattr(config, 'top_p', None),
+        'top_k': getattr(config, 'top_k', None),
+        'max_output_tokens': getattr(config, 'max_output_tokens', None),
+        'grounding': bool(getattr(config, 'tools', None)),
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ResponseStore:
+    """
+    Recorded responses, one JSON file per request key below a directory.
+
+    Identical requests of different configurations (e.g. the same first pass
+    with and without proofreading) share one recording.
+    """
+
+    def __init__(self, directory: str = RECORDINGS_DIR):
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, key: str, recording: Dict[str, Any]) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(recording, f, indent=2, ensure_ascii=False)
+
+
+def usage_counts(usage: Any) -> Dict[str, int]:
+    return {
+        'prompt_tokens': int(getattr(usage, 'prompt_token_count', None) or 0),
+        'cached_tokens': int(getattr(usage, 'cached_content_token_count', None) or 0),
+        'output_tokens': int(getattr(usage, 'candidates_token_count', None) or 0),
+    }
+
+
+class _EvalModels:
+    def __init__(self, client: "EvalClient"):
+        self._client = client
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None) -> Iterator[SimpleNamespace]:
+        return self._client.stream(model, contents, config)
+
+
+class EvalClient:
+    """
+    Client for the analyzer that serves requests from recordings and counts their cost.
+
+    In replay mode (live_client None) every request must have a recording, or
+    ReplayMiss is raised, which the analyzer treats as a failed request. In
+    record mode requests go to live_client and their answers are stored.
+    Tokens and latency are taken from the recording, so replays report the
+    cost of the original run.
+
+    Args:
+        store: Where recordings are read from and written to
+        live_client: Real Gemini client for record mode
+    """
+
+    def __init__(self, store: ResponseStore, live_client: Any = None):
+        self.store = store
+        self.live_client = live_client
+        self.models = _EvalModels(self)
+        self.stats = self.empty_stats()
+
+    @staticmethod
+    def empty_stats() -> Dict[str, Any]:
+        return {'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0,
+                'latency_seconds': 0.0, 'replay_misses': 0}
+
+    def stream(self, model: str, contents: Any, config: Any) -> Iterator[SimpleNamespace]:
+        key = request_key(model, contents, config)
+        recording = self.store.get(key)
+        if recording is None:
+            if self.live_client is None:
+                self.stats['replay_misses'] += 1
+                raise ReplayMiss(f"No recorded response for {model} request {key[:12]}")
+            recording = self.record(key, model, contents, config)
+
+        self.stats['calls'] += 1
+        self.stats['latency_seconds'] += recording['latency_seconds']
+        for name, value in recording['usage'].items():
+            self.stats[name] += value
+        yield SimpleNamespace(
+            text=recording['text'],
+            candidates=[SimpleNamespace(finish_reason=recording['finish_reason'])],
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=recording['usage']['prompt_tokens'],
+                cached_content_token_count=recording['usage']['cached_tokens'] or None,
+                candidates_token_count=recording['usage']['output_tokens'],
+            ),
+        )
+
+    def record(self, key: str, model: str, contents: Any, config: Any) -> Dict[str, Any]:
+        started = time.perf_counter()
+        pieces = []
+        finish_reason = None
+        usage = None
+        for chunk in self.live_client.models.generate_content_stream(model=model, contents=contents, config=config):
+            pieces.append(chunk.text or "")
+            if chunk.candidates and chunk.candidates[0].finish_reason:
+                finish_reason = getattr(chunk.candidates[0].finish_reason, 'name', chunk.candidates[0].finish_reason)
+            if getattr(chunk, 'usage_metadata', None) is not None:
+                usage = chunk.usage_metadata
+        recording = {
+            'model': model,
+            'text': "".join(pieces),
+            'finish_reason': str(finish_reason),
+            'usage': usage_counts(usage),
+            'latency_seconds': round(time.perf_counter() - started, 3),
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }
+        self.store.put(key, recording)
+        return recording
+
+
+def load_configs(configs_file: Optional[str], names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Loads the configurations to compare, filling in CONFIG_DEFAULTS, optionally restricted to some names.
+    """
+    configs = DEFAULT_CONFIGS
+    if configs_file:
+        with open(configs_file, 'r', encoding='utf-8') as f:
+            configs = json.load(f)
+    configs = [dict(CONFIG_DEFAULTS, **config) for config in configs]
+    if names:
+        unknown = set(names) - {config['name'] for config in configs}
+        if unknown:
+            raise ValueError(f"Unknown configurations: {', '.join(sorted(unknown))}")
+        configs = [config for config in configs if config['name'] in names]
+    return configs
+
+
+def load_golden_set(golden_dir: str = GOLDEN_DIR) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads the hand-checked analyses, keyed by episode ID (file name without .json).
+    """
+    golden: Dict[str, Dict[str, Any]] = {}
+    for path in sorted(glob.glob(os.path.join(golden_dir, "*.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            golden[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+    return golden
+
+
+def analyze_episode(client: Any, transcript_data: Dict[str, Any], config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Runs the analyzer on one transcript with the settings of a configuration and returns the proposals.
+    """
+    if config['tiering']:
+        result = analyze_with_model_tiers(client, transcript_data)
+    else:
+        result = analyze_transcript_with_gemini(
+            client, transcript_data, model=config['model'], grounding=config['grounding'],
+            temperature=config['temperature'], top_p=config['top_p'], top_k=config['top_k']
+        )
+    if config['proofread'] and result and result.get("gegenwartsvorschlaege"):
+        result = proofread_analysis_with_gemini(
+            client, result, transcript_data, model=config['proofreading_model'],
+            temperature=config['proofreading_temperature'], top_p=config['proofreading_top_p'],
+            top_k=config['top_k']
+        )
+    output_data = create_output_data(transcript_data, copy.deepcopy(result or {"gegenwartsvorschlaege": []}))
+    vorschlaege = output_data["gegenwartsvorschlaege"] if output_data else []
+    if config['align_start_times'] and vorschlaege:
+        align_start_times(vorschlaege, transcript_data)
+    return vorschlaege
+
+
+def name_similarity(a: str, b: str) -> float:
+    grams_a, grams_b = text_ngrams(a or ""), text_ngrams(b or "")
+    if not grams_a or not grams_b:
+        return 1.0 if (a or "").strip().lower() == (b or "").strip().lower() else 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def match_proposals(expected: List[Dict[str, Any]], predicted: List[Dict[str, Any]],
+                    threshold: float = NAME_MATCH_THRESHOLD) -> List[Tuple[int, int]]:
+    """
+    Pairs golden and predicted proposals one-to-one by name similarity, most similar pairs first.
+
+    Returns:
+        List of (expected index, predicted index)
+    """
+    candidates = sorted(
+        (-name_similarity(e.get('vorschlag'), p.get('vorschlag')), i, j)
+        for i, e in enumerate(expected) for j, p in enumerate(predicted)
+    )
+    used_expected, used_predicted, pairs = set(), set(), []
+    for negated_similarity, i, j in candidates:
+        if -negated_similarity < threshold:
+            break
+        if i not in used_expected and j not in used_predicted:
+            used_expected.add(i)
+            used_predicted.add(j)
+            pairs.append((i, j))
+    return sorted(pairs)
+
+
+def score_episode(expected: List[Dict[str, Any]], predicted: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Counts found, spurious and missed proposals and compares the fields of the matched ones.
+    """
+    pairs = match_proposals(expected, predicted)
+    counts = {
+        'expected': len(expected), 'predicted': len(predicted), 'matched': len(pairs),
+        'punkt_erhalten_correct': 0, 'punkt_von_correct': 0, 'vorschlagender_correct': 0,
+        'start_zeit_compared': 0, 'start_zeit_abs_error': 0, 'start_zeit_within_tolerance': 0,
+    }
+    for i, j in pairs:
+        gold, pred = expected[i], predicted[j]
+        counts['punkt_erhalten_correct'] += bool(gold.get('punkt_erhalten')) == bool(pred.get('punkt_erhalten'))
+        counts['punkt_von_correct'] += (gold.get('punkt_von') or None) == (pred.get('punkt_von') or None)
+        counts['vorschlagender_correct'] += gold.get('vorschlagender') == pred.get('vorschlagender')
+        gold_start, pred_start = parse_start_zeit(gold.get('start_zeit')), parse_start_zeit(pred.get('start_zeit'))
+        if gold_start is not None and pred_start is not None:
+            error = abs(gold_start - pred_start)
+            counts['start_zeit_compared'] += 1
+            counts['start_zeit_abs_error'] += error
+            counts['start_zeit_within_tolerance'] += error <= START_TOLERANCE_SECONDS
+    return counts
+
+
+def summarize(counts: Dict[str, int], cost: Dict[str, Any], episodes: int) -> Dict[str, Any]:
+    """
+    Turns summed episode counts and client stats into the report row of one configuration.
+    """
+    def ratio(numerator: float, denominator: float) -> Optional[float]:
+        return round(numerator / denominator, 3) if denominator else None
+
+    precision = ratio(counts['matched'], counts['predicted'])
+    recall = ratio(counts['matched'], counts['expected'])
+    f1 = ratio(2 * precision * recall, precision + recall) if precision and recall else 0.0
+    return {
+        'episodes': episodes,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'punkt_erhalten_accuracy': ratio(counts['punkt_erhalten_correct'], counts['matched']),
+        'punkt_von_accuracy': ratio(counts['punkt_von_correct'], counts['matched']),
+        'vorschlagender_accuracy': ratio(counts['vorschlagender_correct'], counts['matched']),
+        'start_zeit_mean_abs_error_seconds': ratio(counts['start_zeit_abs_error'], counts['start_zeit_compared']),
+        'start_zeit_within_tolerance': ratio(counts['start_zeit_within_tolerance'], counts['start_zeit_compared']),
+        'calls': cost['calls'],
+        'prompt_tokens': cost['prompt_tokens'],
+        'cached_tokens': cost['cached_tokens'],
+        'output_tokens': cost['output_tokens'],
+        'latency_seconds': round(cost['latency_seconds'], 3),
+        'replay_misses': cost['replay_misses'],
+    }
+
+
+def evaluate(configs: List[Dict[str, Any]], golden: Dict[str, Dict[str, Any]], client: EvalClient,
+             transcripts_dir: str = TRANSCRIPTS_DIR) -> Dict[str, Dict[str, Any]]:
+    """
+    Scores every configuration on the golden set; returns one report row per configuration name.
+    """
+    report: Dict[str, Dict[str, Any]] = {}
+    for config in configs:
+        client.stats = EvalClient.empty_stats()
+        totals: Dict[str, int] = {}
+        episodes = 0
+        for episode_id, gold in golden.items():
+            transcript_path = os.path.join(transcripts_dir, f"{episode_id}_transcript.json")
+            if not os.path.exists(transcript_path):
+                logging.warning(f"Skipping golden episode {episode_id}: no transcript at {transcript_path}")
+                continue
+            predicted = analyze_episode(client, load_transcript(transcript_path), config)
+            for name, value in score_episode(gold.get('gegenwartsvorschlaege', []), predicted).items():
+                totals[name] = totals.get(name, 0) + value
+            episodes += 1
+        report[config['name']] = summarize(totals or score_episode([], []), client.stats, episodes)
+        if client.stats['replay_misses']:
+            logging.warning(f"{config['name']}: {client.stats['replay_misses']} requests without recording; "
+                            f"run 'record --config {config['name']}' to complete it")
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, Any]]) -> None:
+    columns = [('precision', 'Prec'), ('recall', 'Rec'), ('f1', 'F1'), ('punkt_erhalten_accuracy', 'Punkt'),
+               ('punkt_von_accuracy', 'Von'), ('start_zeit_mean_abs_error_seconds', 'Start±s'),
+               ('calls', 'Calls'), ('prompt_tokens', 'In-Tok'), ('output_tokens', 'Out-Tok'),
+               ('latency_seconds', 'Sek'), ('replay_misses', 'Miss')]
+    width = max([len(name) for name in report] + [6])
+    print(f"{'Config':<{width}} " + " ".join(f"{label:>8}" for _, label in columns))
+    for name, row in report.items():
+        cells = ["-" if row[key] is None else str(row[key]) for key, _ in columns]
+        print(f"{name:<{width}} " + " ".join(f"{cell:>8}" for cell in cells))
+
+
+def seed_golden(episode_ids: List[str], analyses_dir: str = ANALYSES_DIR, golden_dir: str = GOLDEN_DIR) -> List[str]:
+    """
+    Copies existing analyses into the golden set as a starting point for checking them by hand.
+
+    The copies are marked "reviewed": false until someone has corrected them
+    against the episode; existing golden files are never overwritten.
+    """
+    os.makedirs(golden_dir, exist_ok=True)
+    seeded = []
+    for episode_id in episode_ids:
+        source = os.path.join(analyses_dir, f"{episode_id}.json")
+        target = os.path.join(golden_dir, f"{episode_id}.json")
+        if os.path.exists(target):
+            logging.info(f"{target} already exists, leaving it alone")
+            continue
+        if not os.path.exists(source):
+            logging.warning(f"No analysis to seed from: {source}")
+            continue
+        shutil.copyfile(source, target)
+        with open(target, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['reviewed'] = False
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        seeded.append(target)
+        logging.info(f"Seeded {target}; check it by hand and set \"reviewed\": true")
+    return seeded
+
+
+# 3. Main Function
+def main(args):
+    if args.command == "seed":
+        seed_golden(args.episodes, args.analyses_dir, args.golden_dir)
+        return
+
+    golden = load_golden_set(args.golden_dir)
+    if not golden:
+        logging.error(f"No golden analyses in {args.golden_dir}; add some with 'seed'")
+        return
+    unreviewed = [episode_id for episode_id, data in golden.items() if data.get('reviewed') is False]
+    if unreviewed:
+        logging.warning(f"Golden analyses not checked by hand yet: {', '.join(unreviewed)}")
+
+    live_client = None
+    if args.command == "record":
+        live_client = setup_gemini_client()
+    client = EvalClient(ResponseStore(args.recordings_dir), live_client)
+    report = evaluate(load_configs(args.configs_file, args.config), golden, client, args.transcripts_dir)
+
+    print_report(report)
+    if args.report_file:
+        report_dir = os.path.dirname(args.report_file)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        with open(args.report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"Saved evaluation report to {args.report_file}")
+
+
+# 4. Script Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares analyzer configurations on hand-checked analyses, offline from recorded responses."
+    )
+    parser.add_argument("--golden-dir", default=GOLDEN_DIR,
+                        help=f"Directory with hand-checked analyses (default: {GOLDEN_DIR})")
+    parser.add_argument("--recordings-dir", default=RECORDINGS_DIR,
+                        help=f"Directory with recorded Gemini responses (default: {RECORDINGS_DIR})")
+    parser.add_argument("--transcripts-dir", default=TRANSCRIPTS_DIR,
+                        help=f"Directory containing transcript JSON files (default: {TRANSCRIPTS_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("run", "Score configurations offline from the recordings"),
+                               ("record", "Send missing requests to the Gemini API and record the answers")):
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument("--config", action="append",
+                                    help="Name of a configuration to evaluate (repeatable; default: all)")
+        command_parser.add_argument("--configs-file", help="JSON list of configurations instead of the built-in ones")
+        command_parser.add_argument("--report-file", help="Write the report as JSON to this file")
+
+    seed_parser = subparsers.add_parser("seed", help="Copy existing analyses into the golden set for review")
+    seed_parser.add_argument("episodes", nargs="+", help="Episode IDs (analysis file names without .json)")
+    seed_parser.add_argument("--analyses-dir", default=ANALYSES_DIR,
+                             help=f"Directory containing analysis JSON files (default: {ANALYSES_DIR})")
+
+    main(parser.parse_args())
@@ -0,0 +1,182 @@
+import json
+import os
+import logging
+from typing import List, Dict, Optional, Set, Any
+
+import json_writer
+import profiling
+from http_cache import get_default_fetcher
+from profiling import stage
+from fetch_state import (
+    FETCH_STATE_FILE,
+    get_known_ids,
+    is_known_page,
+    load_episodes,
+    load_fetch_state,
+    merge_new_episodes,
+    reaches_known_episodes,
+    save_fetch_state,
+    update_watermark,
+)
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('apple_podcast_fetch')
+
+# Die sogenannte Gegenwart podcast ID
+APPLE_PODCAST_ID = '1522895163'
+APPLE_LOOKUP_URL = 'https://itunes.apple.com/lookup'
+APPLE_OUTPUT_FILE = 'data/episodes/apple_episode_links.json'
+
+
+def parse_apple_episodes(data: Dict) -> List[Dict]:
+    """
+    Convert one iTunes lookup response into episode dictionaries.
+
+    Args:
+        data: Decoded JSON response of the lookup API
+
+    Returns:
+        List of episode dictionaries
+    """
+    episodes = []
+    for episode in data.get('results', []):
+        # Only include items with wrapperType == 'podcastEpisode', which filters out the podcast itself
+        if episode.get('wrapperType') != 'podcastEpisode':
+            continue
+
+        release_date = episode.get('releaseDate')
+        # Process the release date to remove the time part
+        if release_date and 'T' in release_date:
+            release_date = release_date.split('T')[0]
+
+        # Include all episodes, not just those with "gegenwartscheck" in the title
+        episodes.append({
+            "title": episode.get('trackName'),
+            "url": episode.get('trackViewUrl'),
+            "apple_id": episode.get('trackId'),
+            "release_date": release_date,
+            "source": "apple"
+        })
+    return episodes
+
+
+def get_podcast_episodes(
+    podcast_id: str, known_ids: Optional[Set[str]] = None, watermark: Optional[Dict[str, Any]] = None
+) -> List[Dict]:
+    """
+    Get episodes of a podcast from the iTunes lookup API.
+
+    Args:
+        podcast_id: Apple Podcasts ID of the show
+        known_ids: IDs of already stored episodes. If given, paging stops as soon
+            as a page reaches known episodes (incremental mode).
+        watermark: Newest known episode of the previous fetch
+
+    Returns:
+        List of episode dictionaries
+    """
+    episodes = []
+    seen_ids: Set[str] = set()
+    limit = 100  # Apple API allows up to 100 episodes per request
+    offset = 0
+
+    logger.info(f"Starting fetch from Apple Podcasts for podcast ID: {podcast_id}")
+
+    while True:
+        params = {
+            "id": podcast_id,
+            "entity": "podcastEpisode",
+            "limit": limit,
+            "offset": offset
+        }
+        logger.info(f"Making request to Apple API with offset {offset}")
+
+        try:
+            response = get_default_fetcher().get(APPLE_LOOKUP_URL, params=params)
+            response.raise_for_status()
+            new_episodes = parse_apple_episodes(response.json())
+        except Exception as e:
+            logger.error(f"Error fetching from Apple: {str(e)}")
+            break
+
+        logger.info(f"Retrieved {len(new_episodes)} episodes from Apple (offset {offset})")
+
+        if not new_episodes:
+            logger.info("No more episodes to fetch from Apple")
+            break
+
+        # The lookup API may ignore the offset and return the same page again
+        if is_known_page(new_episodes, seen_ids, 'apple_id'):
+            logger.info("Apple returned an already fetched page, stopping")
+            break
+        seen_ids |= get_known_ids(new_episodes, 'apple_id')
+
+        episodes.extend(new_episodes)
+
+        if known_ids is not None and reaches_known_episodes(new_episodes, known_ids, 'apple_id', watermark):
+            logger.info("Reached known episodes, stopping incremental fetch")
+            break
+
+        # If we got fewer results than the limit, we've reached the end
+        if len(new_episodes) < limit:
+            logger.info("Reached the end of available episodes from Apple")
+            break
+
+        offset += limit
+
+    logger.info(f"Found total of {len(episodes)} episodes from Apple")
+    return episodes
+
+
+def main() -> None:
+    """
+    Main function to fetch Apple podcast episodes.
+    """
+    profiling.configure("apple_fetch")
+    podcast_id = os.environ.get('APPLE_PODCAST_ID', APPLE_PODCAST_ID)
+    output_file = os.environ.get('APPLE_OUTPUT_FILE', APPLE_OUTPUT_FILE)
+    state_file = os.environ.get('FETCH_STATE_FILE', FETCH_STATE_FILE)
+    incremental = os.environ.get('INCREMENTAL_FETCH', '').lower() in ('1', 'true', 'yes')
+
+    state = load_fetch_state(state_file)
+    existing = load_episodes(output_file) if incremental else []
+
+    if incremental and existing:
+        known_ids = get_known_ids(existing, 'apple_id')
+        logger.info(f"Incremental mode: {len(known_ids)} known Apple episodes")
+        with stage("fetch_episodes"):
+            fetched = get_podcast_episodes(podcast_id, known_ids, state.get('apple'))
+        episodes, added = merge_new_episodes(existing, fetched, 'apple_id')
+        logger.info(f"Added {added} new Apple episodes")
+    else:
+        with stage("fetch_episodes"):
+            episodes = get_podcast_episodes(podcast_id)
+        added = len(episodes)
+    get_default_fetcher().log_stats()
+
+    if added:
+        with stage("save_episodes"):
+            json_writer.write_json(output_file, episodes, ensure_ascii=True)
+        update_watermark(state, 'apple', episodes, 'apple_id')
+        save_fetch_state(state, state_file)
+    else:
+        logger.info("No new Apple episodes, keeping existing file")
+
+    # Set output for next workflow
+    if 'GITHUB_OUTPUT' in os.environ:
+        with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
+            f.write(f"episode_links={json.dumps(episodes)}\n")
+
+    print(f"Found {len(episodes)} episodes from Apple:")
+    for ep in episodes[:10]:  # Print first 10 episodes for brevity
+        print(f"- {ep['title']}: {ep['url']}")
+    if len(episodes) > 10:
+        print("...and more")
+
+
+if __name__ == "__main__":
+    main()
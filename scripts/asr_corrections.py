@@ -0,0 +1,342 @@
+import argparse
+import copy
+import difflib
+import glob
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import json_writer
+import profiling
+
+# 1. Constants
+ASR_CORRECTIONS_FILE = "data/asr_corrections.json"
+ASR_CORRECTIONS_ENV = "ASR_CORRECTIONS"  # "0" always proofreads and neither applies nor learns corrections
+ASR_CORRECT_TRANSCRIPTS_ENV = "ASR_CORRECT_TRANSCRIPTS"  # "1" also corrects transcripts before the first pass
+FIRST_PASS_DIR = "data/first_pass"
+ANALYSES_DIR = "data/analyses"
+
+TEXT_FIELDS = ("vorschlag", "begruendung", "metaebene", "hoerer_name", "punkt_von")
+NAME_FIELDS = ("vorschlag", "hoerer_name", "punkt_von")  # every word here is a term; elsewhere only capitalized ones
+MAX_PHRASE_WORDS = 3  # longer replacements are rewording, not misheard words
+MIN_SPELLING_SIMILARITY = 0.6  # below this, a replacement changed the word rather than its spelling
+MIN_CORRECTION_COUNT = 2  # a correction seen once may have been meant for its context only
+
+WORD_PATTERN = re.compile(r"\w+(?:[-'’]\w+)*")
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def corrections_enabled() -> bool:
+    return os.environ.get(ASR_CORRECTIONS_ENV, '1').lower() not in ('0', 'false', 'no')
+
+
+def transcript_correction_enabled() -> bool:
+    return corrections_enabled() and os.environ.get(ASR_CORRECT_TRANSCRIPTS_ENV, '0').lower() in ('1', 'true', 'yes')
+
+
+def words(text: Any) -> List[str]:
+    return WORD_PATTERN.findall(text) if isinstance(text, str) else []
+
+
+def is_term(word: str, name_field: bool) -> bool:
+    """
+    Whether proofreading would check a word: names, brands, anglicisms and other proper terms.
+
+    In names and tags every word counts; in running text only capitalized
+    words or words with digits or inner capitals ("iPhone", "TikTok").
+    """
+    if len(word) < 3 or word.isdigit():
+        return False
+    return name_field or word[0].isupper() or any(ch.isdigit() for ch in word) or any(ch.isupper() for ch in word[1:])
+
+
+def analysis_terms(analysis: Optional[Dict[str, Any]]) -> Set[str]:
+    """
+    Collects the terms of an analysis that the proofreading pass is there to check.
+    """
+    terms: Set[str] = set()
+    for item in (analysis or {}).get('gegenwartsvorschlaege') or []:
+        if not isinstance(item, dict):
+            continue
+        for field in TEXT_FIELDS:
+            terms.update(w for w in words(item.get(field)) if is_term(w, field in NAME_FIELDS))
+        tags = item.get('tags')
+        for tag in tags if isinstance(tags, list) else []:
+            terms.update(w for w in words(tag) if is_term(w, True))
+    return terms
+
+
+def _text_pairs(before: Dict[str, Any], after: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Pairs the texts of a first pass and its proofread version field by field.
+
+    Proofreading keeps the list of proposals; if its length changed, only
+    proposals with the same position and a similar name are compared.
+    """
+    pairs = []
+    old_items = [item for item in before.get('gegenwartsvorschlaege') or [] if isinstance(item, dict)]
+    new_items = [item for item in after.get('gegenwartsvorschlaege') or [] if isinstance(item, dict)]
+    for old, new in zip(old_items, new_items):
+        if len(old_items) != len(new_items) and spelling_similarity(str(old.get('vorschlag')),
+                                                                    str(new.get('vorschlag'))) < 0.5:
+            continue
+        for field in TEXT_FIELDS:
+            if isinstance(old.get(field), str) and isinstance(new.get(field), str):
+                pairs.append((old[field], new[field]))
+        old_tags, new_tags = old.get('tags'), new.get('tags')
+        if isinstance(old_tags, list) and isinstance(new_tags, list) and len(old_tags) == len(new_tags):
+            pairs.extend((str(a), str(b)) for a, b in zip(old_tags, new_tags))
+    return pairs
+
+
+def spelling_similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+def spelling_changes(before: str, after: str) -> List[Tuple[str, str]]:
+    """
+    Finds the replaced words or short phrases between two versions of a text that look like spelling fixes.
+    """
+    old_words, new_words = words(before), words(after)
+    changes = []
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op != 'replace' or i2 - i1 > MAX_PHRASE_WORDS or j2 - j1 > MAX_PHRASE_WORDS:
+            continue
+        wrong, right = " ".join(old_words[i1:i2]), " ".join(new_words[j1:j2])
+        if wrong != right and spelling_similarity(wrong.replace(" ", ""), right.replace(" ", "")) >= \
+                MIN_SPELLING_SIMILARITY:
+            changes.append((wrong, right))
+    return changes
+
+
+class CorrectionDictionary:
+    """
+    Spelling corrections and verified terms learned from the proofreading pass.
+
+    Every proofread episode teaches two things: the words the grounded
+    proofreading model replaced (e.g. "Idjoma" -> "Ijoma"), and the terms it
+    left unchanged, which count as verified. Corrections are applied locally
+    to later first passes; an episode whose terms are then all verified or
+    correction targets needs no proofreading call. A correction is applied
+    once it was seen MIN_CORRECTION_COUNT times; when a spelling was both
+    corrected and confirmed, the more frequent observation wins.
+
+    Args:
+        path: JSON file the dictionary is kept in; None keeps it in memory only
+    """
+
+    def __init__(self, path: Optional[str] = ASR_CORRECTIONS_FILE):
+        self.path = path
+        self.corrections: Dict[str, Dict[str, int]] = {}  # wrong -> {right: times seen}
+        self.verified: Dict[str, int] = {}  # term -> times confirmed unchanged
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.corrections = data.get('corrections', {})
+                self.verified = data.get('verified', {})
+            except (OSError, json.JSONDecodeError, AttributeError) as e:
+                logging.warning(f"Ignoring unreadable correction dictionary {path}: {e}")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                'corrections': {wrong: dict(sorted(targets.items()))
+                                for wrong, targets in sorted(self.corrections.items())},
+                'verified': dict(sorted(self.verified.items())),
+            }
+        json_writer.write_json(self.path, data)
+
+    def active_corrections(self) -> Dict[str, str]:
+        """
+        The corrections to apply: the most frequent target per spelling, if it was seen at least
+        MIN_CORRECTION_COUNT times and outweighs the confirmations of the spelling.
+        """
+        with self._lock:
+            active = {}
+            for wrong, targets in self.corrections.items():
+                right, count = max(sorted(targets.items()), key=lambda entry: entry[1])
+                if count >= MIN_CORRECTION_COUNT and count > self.verified.get(wrong, 0):
+                    active[wrong] = right
+            return active
+
+    def learn(self, before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Records what a proofreading pass changed and what it confirmed.
+
+        Returns:
+            Counts of learned corrections and confirmed terms
+        """
+        # Counted once per episode: a name misheard throughout one episode is still one observation
+        changes = sorted({change for old, new in _text_pairs(before, after) for change in spelling_changes(old, new)})
+        corrected = {word for wrong, _ in changes for word in wrong.split()}
+        confirmed = (analysis_terms(before) & analysis_terms(after)) - corrected
+        with self._lock:
+            for wrong, right in changes:
+                targets = self.corrections.setdefault(wrong, {})
+                targets[right] = targets.get(right, 0) + 1
+            for term in confirmed:
+                self.verified[term] = self.verified.get(term, 0) + 1
+        return {'corrections': len(changes), 'confirmed': len(confirmed)}
+
+    def correct_text(self, text: str, active: Optional[Dict[str, str]] = None) -> Tuple[str, int]:
+        """
+        Applies the corrections to a text, longest spelling first. Returns the text and the number of replacements.
+        """
+        active = self.active_corrections() if active is None else active
+        total = 0
+        for wrong in sorted(active, key=len, reverse=True):
+            text, count = re.subn(r'(?<!\w)' + re.escape(wrong) + r'(?!\w)', lambda _: active[wrong], text)
+            total += count
+        return text, total
+
+    def correct_analysis(self, analysis: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """
+        Returns a corrected copy of an analysis and the number of replacements.
+        """
+        active = self.active_corrections()
+        corrected = copy.deepcopy(analysis)
+        total = 0
+        for item in corrected.get('gegenwartsvorschlaege') or []:
+            if not isinstance(item, dict):
+                continue
+            for field in TEXT_FIELDS:
+                if isinstance(item.get(field), str):
+                    item[field], count = self.correct_text(item[field], active)
+                    total += count
+            if isinstance(item.get('tags'), list):
+                fixed = [self.correct_text(tag, active) if isinstance(tag, str) else (tag, 0) for tag in item['tags']]
+                item['tags'] = [tag for tag, _ in fixed]
+                total += sum(count for _, count in fixed)
+        return corrected, total
+
+    def correct_transcript(self, transcript_data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """
+        Returns a copy of a transcript with corrected chunk texts and the number of replacements.
+        """
+        active = self.active_corrections()
+        corrected = dict(transcript_data)
+        chunks, total = [], 0
+        for chunk in transcript_data.get('transcript') or []:
+            if isinstance(chunk, dict) and isinstance(chunk.get('text'), str):
+                text, count = self.correct_text(chunk['text'], active)
+                chunk = dict(chunk, text=text)
+                total += count
+            chunks.append(chunk)
+        corrected['transcript'] = chunks
+        return corrected, total
+
+    def unknown_terms(self, analysis: Dict[str, Any]) -> Set[str]:
+        """
+        The terms of a (corrected) analysis that proofreading has neither confirmed nor produced.
+        """
+        active = self.active_corrections()
+        with self._lock:
+            known = set(self.verified) | {word for right in active.values() for word in right.split()}
+            wrong = {word for spelling in active for word in spelling.split()}
+        return {term for term in analysis_terms(analysis) if term not in known or term in wrong}
+
+
+class SkipStats:
+    """
+    Proofreading calls made and avoided in one run, mirrored into the profile report counters.
+    """
+
+    def __init__(self):
+        self.counts = {'proofread': 0, 'skipped': 0, 'corrections_applied': 0}
+        self._lock = threading.Lock()
+
+    def record(self, skipped: bool, corrections_applied: int = 0) -> None:
+        with self._lock:
+            self.counts['skipped' if skipped else 'proofread'] += 1
+            self.counts['corrections_applied'] += corrections_applied
+        profiling.count("proofreading_skipped" if skipped else "proofreading_calls")
+        profiling.count("asr_corrections_applied", corrections_applied)
+
+    def log_summary(self) -> None:
+        with self._lock:
+            counts = dict(self.counts)
+        total = counts['proofread'] + counts['skipped']
+        if total:
+            logging.info(f"Proofreading: {counts['skipped']} of {total} calls avoided by the correction dictionary, "
+                         f"{counts['corrections_applied']} corrections applied locally.")
+
+
+stats = SkipStats()
+_dictionary: Optional[CorrectionDictionary] = None
+_dictionary_lock = threading.Lock()
+
+
+def get_dictionary() -> CorrectionDictionary:
+    """
+    The dictionary of this run, loaded from ASR_CORRECTIONS_FILE on first use.
+    """
+    global _dictionary
+    with _dictionary_lock:
+        if _dictionary is None:
+            _dictionary = CorrectionDictionary()
+        return _dictionary
+
+
+def learn_from_files(dictionary: CorrectionDictionary, first_pass_dir: str = FIRST_PASS_DIR,
+                     analyses_dir: str = ANALYSES_DIR) -> int:
+    """
+    Learns from every proofread analysis. Returns the number of episodes read.
+
+    Analyses with a stored first pass yield corrections and confirmed terms;
+    analyses proofread before first passes were kept only confirm their terms.
+    """
+    learned = 0
+    for analysis_path in sorted(glob.glob(os.path.join(analyses_dir, "*.json"))):
+        first_pass_path = os.path.join(first_pass_dir, os.path.basename(analysis_path))
+        try:
+            with open(analysis_path, 'r', encoding='utf-8') as f:
+                after = json.load(f)
+            before = after
+            if os.path.exists(first_pass_path):
+                with open(first_pass_path, 'r', encoding='utf-8') as f:
+                    before = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Skipping {analysis_path}: {e}")
+            continue
+        dictionary.learn(before, after)
+        learned += 1
+    return learned
+
+
+# 3. Main Function
+def main(args):
+    dictionary = CorrectionDictionary(args.dictionary_file)
+    if args.command == "learn":
+        # Rebuilt from scratch, so learning twice from the same files does not double the counts
+        dictionary.corrections, dictionary.verified = {}, {}
+        learned = learn_from_files(dictionary, args.first_pass_dir, args.analyses_dir)
+        dictionary.save()
+        logging.info(f"Learned from {learned} episodes: {len(dictionary.corrections)} corrections, "
+                     f"{len(dictionary.verified)} verified terms.")
+        return
+    for wrong, right in sorted(dictionary.active_corrections().items()):
+        print(f"{wrong} -> {right}")
+
+
+# 4. Script Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Learns ASR spelling corrections from the proofreading pass.")
+    parser.add_argument("command", choices=["learn", "show"],
+                        help="learn: rebuild the dictionary from first passes and analyses; show: list corrections")
+    parser.add_argument("--dictionary-file", default=ASR_CORRECTIONS_FILE,
+                        help=f"Path to the correction dictionary (default: {ASR_CORRECTIONS_FILE})")
+    parser.add_argument("--first-pass-dir", default=FIRST_PASS_DIR,
+                        help=f"Directory of the stored first passes (default: {FIRST_PASS_DIR})")
+    parser.add_argument("--analyses-dir", default=ANALYSES_DIR,
+                        help=f"Directory of the proofread analyses (default: {ANALYSES_DIR})")
+    main(parser.parse_args())
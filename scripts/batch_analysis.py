@@ -0,0 +1,224 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict, Optional
+
+import json_writer
+
+# 1. Constants
+BATCH_DIR = ".cache/batches"  # kept between runs (actions/cache in CI) so a waiting job is resumed
+POLL_SECONDS = 60
+MAX_WAIT_SECONDS = 24 * 3600  # batch jobs finish within a day or expire
+SUCCESS_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+FINAL_STATES = SUCCESS_STATES | {"JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class BatchPending(Exception):
+    """
+    Raised when a batch job is still running after the maximum wait; the next run resumes polling it.
+    """
+
+    def __init__(self, job: str, state: str, requests: int):
+        super().__init__(f"Batch job {job} with {requests} requests still {state}")
+        self.job = job
+        self.state = state
+
+
+def request_line(key: str, prompt: str, temperature: float, top_p: float, top_k: int = 40,
+                 max_output_tokens: int = 4096, grounding: bool = True,
+                 safety_settings: Optional[list] = None) -> Dict[str, Any]:
+    """
+    One line of a batch input file: a generate_content request under its key.
+    """
+    request: Dict[str, Any] = {
+        'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+        'generation_config': {'temperature': temperature, 'top_p': top_p, 'top_k': top_k,
+                              'max_output_tokens': max_output_tokens},
+    }
+    if grounding:
+        request['tools'] = [{'google_search': {}}]
+    if safety_settings:
+        request['safety_settings'] = safety_settings
+    return {'key': key, 'request': request}
+
+
+def write_batch_file(path: str, lines: Dict[str, Dict[str, Any]]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in lines.values():
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def parse_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Text and finish reason of a GenerateContentResponse in JSON form (camelCase or snake_case keys).
+    """
+    candidates = response.get('candidates') or [{}]
+    candidate = candidates[0]
+    parts = (candidate.get('content') or {}).get('parts') or []
+    text = "".join(part.get('text', '') for part in parts if not part.get('thought'))
+    return {'text': text, 'finish_reason': candidate.get('finishReason', candidate.get('finish_reason'))}
+
+
+def read_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads a batch output file into {key: {'text', 'finish_reason'}} or {key: {'error'}} per request.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, raw in enumerate(f, 1):
+            if not raw.strip():
+                continue
+            try:
+                line = json.loads(raw)
+            except json.JSONDecodeError as e:
+                logging.warning(f"Skipping unreadable line {number} of {path}: {e}")
+                continue
+            key = str(line.get('key', ''))
+            if 'response' in line:
+                results[key] = parse_response(line['response'] or {})
+            else:
+                results[key] = {'error': line.get('error') or "no response"}
+    return results
+
+
+class GeminiBatchTransport:
+    """
+    Submits batch files to the Gemini Batch API and downloads their results.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def submit(self, batch_file: str, model: str, display_name: str) -> str:
+        uploaded = self.client.files.upload(file=batch_file,
+                                            config={'mime_type': 'jsonl', 'display_name': display_name})
+        job = self.client.batches.create(model=model, src=uploaded.name, config={'display_name': display_name})
+        return job.name
+
+    def state(self, job_name: str) -> str:
+        state = self.client.batches.get(name=job_name).state
+        return getattr(state, 'name', str(state))
+
+    def fetch_results(self, job_name: str, destination: str) -> None:
+        job = self.client.batches.get(name=job_name)
+        content = self.client.files.download(file=job.dest.file_name)
+        with open(destination, 'wb') as f:
+            f.write(content)
+
+
+class LocalBatchTransport:
+    """
+    File-based stand-in for the Batch API, for tests and dry runs.
+
+    A job is a copy of the batch file in directory. After polls_until_done
+    state checks it "runs": every request's prompt is answered by
+    responder(model, prompt) and the answers are written as a batch output
+    file. A responder that raises produces an error line for that request.
+    """
+
+    def __init__(self, directory: str, responder: Callable[[str, str], str], polls_until_done: int = 1):
+        self.directory = directory
+        self.responder = responder
+        self.polls_until_done = polls_until_done
+        self.submitted: list = []
+        self._polls: Dict[str, int] = {}
+
+    def submit(self, batch_file: str, model: str, display_name: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        job_name = f"local-{len(self.submitted) + 1}-{display_name}"
+        shutil.copyfile(batch_file, os.path.join(self.directory, f"{job_name}.input.jsonl"))
+        self.submitted.append((job_name, model))
+        self._polls[job_name] = 0
+        return job_name
+
+    def state(self, job_name: str) -> str:
+        self._polls[job_name] += 1
+        if self._polls[job_name] < self.polls_until_done:
+            return "JOB_STATE_RUNNING"
+        output = os.path.join(self.directory, f"{job_name}.output.jsonl")
+        if not os.path.exists(output):
+            model = dict(self.submitted)[job_name]
+            with open(os.path.join(self.directory, f"{job_name}.input.jsonl"), 'r', encoding='utf-8') as f, \
+                    open(output, 'w', encoding='utf-8') as out:
+                for raw in f:
+                    line = json.loads(raw)
+                    prompt = "".join(part['text'] for part in line['request']['contents'][0]['parts'])
+                    try:
+                        answer = {'response': {'candidates': [{'content': {'parts': [{'text': self.responder(
+                            model, prompt)}]}, 'finishReason': "STOP"}]}}
+                    except Exception as e:
+                        answer = {'error': {'message': str(e)}}
+                    out.write(json.dumps(dict(answer, key=line['key']), ensure_ascii=False) + "\n")
+        return "JOB_STATE_SUCCEEDED"
+
+    def fetch_results(self, job_name: str, destination: str) -> None:
+        shutil.copyfile(os.path.join(self.directory, f"{job_name}.output.jsonl"), destination)
+
+
+def run_batch(transport: Any, lines: Dict[str, Dict[str, Any]], model: str, batch_dir: str = BATCH_DIR,
+              label: str = "analysis", poll_seconds: float = POLL_SECONDS, max_wait_seconds: float = MAX_WAIT_SECONDS,
+              sleep: Callable[[float], None] = time.sleep) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Writes the requests to a JSONL batch file, submits it, polls until the job ends and reads the results.
+
+    The batch file is named after the hash of its requests and model, and the
+    submitted job is recorded next to it. A run that stops while waiting
+    therefore resumes polling the same job next time instead of submitting
+    the requests again; a job that failed or expired is submitted anew.
+
+    Returns:
+        Results by request key (see read_results), or None if the job failed or expired
+
+    Raises:
+        BatchPending: The job did not finish within max_wait_seconds
+    """
+    digest = hashlib.sha256(json.dumps([model, lines], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    batch_file = os.path.join(batch_dir, f"{label}_{digest}.jsonl")
+    record_file = f"{batch_file[:-len('.jsonl')]}.job.json"
+    result_file = f"{batch_file[:-len('.jsonl')]}.results.jsonl"
+    if os.path.exists(result_file):
+        return read_results(result_file)
+
+    record = {}
+    if os.path.exists(record_file):
+        with open(record_file, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    if record.get('job') and record.get('state') not in FINAL_STATES - SUCCESS_STATES:
+        logging.info(f"Resuming batch job {record['job']} ({len(lines)} requests)")
+    else:
+        write_batch_file(batch_file, lines)
+        record = {'job': transport.submit(batch_file, model, f"{label}-{digest}"), 'model': model,
+                  'requests': len(lines), 'state': "JOB_STATE_PENDING"}
+        json_writer.write_json(record_file, record)
+        logging.info(f"Submitted batch job {record['job']} with {len(lines)} requests")
+
+    waited = 0.0
+    while True:
+        state = transport.state(record['job'])
+        if state != record['state']:
+            record['state'] = state
+            json_writer.write_json(record_file, record)
+        if state in FINAL_STATES:
+            break
+        if waited >= max_wait_seconds:
+            logging.info(f"Batch job {record['job']} still {state} after {waited:.0f}s; it is resumed next run")
+            raise BatchPending(record['job'], state, len(lines))
+        sleep(poll_seconds)
+        waited += poll_seconds
+
+    if state not in SUCCESS_STATES:
+        logging.warning(f"Batch job {record['job']} ended with {state}")
+        return None
+    transport.fetch_results(record['job'], result_file)
+    results = read_results(result_file)
+    logging.info(f"Batch job {record['job']} finished: {len(results)} of {len(lines)} results")
+    return results
@@ -0,0 +1,468 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+# 1. Constants
+ANALYSES_DIR = "data/analyses"
+EPISODE_LINKS_FILE = "data/episodes/episode_links.json"
+CATALOG_DB = "data/catalog.sqlite"
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episode_sources (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    episode_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY,
+    apple_id TEXT,
+    spotify_id TEXT,
+    title TEXT,
+    release_date TEXT,
+    apple_url TEXT,
+    spotify_url TEXT,
+    json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS episodes_apple_id ON episodes (apple_id);
+CREATE INDEX IF NOT EXISTS episodes_spotify_id ON episodes (spotify_id);
+CREATE INDEX IF NOT EXISTS episodes_release_date ON episodes (release_date);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    filename_primary_id TEXT NOT NULL,
+    apple_id TEXT,
+    spotify_id TEXT,
+    episode_title TEXT,
+    episode_date TEXT,
+    proposal_count INTEGER NOT NULL,
+    imported_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_primary_id ON analyses (filename_primary_id);
+CREATE INDEX IF NOT EXISTS analyses_episode_date ON analyses (episode_date);
+
+CREATE TABLE IF NOT EXISTS proposals (
+    analysis_path TEXT NOT NULL REFERENCES analyses (path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    unique_vorschlag_id TEXT NOT NULL,
+    vorschlag TEXT,
+    vorschlagender TEXT,
+    ist_hoerer INTEGER,
+    punkt_erhalten INTEGER,
+    punkt_von TEXT,
+    start_zeit_sekunden INTEGER,
+    json TEXT NOT NULL,
+    PRIMARY KEY (analysis_path, position)
+);
+CREATE INDEX IF NOT EXISTS proposals_unique_id ON proposals (unique_vorschlag_id);
+CREATE INDEX IF NOT EXISTS proposals_proposer ON proposals (vorschlagender, punkt_erhalten);
+CREATE INDEX IF NOT EXISTS proposals_awarded_by ON proposals (punkt_von);
+
+CREATE TABLE IF NOT EXISTS proposal_tags (
+    analysis_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    FOREIGN KEY (analysis_path, position) REFERENCES proposals (analysis_path, position) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS proposal_tags_tag ON proposal_tags (tag COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS proposal_tags_proposal ON proposal_tags (analysis_path, position);
+
+-- The episode an analysis belongs to, resolved like aggregate_data.load_episode_links:
+-- the primary ID first, then the Apple and Spotify IDs; a later list entry wins over an earlier one.
+CREATE VIEW IF NOT EXISTS analysis_episodes AS
+SELECT a.path AS analysis_path,
+       COALESCE(
+           (SELECT e.id FROM episodes e
+            WHERE e.apple_id = a.filename_primary_id OR e.spotify_id = a.filename_primary_id
+            ORDER BY e.id DESC LIMIT 1),
+           (SELECT e.id FROM episodes e
+            WHERE e.apple_id = a.apple_id OR e.spotify_id = a.apple_id ORDER BY e.id DESC LIMIT 1),
+           (SELECT e.id FROM episodes e
+            WHERE e.apple_id = a.spotify_id OR e.spotify_id = a.spotify_id ORDER BY e.id DESC LIMIT 1)
+       ) AS episode_id
+FROM analyses a;
+
+-- One row per proposal with the episode date and title the website shows
+CREATE VIEW IF NOT EXISTS proposal_overview AS
+SELECT p.analysis_path, p.position, p.unique_vorschlag_id, p.vorschlag, p.vorschlagender, p.ist_hoerer,
+       p.punkt_erhalten, p.punkt_von, p.start_zeit_sekunden,
+       a.filename_primary_id,
+       COALESCE(e.title, a.episode_title) AS episode_title,
+       COALESCE(e.release_date, a.episode_date) AS episode_date
+FROM proposals p
+JOIN analyses a ON a.path = p.analysis_path
+LEFT JOIN analysis_episodes ae ON ae.analysis_path = a.path
+LEFT JOIN episodes e ON e.id = ae.episode_id;
+"""
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """
+    Opens (and if necessary creates) the catalog.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def file_sha256(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def parse_start_seconds(start_zeit: Any, source: str = "") -> Optional[int]:
+    """
+    Converts a 'start_zeit' value such as '426' or '426s' to whole seconds.
+    """
+    if start_zeit is None:
+        return None
+    try:
+        return int(str(start_zeit).replace('s', ''))
+    except ValueError:
+        logging.warning(f"Could not convert start_zeit '{start_zeit}' to int for a vorschlag in {source}")
+        return None
+
+
+def analysis_summary(analysis_data: Dict[str, Any], file_path: str) -> Dict[str, str]:
+    """
+    The episode-level fields of an analysis file that every proposal of it is enriched with.
+    """
+    # Analysis files are named '<primary_id>.json' by gemini_analyzer.get_output_filename
+    filename_primary_id = analysis_data.get('filename_primary_id') or os.path.splitext(os.path.basename(file_path))[0]
+    return {
+        'filename_primary_id': filename_primary_id,
+        'apple_id': str(analysis_data.get('apple_id', '')),
+        'spotify_id': analysis_data.get('spotify_id', ''),
+        'episode_title': analysis_data.get('episode_title', 'Unknown Title'),
+        'episode_date': analysis_data.get('episode_date', 'Unknown Date'),
+    }
+
+
+def enrich_vorschlag(vorschlag_item: Dict[str, Any], position: int, analysis: Dict[str, str],
+                     episode_metadata: Optional[Dict[str, Any]], source: str = "") -> Dict[str, Any]:
+    """
+    Builds the website record of one proposal from the proposal, its analysis and the episode list entry.
+
+    Args:
+        vorschlag_item: Proposal as written by the analyzer
+        position: Index of the proposal in its analysis file
+        analysis: Result of analysis_summary()
+        episode_metadata: Matching entry of episode_links.json, or None
+        source: File name used in log messages
+    """
+    filename_primary_id = analysis['filename_primary_id']
+    enriched_vorschlag = {**vorschlag_item}  # Copy original fields
+
+    # Add/overwrite with episode-level information
+    enriched_vorschlag['episode_title_from_analysis'] = analysis['episode_title']
+    enriched_vorschlag['episode_date_from_analysis'] = analysis['episode_date']
+    enriched_vorschlag['episode_apple_id_from_analysis'] = analysis['apple_id']
+    enriched_vorschlag['episode_spotify_id_from_analysis'] = analysis['spotify_id']
+    enriched_vorschlag['episode_filename_primary_id'] = filename_primary_id
+
+    # Create a unique ID for the Vorschlag
+    enriched_vorschlag['unique_vorschlag_id'] = f"{filename_primary_id or 'unknown_episode'}_{position}"
+
+    if episode_metadata:
+        enriched_vorschlag['episode_title'] = episode_metadata.get('title', analysis['episode_title'])
+        enriched_vorschlag['episode_date'] = episode_metadata.get('release_date', analysis['episode_date'])
+        enriched_vorschlag['episode_apple_url'] = episode_metadata.get('apple_url')
+        # 'url' is spotify URL in combined links
+        enriched_vorschlag['episode_spotify_url'] = episode_metadata.get('url')
+        enriched_vorschlag['episode_apple_id'] = str(episode_metadata.get('apple_id', analysis['apple_id']))
+        enriched_vorschlag['episode_spotify_id'] = episode_metadata.get('spotify_id', analysis['spotify_id'])
+    else:
+        enriched_vorschlag['episode_title'] = analysis['episode_title']
+        enriched_vorschlag['episode_date'] = analysis['episode_date']
+        enriched_vorschlag['episode_apple_url'] = None
+        enriched_vorschlag['episode_spotify_url'] = None
+        enriched_vorschlag['episode_apple_id'] = analysis['apple_id']
+        enriched_vorschlag['episode_spotify_id'] = analysis['spotify_id']
+
+    enriched_vorschlag['start_zeit_sekunden'] = parse_start_seconds(vorschlag_item.get('start_zeit'), source)
+    return enriched_vorschlag
+
+
+def sync_episodes(conn: sqlite3.Connection, episode_links_file: str) -> bool:
+    """
+    Reloads the episode table if episode_links.json changed. Returns True if it was reloaded.
+    """
+    if not os.path.exists(episode_links_file):
+        logging.error(f"Episode links file not found: {episode_links_file}")
+        return False
+    digest = file_sha256(episode_links_file)
+    row = conn.execute("SELECT sha256 FROM episode_sources WHERE path = ?", (episode_links_file,)).fetchone()
+    if row is not None and row['sha256'] == digest:
+        return False
+
+    try:
+        with open(episode_links_file, 'r', encoding='utf-8') as f:
+            episodes_data = json.load(f)
+    except json.JSONDecodeError:
+        logging.error(f"Error decoding JSON from episode links file: {episode_links_file}")
+        return False
+
+    rows = []
+    for episode in episodes_data:
+        if not isinstance(episode, dict):
+            logging.warning(f"Skipping non-dictionary item in episode links: {episode}")
+            continue
+        rows.append((
+            str(episode['apple_id']) if episode.get('apple_id') else None,
+            episode.get('spotify_id') or None,
+            episode.get('title'),
+            episode.get('release_date'),
+            episode.get('apple_url'),
+            episode.get('spotify_url'),
+            json.dumps(episode, ensure_ascii=False),
+        ))
+    with conn:
+        conn.execute("DELETE FROM episodes")
+        conn.executemany(
+            "INSERT INTO episodes (apple_id, spotify_id, title, release_date, apple_url, spotify_url, json) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        conn.execute("INSERT OR REPLACE INTO episode_sources (path, sha256, episode_count) VALUES (?, ?, ?)",
+                     (episode_links_file, digest, len(rows)))
+    logging.info(f"Loaded {len(rows)} episodes from {episode_links_file} into the catalog.")
+    return True
+
+
+def import_analysis(conn: sqlite3.Connection, file_path: str, digest: str, analysis_data: Dict[str, Any]) -> int:
+    """
+    Replaces the catalog rows of one analysis file. Returns the number of proposals stored.
+    """
+    analysis = analysis_summary(analysis_data, file_path)
+    proposal_rows = []
+    tag_rows = []
+    for i, vorschlag_item in enumerate(analysis_data.get('gegenwartsvorschlaege', [])):
+        if not isinstance(vorschlag_item, dict):
+            logging.warning(f"Skipping malformed vorschlag_item (not a dict) in {file_path}")
+            continue
+        punkt_erhalten = vorschlag_item.get('punkt_erhalten')
+        ist_hoerer = vorschlag_item.get('ist_hoerer')
+        proposal_rows.append((
+            file_path, i, f"{analysis['filename_primary_id'] or 'unknown_episode'}_{i}",
+            vorschlag_item.get('vorschlag'), vorschlag_item.get('vorschlagender'),
+            None if ist_hoerer is None else int(bool(ist_hoerer)),
+            None if punkt_erhalten is None else int(bool(punkt_erhalten)),
+            vorschlag_item.get('punkt_von'),
+            parse_start_seconds(vorschlag_item.get('start_zeit'), file_path),
+            json.dumps(vorschlag_item, ensure_ascii=False),
+        ))
+        tags = vorschlag_item.get('tags')
+        if isinstance(tags, list):
+            tag_rows.extend((file_path, i, tag) for tag in tags if isinstance(tag, str) and tag)
+
+    conn.execute("DELETE FROM analyses WHERE path = ?", (file_path,))
+    conn.execute(
+        "INSERT INTO analyses (path, sha256, filename_primary_id, apple_id, spotify_id, episode_title, "
+        "episode_date, proposal_count, imported_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (file_path, digest, analysis['filename_primary_id'], analysis['apple_id'], analysis['spotify_id'],
+         analysis['episode_title'], analysis['episode_date'], len(proposal_rows), time.time())
+    )
+    conn.executemany(
+        "INSERT INTO proposals (analysis_path, position, unique_vorschlag_id, vorschlag, vorschlagender, "
+        "ist_hoerer, punkt_erhalten, punkt_von, start_zeit_sekunden, json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        proposal_rows
+    )
+    conn.executemany("INSERT INTO proposal_tags (analysis_path, position, tag) VALUES (?, ?, ?)", tag_rows)
+    return len(proposal_rows)
+
+
+def sync_analyses(conn: sqlite3.Connection, analyses_dir: str) -> Dict[str, int]:
+    """
+    Brings the analysis and proposal tables in line with the analysis files.
+
+    Only files whose content hash changed are re-read; files that disappeared are removed.
+    Returns counts of added, updated, unchanged and removed files.
+    """
+    stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+    known = {row['path']: row['sha256'] for row in conn.execute("SELECT path, sha256 FROM analyses")}
+    analysis_files = sorted(glob.glob(os.path.join(analyses_dir, "*.json")))
+    if not analysis_files:
+        logging.warning(f"No analysis files found in directory: {analyses_dir}")
+
+    with conn:
+        for file_path in analysis_files:
+            digest = file_sha256(file_path)
+            previous = known.pop(file_path, None)
+            if previous == digest:
+                stats['unchanged'] += 1
+                continue
+
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    analysis_data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.error(f"Skipping unreadable analysis file {file_path}: {e}")
+                analysis_data = None
+            if not isinstance(analysis_data, dict):
+                if analysis_data is not None:
+                    logging.warning(f"Skipping malformed analysis file (not a dict): {file_path}")
+                if previous is not None:
+                    conn.execute("DELETE FROM analyses WHERE path = ?", (file_path,))
+                continue
+
+            count = import_analysis(conn, file_path, digest, analysis_data)
+            stats['updated' if previous is not None else 'added'] += 1
+            logging.info(f"Imported {count} proposals from {file_path}")
+
+        for file_path in known:
+            conn.execute("DELETE FROM analyses WHERE path = ?", (file_path,))
+            stats['removed'] += 1
+            logging.info(f"Removed {file_path} from the catalog")
+
+    logging.info(
+        "Catalog up to date: {added} added, {updated} updated, {unchanged} unchanged, "
+        "{removed} removed.".format(**stats)
+    )
+    return stats
+
+
+def sync(conn: sqlite3.Connection, analyses_dir: str = ANALYSES_DIR,
+         episode_links_file: str = EPISODE_LINKS_FILE) -> Dict[str, int]:
+    """
+    Incrementally imports the episode list and all analysis files.
+    """
+    sync_episodes(conn, episode_links_file)
+    return sync_analyses(conn, analyses_dir)
+
+
+def site_records(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """
+    Returns the enriched proposals for the website in analysis-file order, as aggregate_data publishes them.
+    """
+    rows = conn.execute(
+        """
+        SELECT a.path, a.filename_primary_id, a.apple_id, a.spotify_id, a.episode_title, a.episode_date,
+               p.position, p.json, e.json AS episode_json
+        FROM analyses a
+        JOIN proposals p ON p.analysis_path = a.path
+        LEFT JOIN analysis_episodes ae ON ae.analysis_path = a.path
+        LEFT JOIN episodes e ON e.id = ae.episode_id
+        ORDER BY a.path, p.position
+        """
+    ).fetchall()
+
+    records: List[Dict[str, Any]] = []
+    warned = set()
+    for row in rows:
+        analysis = {key: row[key] for key in
+                    ('filename_primary_id', 'apple_id', 'spotify_id', 'episode_title', 'episode_date')}
+        episode_metadata = json.loads(row['episode_json']) if row['episode_json'] else None
+        if episode_metadata is None and row['path'] not in warned:
+            warned.add(row['path'])
+            logging.warning(f"No episode metadata found for ID '{row['filename_primary_id']}' from file {row['path']}")
+        records.append(enrich_vorschlag(json.loads(row['json']), row['position'], analysis, episode_metadata,
+                                        row['path']))
+    logging.info(f"Read {len(records)} Vorschlaege from the catalog.")
+    return records
+
+
+def find_proposals(conn: sqlite3.Connection, proposer: Optional[str] = None, awarded_by: Optional[str] = None,
+                   year: Optional[int] = None, tag: Optional[str] = None,
+                   points_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Filters proposals by proposer, point giver, episode year and tag, newest episode first.
+
+    Args:
+        conn: Open catalog connection
+        proposer: Name in 'vorschlagender'
+        awarded_by: Name in 'punkt_von'
+        year: Year of the episode date
+        tag: Tag as written by the analyzer (case-insensitive)
+        points_only: Only proposals that received a point
+    """
+    conditions = []
+    params: List[Any] = []
+    if proposer:
+        conditions.append("o.vorschlagender = ?")
+        params.append(proposer)
+    if awarded_by:
+        conditions.append("o.punkt_von = ?")
+        params.append(awarded_by)
+    if points_only:
+        conditions.append("o.punkt_erhalten = 1")
+    if year:
+        conditions.append("o.episode_date >= ? AND o.episode_date < ?")
+        params.extend([f"{year:04d}", f"{year + 1:04d}"])
+    if tag:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM proposal_tags t WHERE t.analysis_path = o.analysis_path "
+            "AND t.position = o.position AND t.tag = ? COLLATE NOCASE)"
+        )
+        params.append(tag)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = conn.execute(
+        f"""
+        SELECT o.unique_vorschlag_id, o.vorschlag, o.vorschlagender, o.punkt_erhalten, o.punkt_von,
+               o.start_zeit_sekunden, o.episode_title, o.episode_date
+        FROM proposal_overview o
+        {where}
+        ORDER BY o.episode_date DESC, o.analysis_path, o.position
+        """,
+        params
+    ).fetchall()
+    return [
+        {**dict(row), 'punkt_erhalten': None if row['punkt_erhalten'] is None else bool(row['punkt_erhalten'])}
+        for row in rows
+    ]
+
+
+# 3. Main Function
+def main(args):
+    conn = connect(args.db)
+    try:
+        sync(conn, args.analyses_dir, args.episode_links_file)
+        if args.command == "query":
+            started = time.perf_counter()
+            proposals = find_proposals(conn, args.proposer, args.awarded_by, args.year, args.tag, args.points)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if args.json:
+                print(json.dumps(proposals, indent=2, ensure_ascii=False))
+            else:
+                for proposal in proposals:
+                    point = f"Punkt von {proposal['punkt_von']}" if proposal['punkt_erhalten'] else "kein Punkt"
+                    print(f"{proposal['episode_date']}  {proposal['vorschlagender'] or '?':<8} "
+                          f"{proposal['vorschlag']} ({point})")
+                print(f"{len(proposals)} Vorschläge in {elapsed_ms:.1f} ms")
+    finally:
+        conn.close()
+
+
+# 4. Script Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite catalog of episodes, analyses and proposals.")
+    parser.add_argument("--db", default=CATALOG_DB, help=f"Path to the catalog database (default: {CATALOG_DB})")
+    parser.add_argument("--analyses-dir", default=ANALYSES_DIR,
+                        help=f"Directory containing analysis JSON files (default: {ANALYSES_DIR})")
+    parser.add_argument("--episode-links-file", default=EPISODE_LINKS_FILE,
+                        help=f"Path to the episode links JSON file (default: {EPISODE_LINKS_FILE})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("sync", help="Update the catalog incrementally from the JSON files")
+
+    query_parser = subparsers.add_parser("query", help="List proposals matching the filters")
+    query_parser.add_argument("--proposer", help="Only proposals made by this host")
+    query_parser.add_argument("--awarded-by", help="Only proposals that got their point from this host")
+    query_parser.add_argument("--year", type=int, help="Only episodes from this year")
+    query_parser.add_argument("--tag", help="Only proposals with this tag")
+    query_parser.add_argument("--points", action="store_true", help="Only proposals that received a point")
+    query_parser.add_argument("--json", action="store_true", help="Print proposals as JSON")
+
+    main(parser.parse_args())
@@ -0,0 +1,298 @@
+import argparse
+import json
+import logging
+import os
+import re
+import traceback
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+import json_writer
+import profiling
+import transcript_segmentation
+from profiling import stage
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('extract_transcript')
+
+EXTRACTED_DIR = 'cache/extracted'
+TRANSCRIPTS_DIR = 'data/transcripts'
+EPISODE_LINKS_FILE = 'data/episodes/episode_links.json'
+
+
+def load_episode_metadata(episode_links_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load titles, release dates and Spotify IDs from the merged episode list.
+
+    Args:
+        episode_links_path: Path to episode_links.json
+
+    Returns:
+        Dictionary keyed by Apple ID (as string)
+    """
+    episode_metadata: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(episode_links_path):
+        logger.warning(f"Warning: Episode links file not found at {episode_links_path}")
+        return episode_metadata
+
+    try:
+        with open(episode_links_path, 'r', encoding='utf-8') as f:
+            episodes_data = json.load(f)
+
+        # Create a lookup dictionary by apple_id
+        for episode in episodes_data:
+            apple_id = str(episode.get('apple_id', ''))
+            if apple_id:
+                episode_metadata[apple_id] = {
+                    'title': episode.get('title'),
+                    'release_date': episode.get('release_date'),
+                    'spotify_id': episode.get('spotify_id')  # Get spotify_id from combined data
+                }
+        logger.info(f"Loaded metadata for {len(episode_metadata)} episodes")
+    except Exception as e:
+        logger.error(f"Error loading episode links: {e}")
+    return episode_metadata
+
+
+def find_ttml_files(extracted_dir: str) -> List[str]:
+    """
+    Find all TTML files below the directory the capture zips were extracted to.
+    """
+    ttml_files = []
+    for root, dirs, files in os.walk(extracted_dir):
+        for file in files:
+            if file.endswith('.ttml'):
+                ttml_files.append(os.path.join(root, file))
+    return ttml_files
+
+
+def ttml_episode_id(ttml_file: str) -> Optional[str]:
+    """
+    Apple ID of the episode a TTML file belongs to, taken from its name.
+
+    The Podcasts app caches transcripts as 'transcript_<id>.ttml-<id>.ttml',
+    so one capture may hold any number of episodes side by side.
+    """
+    base_name = os.path.basename(ttml_file)
+    match = re.match(r'transcript_(\d+)\.ttml-(\d+)\.ttml$', base_name)
+    if match and match.group(1) != match.group(2):
+        logger.warning(f"Conflicting IDs in {base_name}, using {match.group(2)}")
+    match = match or re.search(r'(\d+)\.ttml$', base_name)
+    return match.group(match.lastindex) if match else None
+
+
+def route_ttml_files(ttml_files: List[str], sizes: Optional[Dict[str, int]] = None) -> Dict[str, str]:
+    """
+    Assigns every episode found in the TTML files exactly one file to extract it from.
+
+    If several captures contain the same episode, the largest copy wins (the
+    app keeps partially downloaded transcripts under the same name); ties go
+    to the last path in sort order.
+
+    Args:
+        ttml_files: Paths (or archive member names) of TTML files
+        sizes: File sizes by path; read from disk if not given
+
+    Returns:
+        Dictionary mapping Apple ID to the TTML file for it
+    """
+    routes: Dict[str, str] = {}
+    for ttml_file in sorted(ttml_files):
+        episode_id = ttml_episode_id(ttml_file)
+        if not episode_id:
+            logger.warning(f"Could not extract podcast ID from {ttml_file}")
+            continue
+        size = sizes[ttml_file] if sizes is not None else os.path.getsize(ttml_file)
+        previous = routes.get(episode_id)
+        if previous is not None:
+            previous_size = sizes[previous] if sizes is not None else os.path.getsize(previous)
+            logger.info(f"Episode {episode_id} found more than once, keeping the larger of {previous} and {ttml_file}")
+            if size < previous_size:
+                continue
+        routes[episode_id] = ttml_file
+    return routes
+
+
+def parse_begin_time(begin_time: str) -> int:
+    """
+    Convert a TTML begin attribute (HH:MM:SS.sss, MM:SS.sss or SS.sss) to whole seconds.
+    """
+    begin_seconds = 0.0
+    if not begin_time:
+        return 0
+    try:
+        if ':' in begin_time:
+            time_parts = begin_time.split(':')
+            hours = int(time_parts[0]) if len(time_parts) > 2 else 0
+            minutes = int(time_parts[-2]) if len(time_parts) > 1 else 0
+
+            # For seconds, handle milliseconds properly
+            seconds_parts = time_parts[-1].split('.')
+            seconds = int(seconds_parts[0])
+            milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
+
+            begin_seconds = hours * 3600 + minutes * 60 + seconds + (milliseconds / 1000)
+        else:
+            # Handle simple seconds.milliseconds format
+            seconds_parts = begin_time.split('.')
+            seconds = int(seconds_parts[0])
+            milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
+            begin_seconds = seconds + (milliseconds / 1000)
+    except Exception as e:
+        logger.error(f"Error parsing begin time {begin_time}: {e}")
+
+    # Round down seconds to integers
+    return int(begin_seconds)
+
+
+def extract_transcript_chunks(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+    """
+    Extract speaker, text and start second of every paragraph of a parsed TTML document.
+    """
+    transcript_chunks = []
+    for chunk in soup.select('p'):
+        speaker = chunk.get('ttm:agent', 'Unknown')
+        begin_seconds = parse_begin_time(chunk.get('begin', ''))
+
+        sentences = []
+        for sentence in chunk.select('span[podcasts\\:unit="sentence"]'):
+            sentences.append(' '.join([span.text for span in sentence.select('span')]))
+        text = ' '.join(sentences)
+
+        if text.strip():  # Only add non-empty chunks
+            transcript_chunks.append({
+                'speaker': speaker,
+                'text': text,
+                'begin_seconds': begin_seconds
+            })
+    return transcript_chunks
+
+
+def process_ttml_file(ttml_file: str, episode_metadata: Dict[str, Dict[str, Any]],
+                      transcripts_dir: str = TRANSCRIPTS_DIR, extracted_dir: str = EXTRACTED_DIR) -> Optional[str]:
+    """
+    Convert one TTML file into a transcript JSON file and write its chapter index next to it.
+
+    Args:
+        ttml_file: Path below <extracted_dir>/<CAPTURE>/, named after the episode's Apple ID
+        episode_metadata: Lookup from load_episode_metadata
+        transcripts_dir: Output directory
+        extracted_dir: Directory the capture zips were extracted to
+
+    Returns:
+        Path of the written transcript, or None if the file was skipped
+    """
+    logger.info(f"Processing {ttml_file}")
+
+    # The capture directory (cache/extracted/<CAPTURE>/...) names the episode only
+    # for single-episode captures; the Apple ID in the file name is authoritative
+    path_parts = os.path.relpath(ttml_file, extracted_dir).split(os.sep)
+    episode_id = ttml_episode_id(ttml_file) or (path_parts[0] if len(path_parts) > 1 else None)
+
+    with stage("parse_ttml"):
+        with open(ttml_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        profiling.count("ttml_bytes", len(content))
+        soup = BeautifulSoup(content, 'xml')
+
+    apple_id = ttml_episode_id(ttml_file)
+    if not apple_id:
+        logger.warning(f"Could not extract podcast ID from {ttml_file}")
+        return None
+
+    # Get episode title and Spotify ID from metadata
+    episode_title = None
+    spotify_id = None
+    upload_date = None
+
+    # First check if we have metadata from episode_links.json
+    if apple_id in episode_metadata:
+        meta = episode_metadata[apple_id]
+        episode_title = meta.get('title')
+        spotify_id = meta.get('spotify_id')
+        upload_date = meta.get('release_date')
+
+    # If no title from metadata, try to get it from TTML
+    if not episode_title:
+        metadata = soup.find('metadata')
+        if metadata:
+            title_elem = metadata.find('title')
+            if title_elem and title_elem.text:
+                episode_title = title_elem.text.strip()
+
+    # Final fallback for title
+    if not episode_title:
+        episode_title = f"Episode {episode_id}"
+
+    with stage("extract_chunks"):
+        transcript_chunks = extract_transcript_chunks(soup)
+    profiling.count("transcript_chunks", len(transcript_chunks))
+
+    # Create a safe filename using episode_id
+    if episode_id:
+        output_file = os.path.join(transcripts_dir, f"{episode_id}_transcript.json")
+    else:
+        # Fallback to a safe title derived from the episode title
+        safe_title = re.sub(r'[^\w\-\. ]', '_', episode_title)
+        output_file = os.path.join(transcripts_dir, f"{safe_title}_transcript.json")
+        logger.warning("Using title-based filename because episode_id is not available")
+
+    output_data = {
+        "episode_title": episode_title,
+        "apple_id": apple_id,
+        "filename_primary_id": episode_id,
+    }
+    if spotify_id:
+        output_data["spotify_id"] = spotify_id
+    if upload_date:
+        output_data["upload_date"] = upload_date
+    output_data["transcript"] = transcript_chunks
+
+    with stage("write_json"):
+        written = json_writer.write_json(output_file, output_data)
+
+    logger.info(f"Saved transcript to {output_file}" if written else f"Transcript unchanged: {output_file}")
+
+    # The chapter index lives next to the transcript and is rebuilt with it (local, a few milliseconds)
+    with stage("segment"):
+        transcript_segmentation.write_chapters(output_file, output_data)
+    return output_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert extracted Apple Podcasts TTML files into transcript JSON.")
+    parser.add_argument("--extracted-dir", default=EXTRACTED_DIR,
+                        help=f"Directory the capture zips were extracted to (default: {EXTRACTED_DIR})")
+    parser.add_argument("--transcripts-dir", default=TRANSCRIPTS_DIR,
+                        help=f"Output directory for transcript JSON files (default: {TRANSCRIPTS_DIR})")
+    parser.add_argument("--episode-links-file", default=EPISODE_LINKS_FILE,
+                        help=f"Merged episode list used for titles and dates (default: {EPISODE_LINKS_FILE})")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.configure_from_args("extract_transcripts", args)
+
+    os.makedirs(args.transcripts_dir, exist_ok=True)
+
+    with stage("load_metadata"):
+        episode_metadata = load_episode_metadata(args.episode_links_file)
+
+    ttml_files = find_ttml_files(args.extracted_dir)
+    routes = route_ttml_files(ttml_files)
+    logger.info(f"Found {len(ttml_files)} TTML files for {len(routes)} episodes")
+
+    for ttml_file in routes.values():
+        try:
+            process_ttml_file(ttml_file, episode_metadata, args.transcripts_dir, args.extracted_dir)
+        except Exception as e:
+            logger.error(f"Error processing {ttml_file}: {e}")
+            traceback.print_exc()
+    json_writer.log_summary()
+
+
+if __name__ == "__main__":
+    main()
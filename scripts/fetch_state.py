@@ -0,0 +1,174 @@
+import json
+import os
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import json_writer
+
+logger = logging.getLogger('fetch_state')
+
+FETCH_STATE_FILE = 'data/episodes/fetch_state.json'
+
+
+def load_fetch_state(path: str = FETCH_STATE_FILE) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the per-source watermarks of the last episode-link fetch.
+
+    Args:
+        path: Path to the fetch state JSON file
+
+    Returns:
+        Dictionary keyed by source ("apple", "spotify") holding the newest known
+        episode ID and release date. Empty if no state was recorded yet.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if isinstance(state, dict):
+            return state
+        logger.warning(f"Ignoring malformed fetch state in {path}")
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read fetch state {path}: {e}")
+    return {}
+
+
+def save_fetch_state(state: Dict[str, Dict[str, Any]], path: str = FETCH_STATE_FILE) -> None:
+    """
+    Save the per-source watermarks.
+
+    Args:
+        state: Watermarks keyed by source
+        path: Path to the fetch state JSON file
+    """
+    json_writer.write_json(path, state)
+    logger.info(f"Saved fetch state to {path}")
+
+
+def load_episodes(path: str) -> List[Dict]:
+    """
+    Load a previously saved episode list, returning an empty list if it is missing or unreadable.
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            episodes = json.load(f)
+        if isinstance(episodes, list):
+            return episodes
+        logger.warning(f"Ignoring malformed episode list in {path}")
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read episode list {path}: {e}")
+    return []
+
+
+def get_known_ids(episodes: Iterable[Dict], id_key: str) -> Set[str]:
+    """
+    Collect the IDs of already known episodes as strings (Apple IDs are stored as integers).
+    """
+    return {str(ep[id_key]) for ep in episodes if ep.get(id_key) is not None}
+
+
+def is_known_page(
+    page: List[Dict], known_ids: Set[str], id_key: str, watermark: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Check whether a fetched page contains only episodes we already have.
+
+    An episode counts as known if its ID is in known_ids or if it was released
+    before the watermark date. Both APIs list the newest episodes first, so once a
+    whole page is known, all following pages are known as well.
+
+    Args:
+        page: Parsed episodes of one API page
+        known_ids: IDs of already stored episodes
+        id_key: Name of the ID field ("apple_id" or "episode_id")
+        watermark: Newest known episode of this source, if any
+
+    Returns:
+        True if no episode on the page is new
+    """
+    watermark_date = (watermark or {}).get('release_date')
+    for episode in page:
+        if str(episode.get(id_key)) in known_ids:
+            continue
+        release_date = episode.get('release_date')
+        if watermark_date and release_date and release_date[:10] < watermark_date:
+            continue
+        return False
+    return True
+
+
+def reaches_known_episodes(
+    page: List[Dict], known_ids: Set[str], id_key: str, watermark: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Check whether paging can stop after this page.
+
+    Both APIs list the newest episodes first, so if the oldest episode on a page
+    is already known, every following page consists of known episodes only.
+    Any new episodes are on this page or an earlier one.
+
+    Args:
+        page: Parsed episodes of one API page
+        known_ids: IDs of already stored episodes
+        id_key: Name of the ID field ("apple_id" or "episode_id")
+        watermark: Newest known episode of this source, if any
+
+    Returns:
+        True if no later page can contain new episodes
+    """
+    if not page:
+        return True
+    oldest = min(page, key=lambda ep: ep.get('release_date') or '')
+    return is_known_page([oldest], known_ids, id_key, watermark)
+
+
+def merge_new_episodes(existing: List[Dict], fetched: List[Dict], id_key: str) -> Tuple[List[Dict], int]:
+    """
+    Merge freshly fetched episodes into an existing list without touching known entries.
+
+    Args:
+        existing: Previously saved episodes
+        fetched: Episodes returned by the (possibly partial) fetch
+        id_key: Name of the ID field
+
+    Returns:
+        Tuple of the merged list (newest first) and the number of added episodes
+    """
+    known_ids = get_known_ids(existing, id_key)
+    new_episodes = []
+    for episode in fetched:
+        episode_id = episode.get(id_key)
+        if episode_id is None or str(episode_id) in known_ids:
+            continue
+        known_ids.add(str(episode_id))
+        new_episodes.append(episode)
+
+    if not new_episodes:
+        return existing, 0
+
+    merged = new_episodes + existing
+    merged.sort(key=lambda ep: ep.get('release_date') or '', reverse=True)
+    return merged, len(new_episodes)
+
+
+def update_watermark(state: Dict[str, Dict[str, Any]], source: str, episodes: List[Dict], id_key: str) -> None:
+    """
+    Record the newest episode of a source as its watermark.
+
+    Args:
+        state: Watermarks keyed by source, updated in place
+        source: Source name ("apple" or "spotify")
+        episodes: Complete episode list of that source
+        id_key: Name of the ID field
+    """
+    dated = [ep for ep in episodes if ep.get('release_date') and ep.get(id_key) is not None]
+    if not dated:
+        return
+    newest = max(dated, key=lambda ep: ep['release_date'])
+    state[source] = {
+        'episode_id': str(newest[id_key]),
+        'release_date': newest['release_date'][:10],
+    }
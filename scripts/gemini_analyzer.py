@@ -12,9 +12,26 @@ import random
 import logging
 from datetime import datetime
 from pathlib import Path
+from string import Template
 from google import genai
 from google.genai import types
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
+
+import asr_corrections
+import batch_analysis
+import gemini_cache
+import json_writer
+import model_tiering
+import profiling
+import quota_scheduler
+import request_hedging
+import shows
+import transcript_packing
+import transcript_segmentation
+from gemini_cache import join_prompt, user_content
+from profiling import stage
+from start_time_alignment import align_start_times, summarize_drift
+from streaming_json import ItemStreamParser
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
@@ -22,8 +39,10 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(mes
 # Konstanten für die Verarbeitung
 DATA_DIR = "data/transcripts"
 OUTPUT_DIR = "data/analyses"
+FIRST_PASS_DIR = "data/first_pass"  # Rohergebnisse der ersten Analyse, Eingabe für das Korrekturlesen
 MODEL_NAME = "gemini-2.0-flash-thinking-exp-01-21"
 PROOFREADING_MODEL_NAME = "gemini-2.0-pro-exp-02-05"
+MAX_CONTINUATIONS = 3  # Folgeanfragen, wenn eine Antwort an max_output_tokens abgeschnitten wird
 
 def setup_gemini_client() -> genai.Client:
     """Initialisiert den Gemini API-Client mit dem API-Schlüssel aus der Umgebungsvariable."""
@@ -35,186 +54,67 @@ def setup_gemini_client() -> genai.Client:
     return client
 
 def load_transcript(file_path: str) -> dict:
-    """Lädt eine Transkript-Datei und gibt deren Inhalt zurück."""
+    """Lädt eine Transkript-Datei und hängt den Kapitelindex an, falls er daneben gespeichert ist."""
     with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        transcript_data = json.load(f)
+    chapters = transcript_segmentation.load_chapters(file_path)
+    if chapters:
+        transcript_data.setdefault("chapters", chapters)
+    return transcript_data
 
-def create_gemini_prompt(transcript_data: dict) -> str:
-    """Erstellt einen Prompt für die Gemini API, der aus dem Transkript die relevanten Informationen extrahiert."""
-    # Extract speakers
-    speakers = {}
-    for item in transcript_data["transcript"]:
-        speaker = item["speaker"]
-        if speaker not in speakers and speaker.startswith("SPEAKER_"):
-            speakers[speaker] = speaker
-
-    transcript_text = ""
-    for item in transcript_data["transcript"]:
-        speaker = item["speaker"]
-        text = item["text"]
-        transcript_text += f"{speaker}: {text}\n\n"
-
-    episode_title = transcript_data.get("episode_title", "Unbekannte Episode")
-    
-    prompt = f"""Du bist ein persönlicher Assistent, der dabei hilft, Vorschläge zu identifizieren, die in dem Podcast "Gegenwart" gemacht werden.
+ANALYSIS_TEMPLATE = Template("""Du bist ein persönlicher Assistent, der dabei hilft, Vorschläge zu identifizieren, die in dem Podcast "$podcast_name" gemacht werden.
 
 In diesem Podcast schlagen die Hosts gegenwärtige Phänomene vor, und der andere Host entscheidet, ob ein Punkt dafür vergeben wird oder nicht. Ein Punkt wird vergeben, wenn der Vorschlag tatsächlich ein Phänomen der Gegenwart beschreibt, das neu und relevant ist.
 
-Die Hosts sind Lars Weisbrod und Ijoma Mangold. Manchmal ist statt Ijoma auch Nina Pauer dabei.
+$hosts_intro
 
-Hier ist der Transkript-Text einer Podcast-Episode mit dem Titel "{episode_title}":
-
-{transcript_text}
-
-Identifiziere alle "Gegenwartsvorschläge" in diesem Transkript und extrahiere die folgenden Informationen für jeden Vorschlag:
+Identifiziere alle "Gegenwartsvorschläge" in dem Transkript, das am Ende folgt, und extrahiere die folgenden Informationen für jeden Vorschlag:
 
 1. vorschlag: Der Name des Gegenwartsvorschlags
-2. vorschlagender: Wer hat den Vorschlag gemacht? (Nur Lars, Ijoma oder Nina)
+2. vorschlagender: Wer hat den Vorschlag gemacht? (Nur $host_list)
 3. ist_hoerer: War es ein Vorschlag von einem Hörer oder einer Hörerin? (true/false)
 4. hoerer_name: Name des Hörers oder der Hörerin, falls vorhanden
 5. begruendung: Die Begründung für den Vorschlag 
 6. metaebene: Metaebene des Vorschlags, falls diskutiert
 7. punkt_erhalten: Hat der Vorschlag einen Punkt bekommen? (true/false)
-8. punkt_von: Wer hat den Punkt vergeben? (Lars, Ijoma oder Nina) - muss immer angegeben werden, null wenn kein Punkt vergeben wurde
+8. punkt_von: Wer hat den Punkt vergeben? ($host_list) - muss immer angegeben werden, null wenn kein Punkt vergeben wurde
 9. tags: 5 Keywords oder Tags, die das Thema des Vorschlags beschreiben
 10. start_zeit: Ab welcher Sekunde beginnt die Diskussion des Vorschlags? Gib nur die Zahl ohne "s" an (z.B. "120" statt "120s")
 
 Formatiere deine Antwort als JSON mit folgendem Schema:
-{{
+{
   "gegenwartsvorschlaege": [
-    {{
+    {
       "vorschlag": "Name des Vorschlags",
-      "vorschlagender": "Lars/Ijoma/Nina",
+      "vorschlagender": "$host_choices",
       "ist_hoerer": true/false,
       "hoerer_name": "Name oder null",
       "begruendung": "Begründung für den Vorschlag",
       "metaebene": "Metaebene (falls explizit erwähnt, sonst null)",
       "punkt_erhalten": true/false,
-      "punkt_von": "Lars/Ijoma/Nina",
+      "punkt_von": "$host_choices",
       "tags": ["tag1", "tag2", "tag3", "tag4", "tag5"],
       "start_zeit": "123"
-    }}
+    }
   ]
-}}
+}
 
 WICHTIG:
 - "start_zeit" ist eine Zeichenkette, die NUR die Zahl der Sekunden ohne das "s" am Ende enthält
 - "punkt_von" muss IMMER angegeben werden (auch, wenn kein Punkt vergeben wurde)
-- "vorschlagender" muss IMMER einer der Hosts sein (Lars, Ijoma oder Nina)
-- Stelle sicher, dass das JSON-Format korrekt ist.
-"""
+- "vorschlagender" muss IMMER einer der Hosts sein ($host_list)
+- Stelle sicher, dass das JSON-Format korrekt ist.""")
 
-    return prompt
+def analysis_instructions(show: Optional[shows.Show] = None) -> str:
+    """Statische Anweisungen der ersten Analyse mit den Prompt-Variablen der Sendung (Standard: shows.DEFAULT)."""
+    return ANALYSIS_TEMPLATE.substitute((show or shows.DEFAULT).prompt_variables)
 
-def analyze_transcript_with_gemini(client: genai.Client, transcript_data: dict) -> Optional[dict]:
-    """Analysiert ein Transkript mit der Gemini API."""
-    prompt_text = create_gemini_prompt(transcript_data)
-    
-    # Create content structure for the prompt
-    contents = [
-        types.Content(
-            role="user",
-            parts=[types.Part.from_text(text=prompt_text)]
-        )
-    ]
-    
-    # Add Google Grounding tool
-    tools = [types.Tool(google_search=types.GoogleSearch())]
-    
-    # Create generation config
-    generate_content_config = types.GenerateContentConfig(
-        temperature=0.1,
-        top_p=0.9,
-        top_k=40,
-        max_output_tokens=4096,
-        tools=tools,
-        response_mime_type="text/plain",
-        safety_settings=[
-            types.SafetySetting(
-                category=types.HarmCategory.HARM_CATEGORY_HARASSMENT,
-                threshold=types.HarmBlockThreshold.BLOCK_NONE
-            ),
-            types.SafetySetting(
-                category=types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-                threshold=types.HarmBlockThreshold.BLOCK_NONE
-            ),
-            types.SafetySetting(
-                category=types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-                threshold=types.HarmBlockThreshold.BLOCK_NONE
-            ),
-            types.SafetySetting(
-                category=types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                threshold=types.HarmBlockThreshold.BLOCK_NONE
-            )
-        ]
-    )
-    
-    # Retry mechanism with respect to 2 rpm rate limit
-    max_retries = 5
-    min_retry_delay = 30  # seconds (30s = respecting 2 rpm)
-    
-    for retry_attempt in range(max_retries):
-        try:
-            # Generate content using the model
-            response = client.models.generate_content(
-                model=MODEL_NAME,
-                contents=contents,
-                config=generate_content_config
-            )
-            
-            response_text = response.text
-            
-            # JSON aus der Antwort extrahieren
-            # Oft gibt Gemini das JSON in einem Markdown-Codeblock zurück
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_text = json_match.group(1)
-            else:
-                # Falls kein Markdown-Block gefunden wurde, versuchen wir, die gesamte Antwort zu parsen
-                json_text = response_text
-            
-            try:
-                result = json.loads(json_text)
-                return result
-            except json.JSONDecodeError as e:
-                logging.warning(f"Fehler beim Parsen der Gemini-Antwort: {e}")
-                logging.warning(f"Antworttext: {response_text}")
-                return None
-                
-        except Exception as e:
-            # Check if it's a rate limit error
-            if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-                if retry_attempt < max_retries - 1:  # Don't sleep on the last attempt
-                    # Use a fixed delay based on rate limit of 2 rpm
-                    delay = min_retry_delay + (retry_attempt * 5) + random.uniform(0, 2)
-                    logging.warning(f"Rate limit erreicht (max 2 rpm). Warte {delay:.2f} Sekunden vor Versuch {retry_attempt + 2}/{max_retries}...")
-                    time.sleep(delay)
-                else:
-                    logging.warning(f"Maximale Anzahl von Versuchen erreicht. Fehler: {e}")
-            else:
-                # If it's not a rate limit error, don't retry
-                logging.warning(f"Fehler bei der Gemini API-Anfrage: {e}")
-                break
-    
-    # If all retries failed
-    return None
+ANALYSIS_INSTRUCTIONS = analysis_instructions()
 
-def proofread_analysis_with_gemini(client: genai.Client, initial_analysis: dict, transcript_data: dict) -> dict:
-    """Führt eine zweite Analyse zur Verbesserung und Korrektur der ersten Analyse durch."""
-    if not initial_analysis or "gegenwartsvorschlaege" not in initial_analysis:
-        logging.info("Keine Analyse zum Korrekturlesen vorhanden.")
-        return initial_analysis
-    
-    # Erstellen eines strukturierten JSON-Strings für den Prompt
-    initial_json_str = json.dumps(initial_analysis, indent=2, ensure_ascii=False)
-    
-    # Extrahieren des Podcast-Titels für den Kontext
-    podcast_title = transcript_data.get("episode_title", "Unbekannter Podcast")
-    
-    # Erstellen des Proofreading-Prompts
-    prompt_text = f"""
-Du bist ein Korrektur-Assistent für Podcast-Analysen des deutschen Podcasts "Die sogenannte Gegenwart". Du erhältst eine automatisch erstellte Analyse 
-der Folge mit dem Titel "{podcast_title}".
+ANALYSIS_TAIL = "Identifiziere jetzt alle Gegenwartsvorschläge in diesem Transkript und antworte im oben beschriebenen JSON-Format."
+
+PROOFREADING_TEMPLATE = Template("""Du bist ein Korrektur-Assistent für Podcast-Analysen des deutschen Podcasts "$show_title". Du erhältst eine automatisch erstellte Analyse 
+einer Folge.
 
 # Wichtige Kontextinformationen
 Die Analyse basiert auf einem automatisch generierten Transkript eines deutschsprachigen Podcasts. Bei der Spracherkennung und Transkription treten häufig Fehler auf, besonders bei:
@@ -240,35 +140,62 @@ Deine Aufgabe ist AUSSCHLIESSLICH die Überprüfung der Rechtschreibung von Konz
 3. Füge KEINE neuen Tags hinzu und ändere die Tags nur, wenn sie falsch geschrieben sind.
 4. Erweitere NICHT die "begruendung" oder andere Textfelder inhaltlich.
 5. Übersetze KEINE Inhalte in eine andere Sprache - alle Texte bleiben in ihrer Originalsprache.
-6. Konzentriere dich NUR auf mögliche Fehler, die durch Spracherkennung oder Transkription entstanden sein könnten.
+6. Konzentriere dich NUR auf mögliche Fehler, die durch Spracherkennung oder Transkription entstanden sein könnten.""")
 
-Hier ist die zu korrigierende Analyse im JSON-Format:
+def proofreading_instructions(show: Optional[shows.Show] = None) -> str:
+    """Statische Anweisungen des Korrekturlesens mit den Prompt-Variablen der Sendung."""
+    return PROOFREADING_TEMPLATE.substitute((show or shows.DEFAULT).prompt_variables)
 
-```json
-{initial_json_str}
-```
+PROOFREADING_INSTRUCTIONS = proofreading_instructions()
 
-Antworte nur mit dem verbesserten JSON-Format. Füge keine Erklärungen oder zusätzlichen Text hinzu.
-"""
-    
-    # Create content structure for the prompt
-    contents = [
-        types.Content(
-            role="user",
-            parts=[types.Part.from_text(text=prompt_text)]
-        )
-    ]
-    
-    # Add Google Grounding tool
-    tools = [types.Tool(google_search=types.GoogleSearch())]
-    
-    # Create generation config
-    generate_content_config = types.GenerateContentConfig(
-        temperature=0.2,
-        top_p=0.95,
-        top_k=40,
+PROOFREADING_TAIL = "Antworte nur mit dem verbesserten JSON-Format. Füge keine Erklärungen oder zusätzlichen Text hinzu."
+
+def format_timestamp(seconds: float) -> str:
+    """Sekunden als m:ss."""
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+def create_chapter_overview(chapters: list) -> str:
+    """Kapitelliste (Zeitraum und Schlagworte) aus dem Index von transcript_segmentation.py."""
+    lines = [f"{number}. {format_timestamp(chapter['start_seconds'])}–{format_timestamp(chapter['end_seconds'])}: "
+             f"{', '.join(chapter['keywords']) or 'ohne Schlagworte'}"
+             for number, chapter in enumerate(chapters, start=1)]
+    return "Kapitelübersicht der Episode (automatisch nach Themenwechseln erkannt):\n" + "\n".join(lines)
+
+def create_transcript_section(transcript_data: dict) -> str:
+    """Erstellt den episodenspezifischen Teil des Analyse-Prompts (Titel, Kapitelübersicht und Transkript-Text)."""
+    transcript_text = ""
+    for item in transcript_data["transcript"]:
+        speaker = item["speaker"]
+        text = item["text"]
+        transcript_text += f"{speaker}: {text}\n\n"
+
+    episode_title = transcript_data.get("episode_title", "Unbekannte Episode")
+    chapters = transcript_data.get("chapters")
+    chapter_overview = f"{create_chapter_overview(chapters)}\n\n" if chapters else ""
+    return f"""Hier ist der Transkript-Text einer Podcast-Episode mit dem Titel "{episode_title}":
+
+{chapter_overview}{transcript_text}"""
+
+def create_gemini_prompt(transcript_data: dict, show: Optional[shows.Show] = None) -> str:
+    """
+    Erstellt einen Prompt für die Gemini API, der aus dem Transkript die relevanten Informationen extrahiert.
+
+    Die statischen Anweisungen stehen vorne, damit sie als gemeinsames Präfix
+    aller Episoden zwischengespeichert werden können (siehe gemini_cache.py).
+    """
+    return join_prompt([analysis_instructions(show), create_transcript_section(transcript_data), ANALYSIS_TAIL])
+
+def create_generation_config(temperature: float, top_p: float, tools: Optional[list],
+                             cached_content: Optional[str] = None, top_k: int = 40) -> types.GenerateContentConfig:
+    """Erstellt die Generierungskonfiguration; mit Cache stecken die Tools im Cache statt in der Anfrage."""
+    return types.GenerateContentConfig(
+        temperature=temperature,
+        top_p=top_p,
+        top_k=top_k,
         max_output_tokens=4096,
         tools=tools,
+        cached_content=cached_content,
         response_mime_type="text/plain",
         safety_settings=[
             types.SafetySetting(
@@ -289,42 +216,129 @@ Antworte nur mit dem verbesserten JSON-Format. Füge keine Erklärungen oder zus
             )
         ]
     )
-    
+
+def prepare_request(client: genai.Client, model: str, prompt_parts: tuple, label: str,
+                    grounding: bool = True) -> dict:
+    """
+    Stellt Inhalte, Cache und Tools einer Anfrage zusammen.
+
+    Wird einmal je Anfrage aufgerufen, nicht je Wiederholung: Absicherungskopien
+    und Wiederholungen zählen sonst als weitere Nutzung des Episodenteils und
+    legen für eine einmalige Anfrage einen eigenen Cache an.
+
+    Returns:
+        Dictionary mit 'contents', 'cached_content' (Cache-Name oder None) und 'tools'
+    """
+    prefix, episode, tail = prompt_parts
+    tools = [types.Tool(google_search=types.GoogleSearch())] if grounding else None
+    context_cache = gemini_cache.get(client)
+    if context_cache is None:
+        return {'contents': [user_content([prefix, episode, tail])], 'cached_content': None, 'tools': tools}
+    return context_cache.prepare(model, [prefix], [episode], [tail], tools=tools, label=label)
+
+def stream_with_cache(client: genai.Client, model: str, prompt_parts: tuple, temperature: float, top_p: float,
+                      label: str, grounding: bool = True, top_k: int = 40, request: Optional[dict] = None) -> dict:
+    """
+    Streamt die Antwort auf eine Anfrage aus Präfix, Episodenteil und Abschluss (prompt_parts).
+
+    Vollständige Einträge von "gegenwartsvorschlaege" werden schon während des
+    Streamings erkannt. Ist Context Caching aktiv (gemini_cache.configure),
+    kommen Präfix und ggf. Episodenteil aus dem Cache; ist ein Cache abgelaufen
+    oder gelöscht, wird er verworfen und die Anfrage einmal ohne ihn wiederholt.
+    Ist ein Quotenbuch aktiv (quota_scheduler.configure), wird jede Anfrage
+    dort gebucht; ist das Tagesbudget des Modells verbraucht, wird keine
+    Anfrage gesendet, sondern QuotaExhausted ausgelöst.
+
+    request ist das Ergebnis von prepare_request; ohne wird es hier erstellt.
+
+    Returns:
+        Dictionary mit 'text' (gesamte Antwort), 'finish_reason' (z.B. "STOP"
+        oder "MAX_TOKENS"), 'items' (vollständige Vorschläge) und 'closed'
+        (ob die Liste vollständig übertragen wurde)
+    """
+    prefix, episode, tail = prompt_parts
+    tools = [types.Tool(google_search=types.GoogleSearch())] if grounding else None
+    context_cache = gemini_cache.get(client)
+    ledger = quota_scheduler.get()
+    if request is None:
+        request = prepare_request(client, model, prompt_parts, label, grounding)
+
+    for attempt in range(2):
+        parser = ItemStreamParser()
+        finish_reason = None
+        last_usage_chunk = None
+        try:
+            if ledger is not None:
+                ledger.acquire(model)
+            with stage("gemini_request"):
+                profiling.count("gemini_requests")
+                stream = client.models.generate_content_stream(
+                    model=model,
+                    contents=request['contents'],
+                    config=create_generation_config(temperature, top_p, request['tools'], request['cached_content'],
+                                                    top_k)
+                )
+                for chunk in stream:
+                    for item in parser.feed(chunk.text or ""):
+                        profiling.count("streamed_items")
+                        logging.info(f"Vorschlag empfangen: {item.get('vorschlag')}")
+                    if chunk.candidates and chunk.candidates[0].finish_reason:
+                        finish_reason = getattr(chunk.candidates[0].finish_reason, 'name',
+                                                chunk.candidates[0].finish_reason)
+                    if getattr(chunk, 'usage_metadata', None) is not None:
+                        last_usage_chunk = chunk
+        except quota_scheduler.QuotaExhausted:
+            raise
+        except Exception as e:
+            if attempt == 0 and request['cached_content'] and gemini_cache.is_cache_miss(e):
+                logging.info(f"Cache {request['cached_content']} nicht mehr verfügbar, sende ohne Cache: {e}")
+                context_cache.invalidate(request['cached_content'])
+                request = {'contents': [user_content([prefix, episode, tail])], 'cached_content': None,
+                           'tools': tools}
+                continue
+            raise
+        if context_cache is not None and last_usage_chunk is not None:
+            context_cache.record_usage(last_usage_chunk)
+        if ledger is not None and last_usage_chunk is not None:
+            ledger.record_tokens(model, getattr(last_usage_chunk.usage_metadata, 'total_token_count', 0) or 0)
+        return {'text': parser.buffer, 'finish_reason': str(finish_reason), 'items': parser.items,
+                'closed': parser.closed}
+
+def with_rate_limit_retries(request: Callable[[], Any], error_message: str,
+                            model: Optional[str] = None) -> Optional[Any]:
+    """
+    Führt eine API-Anfrage aus und wiederholt sie bei Rate-Limit-Fehlern (max. 2 rpm).
+
+    Meldet die API bei aktivem Quotenbuch das Tagesbudget von model als
+    erschöpft, wird nicht gewartet, sondern QuotaExhausted ausgelöst.
+    Ist request_hedging aktiv (request_hedging.configure), läuft jede Anfrage
+    mit Frist und ggf. einer Absicherungskopie; vorübergehende Serverfehler
+    und Zeitüberschreitungen werden dann ebenfalls wiederholt, bis der
+    Circuit Breaker des Modells weitere Anfragen stoppt.
+
+    Returns:
+        Das Ergebnis der Anfrage oder None, wenn sie endgültig fehlgeschlagen ist
+    """
     # Retry mechanism with respect to 2 rpm rate limit
     max_retries = 5
     min_retry_delay = 30  # seconds (30s = respecting 2 rpm)
     
     for retry_attempt in range(max_retries):
         try:
-            # Generate content using the model
-            response = client.models.generate_content(
-                model=PROOFREADING_MODEL_NAME,
-                contents=contents,
-                config=generate_content_config
-            )
-            
-            response_text = response.text
-            
-            # JSON aus der Antwort extrahieren
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_text = json_match.group(1)
-            else:
-                # Falls kein Markdown-Block gefunden wurde, versuchen wir, die gesamte Antwort zu parsen
-                json_text = response_text
-            
-            try:
-                result = json.loads(json_text)
-                logging.info("Zweite Analyse (Korrekturlesen) erfolgreich durchgeführt.")
-                return result
-            except json.JSONDecodeError as e:
-                logging.warning(f"Fehler beim Parsen der Proofreading-Antwort: {e}")
-                logging.warning(f"Antworttext: {response_text}")
-                return initial_analysis  # Rückgabe der ursprünglichen Analyse bei Fehler
-                
+            return request_hedging.call(model or "gemini", request)
+        except quota_scheduler.QuotaExhausted:
+            raise
+        except request_hedging.CircuitOpen as e:
+            logging.warning(f"{error_message}: {e}")
+            break
         except Exception as e:
             # Check if it's a rate limit error
             if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
+                # Waiting does not help against the daily quota; stop and continue in the next run
+                if model and quota_scheduler.is_daily_quota_error(e):
+                    exhausted = quota_scheduler.exhausted(model, e)
+                    if exhausted is not None:
+                        raise exhausted
                 if retry_attempt < max_retries - 1:  # Don't sleep on the last attempt
                     # Use a fixed delay based on rate limit of 2 rpm
                     delay = min_retry_delay + (retry_attempt * 5) + random.uniform(0, 2)
@@ -332,13 +346,298 @@ Antworte nur mit dem verbesserten JSON-Format. Füge keine Erklärungen oder zus
                     time.sleep(delay)
                 else:
                     logging.warning(f"Maximale Anzahl von Versuchen erreicht. Fehler: {e}")
+            elif (request_hedging.get() is not None and request_hedging.is_transient(e)
+                  and retry_attempt < max_retries - 1):
+                delay = request_hedging.TRANSIENT_RETRY_SECONDS * (retry_attempt + 1) + random.uniform(0, 2)
+                logging.warning(f"{error_message} (vorübergehend): {e}. Warte {delay:.2f} Sekunden vor Versuch "
+                                f"{retry_attempt + 2}/{max_retries}...")
+                time.sleep(delay)
             else:
-                # If it's not a rate limit error, don't retry
-                logging.warning(f"Fehler bei der Proofreading-API-Anfrage: {e}")
+                # Other errors (e.g. invalid requests) would fail again
+                logging.warning(f"{error_message}: {e}")
                 break
     
-    # If all retries failed, return the initial analysis
-    return initial_analysis
+    # If all retries failed
+    return None
+
+def extract_json_text(response_text: str) -> str:
+    """Schneidet das JSON aus einer Antwort, die oft in einem Markdown-Codeblock steht."""
+    json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+    if json_match:
+        return json_match.group(1)
+    # Falls kein Markdown-Block gefunden wurde, versuchen wir, die gesamte Antwort zu parsen
+    return response_text
+
+def merge_vorschlaege(existing: list, new_items: list) -> list:
+    """
+    Hängt neue Vorschläge an und überspringt bereits vorhandene Namen (Wiederholungen in Fortsetzungen).
+
+    In gepackten Antworten gilt ein Name je Episode (Feld "episode_id").
+    """
+    def key(item: dict) -> tuple:
+        return item.get("episode_id"), str(item.get("vorschlag", "")).strip().lower()
+
+    seen = {key(item) for item in existing}
+    merged = list(existing)
+    for item in new_items:
+        if key(item) not in seen:
+            seen.add(key(item))
+            merged.append(item)
+    return merged
+
+def generate_vorschlaege(client: genai.Client, model: str, prompt_parts: tuple,
+                         continuation_tail: Callable[[list], str], temperature: float, top_p: float, label: str,
+                         grounding: bool = True, top_k: int = 40,
+                         error_message: str = "Fehler bei der Gemini API-Anfrage",
+                         parse_error_message: str = "Fehler beim Parsen der Gemini-Antwort") -> Optional[dict]:
+    """
+    Fragt eine Liste von Gegenwartsvorschlägen per Streaming ab und setzt abgeschnittene Antworten fort.
+
+    Endet eine Antwort wegen der Längenbegrenzung (finish_reason MAX_TOKENS),
+    bleiben die vollständig übertragenen Vorschläge erhalten, und eine
+    Folgeanfrage mit demselben Präfix und Episodenteil (aus dem Cache) fordert
+    nur die fehlenden an; continuation_tail(bisherige_vorschlaege) liefert den
+    Abschluss dieser Folgeanfrage.
+
+    Returns:
+        Das geparste Ergebnis, bei Fortsetzungen {"gegenwartsvorschlaege": [...]},
+        oder None bei API- oder Parse-Fehlern
+    """
+    prefix, episode, tail = prompt_parts
+    collected: list = []
+    for continuation in range(MAX_CONTINUATIONS + 1):
+        parts = (prefix, episode, tail if continuation == 0 else continuation_tail(collected))
+        # Prepared once, so hedged copies and retries do not count as further uses of the episode cache
+        request = prepare_request(client, model, parts, label, grounding)
+        streamed = with_rate_limit_retries(
+            lambda: stream_with_cache(client, model, parts, temperature, top_p, label, grounding, top_k, request),
+            error_message, model=model
+        )
+        if streamed is None:
+            return {"gegenwartsvorschlaege": collected} if collected else None
+
+        truncated = streamed['finish_reason'] == "MAX_TOKENS"
+        if not truncated:
+            try:
+                result = json.loads(extract_json_text(streamed['text']))
+            except json.JSONDecodeError as e:
+                if streamed['items'] and not streamed['closed']:
+                    truncated = True  # Stream brach mitten in der Liste ab
+                else:
+                    logging.warning(f"{parse_error_message}: {e}")
+                    logging.warning(f"Antworttext: {streamed['text']}")
+                    return {"gegenwartsvorschlaege": collected} if collected else None
+            else:
+                if continuation == 0:
+                    return result
+                new_items = result.get("gegenwartsvorschlaege", []) if isinstance(result, dict) else []
+                return {"gegenwartsvorschlaege": merge_vorschlaege(collected, new_items)}
+
+        collected = merge_vorschlaege(collected, streamed['items'])
+        profiling.count("gemini_continuations")
+        logging.info(f"Antwort nach {len(collected)} vollständigen Vorschlägen abgeschnitten "
+                     f"({streamed['finish_reason']}), fordere die fehlenden an...")
+
+    logging.warning(f"Maximale Anzahl von Fortsetzungen erreicht, verwende {len(collected)} Vorschläge.")
+    return {"gegenwartsvorschlaege": collected}
+
+def analysis_continuation_tail(collected: list) -> str:
+    """Abschluss der Folgeanfrage, wenn die erste Analyse abgeschnitten wurde."""
+    names = ", ".join(f'"{item.get("vorschlag")}"' for item in collected) or "keine"
+    return (f"Deine vorherige Antwort wurde wegen der Längenbegrenzung abgeschnitten. Diese Gegenwartsvorschläge "
+            f"hast du bereits vollständig geliefert: {names}. Liefere jetzt NUR die übrigen Gegenwartsvorschläge "
+            f"aus dem Transkript im oben beschriebenen JSON-Format. Wenn es keine weiteren gibt, antworte mit "
+            f'{{"gegenwartsvorschlaege": []}}.')
+
+def packed_analysis_tail(episode_ids: list) -> str:
+    """Abschluss einer gepackten Anfrage: nennt die Episoden-IDs und verlangt die Zuordnung jedes Vorschlags."""
+    start = transcript_packing.EPISODE_START.format(episode_id="<ID>")
+    end = transcript_packing.EPISODE_END.format(episode_id="<ID>")
+    empty_key = transcript_packing.EMPTY_EPISODES_KEY
+    return (f"Oben stehen die Transkripte mehrerer Episoden, jede zwischen \"{start}\" und \"{end}\". "
+            f"Identifiziere jetzt alle Gegenwartsvorschläge in jeder dieser Episoden ({', '.join(episode_ids)}) "
+            f"und antworte im oben beschriebenen JSON-Format, mit diesen Ergänzungen:\n"
+            f"- Jeder Vorschlag bekommt das zusätzliche Feld \"{transcript_packing.EPISODE_ID_FIELD}\" mit der ID "
+            f"der Episode, in der er gemacht wurde.\n"
+            f"- \"start_zeit\" zählt ab dem Beginn der jeweiligen Episode.\n"
+            f"- Liste die IDs der Episoden ohne Gegenwartsvorschläge unter \"{empty_key}\", z.B. "
+            f'{{"gegenwartsvorschlaege": [...], "{empty_key}": ["123"]}}.')
+
+def packed_continuation_tail(collected: list) -> str:
+    """Abschluss der Folgeanfrage, wenn eine gepackte Analyse abgeschnitten wurde."""
+    names = ", ".join(f'"{item.get("vorschlag")}" ({item.get("episode_id")})' for item in collected) or "keine"
+    return (f"Deine vorherige Antwort wurde wegen der Längenbegrenzung abgeschnitten. Diese Gegenwartsvorschläge "
+            f"(mit Episoden-ID) hast du bereits vollständig geliefert: {names}. Liefere jetzt NUR die übrigen "
+            f"Gegenwartsvorschläge aller Episoden im selben JSON-Format, jeden mit \"episode_id\". Wenn es keine "
+            f'weiteren gibt, antworte mit {{"gegenwartsvorschlaege": []}}.')
+
+def proofreading_continuation_tail(collected: list) -> str:
+    """Abschluss der Folgeanfrage, wenn das Korrekturlesen abgeschnitten wurde."""
+    names = ", ".join(f'"{item.get("vorschlag")}"' for item in collected) or "keine"
+    return (f"Deine vorherige Antwort wurde wegen der Längenbegrenzung abgeschnitten. Diese Vorschläge hast du "
+            f"bereits korrigiert zurückgegeben: {names}. Gib jetzt NUR die übrigen Vorschläge der Analyse "
+            f"korrigiert im selben JSON-Format zurück. Füge keine Erklärungen oder zusätzlichen Text hinzu.")
+
+def analyze_transcript_with_gemini(client: genai.Client, transcript_data: dict, model: str = MODEL_NAME,
+                                   grounding: bool = True, temperature: float = 0.1, top_p: float = 0.9,
+                                   top_k: int = 40, show: Optional[shows.Show] = None) -> Optional[dict]:
+    """Analysiert ein Transkript mit der Gemini API (standardmäßig mit MODEL_NAME und Google-Grounding)."""
+    with stage("build_prompt"):
+        prompt_parts = (analysis_instructions(show), create_transcript_section(transcript_data), ANALYSIS_TAIL)
+    
+    return generate_vorschlaege(
+        client, model, prompt_parts, analysis_continuation_tail, temperature=temperature, top_p=top_p,
+        label=transcript_data.get("episode_title", "episode"), grounding=grounding, top_k=top_k
+    )
+
+def analyze_with_model_tiers(client: genai.Client, transcript_data: dict,
+                             show: Optional[shows.Show] = None) -> Optional[dict]:
+    """
+    Erste Analyse mit dem schnellsten ausreichenden Modell; eskaliert nur bei Bedarf.
+
+    Zuerst analysiert das schnelle Modell ohne Google-Suche. Nur wenn dessen
+    Antwort nicht lesbar ist, trotz Gegenwartscheck-Hinweisen im Transkript leer
+    bleibt oder zu viele zweifelhafte Felder hat, folgt MODEL_NAME mit Grounding.
+    Latenz und Trefferquote je Stufe landen in model_tiering.stats und im Profilbericht.
+    """
+    if not model_tiering.tiering_enabled():
+        return analyze_transcript_with_gemini(client, transcript_data, show=show)
+
+    tiers = [("fast", model_tiering.fast_model_name(), False), ("standard", MODEL_NAME, True)]
+    best_result = None
+    for tier, model, grounding in tiers:
+        started = time.perf_counter()
+        try:
+            with stage(f"tier_{tier}"):
+                result = analyze_transcript_with_gemini(client, transcript_data, model=model, grounding=grounding,
+                                                        show=show)
+        except quota_scheduler.QuotaExhausted:
+            if tier == tiers[-1][0]:
+                raise
+            logging.info(f"Tagesbudget von {model} verbraucht, weiter mit der nächsten Stufe.")
+            model_tiering.stats.record(tier, time.perf_counter() - started, "quota_exhausted")
+            continue
+        reason = model_tiering.escalation_reason(result, transcript_data, hosts=(show or shows.DEFAULT).hosts)
+        model_tiering.stats.record(tier, time.perf_counter() - started, reason)
+        if reason is None:
+            return result
+        if reason != "parse_failure":
+            best_result = result  # the strongest readable answer so far
+        logging.info(f"Stufe {tier} ({model}) nicht ausreichend: {reason}")
+    return best_result
+
+def analyze_packed(client: genai.Client, transcripts: Dict[str, dict], model: str = MODEL_NAME,
+                   show: Optional[shows.Show] = None) -> Dict[str, dict]:
+    """
+    Analysiert mehrere Transkripte in einer Anfrage und teilt die Antwort nach Episoden auf.
+
+    Die Transkripte stehen mit ihrer Episoden-ID zwischen Markierungen im
+    Episodenteil des Prompts; die Anweisungen bleiben das gemeinsame,
+    zwischenspeicherbare Präfix. Jeder Vorschlag der Antwort nennt seine
+    Episode. Der Anteil einer Episode wird wie eine Stufe der Modellstaffel
+    geprüft (model_tiering.escalation_reason).
+
+    Args:
+        transcripts: Transkriptdaten nach Episoden-ID
+
+    Returns:
+        Erste Analyse je Episoden-ID; fehlende oder unplausible Episoden fehlen und werden einzeln analysiert
+    """
+    episode_ids = list(transcripts)
+    with stage("build_prompt"):
+        sections = {episode_id: create_transcript_section(data) for episode_id, data in transcripts.items()}
+        prompt_parts = (analysis_instructions(show), transcript_packing.pack_sections(sections),
+                        packed_analysis_tail(episode_ids))
+    result = generate_vorschlaege(
+        client, model, prompt_parts, packed_continuation_tail, temperature=0.1, top_p=0.9,
+        label=f"Paket {', '.join(episode_ids)}"
+    )
+    analyses, missing = transcript_packing.demultiplex(result, episode_ids)
+    hosts = (show or shows.DEFAULT).hosts
+    accepted = {}
+    for episode_id, analysis in analyses.items():
+        reason = model_tiering.escalation_reason(analysis, transcripts[episode_id], hosts=hosts)
+        if reason is None:
+            accepted[episode_id] = analysis
+        else:
+            logging.info(f"Gepackte Analyse von {episode_id} nicht ausreichend ({reason}), analysiere einzeln.")
+            missing.append(episode_id)
+    profiling.count("packed_episodes", len(accepted))
+    profiling.count("packed_fallbacks", len(missing))
+    logging.info(f"Gepackte Anfrage: {len(accepted)} von {len(episode_ids)} Episoden übernommen"
+                 + (f", einzeln folgen: {', '.join(missing)}" if missing else ""))
+    return accepted
+
+def proofread_analysis_with_gemini(client: genai.Client, initial_analysis: dict, transcript_data: dict,
+                                   model: str = PROOFREADING_MODEL_NAME, temperature: float = 0.2,
+                                   top_p: float = 0.95, top_k: int = 40, show: Optional[shows.Show] = None) -> dict:
+    """Führt eine zweite Analyse zur Verbesserung und Korrektur der ersten Analyse durch."""
+    if not initial_analysis or "gegenwartsvorschlaege" not in initial_analysis:
+        logging.info("Keine Analyse zum Korrekturlesen vorhanden.")
+        return initial_analysis
+    
+    # Erstellen eines strukturierten JSON-Strings für den Prompt
+    initial_json_str = json.dumps(initial_analysis, indent=2, ensure_ascii=False)
+    
+    # Extrahieren des Podcast-Titels für den Kontext
+    podcast_title = transcript_data.get("episode_title", "Unbekannter Podcast")
+    
+    # Statische Anweisungen vorne (zwischenspeicherbar), danach die episodenspezifische Analyse
+    analysis_section = f"""Die Analyse gehört zur Folge mit dem Titel "{podcast_title}".
+
+Hier ist die zu korrigierende Analyse im JSON-Format:
+
+```json
+{initial_json_str}
+```"""
+    prompt_parts = (proofreading_instructions(show), analysis_section, PROOFREADING_TAIL)
+    
+    result = generate_vorschlaege(
+        client, model, prompt_parts, proofreading_continuation_tail, temperature=temperature, top_p=top_p,
+        label=podcast_title, top_k=top_k, error_message="Fehler bei der Proofreading-API-Anfrage",
+        parse_error_message="Fehler beim Parsen der Proofreading-Antwort"
+    )
+    if result is None:
+        return initial_analysis  # Rückgabe der ursprünglichen Analyse bei Fehler
+    logging.info("Zweite Analyse (Korrekturlesen) erfolgreich durchgeführt.")
+    return result
+
+def proofread_or_correct(client: genai.Client, initial_analysis: dict, transcript_data: dict,
+                         show: Optional[shows.Show] = None) -> dict:
+    """
+    Korrigiert bekannte Transkriptionsfehler lokal und liest nur bei unbekannten Begriffen Korrektur.
+
+    Das Korrekturwörterbuch (asr_corrections) lernt aus jedem Korrekturlesen,
+    welche Schreibweisen das Modell ersetzt und welche es bestätigt. Sind nach
+    den lokalen Korrekturen alle Begriffe der Analyse bestätigt oder bekannte
+    Korrekturziele, entfällt der Aufruf des Korrekturmodells.
+    """
+    if not asr_corrections.corrections_enabled():
+        return proofread_analysis_with_gemini(client, initial_analysis, transcript_data, show=show)
+    dictionary = asr_corrections.get_dictionary()
+    corrected, applied = dictionary.correct_analysis(initial_analysis)
+    unknown = dictionary.unknown_terms(corrected)
+    if not unknown:
+        logging.info(f"Korrekturlesen übersprungen, alle Begriffe sind bekannt ({applied} lokale Korrekturen).")
+        asr_corrections.stats.record(True, applied)
+        return corrected
+
+    logging.info(f"Korrekturlesen wegen {len(unknown)} unbekannter Begriffe, z. B. {', '.join(sorted(unknown)[:5])}")
+    final_analysis = proofread_analysis_with_gemini(client, corrected, transcript_data, show=show)
+    asr_corrections.stats.record(False, applied)
+    if final_analysis is not corrected:
+        dictionary.learn(initial_analysis, final_analysis)
+        dictionary.save()
+    return final_analysis
+
+def correct_transcript_terms(transcript_data: dict) -> dict:
+    """Wendet das Korrekturwörterbuch auf das Transkript an, falls ASR_CORRECT_TRANSCRIPTS=1 gesetzt ist."""
+    if not asr_corrections.transcript_correction_enabled():
+        return transcript_data
+    corrected, applied = asr_corrections.get_dictionary().correct_transcript(transcript_data)
+    if applied:
+        logging.info(f"{applied} bekannte Transkriptionsfehler im Transkript korrigiert.")
+    return corrected
 
 def extract_date_from_title(title: str) -> str:
     """Versucht, ein Datum aus dem Episodentitel zu extrahieren."""
@@ -350,8 +649,10 @@ def extract_date_from_title(title: str) -> str:
     # Falls kein Datum gefunden wurde, verwenden wir das aktuelle Datum
     return datetime.now().strftime("%Y-%m-%d")
 
-def create_output_data(transcript_data: dict, analysis_result: dict) -> Optional[dict]:
+def create_output_data(transcript_data: dict, analysis_result: dict,
+                       show: Optional[shows.Show] = None) -> Optional[dict]:
     """Erstellt die finalen Ausgabedaten aus den Transkript- und Analysedaten."""
+    show = show or shows.DEFAULT
     if not analysis_result or "gegenwartsvorschlaege" not in analysis_result:
         return None
     
@@ -397,11 +698,11 @@ def create_output_data(transcript_data: dict, analysis_result: dict) -> Optional
             del vorschlag["ende_zeit"]
             
         # Ensure vorschlagender is one of the hosts
-        if "vorschlagender" not in vorschlag or vorschlag["vorschlagender"] not in ["Lars", "Ijoma", "Nina"]:
+        if "vorschlagender" not in vorschlag or vorschlag["vorschlagender"] not in show.hosts:
             # If a listener was the source, set vorschlagender to the host who presented it
             if vorschlag.get("ist_hoerer", False) and "hoerer_name" in vorschlag and vorschlag["hoerer_name"]:
-                # Default to Lars if we can't determine who presented it
-                vorschlag["vorschlagender"] = "Lars"
+                # Default to the first host if we can't determine who presented it
+                vorschlag["vorschlagender"] = show.default_host
     
     return {
         "episode_title": transcript_data.get("episode_title", "Unbekannte Episode"),
@@ -429,10 +730,10 @@ def save_output_data(output_data: dict, output_path: str) -> None:
         logging.warning(f"Ungültiges Ausgabeschema, Datei wird nicht gespeichert: {output_path}")
         return
     try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
-        logging.info(f"Ausgabedaten gespeichert in: {output_path}")
+        if json_writer.write_json(output_path, output_data):
+            logging.info(f"Ausgabedaten gespeichert in: {output_path}")
+        else:
+            logging.info(f"Ausgabedaten unverändert, nicht neu geschrieben: {output_path}")
     except Exception as e:
         logging.error(f"Fehler beim Speichern der Ausgabedaten in {output_path}: {e}")
 
@@ -460,27 +761,82 @@ def get_existing_analysis(output_path: str) -> Optional[dict]:
             logging.warning(f"Fehler beim Laden bestehender Analysedatei {output_path}: {e}")
     return None
 
-def process_transcript(client: genai.Client, file_path: str, output_dir: str) -> bool:
-    """Verarbeitet eine einzelne Transkript-Datei und speichert die Analyse, falls noch nicht vorhanden."""
+def load_stored_first_pass(file_path: str, first_pass_path: str) -> Optional[dict]:
+    """Gespeicherte erste Analyse, falls vorhanden, lesbar und nicht älter als das Transkript."""
+    if not os.path.exists(first_pass_path) or os.path.getmtime(first_pass_path) < os.path.getmtime(file_path):
+        return None
+    try:
+        with open(first_pass_path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Fehler beim Laden der ersten Analyse {first_pass_path}: {e}")
+        return None
+    return stored if isinstance(stored, dict) else None
+
+def analysis_is_stale(file_path: str, output_path: str, stamps: dict) -> bool:
+    """
+    Ob eine vorhandene Analyse veraltet ist (stamps: Pipeline-Stempel, pipeline.load_stamps).
+
+    Veraltet ist sie, wenn der Stempel ihres Korrekturlesens einen anderen
+    Transkriptinhalt als den jetzigen verzeichnet und die Analyse seitdem
+    nicht neu erstellt wurde. Ohne Stempel gilt eine Analyse als aktuell.
+    """
+    from pipeline import file_digest
+
+    stamp = stamps.get(f"proofread:{episode_id_of(file_path)}") or {}
+    transcript_digests = [digest for path, digest in stamp.get('inputs', {}).items()
+                          if os.path.basename(path) == os.path.basename(file_path)]
+    output_digests = [digest for path, digest in stamp.get('outputs', {}).items()
+                      if os.path.basename(path) == os.path.basename(output_path)]
+    if not transcript_digests or not output_digests:
+        return False
+    return transcript_digests[0] != file_digest(file_path) and output_digests[0] == file_digest(output_path)
+
+def process_transcript(client: genai.Client, file_path: str, output_dir: str,
+                       show: Optional[shows.Show] = None, initial_analysis: Optional[dict] = None,
+                       first_pass_dir: Optional[str] = None, reanalyze: bool = False) -> bool:
+    """
+    Verarbeitet eine einzelne Transkript-Datei und speichert die Analyse, falls noch nicht vorhanden.
+
+    Mit reanalyze wird eine vorhandene (veraltete) Analyse ersetzt.
+
+    Liegt die erste Analyse schon vor (initial_analysis, aus einer gepackten
+    Anfrage), folgen nur noch Korrekturlesen und Speichern.
+
+    Mit first_pass_dir wird die erste Analyse vor dem Korrekturlesen dort
+    gespeichert (wie von run_first_pass) und im nächsten Lauf wiederverwendet.
+    Ist nur das Tagesbudget des Korrekturmodells erschöpft, wird die erste
+    Analyse so nicht bei jedem Lauf erneut bezahlt.
+    """
     try:
         logging.info(f"Verarbeite Transkript: {file_path}")
-        transcript_data = load_transcript(file_path)
+        with stage("load_transcript"):
+            transcript_data = correct_transcript_terms(load_transcript(file_path))
         output_filename = get_output_filename(file_path)
         output_path = os.path.join(output_dir, output_filename)
-        existing_data = get_existing_analysis(output_path)
+        existing_data = None if reanalyze else get_existing_analysis(output_path)
         if existing_data:
             logging.info(f"Überspringe Verarbeitung, da bereits analysiert: {file_path}")
             return True
         
         # Transcript analysieren
-        logging.info("Führe erste Analyse durch...")
-        initial_analysis = analyze_transcript_with_gemini(client, transcript_data)
+        first_pass_path = get_first_pass_path(file_path, first_pass_dir) if first_pass_dir else None
+        if initial_analysis is None and first_pass_path:
+            initial_analysis = load_stored_first_pass(file_path, first_pass_path)
+            if initial_analysis is not None:
+                logging.info(f"Verwende gespeicherte erste Analyse: {first_pass_path}")
+        if initial_analysis is None:
+            logging.info("Führe erste Analyse durch...")
+            with stage("analyze"):
+                initial_analysis = analyze_with_model_tiers(client, transcript_data, show)
+        if initial_analysis is not None and first_pass_path:
+            json_writer.write_json(first_pass_path, initial_analysis)
         
         if not initial_analysis or "gegenwartsvorschlaege" not in initial_analysis or not initial_analysis["gegenwartsvorschlaege"]:
             logging.info(f"Keine Gegenwartsvorschläge gefunden in: {file_path}")
             # Leeres Ergebnis speichern, um in Zukunft zu überspringen
             empty_result = {"gegenwartsvorschlaege": []}
-            output_data = create_output_data(transcript_data, empty_result)
+            output_data = create_output_data(transcript_data, empty_result, show)
             save_output_data(output_data, output_path)
             return True
         
@@ -488,53 +844,316 @@ def process_transcript(client: genai.Client, file_path: str, output_dir: str) ->
         
         # Zweite Analyse durchführen (Korrektur und Verbesserung)
         logging.info("Führe zweite Analyse zur Verbesserung durch...")
-        final_analysis = proofread_analysis_with_gemini(client, initial_analysis, transcript_data)
+        with stage("proofread"):
+            final_analysis = proofread_or_correct(client, initial_analysis, transcript_data, show)
         
         # Ausgabedaten erstellen
-        output_data = create_output_data(transcript_data, final_analysis)
+        output_data = create_output_data(transcript_data, final_analysis, show)
         
         if not output_data:
             logging.warning(f"Warnung: Keine gültigen Ausgabedaten für {file_path}")
             return False
         
+        # Startzeiten lokal am Transkript ausrichten, statt der Schätzung des Modells zu vertrauen
+        with stage("align_start_times"):
+            drift = summarize_drift(align_start_times(output_data["gegenwartsvorschlaege"], transcript_data))
+        logging.info(f"Startzeiten ausgerichtet: {drift['corrected']} von {drift['proposals']} korrigiert, "
+                     f"mittlere Abweichung {drift['mean_abs_drift_seconds']}s")
+        
         # Ausgabedatei speichern
         output_path = os.path.join(output_dir, output_filename)
-        save_output_data(output_data, output_path)
+        with stage("save_output"):
+            save_output_data(output_data, output_path)
         
         return True
         
+    except quota_scheduler.QuotaExhausted:
+        raise
     except Exception as e:
         logging.warning(f"Fehler bei der Verarbeitung von {file_path}: {e}")
         return False
 
+def episode_id_of(file_path: str) -> str:
+    """Episoden-ID einer Transkript-Datei (Name ohne "_transcript.json")."""
+    return get_output_filename(file_path)[:-len(".json")]
+
+def pack_transcript_files(file_paths: list, output_dir: str,
+                          budget: int = transcript_packing.DEFAULT_PACK_TOKENS) -> list:
+    """
+    Teilt noch nicht analysierte Transkripte in Pakete für gepackte Anfragen auf.
+
+    Die Reihenfolge (Priorität) bleibt grob erhalten; bereits analysierte
+    Transkripte bilden eigene Einträge, damit process_transcript sie überspringt.
+
+    Returns:
+        Listen von Dateipfaden, eine je Anfrage
+    """
+    token_counts = {}
+    batches = []
+    for file_path in file_paths:
+        if os.path.exists(os.path.join(output_dir, get_output_filename(file_path))):
+            batches.append([file_path])
+            continue
+        with stage("load_transcript"):
+            section = create_transcript_section(load_transcript(file_path))
+        token_counts[file_path] = gemini_cache.estimate_tokens([section])
+    packs = transcript_packing.pack_episodes(token_counts, budget)
+    logging.info(f"{len(token_counts)} offene Transkripte in {len(packs)} Anfragen gepackt "
+                 f"({sum(1 for pack in packs if len(pack) > 1)} mit mehreren Episoden).")
+    return batches + packs
+
+def run_packed_first_pass(client: genai.Client, file_paths: list,
+                          show: Optional[shows.Show] = None) -> Dict[str, dict]:
+    """Erste Analyse eines Pakets; liefert die übernommenen Analysen nach Dateipfad."""
+    by_id = {}
+    for file_path in file_paths:
+        with stage("load_transcript"):
+            by_id[episode_id_of(file_path)] = (file_path, correct_transcript_terms(load_transcript(file_path)))
+    with stage("analyze"):
+        analyses = analyze_packed(client, {episode_id: data for episode_id, (_, data) in by_id.items()}, show=show)
+    return {by_id[episode_id][0]: analysis for episode_id, analysis in analyses.items()}
+
+def batch_request_line(episode_id: str, transcript_data: dict, model: str = MODEL_NAME,
+                       show: Optional[shows.Show] = None) -> dict:
+    """Erste Analyse einer Episode als Zeile einer Batch-Datei (gleicher Prompt und Konfiguration wie einzeln)."""
+    config = create_generation_config(0.1, 0.9, None)
+    prompt = join_prompt([analysis_instructions(show), create_transcript_section(transcript_data), ANALYSIS_TAIL])
+    safety_settings = [{'category': setting.category.value, 'threshold': setting.threshold.value}
+                       for setting in config.safety_settings]
+    return batch_analysis.request_line(episode_id, prompt, config.temperature, config.top_p, config.top_k,
+                                       config.max_output_tokens, grounding=model == MODEL_NAME,
+                                       safety_settings=safety_settings)
+
+def parse_batch_answer(answer: Optional[dict]) -> Optional[dict]:
+    """Erste Analyse aus einem Batch-Ergebnis; None bei Fehler, abgeschnittener oder unlesbarer Antwort."""
+    if not answer or answer.get('error') or answer.get('finish_reason') == "MAX_TOKENS":
+        return None
+    try:
+        result = json.loads(extract_json_text(answer.get('text', '')))
+    except json.JSONDecodeError:
+        return None
+    return result if isinstance(result, dict) and isinstance(result.get("gegenwartsvorschlaege"), list) else None
+
+def run_batch_first_pass(client: genai.Client, file_paths: list, output_dir: str,
+                         show: Optional[shows.Show] = None, transport: Any = None,
+                         batch_dir: str = batch_analysis.BATCH_DIR, poll_seconds: float = batch_analysis.POLL_SECONDS,
+                         max_wait_seconds: float = batch_analysis.MAX_WAIT_SECONDS,
+                         sleep: Callable[[float], None] = time.sleep) -> Dict[str, dict]:
+    """
+    Erste Analyse aller noch nicht analysierten Transkripte als ein Batch-Job.
+
+    Die Anfragen landen in einer JSONL-Datei, die als Batch-Job (Standard:
+    Gemini Batch API, transport austauschbar) eingereicht und bis zum Ende
+    abgefragt wird. Ein abgebrochener Lauf setzt beim nächsten Mal das Warten
+    auf denselben Job fort. Übernommene Ergebnisse gehen wie gepackte Analysen
+    über process_transcript (Korrekturlesen, create_output_data,
+    save_output_data); fehlende, abgeschnittene oder unplausible Antworten
+    sowie alle Episoden eines fehlgeschlagenen Jobs werden dort einzeln
+    analysiert.
+
+    Returns:
+        Übernommene erste Analysen nach Dateipfad
+
+    Raises:
+        batch_analysis.BatchPending: Der Job lief nach max_wait_seconds noch; seine
+            Episoden dürfen nicht einzeln analysiert werden, sonst passt der
+            nächste Lauf nicht mehr zu Batch-Datei und Job
+    """
+    transport = transport or batch_analysis.GeminiBatchTransport(client)
+    by_id = {}
+    for file_path in file_paths:
+        if os.path.exists(os.path.join(output_dir, get_output_filename(file_path))):
+            continue
+        with stage("load_transcript"):
+            by_id[episode_id_of(file_path)] = (file_path, correct_transcript_terms(load_transcript(file_path)))
+    if not by_id:
+        return {}
+    with stage("build_prompt"):
+        lines = {episode_id: batch_request_line(episode_id, data, show=show) for episode_id, (_, data) in by_id.items()}
+    try:
+        with stage("batch_job"):
+            results = batch_analysis.run_batch(transport, lines, MODEL_NAME, batch_dir,
+                                               f"analysis_{(show or shows.DEFAULT).id}", poll_seconds,
+                                               max_wait_seconds, sleep)
+    except batch_analysis.BatchPending:
+        raise
+    except Exception as e:
+        logging.warning(f"Fehler beim Batch-Job: {e}")
+        results = None
+    if results is None:
+        logging.warning("Batch-Job ohne Ergebnis, alle Transkripte werden einzeln analysiert.")
+        return {}
+    hosts = (show or shows.DEFAULT).hosts
+    accepted = {}
+    for episode_id, (file_path, transcript_data) in by_id.items():
+        analysis = parse_batch_answer(results.get(episode_id))
+        reason = "parse_failure" if analysis is None else model_tiering.escalation_reason(
+            analysis, transcript_data, hosts=hosts)
+        if reason is None:
+            accepted[file_path] = analysis
+        else:
+            logging.info(f"Batch-Ergebnis von {episode_id} nicht übernommen ({reason}), analysiere einzeln.")
+    profiling.count("batch_episodes", len(accepted))
+    profiling.count("batch_fallbacks", len(by_id) - len(accepted))
+    logging.info(f"Batch-Job: {len(accepted)} von {len(by_id)} Episoden übernommen.")
+    return accepted
+
+def get_first_pass_path(file_path: str, first_pass_dir: str = FIRST_PASS_DIR) -> str:
+    """Pfad der ersten Analyse zu einer Transkript-Datei (gleicher Name wie die finale Analyse)."""
+    return os.path.join(first_pass_dir, get_output_filename(file_path))
+
+def run_first_pass(client: genai.Client, file_path: str, first_pass_path: str,
+                   show: Optional[shows.Show] = None) -> bool:
+    """
+    Führt nur die erste Analyse durch und speichert deren Rohergebnis.
+
+    Ein leeres Ergebnis wird ebenfalls gespeichert, damit das Korrekturlesen
+    daraus eine leere Analyse erzeugen kann. Bei einem API-Fehler wird nichts
+    gespeichert.
+    """
+    logging.info(f"Erste Analyse für: {file_path}")
+    with stage("load_transcript"):
+        transcript_data = correct_transcript_terms(load_transcript(file_path))
+    with stage("analyze"):
+        initial_analysis = analyze_with_model_tiers(client, transcript_data, show)
+    if initial_analysis is None:
+        logging.warning(f"Erste Analyse fehlgeschlagen: {file_path}")
+        return False
+    if "gegenwartsvorschlaege" not in initial_analysis:
+        initial_analysis = {"gegenwartsvorschlaege": []}
+    json_writer.write_json(first_pass_path, initial_analysis)
+    logging.info(f"Erste Analyse gespeichert in: {first_pass_path} "
+                 f"({len(initial_analysis['gegenwartsvorschlaege'])} Vorschläge)")
+    return True
+
+def run_proofread(client: genai.Client, file_path: str, first_pass_path: str, output_path: str,
+                  show: Optional[shows.Show] = None) -> bool:
+    """
+    Liest eine gespeicherte erste Analyse Korrektur, richtet die Startzeiten aus und speichert das Ergebnis.
+    """
+    logging.info(f"Korrekturlesen für: {file_path}")
+    with stage("load_transcript"):
+        transcript_data = correct_transcript_terms(load_transcript(file_path))
+    with open(first_pass_path, 'r', encoding='utf-8') as f:
+        initial_analysis = json.load(f)
+
+    if initial_analysis.get("gegenwartsvorschlaege"):
+        with stage("proofread"):
+            final_analysis = proofread_or_correct(client, initial_analysis, transcript_data, show)
+    else:
+        logging.info(f"Keine Gegenwartsvorschläge gefunden in: {file_path}")
+        final_analysis = {"gegenwartsvorschlaege": []}
+
+    output_data = create_output_data(transcript_data, final_analysis, show)
+    if not output_data:
+        logging.warning(f"Warnung: Keine gültigen Ausgabedaten für {file_path}")
+        return False
+    if output_data["gegenwartsvorschlaege"]:
+        with stage("align_start_times"):
+            drift = summarize_drift(align_start_times(output_data["gegenwartsvorschlaege"], transcript_data))
+        logging.info(f"Startzeiten ausgerichtet: {drift['corrected']} von {drift['proposals']} korrigiert, "
+                     f"mittlere Abweichung {drift['mean_abs_drift_seconds']}s")
+    with stage("save_output"):
+        save_output_data(output_data, output_path)
+    return True
+
 def main() -> None:
     """Hauptfunktion zum Ausführen des Skripts."""
     
     parser = argparse.ArgumentParser(description="Analysiert Podcast-Transkripte mit der Gemini API")
-    parser.add_argument("--input-dir", default=DATA_DIR, help="Verzeichnis mit den Transkript-Dateien")
-    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Verzeichnis für die Ausgabedaten")
+    parser.add_argument("--show", help=f"Sendung aus {shows.SHOWS_FILE} (Standard: ${shows.SHOW_ENV} oder die erste)")
+    parser.add_argument("--input-dir",
+                        help=f"Verzeichnis mit den Transkript-Dateien (Standard: {DATA_DIR} der Sendung)")
+    parser.add_argument("--output-dir", help=f"Verzeichnis für die Ausgabedaten (Standard: {OUTPUT_DIR} der Sendung)")
     parser.add_argument("--file", help="Spezifische Datei zum Verarbeiten (optional)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--pack", action="store_true",
+                      help="Mehrere kurze Transkripte in einer Anfrage analysieren (bis --pack-tokens)")
+    mode.add_argument("--batch", action="store_true",
+                      help="Erste Analysen aller offenen Transkripte als Batch-Job einreichen und abwarten")
+    parser.add_argument("--pack-tokens", type=int, default=transcript_packing.DEFAULT_PACK_TOKENS,
+                        help=f"Token-Budget der Transkripte je gepackter Anfrage "
+                             f"(Standard: {transcript_packing.DEFAULT_PACK_TOKENS})")
+    parser.add_argument("--batch-dir", default=batch_analysis.BATCH_DIR,
+                        help=f"Verzeichnis für Batch-Dateien und Job-Status (Standard: {batch_analysis.BATCH_DIR})")
+    parser.add_argument("--batch-max-wait", type=float, default=batch_analysis.MAX_WAIT_SECONDS,
+                        help="Höchstens so viele Sekunden auf den Batch-Job warten; der nächste Lauf wartet weiter")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.configure_from_args("gemini_analyzer", args)
+    show = shows.get_show(args.show)
+    args.input_dir = args.input_dir or show.path(DATA_DIR)
+    args.output_dir = args.output_dir or show.path(OUTPUT_DIR)
     
     # Gemini-Client initialisieren
     client = setup_gemini_client()
+    gemini_cache.configure(client)
+    ledger = quota_scheduler.configure()
+    request_hedging.configure()
     
     # Ausgabeverzeichnis erstellen, falls es nicht existiert
     os.makedirs(args.output_dir, exist_ok=True)
     
     # Transkript-Dateien finden
+    stale_files = set()
     if args.file:
         transcript_files = [args.file]
+        logging.info(f"Gefundene Transkript-Dateien: {len(transcript_files)}")
     else:
+        from pipeline import STAMPS_FILE, load_stamps
+
         transcript_files = glob.glob(os.path.join(args.input_dir, "*_transcript.json"))
-    
-    logging.info(f"Gefundene Transkript-Dateien: {len(transcript_files)}")
+        logging.info(f"Gefundene Transkript-Dateien: {len(transcript_files)}")
+        # Neueste Folgen zuerst, damit ein erschöpftes Tagesbudget nur das Nachholen alter Folgen verzögert;
+        # aktuelle Analysen stehen nicht in der Warteschlange, veraltete werden ersetzt
+        by_id = {get_output_filename(path)[:-len(".json")]: path for path in transcript_files}
+        stamps = load_stamps(show.path(STAMPS_FILE))
+
+        def output_path_of(episode_id: str) -> str:
+            return os.path.join(args.output_dir, f"{episode_id}.json")
+
+        ordered_ids = quota_scheduler.prioritize(
+            list(by_id), quota_scheduler.load_release_dates(show.path(quota_scheduler.EPISODE_LINKS_FILE)),
+            lambda episode_id: os.path.exists(output_path_of(episode_id)),
+            lambda episode_id: analysis_is_stale(by_id[episode_id], output_path_of(episode_id), stamps))
+        transcript_files = [by_id[episode_id] for episode_id in ordered_ids]
+        stale_files = {by_id[episode_id] for episode_id in ordered_ids if os.path.exists(output_path_of(episode_id))}
     
     # Transkripte verarbeiten
     success_count = 0
-    for file_path in transcript_files:
-        if process_transcript(client, file_path, args.output_dir):
-            success_count += 1
+    processed = 0
+    first_passes = {}
+    batches = [[file_path] for file_path in transcript_files]
+    if args.batch:
+        try:
+            first_passes = run_batch_first_pass(client, transcript_files, args.output_dir, show,
+                                                batch_dir=args.batch_dir, max_wait_seconds=args.batch_max_wait)
+        except batch_analysis.BatchPending as e:
+            # Alle offenen Transkripte stecken im Job; der nächste Lauf wartet weiter und übernimmt ihn
+            logging.info(f"{e}. Die offenen Transkripte folgen im nächsten Lauf aus dem Batch-Job.")
+            batches = []
+    elif args.pack:
+        batches = pack_transcript_files(transcript_files, args.output_dir, args.pack_tokens)
+    for batch in batches:
+        try:
+            if len(batch) > 1:
+                first_passes.update(run_packed_first_pass(client, batch, show))
+            for file_path in batch:
+                # Ohne übernommene Analyse aus Paket oder Batch-Job folgt die Einzelanalyse
+                if process_transcript(client, file_path, args.output_dir, show, first_passes.get(file_path),
+                                      first_pass_dir=show.path(FIRST_PASS_DIR), reanalyze=file_path in stale_files):
+                    success_count += 1
+                processed += 1
+        except quota_scheduler.QuotaExhausted as e:
+            remaining = len(transcript_files) - processed
+            logging.warning(f"{e}. Die übrigen {remaining} Transkripte folgen im nächsten Lauf.")
+            break
+    gemini_cache.close()
+    ledger.log_summary()
+    model_tiering.stats.log_summary()
+    request_hedging.stats.log_summary()
+    asr_corrections.stats.log_summary()
+    json_writer.log_summary()
     
     logging.info(f"Verarbeitung abgeschlossen. {success_count} von {len(transcript_files)} Transkripten erfolgreich verarbeitet.")
 
@@ -0,0 +1,283 @@
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from google.genai import types
+
+import profiling
+
+# 1. Constants
+CONTEXT_CACHE_ENV = "GEMINI_CONTEXT_CACHE"  # "0" disables explicit caching
+CACHE_TTL_ENV = "GEMINI_CACHE_TTL"
+CACHE_MIN_TOKENS_ENV = "GEMINI_CACHE_MIN_TOKENS"
+DEFAULT_TTL_SECONDS = 900
+REFRESH_MARGIN_SECONDS = 120  # extend a cache's TTL when it would expire sooner than this
+MIN_CACHE_TOKENS = 1024  # the API rejects smaller caches; the exact minimum depends on the model
+CHARS_PER_TOKEN = 4  # rough estimate for German text, only used to skip hopeless cache requests
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def estimate_tokens(texts: List[str]) -> int:
+    return sum(len(text) for text in texts) // CHARS_PER_TOKEN
+
+
+def join_prompt(texts: List[str]) -> str:
+    return "\n\n".join(text for text in texts if text)
+
+
+def user_content(texts: List[str]) -> types.Content:
+    return types.Content(role="user", parts=[types.Part.from_text(text=join_prompt(texts))])
+
+
+def tools_fingerprint(tools: Optional[list]) -> str:
+    """
+    Identifies the tools a cache is created with (e.g. Google Search grounding); empty without tools.
+    """
+    if not tools:
+        return ""
+    return "|".join(tool.model_dump_json(exclude_none=True) if hasattr(tool, 'model_dump_json') else repr(tool)
+                    for tool in tools)
+
+
+def is_cache_miss(error: Exception) -> bool:
+    """
+    True if a request failed because its cached content expired or was deleted.
+    """
+    message = str(error).lower()
+    return ("cachedcontent" in message or "cached content" in message) and (
+        "not found" in message or "404" in message or "expired" in message or "permission" in message
+    )
+
+
+class ContextCache:
+    """
+    Explicit Gemini context caching for the analysis passes, with fallback to plain requests.
+
+    A prompt is passed in three pieces: a static prefix (the instructions), the
+    episode material (e.g. the transcript) and a short tail. The prefix is cached
+    once per model, tools and run. Episode material is cached together with the prefix
+    as soon as a second request for the same model and material comes in
+    (retries after a bad response, continuations), because a cache only pays off
+    when it is read more than once. Caches are created with a TTL, extended
+    while in use and deleted by close(). Since a cache carries the tools of the
+    request that created it, a grounded and an ungrounded request never share one.
+
+    If caching is unavailable, the request is sent without a cache: content the
+    API rejects as too small is not offered again, and a model that cannot cache
+    at all (unsupported, API error) is not tried again in this run.
+
+    The pipelined run analyzes several episodes at once; a lock keeps two
+    threads from creating the same cache twice.
+
+    Args:
+        client: google-genai client (or a stand-in with the same surface)
+        ttl_seconds: Lifetime of new caches
+        min_tokens: Estimated size below which no cache is requested
+        clock: Time source, replaceable in tests
+    """
+
+    def __init__(self, client: Any, ttl_seconds: int = DEFAULT_TTL_SECONDS, min_tokens: int = MIN_CACHE_TOKENS,
+                 clock: Callable[[], float] = time.time):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.clock = clock
+        self._caches: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._uses: Dict[Tuple[str, str], int] = {}
+        self._unavailable: Set[str] = set()
+        self._rejected: Set[Tuple[str, str]] = set()
+        self._lock = threading.RLock()
+        self.stats = {'caches_created': 0, 'cache_requests': 0, 'uncached_requests': 0, 'fallbacks': 0,
+                      'prompt_tokens': 0, 'cached_tokens': 0}
+
+    @staticmethod
+    def _key(kind: str, texts: List[str], tools: Optional[list] = None) -> str:
+        digest = hashlib.sha256(tools_fingerprint(tools).encode('utf-8'))
+        digest.update(b'\0')
+        for text in texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        return f"{kind}:{digest.hexdigest()[:16]}"
+
+    def _get_or_create(self, model: str, key: str, texts: List[str], tools: Optional[list],
+                       display_name: str) -> Optional[str]:
+        if model in self._unavailable or (model, key) in self._rejected or estimate_tokens(texts) < self.min_tokens:
+            return None
+        entry = self._caches.get((model, key))
+        now = self.clock()
+        if entry and entry['expires_at'] - now < REFRESH_MARGIN_SECONDS:
+            try:
+                self.client.caches.update(
+                    name=entry['name'], config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s")
+                )
+                entry['expires_at'] = now + self.ttl_seconds
+            except Exception as e:
+                logging.info(f"Could not extend cache {entry['name']}, creating a new one: {e}")
+                self._caches.pop((model, key), None)
+                entry = None
+        if entry:
+            return entry['name']
+
+        try:
+            cache = self.client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    contents=[user_content(texts)],
+                    tools=tools,
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name=display_name[:100],
+                ),
+            )
+        except Exception as e:
+            self.stats['fallbacks'] += 1
+            if "token" in str(e).lower():
+                # Too small (or too large) for this model; other content may still be cacheable
+                logging.info(f"Not caching {display_name} for {model}: {e}")
+                self._rejected.add((model, key))
+            else:
+                logging.warning(f"Context caching unavailable for {model}, sending uncached requests: {e}")
+                self._unavailable.add(model)
+            return None
+        self._caches[(model, key)] = {'name': cache.name, 'expires_at': now + self.ttl_seconds}
+        self.stats['caches_created'] += 1
+        profiling.count("gemini_caches_created")
+        logging.info(f"Created context cache {cache.name} for {model} ({display_name}, "
+                     f"~{estimate_tokens(texts)} tokens, TTL {self.ttl_seconds}s)")
+        return cache.name
+
+    def prepare(self, model: str, prefix: List[str], episode: List[str], tail: List[str],
+                tools: Optional[list] = None, label: str = "episode") -> Dict[str, Any]:
+        """
+        Decides which part of a prompt comes from a cache.
+
+        Returns:
+            Dictionary with 'contents' for generate_content, 'cached_content'
+            (cache name or None) and 'tools' (None if the cache carries them,
+            since requests using a cache may not set tools themselves)
+        """
+        with self._lock:
+            episode_key = self._key("episode", prefix + episode, tools)
+            self._uses[(model, episode_key)] = self._uses.get((model, episode_key), 0) + 1
+
+            cache_name = None
+            request_texts = tail
+            if any(episode) and ((model, episode_key) in self._caches or self._uses[(model, episode_key)] > 1):
+                cache_name = self._get_or_create(model, episode_key, prefix + episode, tools, label)
+            if cache_name is None:
+                request_texts = episode + tail
+                cache_name = self._get_or_create(model, self._key("prefix", prefix, tools), prefix, tools, "prefix")
+            if cache_name is None:
+                request_texts = prefix + episode + tail
+
+            self.stats['cache_requests' if cache_name else 'uncached_requests'] += 1
+            return {
+                'contents': [user_content(request_texts)],
+                'cached_content': cache_name,
+                'tools': None if cache_name else tools,
+            }
+
+    def invalidate(self, cache_name: str) -> None:
+        """
+        Forgets a cache the API no longer knows, so the next prepare() creates a fresh one.
+        """
+        with self._lock:
+            for key, entry in list(self._caches.items()):
+                if entry['name'] == cache_name:
+                    del self._caches[key]
+
+    def release(self, model: str, prefix: List[str], episode: List[str], tools: Optional[list] = None) -> None:
+        """
+        Deletes the episode cache for this material early, once its episode is done.
+        """
+        key = (model, self._key("episode", prefix + episode, tools))
+        with self._lock:
+            entry = self._caches.pop(key, None)
+            self._uses.pop(key, None)
+        if entry:
+            self._delete(entry['name'])
+
+    def _delete(self, cache_name: str) -> None:
+        try:
+            self.client.caches.delete(name=cache_name)
+        except Exception as e:
+            logging.info(f"Could not delete cache {cache_name} (it expires on its own): {e}")
+
+    def record_usage(self, response: Any) -> None:
+        """
+        Adds the prompt and cached token counts of a response to the stats and the run report.
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_token_count', None) or 0
+        cached_tokens = getattr(usage, 'cached_content_token_count', None) or 0
+        with self._lock:
+            self.stats['prompt_tokens'] += prompt_tokens
+            self.stats['cached_tokens'] += cached_tokens
+        profiling.count("gemini_prompt_tokens", prompt_tokens)
+        profiling.count("gemini_cached_tokens", cached_tokens)
+
+    def close(self) -> None:
+        """
+        Deletes all caches of this run and logs the token savings.
+        """
+        with self._lock:
+            for entry in self._caches.values():
+                self._delete(entry['name'])
+            self._caches.clear()
+            self._uses.clear()
+        share = self.stats['cached_tokens'] / self.stats['prompt_tokens'] if self.stats['prompt_tokens'] else 0.0
+        logging.info(
+            "Context caching: {caches_created} caches created, {cache_requests} requests with cache, "
+            "{uncached_requests} without, {cached_tokens} of {prompt_tokens} prompt tokens cached".format(
+                **self.stats) + f" ({share:.0%})."
+        )
+
+
+_context_cache: Optional[ContextCache] = None
+
+
+def configure(client: Any) -> Optional[ContextCache]:
+    """
+    Enables context caching for the given client unless GEMINI_CONTEXT_CACHE=0.
+
+    GEMINI_CACHE_TTL and GEMINI_CACHE_MIN_TOKENS override the defaults.
+    Remaining caches are deleted when the process exits. Returns the active
+    cache, or None if caching stays disabled.
+    """
+    global _context_cache
+    if _context_cache is not None:
+        _context_cache.close()
+        _context_cache = None
+    if os.environ.get(CONTEXT_CACHE_ENV, '1').lower() in ('0', 'false', 'no'):
+        logging.info("Context caching disabled.")
+        return None
+    _context_cache = ContextCache(
+        client,
+        ttl_seconds=int(os.environ.get(CACHE_TTL_ENV, DEFAULT_TTL_SECONDS)),
+        min_tokens=int(os.environ.get(CACHE_MIN_TOKENS_ENV, MIN_CACHE_TOKENS)),
+    )
+    atexit.register(close)
+    return _context_cache
+
+
+def get(client: Any) -> Optional[ContextCache]:
+    """
+    The active cache if it belongs to this client; requests from other clients stay uncached.
+    """
+    if _context_cache is not None and _context_cache.client is client:
+        return _context_cache
+    return None
+
+
+def close() -> None:
+    global _context_cache
+    if _context_cache is not None:
+        _context_cache.close()
+        _context_cache = None
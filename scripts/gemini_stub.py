@@ -0,0 +1,225 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('gemini_stub')
+
+EMPTY_ANALYSIS = '```json\n{"gegenwartsvorschlaege": []}\n```'
+
+
+def count_tokens(contents: Any) -> int:
+    """
+    Approximates the token count of request contents: one token per four characters of text.
+    """
+    if contents is None:
+        return 0
+    if isinstance(contents, str):
+        return max(1, len(contents) // 4)
+    if isinstance(contents, (list, tuple)):
+        return sum(count_tokens(item) for item in contents)
+    parts = getattr(contents, 'parts', None)
+    if parts is not None:
+        return sum(count_tokens(getattr(part, 'text', None)) for part in parts)
+    return 0
+
+
+class StubError(Exception):
+    """Error with the status text the real API puts into its exception messages."""
+
+
+class _Caches:
+    def __init__(self, stub: "GeminiStubClient"):
+        self._stub = stub
+
+    def create(self, *, model: str, config: Any = None) -> SimpleNamespace:
+        stub = self._stub
+        stub.calls.append(('caches.create', model))
+        if stub.caching_models is not None and model not in stub.caching_models:
+            raise StubError(f"400 INVALID_ARGUMENT: Model {model} does not support CachedContent.")
+        tokens = count_tokens(getattr(config, 'contents', None))
+        if tokens < stub.min_cache_tokens:
+            raise StubError(f"400 INVALID_ARGUMENT: Cached content is too small. total_token_count={tokens}, "
+                            f"min_total_token_count={stub.min_cache_tokens}")
+        stub._next_id += 1
+        name = f"cachedContents/stub{stub._next_id}"
+        stub.caches_by_name[name] = {
+            'model': model,
+            'tokens': tokens,
+            'tools': getattr(config, 'tools', None),
+            'expires_at': stub.clock() + _ttl_seconds(getattr(config, 'ttl', None)),
+        }
+        return SimpleNamespace(name=name, model=model)
+
+    def update(self, *, name: str, config: Any = None) -> SimpleNamespace:
+        stub = self._stub
+        stub.calls.append(('caches.update', name))
+        cache = stub._live_cache(name)
+        cache['expires_at'] = stub.clock() + _ttl_seconds(getattr(config, 'ttl', None))
+        return SimpleNamespace(name=name, model=cache['model'])
+
+    def delete(self, *, name: str, config: Any = None) -> None:
+        self._stub.calls.append(('caches.delete', name))
+        self._stub.caches_by_name.pop(name, None)
+
+
+class _Models:
+    def __init__(self, stub: "GeminiStubClient"):
+        self._stub = stub
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None) -> SimpleNamespace:
+        self._stub.calls.append(('models.generate_content', model))
+        return self._respond(model, contents, config)
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None) -> Iterator[SimpleNamespace]:
+        """
+        Yields the response in chunks; only the last chunk carries finish_reason and usage_metadata.
+        """
+        self._stub.calls.append(('models.generate_content_stream', model))
+        response = self._respond(model, contents, config)
+        text = response.text
+        size = self._stub.stream_chunk_chars
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        for index, piece in enumerate(pieces):
+            last = index == len(pieces) - 1
+            yield SimpleNamespace(
+                text=piece,
+                candidates=[SimpleNamespace(finish_reason=response.finish_reason if last else None)],
+                usage_metadata=response.usage_metadata if last else None,
+            )
+
+    def _respond(self, model: str, contents: Any, config: Any) -> SimpleNamespace:
+        stub = self._stub
+        stub.requests.append({'model': model, 'contents': contents, 'config': config})
+        cached_tokens = 0
+        cache_name = getattr(config, 'cached_content', None)
+        if cache_name:
+            cache = stub._live_cache(cache_name)
+            if cache['model'] != model:
+                raise StubError(f"400 INVALID_ARGUMENT: CachedContent {cache_name} belongs to {cache['model']}.")
+            if getattr(config, 'tools', None) or getattr(config, 'system_instruction', None):
+                raise StubError("400 INVALID_ARGUMENT: CachedContent can not be used with GenerateContent request "
+                                "setting system_instruction, tools or tool_config.")
+            cached_tokens = cache['tokens']
+        prompt_tokens = count_tokens(contents) + cached_tokens
+        text = stub.responder(model, contents)
+        finish_reason = "STOP"
+        limit = stub.output_token_limit or getattr(config, 'max_output_tokens', None)
+        if limit and count_tokens(text) > limit:
+            text = text[:limit * 4]
+            finish_reason = "MAX_TOKENS"
+        response = SimpleNamespace(
+            text=text,
+            finish_reason=finish_reason,
+            candidates=[SimpleNamespace(finish_reason=finish_reason)],
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=prompt_tokens,
+                cached_content_token_count=cached_tokens or None,
+                candidates_token_count=count_tokens(text),
+            ),
+        )
+        stub.responses.append(response)
+        return response
+
+
+def _ttl_seconds(ttl: Optional[str]) -> float:
+    return float(ttl.rstrip('s')) if ttl else 3600.0
+
+
+class GeminiStubClient:
+    """
+    In-process stand-in for the parts of google-genai's Client the analyzer uses.
+
+    Implements models.generate_content(_stream) and caches.create/update/delete
+    with the rules of the real API that matter here: per-model caches, a minimum
+    cache size, TTL expiry, no tools in requests that use a cache, and responses
+    cut off at the output token limit with finish_reason MAX_TOKENS.
+    Token counts are approximated, and usage_metadata reports prompt and cached
+    tokens like the real responses. Every call is recorded in 'calls', and the
+    arguments of every generate_content call in 'requests'.
+
+    Usage:
+        client = GeminiStubClient(responder=lambda model, contents: '{"gegenwartsvorschlaege": []}')
+        gemini_cache.configure(client)
+        analyze_transcript_with_gemini(client, transcript_data)
+
+    Args:
+        responder: Returns the response text for (model, contents)
+        caching_models: Models that accept caches (None: all)
+        min_cache_tokens: Smallest cache the stub accepts
+        clock: Time source for TTLs, replaceable in tests
+        output_token_limit: Cut responses after this many tokens with finish_reason MAX_TOKENS
+            (default: the request's max_output_tokens)
+        stream_chunk_chars: Size of the chunks generate_content_stream yields
+    """
+
+    def __init__(self, responder: Optional[Callable[[str, Any], str]] = None,
+                 caching_models: Optional[List[str]] = None, min_cache_tokens: int = 1024,
+                 clock: Callable[[], float] = time.time, output_token_limit: Optional[int] = None,
+                 stream_chunk_chars: int = 64):
+        self.responder = responder or (lambda model, contents: EMPTY_ANALYSIS)
+        self.min_cache_tokens = min_cache_tokens
+        self.clock = clock
+        self.output_token_limit = output_token_limit
+        self.stream_chunk_chars = stream_chunk_chars
+        self.caches_by_name: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[tuple] = []
+        self.requests: List[Dict[str, Any]] = []
+        self.responses: List[SimpleNamespace] = []
+        self._next_id = 0
+        self.caching_models = caching_models
+        self.models = _Models(self)
+        self.caches = _Caches(self)
+
+    def _live_cache(self, name: str) -> Dict[str, Any]:
+        cache = self.caches_by_name.get(name)
+        if cache is None or cache['expires_at'] <= self.clock():
+            self.caches_by_name.pop(name, None)
+            raise StubError(f"404 NOT_FOUND: CachedContent not found (or permission denied): {name}")
+        return cache
+
+
+def run_demo(transcript_files: List[str], passes: int) -> None:
+    """
+    Runs the analysis prompt of each transcript against the stub and prints the token report.
+    """
+    import gemini_cache
+    from gemini_analyzer import analyze_transcript_with_gemini, load_transcript
+
+    client = GeminiStubClient()
+    context_cache = gemini_cache.configure(client)
+    for file_path in transcript_files:
+        transcript_data = load_transcript(file_path)
+        for _ in range(passes):
+            analyze_transcript_with_gemini(client, transcript_data)
+    stats = dict(context_cache.stats) if context_cache else {}
+    gemini_cache.close()
+    print(json.dumps(stats, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Runs the Gemini analysis prompts against a local stand-in and reports cached tokens."
+    )
+    parser.add_argument("--transcripts-dir", default="data/transcripts", help="Directory with transcript JSON files")
+    parser.add_argument("--limit", type=int, default=3, help="Number of transcripts to send")
+    parser.add_argument("--passes", type=int, default=2,
+                        help="Requests per transcript (the second one can reuse the episode cache)")
+    args = parser.parse_args()
+
+    transcript_files = sorted(glob.glob(os.path.join(args.transcripts_dir, "*_transcript.json")))[:args.limit]
+    logger.info(f"Sending {len(transcript_files)} transcripts x {args.passes} passes to the stub")
+    run_demo(transcript_files, args.passes)
+
+
+if __name__ == "__main__":
+    main()
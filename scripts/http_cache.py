@@ -0,0 +1,238 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+logger = logging.getLogger('http_cache')
+
+# Caching is enabled by pointing HTTP_CACHE_DIR at a directory; HTTP_CACHE_OFFLINE=1 serves from it only.
+HTTP_CACHE_DIR_ENV = 'HTTP_CACHE_DIR'
+HTTP_CACHE_OFFLINE_ENV = 'HTTP_CACHE_OFFLINE'
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a request has no cached response."""
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for requests.Response for answers served from the cache.
+    """
+
+    def __init__(self, url: str, body: Any, headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.status_code = 200
+        self.headers = headers or {}
+        self.from_cache = True
+        self._body = body
+
+    @property
+    def text(self) -> str:
+        return json.dumps(self._body, ensure_ascii=False)
+
+    def json(self) -> Any:
+        return self._body
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the cache key of a request from its URL and query parameters (headers are ignored).
+    """
+    normalized_params = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    raw = json.dumps([url, normalized_params], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Parse a Cache-Control header into a dictionary of lower-cased directives.
+    """
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition('=')
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: Dict[str, str]) -> float:
+    """
+    Seconds a response may be served without revalidation according to Cache-Control.
+
+    Responses without max-age, or with no-cache, are stored but always revalidated.
+    """
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-cache' in directives or 'no-store' in directives:
+        return 0.0
+    max_age = directives.get('max-age')
+    if max_age is None or not re.fullmatch(r'\d+', max_age):
+        return 0.0
+    age = headers.get('Age', '0')
+    return max(0.0, float(max_age) - (float(age) if age.isdigit() else 0.0))
+
+
+class CachedFetcher:
+    """
+    GET requests through an on-disk cache with conditional revalidation.
+
+    Each response body is stored with its ETag, Last-Modified and Cache-Control
+    freshness. Fresh entries are served without a request, stale entries are
+    revalidated with If-None-Match/If-Modified-Since so an unchanged resource
+    costs a 304, and in offline mode only the cache is consulted.
+
+    Args:
+        cache_dir: Directory of the cache; None disables caching (plain pass-through)
+        session: Session used for network requests
+        offline: Serve from the cache only and raise CacheMiss for unknown requests
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, session: Optional[requests.Session] = None,
+                 offline: bool = False):
+        self.cache_dir = cache_dir
+        self.session = session or requests.Session()
+        self.offline = offline
+        self.stats = {'fresh': 0, 'revalidated': 0, 'downloaded': 0, 'offline': 0}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, session: Optional[requests.Session] = None) -> "CachedFetcher":
+        """Create a fetcher configured by HTTP_CACHE_DIR and HTTP_CACHE_OFFLINE."""
+        offline = os.environ.get(HTTP_CACHE_OFFLINE_ENV, '').lower() in ('1', 'true', 'yes')
+        return cls(os.environ.get(HTTP_CACHE_DIR_ENV) or None, session=session, offline=offline)
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def _store_entry(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename, so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+        """
+        Perform a cached GET request.
+
+        Args:
+            url: Request URL
+            params: Query parameters (part of the cache key)
+            headers: Request headers (not part of the cache key, e.g. Authorization)
+
+        Returns:
+            A CachedResponse for answers served from the cache, otherwise the
+            requests.Response of the network request (error responses are not cached)
+
+        Raises:
+            CacheMiss: In offline mode if the request was never cached
+        """
+        if not self.cache_dir:
+            return self.session.get(url, headers=headers, params=params)
+
+        key = cache_key(url, params)
+        entry = self._load_entry(key)
+
+        if self.offline:
+            if entry is None:
+                raise CacheMiss(f"No cached response for {url} {params or ''}")
+            self._count('offline')
+            return CachedResponse(url, entry['body'], entry.get('headers'))
+
+        if entry is not None and entry.get('expires_at', 0) > time.time():
+            self._count('fresh')
+            logger.debug(f"Serving fresh cache entry for {url}")
+            return CachedResponse(url, entry['body'], entry.get('headers'))
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.session.get(url, headers=request_headers, params=params)
+
+        if response.status_code == 304 and entry is not None:
+            self._count('revalidated')
+            logger.debug(f"Cache entry for {url} revalidated")
+            entry['expires_at'] = time.time() + freshness_lifetime(response.headers)
+            self._store_entry(key, entry)
+            return CachedResponse(url, entry['body'], entry.get('headers'))
+
+        if not 200 <= response.status_code < 300:
+            return response
+
+        self._count('downloaded')
+        if 'no-store' in parse_cache_control(response.headers.get('Cache-Control')):
+            return response
+        self._store_entry(key, {
+            'url': url,
+            'params': params or {},
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'expires_at': time.time() + freshness_lifetime(response.headers),
+            'headers': {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'cache-control')},
+            'body': response.json(),
+        })
+        return response
+
+    def log_stats(self) -> None:
+        """Log how many requests were served fresh, revalidated, downloaded or offline."""
+        if self.cache_dir:
+            logger.info(
+                "HTTP cache: {fresh} fresh, {revalidated} revalidated (304), {downloaded} downloaded, "
+                "{offline} served offline".format(**self.stats)
+            )
+
+
+_default_fetcher: Optional[CachedFetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_default_fetcher() -> CachedFetcher:
+    """
+    Get the process-wide fetcher configured from the environment.
+    """
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = CachedFetcher.from_env()
+        return _default_fetcher
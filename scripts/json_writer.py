@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+import profiling
+
+# 1. Constants
+FLOAT_DIGITS = 6  # decimals floats are rounded to, so recomputed values do not differ in the last bit
+NEW_FILE_MODE = 0o644  # mkstemp creates 0600; new outputs should stay readable like the files they replace
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_lock = threading.Lock()
+counts: Dict[str, int] = {'written': 0, 'skipped': 0}
+
+
+def normalize_floats(value: Any) -> Any:
+    """
+    Rounds every float in a JSON-like structure to FLOAT_DIGITS decimals.
+
+    Negative zero becomes 0.0; NaN and infinity are rejected, since they are not valid JSON.
+    """
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot write non-finite number {value} as JSON")
+        return round(value, FLOAT_DIGITS) + 0.0
+    if isinstance(value, dict):
+        return {key: normalize_floats(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_floats(item) for item in value]
+    return value
+
+
+def serialize(data: Any, indent: Optional[int] = 2, ensure_ascii: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serializes data the same way on every run.
+
+    Key order follows the dicts as built, which is stable for everything the
+    scripts assemble themselves; sort_keys is for data whose order comes from
+    outside. Floats are rounded by normalize_floats. indent=None gives the
+    most compact form, without spaces after separators.
+    """
+    separators = (',', ':') if indent is None else None
+    text = json.dumps(normalize_floats(data), indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys,
+                      separators=separators, allow_nan=False)
+    return text.encode('utf-8')
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _count(outcome: str) -> None:
+    with _lock:
+        counts[outcome] += 1
+    profiling.count(f"json_files_{outcome}")
+
+
+def write_json(path: str, data: Any, indent: Optional[int] = 2, ensure_ascii: bool = False,
+               sort_keys: bool = False) -> bool:
+    """
+    Writes a JSON file atomically, and only if its content changed.
+
+    The serialized data is compared with the existing file by SHA-256; an
+    unchanged file is left alone, so its modification time stays and git sees
+    no change. Otherwise the data goes to a temporary file in the same
+    directory, which then replaces the target in one rename, so readers never
+    see a half-written file. Errors are raised to the caller.
+
+    Args:
+        path: Target file
+        data: JSON-serializable data
+        indent, ensure_ascii, sort_keys: Passed to json.dumps; callers keep the format of their existing files
+
+    Returns:
+        True if the file was written, False if it already had this content
+    """
+    content = serialize(data, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+    if os.path.exists(path) and _file_sha256(path) == hashlib.sha256(content).hexdigest():
+        logging.debug(f"Unchanged, not rewritten: {path}")
+        _count('skipped')
+        return False
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or '.', prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, NEW_FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _count('written')
+    return True
+
+
+def log_summary() -> None:
+    """
+    Logs how many JSON files were written and how many were left unchanged.
+    """
+    with _lock:
+        written, skipped = counts['written'], counts['skipped']
+    if written or skipped:
+        logging.info(f"JSON outputs: {written} written, {skipped} unchanged and skipped.")
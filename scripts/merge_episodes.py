@@ -0,0 +1,130 @@
+import os
+import logging
+from typing import Dict, List
+
+import json_writer
+import profiling
+from fetch_state import load_episodes
+from profiling import stage
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('merge_episodes')
+
+APPLE_EPISODES_FILE = 'data/episodes/apple_episode_links.json'
+SPOTIFY_EPISODES_FILE = 'data/episodes/spotify_episode_links.json'
+EPISODE_LINKS_FILE = 'data/episodes/episode_links.json'
+
+
+def merge_episode_links(apple_episodes: List[Dict], spotify_episodes: List[Dict]) -> List[Dict]:
+    """
+    Combine Apple and Spotify episode lists into one entry per release date.
+
+    Args:
+        apple_episodes: Episodes as written by apple_fetch.py
+        spotify_episodes: Episodes as written by spotify_fetch.py
+
+    Returns:
+        Merged episodes, newest first
+    """
+    # Create a dictionary to group episodes by release date
+    episodes_by_date: Dict[str, Dict] = {}
+
+    # Process Apple episodes
+    for episode in apple_episodes:
+        release_date = episode.get('release_date')
+        if not release_date:
+            logger.warning(f"Skipping Apple episode with no release date: {episode.get('title')}")
+            continue
+
+        # Create or update the entry for this date
+        if release_date not in episodes_by_date:
+            episodes_by_date[release_date] = {
+                'title': episode.get('title'),
+                'release_date': release_date,
+                'apple_id': episode.get('apple_id'),
+                'apple_url': episode.get('url')
+            }
+        else:
+            # If this date already exists, update Apple info
+            episodes_by_date[release_date]['apple_id'] = episode.get('apple_id')
+            episodes_by_date[release_date]['apple_url'] = episode.get('url')
+
+            # Only update title if we don't already have one
+            if not episodes_by_date[release_date].get('title'):
+                episodes_by_date[release_date]['title'] = episode.get('title')
+
+    # Process Spotify episodes
+    for episode in spotify_episodes:
+        release_date = episode.get('release_date')
+        if not release_date:
+            logger.warning(f"Skipping Spotify episode with no release date: {episode.get('title')}")
+            continue
+
+        # Make sure the release date is just the date part (YYYY-MM-DD)
+        if 'T' in release_date:
+            release_date = release_date.split('T')[0]
+
+        # Create or update the entry for this date
+        if release_date not in episodes_by_date:
+            episodes_by_date[release_date] = {
+                'title': episode.get('title'),
+                'release_date': release_date,
+                'spotify_id': episode.get('episode_id'),
+                'spotify_url': episode.get('url')
+            }
+        else:
+            # If this date already exists, update Spotify info
+            episodes_by_date[release_date]['spotify_id'] = episode.get('episode_id')
+            episodes_by_date[release_date]['spotify_url'] = episode.get('url')
+
+            # Only update title if we don't already have one
+            if not episodes_by_date[release_date].get('title'):
+                episodes_by_date[release_date]['title'] = episode.get('title')
+
+    # Convert the dictionary to a list
+    merged_episodes = list(episodes_by_date.values())
+
+    # Sort by release date (newest first)
+    merged_episodes.sort(key=lambda x: x.get('release_date', ''), reverse=True)
+    return merged_episodes
+
+
+def main() -> None:
+    """
+    Merge the per-source episode lists into data/episodes/episode_links.json.
+
+    APPLE_OUTPUT_FILE, SPOTIFY_OUTPUT_FILE and EPISODE_LINKS_FILE override the
+    paths, like in the fetch scripts (the pipeline sets them per show).
+    """
+    profiling.configure("merge_episodes")
+    apple_file = os.environ.get('APPLE_OUTPUT_FILE', APPLE_EPISODES_FILE)
+    spotify_file = os.environ.get('SPOTIFY_OUTPUT_FILE', SPOTIFY_EPISODES_FILE)
+    output_file = os.environ.get('EPISODE_LINKS_FILE', EPISODE_LINKS_FILE)
+    with stage("load_episodes"):
+        apple_episodes = load_episodes(apple_file)
+    logger.info(f"Loaded {len(apple_episodes)} episodes from Apple")
+
+    if not os.path.exists(spotify_file):
+        logger.warning(f"Spotify episodes file not found: {spotify_file}")
+    with stage("load_episodes"):
+        spotify_episodes = load_episodes(spotify_file)
+    logger.info(f"Loaded {len(spotify_episodes)} episodes from Spotify")
+
+    with stage("merge"):
+        merged_episodes = merge_episode_links(apple_episodes, spotify_episodes)
+    logger.info(f"Combined total: {len(merged_episodes)} unique episodes by date")
+
+    # Save combined episodes
+    with stage("save_episodes"):
+        json_writer.write_json(output_file, merged_episodes, ensure_ascii=True)
+
+    logger.info(f"Successfully saved combined episodes to {output_file}")
+    print(f"Combined {len(merged_episodes)} unique episodes from Apple and Spotify")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import profiling
+
+# 1. Constants
+MODEL_TIERING_ENV = "GEMINI_MODEL_TIERING"  # "0" sends every episode straight to the strongest tier
+FAST_MODEL_ENV = "GEMINI_FAST_MODEL"
+FAST_MODEL_NAME = "gemini-2.0-flash"
+
+HOSTS = ("Lars", "Ijoma", "Nina")  # hosts of the default show; other shows pass theirs
+REQUIRED_FIELDS = ("vorschlag", "vorschlagender", "begruendung", "punkt_erhalten", "tags", "start_zeit")
+LOW_CONFIDENCE_SHARE = 0.25  # escalate if more than this share of proposals has doubtful fields
+MIN_CUE_HITS = 2  # an empty result is only doubted if the transcript mentions the game at least this often
+
+# Phrases hosts use when a Gegenwartscheck proposal is made or scored (ASR variants included)
+GEGENWARTSCHECK_CUES = re.compile(
+    r'gegenwarts?[- ]?(?:check|vorschl)|gegenwartsphänomen|(?:einen|keinen|den|ein) punkt|'
+    r'punkt (?:geben|vergeben|bekommen|dafür|für)',
+    re.IGNORECASE
+)
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def fast_model_name() -> str:
+    return os.environ.get(FAST_MODEL_ENV, FAST_MODEL_NAME)
+
+
+def tiering_enabled() -> bool:
+    return os.environ.get(MODEL_TIERING_ENV, '1').lower() not in ('0', 'false', 'no')
+
+
+def count_cues(transcript_data: Dict[str, Any]) -> int:
+    """
+    Counts phrases in the transcript that indicate Gegenwartscheck proposals or point decisions.
+    """
+    return sum(
+        len(GEGENWARTSCHECK_CUES.findall(chunk.get('text', '')))
+        for chunk in transcript_data.get('transcript', [])
+        if isinstance(chunk, dict)
+    )
+
+
+def doubtful_fields(vorschlag_item: Dict[str, Any], hosts: Sequence[str] = HOSTS) -> List[str]:
+    """
+    Lists the fields of one proposal that are missing or implausible.
+    """
+    problems = [field for field in REQUIRED_FIELDS if vorschlag_item.get(field) in (None, "", [])]
+    if vorschlag_item.get('vorschlagender') not in hosts and 'vorschlagender' not in problems:
+        problems.append('vorschlagender')
+    if not isinstance(vorschlag_item.get('tags', []), list) and 'tags' not in problems:
+        problems.append('tags')
+    start_zeit = vorschlag_item.get('start_zeit')
+    if start_zeit not in (None, "") and not re.fullmatch(r'\d+(?:\.\d+)?s?', str(start_zeit).strip()):
+        problems.append('start_zeit')
+    if vorschlag_item.get('punkt_erhalten') is True and vorschlag_item.get('punkt_von') not in hosts:
+        problems.append('punkt_von')
+    return problems
+
+
+def escalation_reason(result: Optional[Dict[str, Any]], transcript_data: Dict[str, Any],
+                      hosts: Sequence[str] = HOSTS) -> Optional[str]:
+    """
+    Decides whether a cheaper tier's analysis has to be redone by the next tier.
+
+    Returns:
+        'parse_failure', 'empty_with_cues' or 'low_confidence', or None if the result is accepted
+    """
+    if not isinstance(result, dict) or not isinstance(result.get('gegenwartsvorschlaege'), list):
+        return 'parse_failure'
+    vorschlaege = result['gegenwartsvorschlaege']
+    if not vorschlaege:
+        return 'empty_with_cues' if count_cues(transcript_data) >= MIN_CUE_HITS else None
+    if any(not isinstance(item, dict) or not item.get('vorschlag') for item in vorschlaege):
+        return 'low_confidence'
+    doubtful = sum(1 for item in vorschlaege if doubtful_fields(item, hosts))
+    if doubtful / len(vorschlaege) > LOW_CONFIDENCE_SHARE:
+        return 'low_confidence'
+    return None
+
+
+class TierStats:
+    """
+    Requests, latency and outcome per tier for one run, mirrored into the profile report counters.
+    """
+
+    def __init__(self):
+        self.tiers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, seconds: float, reason: Optional[str]) -> None:
+        """
+        Records one analysis by a tier; reason is None if its result was accepted (a hit).
+        """
+        with self._lock:
+            entry = self.tiers.setdefault(tier, {'requests': 0, 'hits': 0, 'seconds': 0.0, 'misses': {}})
+            entry['requests'] += 1
+            entry['seconds'] += seconds
+            if reason is None:
+                entry['hits'] += 1
+            else:
+                entry['misses'][reason] = entry['misses'].get(reason, 0) + 1
+        profiling.count(f"tier_{tier}_requests")
+        if reason is None:
+            profiling.count(f"tier_{tier}_hits")
+        else:
+            profiling.count(f"tier_{tier}_miss_{reason}")
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            tier: {
+                'requests': entry['requests'],
+                'hit_rate': round(entry['hits'] / entry['requests'], 3) if entry['requests'] else 0.0,
+                'mean_seconds': round(entry['seconds'] / entry['requests'], 3) if entry['requests'] else 0.0,
+                'misses': dict(entry['misses']),
+            }
+            for tier, entry in self.tiers.items()
+        }
+
+    def log_summary(self) -> None:
+        for tier, entry in self.summary().items():
+            logging.info(f"Tier {tier}: {entry['requests']} requests, hit rate {entry['hit_rate']:.0%}, "
+                         f"mean {entry['mean_seconds']}s, misses {entry['misses']}")
+
+
+stats = TierStats()
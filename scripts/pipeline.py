@@ -0,0 +1,791 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Any, Callable, Dict, List, Optional
+
+# 1. Constants
+STAGES = ["fetch-links", "extract", "analyze", "proofread", "aggregate"]
+STAMPS_FILE = "data/pipeline_stamps.json"
+MISSING = "missing"
+DEFAULT_WORKERS = 2  # concurrent analysis workers in the pipelined run
+DEFAULT_QUEUE_SIZE = 4  # episodes extraction may run ahead of analysis
+SINK_POLL_SECONDS = 0.5
+
+DEFAULT_PATHS = {
+    'raw_dir': "data/raw",
+    'extracted_dir': "cache/extracted",
+    'transcripts_dir': "data/transcripts",
+    'first_pass_dir': "data/first_pass",
+    'analyses_dir': "data/analyses",
+    'episode_links_file': "data/episodes/episode_links.json",
+    'tag_canon_file': "data/tag_canon.json",
+    'site_data_file': "docs/site_data.json",
+    'tags_file': "docs/tags.json",
+    'related_file': "docs/related.json",
+    'chapters_dir': "docs/chapters",
+    'catalog_db': "data/catalog.sqlite",
+    'cluster_state_file': ".cache/proposal_minhash.json",
+    'stamps_file': STAMPS_FILE,
+}
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def file_digest(path: str) -> str:
+    """
+    SHA-256 of a file's content, or 'missing' if it does not exist.
+    """
+    if not os.path.exists(path):
+        return MISSING
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def value_digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class Unit:
+    """
+    One buildable step of a stage, e.g. 'analyze' for one episode.
+
+    Args:
+        stage: Stage name from STAGES
+        key: Episode ID, or a fixed name for whole-corpus stages
+        inputs: Files whose content the result depends on
+        outputs: Files the action writes
+        params: Further values the result depends on (model names, a metadata record, ...)
+        phony: Always rebuilt because its real inputs live outside the repository
+        optional: Intermediate inputs or outputs a checkout may lack (first passes); their absence
+            alone does not make the unit stale
+    """
+
+    def __init__(self, stage: str, key: str, inputs: List[str], outputs: List[str],
+                 params: Optional[Dict[str, Any]] = None, phony: bool = False,
+                 optional: Optional[List[str]] = None):
+        self.stage = stage
+        self.key = key
+        self.inputs = inputs
+        self.outputs = outputs
+        self.params = params or {}
+        self.phony = phony
+        self.optional = set(optional or [])
+
+    @property
+    def id(self) -> str:
+        return f"{self.stage}:{self.key}"
+
+    def input_digests(self) -> Dict[str, str]:
+        digests = {path: file_digest(path) for path in self.inputs}
+        digests.update({f"param:{name}": value_digest(value) for name, value in self.params.items()})
+        return digests
+
+    def output_digests(self) -> Dict[str, str]:
+        return {path: file_digest(path) for path in self.outputs}
+
+
+def load_stamps(path: str) -> Dict[str, Dict[str, Dict[str, str]]]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Ignoring unreadable stamps file {path}: {e}")
+        return {}
+
+
+def save_stamps(path: str, stamps: Dict[str, Dict[str, Dict[str, str]]]) -> None:
+    stamps_dir = os.path.dirname(path)
+    if stamps_dir:
+        os.makedirs(stamps_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=stamps_dir or '.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(stamps.items())), f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def stale_reason(unit: Unit, stamps: Dict[str, Dict[str, Dict[str, str]]]) -> Optional[str]:
+    """
+    Explains why a unit must be rebuilt, or returns None if its stamp is current.
+
+    A unit is stale if it was never built, if the content of an input or a
+    parameter changed since its stamp, or if an output it produced is gone.
+    An optional file that is absent now counts as unchanged, so a checkout
+    without the intermediate first passes does not trigger paid re-runs.
+    """
+    if unit.phony:
+        return "external source"
+    stamp = stamps.get(unit.id)
+    if stamp is None:
+        return "never built"
+    current = unit.input_digests()
+    recorded = stamp.get('inputs', {})
+    changed = sorted(name for name in set(current) | set(recorded)
+                     if current.get(name) != recorded.get(name)
+                     and not (name in unit.optional and current.get(name) == MISSING))
+    if changed:
+        return "changed: " + ", ".join(changed)
+    gone = [path for path, digest in stamp.get('outputs', {}).items()
+            if digest != MISSING and not os.path.exists(path) and path not in unit.optional]
+    if gone:
+        return "missing output: " + ", ".join(gone)
+    return None
+
+
+def episode_metadata_record(episode_links_file: str, episode_id: str) -> Optional[Dict[str, Any]]:
+    """
+    The merged episode-list entry an extracted transcript takes its title, date and Spotify ID from.
+    """
+    if not os.path.exists(episode_links_file):
+        return None
+    with open(episode_links_file, 'r', encoding='utf-8') as f:
+        episodes = json.load(f)
+    for episode in episodes:
+        if str(episode.get('apple_id', '')) == episode_id:
+            return {key: episode.get(key) for key in ('title', 'release_date', 'spotify_id')}
+    return None
+
+
+def zip_routes(zip_paths: List[str]) -> Dict[str, List[str]]:
+    """
+    Decides which capture zip each episode's transcript is extracted from.
+
+    A capture session may hold any number of episodes, and the same episode
+    may turn up in several captures; extract_transcripts.route_ttml_files picks
+    one copy per Apple ID. Only the archive directories are read.
+
+    Returns:
+        Dictionary mapping zip path to the sorted Apple IDs extracted from it
+    """
+    from extract_transcripts import route_ttml_files
+
+    members: Dict[str, str] = {}
+    sizes: Dict[str, int] = {}
+    for zip_path in zip_paths:
+        try:
+            with zipfile.ZipFile(zip_path) as archive:
+                infos = [info for info in archive.infolist() if info.filename.endswith('.ttml')]
+        except zipfile.BadZipFile as e:
+            logging.warning(f"Skipping unreadable capture {zip_path}: {e}")
+            continue
+        for info in infos:
+            member = os.path.join(zip_path, info.filename)
+            members[member] = zip_path
+            sizes[member] = info.file_size
+
+    routes: Dict[str, List[str]] = {}
+    for episode_id, member in route_ttml_files(list(members), sizes).items():
+        routes.setdefault(members[member], []).append(episode_id)
+    return {zip_path: sorted(episode_ids) for zip_path, episode_ids in routes.items()}
+
+
+def build_units(paths: Dict[str, str], episodes: Optional[List[str]] = None) -> List[Unit]:
+    """
+    Builds the dependency graph fetch-links -> extract -> analyze -> proofread -> aggregate.
+
+    Per-episode stages get one unit per episode; a transcript may come from a
+    capture zip (one extract unit per zip, which may hold several episodes)
+    or already exist. Units are returned in build order; within a stage,
+    episodes follow quota_scheduler.prioritize (new episodes, then stale
+    analyses, then backfill), so a used-up daily quota defers the least
+    urgent work. An analysis is stale if a unit of its episode is
+    (stale_reason), e.g. because its transcript changed.
+    """
+    import quota_scheduler
+    from gemini_analyzer import MODEL_NAME, PROOFREADING_MODEL_NAME
+
+    units = [Unit("fetch-links", "episodes", [], [paths['episode_links_file']], phony=True)]
+
+    zip_paths = sorted(glob.glob(os.path.join(paths['raw_dir'], "*_cache.zip")))
+    transcript_ids = sorted(os.path.basename(p)[:-len("_transcript.json")]
+                            for p in glob.glob(os.path.join(paths['transcripts_dir'], "*_transcript.json")))
+    routes = zip_routes(zip_paths)
+    if episodes:
+        routes = {zip_path: [e for e in episode_ids if e in episodes] for zip_path, episode_ids in routes.items()}
+        transcript_ids = [e for e in transcript_ids if e in episodes]
+    extracted_ids = sorted(e for episode_ids in routes.values() for e in episode_ids)
+
+    def transcript_path(episode_id: str) -> str:
+        return os.path.join(paths['transcripts_dir'], f"{episode_id}_transcript.json")
+
+    for zip_path, episode_ids in sorted(routes.items()):
+        if not episode_ids:
+            continue
+        units.append(Unit(
+            "extract", os.path.basename(zip_path)[:-len("_cache.zip")],
+            inputs=[zip_path],
+            outputs=[transcript_path(episode_id) for episode_id in episode_ids],
+            params={'metadata': {episode_id: episode_metadata_record(paths['episode_links_file'], episode_id)
+                                 for episode_id in episode_ids}},
+        ))
+
+    analysis_paths = []
+    episode_units: Dict[str, List[Unit]] = {}
+    episode_ids = sorted(set(extracted_ids) | set(transcript_ids))
+    for episode_id in episode_ids:
+        first_pass = os.path.join(paths['first_pass_dir'], f"{episode_id}.json")
+        analysis = os.path.join(paths['analyses_dir'], f"{episode_id}.json")
+        episode_units[episode_id] = [
+            Unit("analyze", episode_id, [transcript_path(episode_id)], [first_pass], params={'model': MODEL_NAME},
+                 optional=[first_pass]),
+            Unit("proofread", episode_id, [first_pass, transcript_path(episode_id)], [analysis],
+                 params={'model': PROOFREADING_MODEL_NAME}, optional=[first_pass]),
+        ]
+        units.extend(episode_units[episode_id])
+        analysis_paths.append(analysis)
+
+    stamps = load_stamps(paths['stamps_file'])
+    queue_order = quota_scheduler.prioritize(
+        episode_ids, quota_scheduler.load_release_dates(paths['episode_links_file']),
+        lambda episode_id: os.path.exists(os.path.join(paths['analyses_dir'], f"{episode_id}.json")),
+        lambda episode_id: any(stale_reason(unit, stamps) is not None for unit in episode_units[episode_id]))
+    priority = {episode_id: rank for rank, episode_id in enumerate(queue_order)}
+
+    if not episodes:
+        # Analyses that have no transcript here (e.g. added by hand) still belong to the site
+        analysis_paths = sorted(set(analysis_paths) | set(glob.glob(os.path.join(paths['analyses_dir'], "*.json"))))
+        units.append(Unit(
+            "aggregate", "site",
+            inputs=analysis_paths + [paths['episode_links_file'], paths['tag_canon_file']]
+            + sorted(glob.glob(os.path.join(paths['transcripts_dir'], "*_chapters.json"))),
+            outputs=[paths['site_data_file'], paths['tags_file'], paths['related_file']],
+        ))
+
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    # Up-to-date episodes are not queued; they are not rebuilt either and go last
+    return sorted(units, key=lambda unit: (order[unit.stage], priority.get(unit.key, len(priority)), unit.key))
+
+
+def plan(units: List[Unit], stamps: Dict[str, Dict[str, Dict[str, str]]],
+         selected_stages: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Lists the units that would be rebuilt, with the reason.
+
+    Units downstream of a unit that will be rebuilt are listed as well, since
+    their inputs are about to change. External sources are refetched on every
+    run but rarely change, so they do not mark their dependents; stages outside
+    selected_stages are not run.
+    """
+    producers = {path: unit for unit in units for path in unit.outputs}
+    rebuilding: Dict[str, str] = {}
+    for unit in units:
+        if selected_stages and unit.stage not in selected_stages:
+            continue
+        reason = stale_reason(unit, stamps)
+        if reason is None:
+            upstream = [producers[path].id for path in unit.inputs
+                        if path in producers and producers[path].id in rebuilding and not producers[path].phony]
+            if upstream:
+                reason = "upstream: " + ", ".join(upstream)
+        if reason is not None:
+            rebuilding[unit.id] = reason
+    return [{'unit': unit, 'reason': rebuilding[unit.id]} for unit in units if unit.id in rebuilding]
+
+
+class SharedClients:
+    """
+    Lazily created API clients with their context cache, quota ledger, circuit breakers and statistics.
+
+    One instance serves every show of a run, so all shows share the Gemini
+    rate limits and daily quota and the context caches of common prompt prefixes.
+    """
+
+    def __init__(self):
+        self._gemini_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def gemini_client(self):
+        with self._lock:
+            if self._gemini_client is None:
+                import gemini_cache
+                import quota_scheduler
+                import request_hedging
+                from gemini_analyzer import setup_gemini_client
+                self._gemini_client = setup_gemini_client()
+                gemini_cache.configure(self._gemini_client)
+                if quota_scheduler.get() is None:
+                    quota_scheduler.configure()
+                if request_hedging.get() is None:
+                    request_hedging.configure()
+        return self._gemini_client
+
+    def close(self) -> None:
+        if self._gemini_client is not None:
+            import asr_corrections
+            import gemini_cache
+            import model_tiering
+            import quota_scheduler
+            import request_hedging
+            gemini_cache.close()
+            model_tiering.stats.log_summary()
+            request_hedging.stats.log_summary()
+            asr_corrections.stats.log_summary()
+            if quota_scheduler.get() is not None:
+                quota_scheduler.get().log_summary()
+
+
+class PipelineContext:
+    """
+    Paths, show and clients used by the stage actions.
+
+    Args:
+        paths: Paths of the show's files (already in its namespace)
+        show: The show the units belong to (default: shows.DEFAULT)
+        clients: Clients shared with other shows; a context without them creates and closes its own
+    """
+
+    def __init__(self, paths: Dict[str, str], show=None, clients: Optional[SharedClients] = None):
+        import shows
+
+        self.paths = paths
+        self.show = show or shows.DEFAULT
+        self._owns_clients = clients is None
+        self.clients = clients or SharedClients()
+
+    @property
+    def gemini_client(self):
+        return self.clients.gemini_client
+
+    def close(self) -> None:
+        if self._owns_clients:
+            self.clients.close()
+
+
+def run_fetch_links(unit: Unit, context: PipelineContext) -> bool:
+    env = dict(os.environ, INCREMENTAL_FETCH=os.environ.get('INCREMENTAL_FETCH', 'true'))
+    env.update(context.show.fetch_env(context.paths['episode_links_file']))
+    for script in ("apple_fetch.py", "spotify_fetch.py", "merge_episodes.py"):
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script)], env=env)
+        if result.returncode != 0:
+            logging.error(f"{script} failed with exit code {result.returncode}")
+            return False
+    return True
+
+
+def run_extract(unit: Unit, context: PipelineContext) -> bool:
+    from extract_transcripts import find_ttml_files, load_episode_metadata, process_ttml_file, route_ttml_files
+
+    extracted_dir = context.paths['extracted_dir']
+    capture_dir = os.path.join(extracted_dir, unit.key)
+    shutil.rmtree(capture_dir, ignore_errors=True)
+    with zipfile.ZipFile(unit.inputs[0]) as archive:
+        archive.extractall(capture_dir, [name for name in archive.namelist() if name.endswith('.ttml')])
+    os.makedirs(context.paths['transcripts_dir'], exist_ok=True)
+    metadata = load_episode_metadata(context.paths['episode_links_file'])
+    routes = route_ttml_files(find_ttml_files(capture_dir))
+    written = [process_ttml_file(routes[episode_id], metadata, context.paths['transcripts_dir'], extracted_dir)
+               for episode_id in unit.params['metadata'] if episode_id in routes]
+    return len(written) == len(unit.outputs) and all(written)
+
+
+def run_analyze(unit: Unit, context: PipelineContext) -> bool:
+    from gemini_analyzer import run_first_pass
+    return run_first_pass(context.gemini_client, unit.inputs[0], unit.outputs[0], context.show)
+
+
+def run_proofread(unit: Unit, context: PipelineContext) -> bool:
+    from gemini_analyzer import run_proofread as proofread
+    first_pass, transcript = unit.inputs
+    return proofread(context.gemini_client, transcript, first_pass, unit.outputs[0], context.show)
+
+
+def run_aggregate(unit: Unit, context: PipelineContext) -> bool:
+    import aggregate_data
+
+    aggregate_data.main(argparse.Namespace(
+        analyses_dir=context.paths['analyses_dir'],
+        episode_links_file=context.paths['episode_links_file'],
+        output_file=context.paths['site_data_file'],
+        cluster_state_file=context.paths['cluster_state_file'],
+        tag_canon_file=context.paths['tag_canon_file'],
+        tags_output_file=context.paths['tags_file'],
+        related_output_file=context.paths['related_file'],
+        transcripts_dir=context.paths['transcripts_dir'],
+        chapters_output_dir=context.paths['chapters_dir'],
+        catalog_db=context.paths['catalog_db'],
+    ))
+    return os.path.exists(context.paths['site_data_file'])
+
+
+ACTIONS: Dict[str, Callable[[Unit, PipelineContext], bool]] = {
+    "fetch-links": run_fetch_links,
+    "extract": run_extract,
+    "analyze": run_analyze,
+    "proofread": run_proofread,
+    "aggregate": run_aggregate,
+}
+
+
+class UnitBuilder:
+    """
+    Builds single units and keeps the stamps and the run result.
+
+    Staleness is checked again right before a unit runs, so a rebuilt upstream
+    artifact whose content did not change does not trigger its dependents.
+    Dependents of a failed unit are skipped. A unit that stops because the
+    daily Gemini quota is used up is deferred, not failed: it stays stale, so
+    the next run picks it up, and its per-episode dependents are deferred
+    with it.
+    Stamps and results are guarded by a lock, so several threads may build
+    units at once.
+    """
+
+    def __init__(self, units: List[Unit], paths: Dict[str, str], selected_stages: Optional[List[str]] = None,
+                 actions: Optional[Dict[str, Callable[[Unit, PipelineContext], bool]]] = None, show=None,
+                 clients: Optional[SharedClients] = None):
+        self.paths = paths
+        self.selected_stages = selected_stages
+        self.actions = actions or ACTIONS
+        self.context = PipelineContext(paths, show, clients)
+        self.stamps = load_stamps(paths['stamps_file'])
+        self.producers = {path: unit for unit in units for path in unit.outputs}
+        self.result: Dict[str, List[str]] = {'built': [], 'up_to_date': [], 'failed': [], 'skipped': [],
+                                             'deferred': []}
+        self._lock = threading.Lock()
+
+    def _record(self, unit: Unit, outcome: str) -> str:
+        # A unit built more than once (the pipelined aggregate) keeps its last outcome; a later
+        # check that finds it up to date does not hide that it was built
+        if outcome == 'up_to_date' and unit.id in self.result['built']:
+            return outcome
+        for ids in self.result.values():
+            if unit.id in ids:
+                ids.remove(unit.id)
+        self.result[outcome].append(unit.id)
+        return outcome
+
+    def build(self, unit: Unit, check_upstream: bool = True) -> Optional[str]:
+        """
+        Builds a unit if it is stale and stamps it if it succeeds.
+
+        Returns:
+            'built', 'up_to_date', 'failed', 'skipped' or 'deferred', or None if its stage is not selected
+        """
+        import quota_scheduler
+
+        if self.selected_stages and unit.stage not in self.selected_stages:
+            return None
+        with self._lock:
+            waiting = [self.producers[path].id for path in unit.inputs
+                       if path in self.producers and self.producers[path].id in self.result['deferred']]
+            # The site still publishes the analyses that are done; the rest follow in the next run
+            if waiting and check_upstream and unit.stage != 'aggregate':
+                logging.info(f"Deferring {unit.id}: upstream {', '.join(waiting)} is deferred")
+                return self._record(unit, 'deferred')
+            blocked = [self.producers[path].id for path in unit.inputs
+                       if path in self.producers
+                       and self.producers[path].id in self.result['failed'] + self.result['skipped']]
+            if blocked and check_upstream:
+                logging.warning(f"Skipping {unit.id}: upstream {', '.join(blocked)} did not build")
+                return self._record(unit, 'skipped')
+            reason = stale_reason(unit, self.stamps)
+            if reason is None:
+                return self._record(unit, 'up_to_date')
+
+        logging.info(f"Building {unit.id} ({reason})")
+        # Taken before the action: an input another thread rewrites meanwhile must leave the unit stale
+        inputs = unit.input_digests()
+        try:
+            succeeded = self.actions[unit.stage](unit, self.context)
+        except quota_scheduler.QuotaExhausted as e:
+            logging.warning(f"Deferring {unit.id} to the next run: {e}")
+            with self._lock:
+                return self._record(unit, 'deferred')
+        except Exception as e:
+            logging.error(f"{unit.id} failed: {e}")
+            succeeded = False
+        outputs = unit.output_digests()
+        with self._lock:
+            if not succeeded or any(digest == MISSING for digest in outputs.values()):
+                logging.error(f"{unit.id} did not produce its outputs")
+                return self._record(unit, 'failed')
+            if not unit.phony:
+                self.stamps[unit.id] = {'inputs': inputs, 'outputs': outputs}
+                save_stamps(self.paths['stamps_file'], self.stamps)
+            return self._record(unit, 'built')
+
+    def finish(self) -> Dict[str, List[str]]:
+        import json_writer
+
+        self.context.close()
+        json_writer.log_summary()
+        logging.info("Pipeline finished: {} built, {} up to date, {} failed, {} skipped, {} deferred.".format(
+            *(len(self.result[k]) for k in ('built', 'up_to_date', 'failed', 'skipped', 'deferred'))))
+        return self.result
+
+
+def run(units: List[Unit], paths: Dict[str, str], selected_stages: Optional[List[str]] = None,
+        actions: Optional[Dict[str, Callable[[Unit, PipelineContext], bool]]] = None, show=None,
+        clients: Optional[SharedClients] = None) -> Dict[str, List[str]]:
+    """
+    Builds the stale units in dependency order and stamps each one that succeeds.
+
+    Returns the ids of the built, up-to-date, failed, skipped and deferred units.
+    """
+    builder = UnitBuilder(units, paths, selected_stages, actions, show, clients)
+    for unit in units:
+        builder.build(unit)
+    return builder.finish()
+
+
+def run_pipelined(units: List[Unit], paths: Dict[str, str], selected_stages: Optional[List[str]] = None,
+                  actions: Optional[Dict[str, Callable[[Unit, PipelineContext], bool]]] = None,
+                  workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE, show=None,
+                  clients: Optional[SharedClients] = None) -> Dict[str, List[str]]:
+    """
+    Builds the same units as run(), but overlaps the stages per episode.
+
+    A producer thread refreshes the episode list, then hands every episode
+    whose transcript is ready to a bounded queue: existing transcripts first,
+    then each capture's episodes as soon as its zip is extracted. When the
+    queue is full, extraction waits, so it runs at most queue_size episodes
+    ahead of analysis. Worker threads take episodes off the queue and build
+    their analyze and proofread units. Whenever analyses changed, the main
+    thread rebuilds the site; aggregation goes through the catalog, which
+    only rereads changed analyses. The first new proposal is therefore online
+    after one episode instead of after the whole batch.
+
+    Unlike run(), a failed episode does not hold back the site: every
+    aggregation publishes the analyses that are done. Stamps and the returned
+    result have the same form as with run().
+    """
+    builder = UnitBuilder(units, paths, selected_stages, actions, show, clients)
+    stage_units = {stage: [unit for unit in units if unit.stage == stage] for stage in STAGES}
+    episode_units: Dict[str, List[Unit]] = {}
+    for unit in stage_units['analyze'] + stage_units['proofread']:
+        episode_units.setdefault(unit.key, []).append(unit)
+    transcript_episodes = {unit.inputs[0]: unit.key for unit in stage_units['analyze']}
+    extracted = {path for unit in stage_units['extract'] for path in unit.outputs}
+
+    episodes: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max(queue_size, 1))
+    finished: "queue.Queue[str]" = queue.Queue()
+
+    def produce() -> None:
+        try:
+            for unit in stage_units['fetch-links']:
+                builder.build(unit)
+            for path, episode_id in transcript_episodes.items():  # in priority order
+                if path not in extracted:
+                    episodes.put(episode_id)
+            for unit in stage_units['extract']:
+                builder.build(unit)
+                for path in unit.outputs:
+                    if path in transcript_episodes:
+                        episodes.put(transcript_episodes[path])
+        except Exception as e:
+            logging.error(f"Extraction stopped: {e}")
+        finally:
+            for _ in range(workers):
+                episodes.put(None)
+
+    def analyze() -> None:
+        while True:
+            episode_id = episodes.get()
+            if episode_id is None:
+                return
+            try:
+                for unit in episode_units[episode_id]:
+                    if builder.build(unit) == 'built' and unit.stage == 'proofread':
+                        finished.put(episode_id)
+            except Exception as e:
+                logging.error(f"Analysis of {episode_id} stopped: {e}")
+
+    threads = [threading.Thread(target=produce, name="extract")]
+    threads += [threading.Thread(target=analyze, name=f"analyze-{i + 1}") for i in range(workers)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    published = 0
+    while any(thread.is_alive() for thread in threads[1:]) or not finished.empty():
+        try:
+            batch = [finished.get(timeout=SINK_POLL_SECONDS)]
+        except queue.Empty:
+            continue
+        while not finished.empty():
+            batch.append(finished.get())
+        for unit in stage_units['aggregate']:
+            if builder.build(unit, check_upstream=False) == 'built' and not published:
+                logging.info(f"First new analyses online after {time.monotonic() - started:.1f}s")
+        published += len(batch)
+    for thread in threads:
+        thread.join()
+
+    # Catches changes that reach the site without a new analysis (episode list, tag canon)
+    for unit in stage_units['aggregate']:
+        builder.build(unit, check_upstream=False)
+    logging.info(f"Published {published} new analyses in {time.monotonic() - started:.1f}s")
+    return builder.finish()
+
+
+def run_shows(show_list: List[Any], paths: Dict[str, str], selected_stages: Optional[List[str]] = None,
+              actions: Optional[Dict[str, Callable[[Unit, PipelineContext], bool]]] = None,
+              episodes: Optional[List[str]] = None, pipelined: bool = False, workers: int = DEFAULT_WORKERS,
+              queue_size: int = DEFAULT_QUEUE_SIZE) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Runs the pipeline of several shows at the same time, one thread per show.
+
+    Every show builds its own units in its namespace (show.paths), with its
+    own stamps; fetch, extract, analyze and aggregate of different shows
+    overlap. The Gemini client, context cache, quota ledger and correction
+    dictionary are shared, so the shows draw on one rate limit and daily
+    budget. An error in one show does not stop the others.
+
+    Returns:
+        The run result of every show by show ID
+    """
+    clients = SharedClients()
+    results: Dict[str, Dict[str, List[str]]] = {}
+
+    def run_show(show) -> None:
+        show_paths = show.paths(paths)
+        try:
+            units = build_units(show_paths, episodes)
+            runner = run_pipelined if pipelined else run
+            kwargs = {'workers': workers, 'queue_size': queue_size} if pipelined else {}
+            results[show.id] = runner(units, show_paths, selected_stages, actions, show=show, clients=clients,
+                                      **kwargs)
+        except Exception as e:
+            logging.error(f"Show {show.id} stopped: {e}")
+            results[show.id] = {'built': [], 'up_to_date': [], 'failed': [f"show:{show.id}"], 'skipped': [],
+                                'deferred': []}
+
+    threads = [threading.Thread(target=run_show, args=(show,), name=f"show-{show.id}") for show in show_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    clients.close()
+    for show in show_list:
+        result = results[show.id]
+        logging.info(f"Show {show.id}: {len(result['built'])} built, {len(result['failed'])} failed, "
+                     f"{len(result['deferred'])} deferred.")
+    return results
+
+
+def adopt(units: List[Unit], paths: Dict[str, str]) -> int:
+    """
+    Stamps existing artifacts as current without rebuilding them.
+
+    Used once for data produced before the pipeline kept stamps. A unit is
+    adopted if its outputs exist, or if every unit consuming its missing
+    outputs is adopted (analyses made before first passes were kept).
+    Returns the number of adopted units.
+    """
+    stamps = load_stamps(paths['stamps_file'])
+    consumers: Dict[str, List[Unit]] = {}
+    for unit in units:
+        for path in unit.inputs:
+            consumers.setdefault(path, []).append(unit)
+
+    adopted: Dict[str, bool] = {}
+
+    def adoptable(unit: Unit) -> bool:
+        if unit.id not in adopted:
+            adopted[unit.id] = False  # guards against cycles
+            missing = [path for path in unit.outputs if not os.path.exists(path)]
+            adopted[unit.id] = not unit.phony and all(
+                consumers.get(path) and all(adoptable(consumer) for consumer in consumers[path])
+                for path in missing
+            )
+        return adopted[unit.id]
+
+    count = 0
+    for unit in units:
+        if unit.id not in stamps and adoptable(unit):
+            stamps[unit.id] = {'inputs': unit.input_digests(), 'outputs': unit.output_digests()}
+            count += 1
+    save_stamps(paths['stamps_file'], stamps)
+    logging.info(f"Adopted {count} existing units into {paths['stamps_file']}")
+    return count
+
+
+# 3. Main Function
+def main(args):
+    import shows
+
+    paths = dict(DEFAULT_PATHS, stamps_file=args.stamps_file)
+    selected = [stage for stage in STAGES if stage in args.stage] if args.stage else None
+    if args.skip:
+        selected = [stage for stage in (selected or STAGES) if stage not in args.skip]
+    show_list = [shows.get_show(show_id, args.shows_file) for show_id in args.show] if args.show \
+        else shows.load_shows(args.shows_file)
+
+    if args.command in ("adopt", "status") or args.dry_run:
+        for show in show_list:
+            show_paths = show.paths(paths)
+            units = build_units(show_paths, args.episode)
+            if args.command == "adopt":
+                adopt(units, show_paths)
+                continue
+            prefix = f"[{show.id}] " if len(show_list) > 1 else ""
+            pending = plan(units, load_stamps(show_paths['stamps_file']), selected)
+            if not pending:
+                print(f"{prefix}Everything is up to date.")
+            for entry in pending:
+                print(f"{prefix}{entry['unit'].id:<32} {entry['reason']}")
+        return
+
+    if len(show_list) == 1:
+        show = show_list[0]
+        show_paths = show.paths(paths)
+        units = build_units(show_paths, args.episode)
+        if args.pipelined:
+            results = {show.id: run_pipelined(units, show_paths, selected, workers=args.workers,
+                                              queue_size=args.queue_size, show=show)}
+        else:
+            results = {show.id: run(units, show_paths, selected, show=show)}
+    else:
+        results = run_shows(show_list, paths, selected, episodes=args.episode, pipelined=args.pipelined,
+                            workers=args.workers, queue_size=args.queue_size)
+    if any(result['failed'] for result in results.values()):
+        sys.exit(1)
+
+
+# 4. Script Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Runs fetch-links -> extract -> analyze -> proofread -> aggregate, rebuilding only stale steps."
+    )
+    parser.add_argument("command", choices=["run", "status", "adopt"],
+                        help="run: build stale units; status: list them; adopt: stamp existing data as current")
+    parser.add_argument("--dry-run", action="store_true", help="With run: only list what would be rebuilt")
+    parser.add_argument("--stage", action="append", choices=STAGES, help="Only run these stages (repeatable)")
+    parser.add_argument("--skip", action="append", choices=STAGES, help="Do not run these stages (repeatable)")
+    parser.add_argument("--episode", action="append", help="Limit per-episode stages to these IDs (repeatable)")
+    parser.add_argument("--show", action="append",
+                        help="Only run these shows (repeatable; default: every show in the shows file, in parallel)")
+    parser.add_argument("--shows-file", default="data/shows.json",
+                        help="Path to the show configuration (default: data/shows.json)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="With run: analyze episodes while later zips are still extracted and update the site "
+                             "after every finished analysis")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"With --pipelined: concurrent analysis workers (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"With --pipelined: episodes extraction may run ahead of analysis "
+                             f"(default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--stamps-file", default=STAMPS_FILE,
+                        help=f"Path to the content-hash stamps, moved into each show's namespace "
+                             f"(default: {STAMPS_FILE})")
+
+    main(parser.parse_args())
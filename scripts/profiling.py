@@ -0,0 +1,232 @@
+import atexit
+import cProfile
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger('profiling')
+
+# Profiling is off unless PROFILE_REPORT names the run report (or --profile-report is given).
+PROFILE_REPORT_ENV = 'PROFILE_REPORT'
+PROFILE_CPROFILE_DIR_ENV = 'PROFILE_CPROFILE_DIR'
+PROFILE_MEMORY_ENV = 'PROFILE_MEMORY'
+
+
+class StageProfiler:
+    """
+    Collects wall time, CPU time and optionally peak memory and cProfile data per named stage.
+
+    Stages may nest (their names are joined with '/') and may repeat, e.g. once
+    per transcript; repeated stages are summed up. cProfile only records
+    top-level stages, because only one profiler can be active at a time.
+
+    Args:
+        script: Name of the script the report entry belongs to
+        report_path: JSON file the run is appended to
+        cprofile_dir: Directory for one .prof dump per top-level stage, or None
+        trace_memory: Record the tracemalloc peak of every stage
+    """
+
+    def __init__(self, script: str, report_path: str, cprofile_dir: Optional[str] = None,
+                 trace_memory: bool = False):
+        self.script = script
+        self.report_path = report_path
+        self.cprofile_dir = cprofile_dir
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, float] = {}
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._written = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self) -> List[Dict[str, Any]]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        stack = self._stack()
+        path = '/'.join([frame['path'] for frame in stack[-1:]] + [name])
+        frame = {'path': path, 'peak': 0}
+        profile = None
+        if self.cprofile_dir and not stack and threading.current_thread() is threading.main_thread():
+            profile = self._profiles.setdefault(path, cProfile.Profile())
+        if self.trace_memory:
+            if stack:
+                # Keep the parent's peak so far before the child resets the counter
+                stack[-1]['peak'] = max(stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+            stack.pop()
+            if self.trace_memory:
+                frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                if stack:
+                    # The parent's peak includes its children's; reset so the next sibling starts fresh
+                    stack[-1]['peak'] = max(stack[-1]['peak'], frame['peak'])
+                tracemalloc.reset_peak()
+            self._record(path, wall, cpu, frame['peak'])
+
+    def _record(self, path: str, wall: float, cpu: float, peak: int) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(
+                path, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'max_wall_seconds': 0.0}
+            )
+            entry['calls'] += 1
+            entry['wall_seconds'] += wall
+            entry['cpu_seconds'] += cpu
+            entry['max_wall_seconds'] = max(entry['max_wall_seconds'], wall)
+            if self.trace_memory:
+                entry['peak_memory_bytes'] = max(entry.get('peak_memory_bytes', 0), peak)
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def run_entry(self) -> Dict[str, Any]:
+        stages = {
+            path: {key: round(value, 6) if isinstance(value, float) else value for key, value in entry.items()}
+            for path, entry in self.stages.items()
+        }
+        return {
+            'script': self.script,
+            'argv': sys.argv[1:],
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self._wall_start, 6),
+            'cpu_seconds': round(time.process_time() - self._cpu_start, 6),
+            'stages': stages,
+            'counters': dict(self.counters),
+        }
+
+    def write_report(self) -> None:
+        """
+        Appends this run to the report file and dumps the cProfile data, once per process.
+        """
+        if self._written:
+            return
+        self._written = True
+
+        report: Dict[str, Any] = {'runs': []}
+        if os.path.exists(self.report_path):
+            try:
+                with open(self.report_path, 'r', encoding='utf-8') as f:
+                    report = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Starting a new profile report, could not read {self.report_path}: {e}")
+        report.setdefault('runs', []).append(self.run_entry())
+
+        report_dir = os.path.dirname(self.report_path)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=report_dir or '.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, self.report_path)
+        logger.info(f"Profile report written to {self.report_path}")
+
+        if self.cprofile_dir and self._profiles:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            for path, profile in self._profiles.items():
+                safe_name = re.sub(r'[^\w.-]+', '_', f"{self.script}.{path}")
+                profile.dump_stats(os.path.join(self.cprofile_dir, f"{safe_name}.prof"))
+            logger.info(f"cProfile dumps written to {self.cprofile_dir}")
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def configure(script: str, report_path: Optional[str] = None, cprofile_dir: Optional[str] = None,
+              trace_memory: Optional[bool] = None) -> Optional[StageProfiler]:
+    """
+    Enables profiling for this process if a report path is given here or in PROFILE_REPORT.
+
+    Arguments left as None fall back to PROFILE_REPORT, PROFILE_CPROFILE_DIR and
+    PROFILE_MEMORY. The report is written when the process exits.
+
+    Returns:
+        The active profiler, or None if profiling stays disabled
+    """
+    global _profiler
+    report_path = report_path or os.environ.get(PROFILE_REPORT_ENV)
+    if not report_path:
+        return None
+    if cprofile_dir is None:
+        cprofile_dir = os.environ.get(PROFILE_CPROFILE_DIR_ENV) or None
+    if trace_memory is None:
+        trace_memory = os.environ.get(PROFILE_MEMORY_ENV, '').lower() in ('1', 'true', 'yes')
+    _profiler = StageProfiler(script, report_path, cprofile_dir, trace_memory)
+    atexit.register(_profiler.write_report)
+    return _profiler
+
+
+def add_arguments(parser) -> None:
+    """
+    Adds the --profile-* switches to an argparse parser.
+    """
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile-report",
+                       help=f"Append per-stage timings to this JSON report (env: {PROFILE_REPORT_ENV})")
+    group.add_argument("--profile-cprofile-dir",
+                       help=f"Dump cProfile data per stage into this directory (env: {PROFILE_CPROFILE_DIR_ENV})")
+    group.add_argument("--profile-memory", action="store_true", default=None,
+                       help=f"Record tracemalloc peak memory per stage (env: {PROFILE_MEMORY_ENV}=1)")
+
+
+def configure_from_args(script: str, args) -> Optional[StageProfiler]:
+    """
+    Enables profiling from parsed --profile-* arguments, falling back to the environment.
+    """
+    return configure(
+        script,
+        report_path=getattr(args, 'profile_report', None),
+        cprofile_dir=getattr(args, 'profile_cprofile_dir', None),
+        trace_memory=getattr(args, 'profile_memory', None),
+    )
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times a named stage if profiling is enabled; otherwise does nothing.
+
+    Usage:
+        with stage("parse_ttml"):
+            soup = BeautifulSoup(...)
+    """
+    if _profiler is None:
+        yield
+        return
+    with _profiler.stage(name):
+        yield
+
+
+def count(name: str, value: float = 1) -> None:
+    """
+    Adds to a named counter of the run report (e.g. requests, bytes, files) if profiling is enabled.
+    """
+    if _profiler is not None:
+        _profiler.count(name, value)
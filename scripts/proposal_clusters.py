@@ -0,0 +1,225 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# 1. Constants
+CLUSTER_STATE_FILE = ".cache/proposal_minhash.json"
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands of 4 rows: pairs above ~0.5 Jaccard similarity become candidates
+SIMILARITY_THRESHOLD = 0.5
+MINHASH_SEED = 1522895163
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+STOPWORDS = {
+    'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einen', 'einem', 'einer', 'und', 'oder', 'aber',
+    'ist', 'sind', 'war', 'wird', 'werden', 'sich', 'mit', 'von', 'fuer', 'auf', 'aus', 'bei', 'nach', 'als',
+    'auch', 'nicht', 'dass', 'wie', 'zum', 'zur', 'im', 'in', 'an', 'am', 'es', 'er', 'sie', 'man', 'so',
+    'immer', 'mehr', 'sehr', 'nur', 'noch', 'diese', 'dieser', 'dieses', 'wenn', 'the', 'and', 'of',
+}
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lower-cases text, folds umlauts and accents and replaces punctuation (incl. hyphens) by spaces.
+    """
+    text = (text or '').lower().translate(UMLAUTS)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def proposal_shingles(vorschlag_item: Dict[str, Any]) -> Set[str]:
+    """
+    Builds the shingle set of a proposal from its name, tags and reasoning: word unigrams and bigrams.
+    """
+    parts = [vorschlag_item.get('vorschlag') or '']
+    tags = vorschlag_item.get('tags') or []
+    if isinstance(tags, list):
+        parts.extend(str(tag) for tag in tags)
+    parts.append(vorschlag_item.get('begruendung') or '')
+
+    shingles: Set[str] = set()
+    for part in parts:
+        words = [w for w in normalize_text(part).split() if len(w) > 2 and w not in STOPWORDS]
+        shingles.update(words)
+        shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return shingles
+
+
+def _permutations(num_perm: int, seed: int) -> List[tuple]:
+    rng = random.Random(seed)
+    return [(rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1)) for _ in range(num_perm)]
+
+
+_PERMUTATIONS = _permutations(NUM_PERMUTATIONS, MINHASH_SEED)
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+
+
+def minhash_signature(shingles: Iterable[str]) -> List[int]:
+    """
+    Computes the MinHash signature (one minimum per hash permutation) of a shingle set.
+    """
+    hashes = [_shingle_hash(s) for s in shingles]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERMUTATIONS
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimated_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """
+    Estimates the Jaccard similarity of two sets from their signatures.
+    """
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def fingerprint(vorschlag_item: Dict[str, Any]) -> str:
+    """
+    Hashes the fields that enter the signature, to detect records that need a new signature.
+    """
+    raw = json.dumps(
+        [vorschlag_item.get('vorschlag'), vorschlag_item.get('tags'), vorschlag_item.get('begruendung')],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def load_cluster_state(state_path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads stored signatures keyed by unique_vorschlag_id; returns an empty dict if missing or incompatible.
+    """
+    if not state_path or not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Ignoring unreadable cluster state {state_path}: {e}")
+        return {}
+    if state.get('num_permutations') != NUM_PERMUTATIONS or state.get('seed') != MINHASH_SEED:
+        logging.info("MinHash parameters changed, recomputing all signatures.")
+        return {}
+    return state.get('signatures', {})
+
+
+def save_cluster_state(state_path: Optional[str], signatures: Dict[str, Dict[str, Any]]) -> None:
+    if not state_path:
+        return
+    state_dir = os.path.dirname(state_path)
+    if state_dir:
+        os.makedirs(state_dir, exist_ok=True)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump({'num_permutations': NUM_PERMUTATIONS, 'seed': MINHASH_SEED, 'signatures': signatures}, f)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, item: str) -> str:
+        self.parent.setdefault(item, item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: str, b: str) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _canonical_sort_key(item: Dict[str, Any]):
+    # The earliest mention of a phenomenon represents its cluster
+    return (str(item.get('episode_date') or '9999'), str(item.get('unique_vorschlag_id')))
+
+
+def assign_clusters(vorschlaege: List[Dict[str, Any]], state_path: Optional[str] = CLUSTER_STATE_FILE,
+                    threshold: float = SIMILARITY_THRESHOLD) -> Dict[str, int]:
+    """
+    Groups near-duplicate proposals and annotates each record in place.
+
+    Signatures are only computed for records that are new or changed since the
+    stored state; candidate pairs come from LSH banding, so the work grows about
+    linearly with the number of records. Each record gets 'cluster_id',
+    'cluster_canonical_id' (unique_vorschlag_id of the earliest mention) and
+    'cluster_size'.
+
+    Returns counts of computed and reused signatures and of clusters with more than one record.
+    """
+    stored = load_cluster_state(state_path)
+    signatures: Dict[str, Dict[str, Any]] = {}
+    stats = {'computed': 0, 'reused': 0, 'clusters': 0, 'clustered_records': 0}
+
+    for item in vorschlaege:
+        record_id = item['unique_vorschlag_id']
+        item_fingerprint = fingerprint(item)
+        previous = stored.get(record_id)
+        if previous and previous.get('fingerprint') == item_fingerprint:
+            signatures[record_id] = previous
+            stats['reused'] += 1
+        else:
+            signatures[record_id] = {
+                'fingerprint': item_fingerprint,
+                'signature': minhash_signature(proposal_shingles(item)),
+            }
+            stats['computed'] += 1
+
+    rows_per_band = NUM_PERMUTATIONS // LSH_BANDS
+    buckets: Dict[tuple, List[str]] = defaultdict(list)
+    for record_id, entry in signatures.items():
+        signature = entry['signature']
+        if all(value == _MAX_HASH for value in signature):
+            continue  # nothing to compare (no usable words)
+        for band in range(LSH_BANDS):
+            band_values = tuple(signature[band * rows_per_band:(band + 1) * rows_per_band])
+            buckets[(band, band_values)].append(record_id)
+
+    union_find = _UnionFind()
+    checked: Set[tuple] = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if estimated_similarity(signatures[a]['signature'], signatures[b]['signature']) >= threshold:
+                    union_find.union(a, b)
+
+    clusters: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for item in vorschlaege:
+        clusters[union_find.find(item['unique_vorschlag_id'])].append(item)
+
+    for members in clusters.values():
+        canonical = min(members, key=_canonical_sort_key)
+        canonical_id = canonical['unique_vorschlag_id']
+        for item in members:
+            item['cluster_id'] = f"c_{canonical_id}"
+            item['cluster_canonical_id'] = canonical_id
+            item['cluster_size'] = len(members)
+        if len(members) > 1:
+            stats['clusters'] += 1
+            stats['clustered_records'] += len(members)
+
+    save_cluster_state(state_path, signatures)
+    logging.info(
+        "Clustering: {computed} signatures computed, {reused} reused, "
+        "{clusters} clusters covering {clustered_records} records.".format(**stats)
+    )
+    return stats
@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import json_writer
+import profiling
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+
+# 1. Constants
+QUOTA_FILE = "data/gemini_quota.json"
+EPISODE_LINKS_FILE = "data/episodes/episode_links.json"
+QUOTA_TIMEZONE = "America/Los_Angeles"  # Gemini's daily quotas reset at midnight Pacific time
+DAILY_LIMITS_ENV = "GEMINI_DAILY_LIMITS"  # JSON object {"model": requests per day}, merged over the defaults
+RPM_LIMITS_ENV = "GEMINI_RPM_LIMITS"  # JSON object {"model": requests per minute}
+DEFAULT_DAILY_REQUESTS = 50
+DEFAULT_RPM = 2
+DAILY_LIMITS: Dict[str, int] = {}  # per-model defaults; models not listed get DEFAULT_DAILY_REQUESTS
+RPM_LIMITS: Dict[str, int] = {}
+KEEP_DAYS = 7  # days of history kept in the quota file
+NEW_EPISODE_DAYS = 30  # unanalyzed episodes released within this many days count as new
+
+PRIORITY_NEW = 0
+PRIORITY_STALE = 1
+PRIORITY_BACKFILL = 2
+PRIORITY_NAMES = {PRIORITY_NEW: "new", PRIORITY_STALE: "stale", PRIORITY_BACKFILL: "backfill"}
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class QuotaExhausted(Exception):
+    """
+    Raised instead of sending a request when a model's daily budget is used up.
+    """
+
+    def __init__(self, model: str, detail: str = ""):
+        super().__init__(f"Daily quota of {model} exhausted" + (f": {detail}" if detail else ""))
+        self.model = model
+
+
+def _env_limits(name: str) -> Dict[str, int]:
+    raw = os.environ.get(name)
+    if not raw:
+        return {}
+    try:
+        return {str(model): int(limit) for model, limit in json.loads(raw).items()}
+    except (ValueError, AttributeError) as e:
+        logging.warning(f"Ignoring malformed {name}: {e}")
+        return {}
+
+
+def quota_day(now: float) -> str:
+    """
+    The quota day a timestamp falls on (Pacific time, UTC if no time zone data is available).
+    """
+    tz = timezone.utc
+    if ZoneInfo is not None:
+        try:
+            tz = ZoneInfo(QUOTA_TIMEZONE)
+        except Exception:
+            pass
+    return datetime.fromtimestamp(now, tz).date().isoformat()
+
+
+def is_daily_quota_error(error: Exception) -> bool:
+    """
+    Whether a rate-limit error is about the daily quota (waiting a minute will not help).
+    """
+    text = str(error)
+    return ("429" in text or "RESOURCE_EXHAUSTED" in text) and ("PerDay" in text or "per day" in text.lower())
+
+
+class QuotaLedger:
+    """
+    Requests and tokens used per model and day, kept in a file across workflow runs.
+
+    acquire() is called before every request: it raises QuotaExhausted once
+    the day's budget of the model is spent (or the API reported its daily
+    quota as exhausted), and otherwise waits until the model's per-minute
+    limit allows the next request. Counts are saved after every request, so a
+    run that is cancelled still leaves an accurate record.
+
+    Args:
+        path: JSON file of the ledger; None keeps it in memory only
+        daily_limits: Requests per day by model (DEFAULT_DAILY_REQUESTS for others)
+        rpm_limits: Requests per minute by model (DEFAULT_RPM for others)
+        clock, sleep: Time source and sleep function, replaceable in tests
+    """
+
+    def __init__(self, path: Optional[str] = QUOTA_FILE, daily_limits: Optional[Dict[str, int]] = None,
+                 rpm_limits: Optional[Dict[str, int]] = None, clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.path = path
+        self.daily_limits = dict(DAILY_LIMITS, **(daily_limits or {}))
+        self.rpm_limits = dict(RPM_LIMITS, **(rpm_limits or {}))
+        self.clock = clock
+        self.sleep = sleep
+        self.days: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.days = json.load(f).get('days', {})
+            except (OSError, json.JSONDecodeError, AttributeError) as e:
+                logging.warning(f"Ignoring unreadable quota file {path}: {e}")
+
+    def _usage(self, model: str) -> Dict[str, Any]:
+        day = self.days.setdefault(quota_day(self.clock()), {})
+        return day.setdefault(model, {'requests': 0, 'tokens': 0, 'exhausted': False})
+
+    def daily_limit(self, model: str) -> int:
+        return self.daily_limits.get(model, DEFAULT_DAILY_REQUESTS)
+
+    def remaining(self, model: str) -> int:
+        with self._lock:
+            usage = self._usage(model)
+            return 0 if usage['exhausted'] else max(self.daily_limit(model) - usage['requests'], 0)
+
+    def acquire(self, model: str) -> None:
+        """
+        Books one request of a model, waiting for its per-minute limit; raises QuotaExhausted if none is left.
+        """
+        with self._lock:
+            usage = self._usage(model)
+            if usage['exhausted'] or usage['requests'] >= self.daily_limit(model):
+                raise QuotaExhausted(model, f"{usage['requests']} of {self.daily_limit(model)} requests used")
+            usage['requests'] += 1
+            now = self.clock()
+            slot = max(now, self._next_slot.get(model, now))
+            self._next_slot[model] = slot + 60.0 / self.rpm_limits.get(model, DEFAULT_RPM)
+        self.save()
+        profiling.count(f"quota_requests_{model}")
+        if slot > now:
+            self.sleep(slot - now)
+
+    def record_tokens(self, model: str, tokens: int) -> None:
+        with self._lock:
+            self._usage(model)['tokens'] += tokens or 0
+        self.save()
+
+    def exhaust(self, model: str) -> None:
+        """
+        Marks a model's quota as used up for today, e.g. after the API reported it.
+        """
+        with self._lock:
+            self._usage(model)['exhausted'] = True
+        self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            oldest = (date.fromisoformat(quota_day(self.clock())) - timedelta(days=KEEP_DAYS - 1)).isoformat()
+            self.days = {day: models for day, models in self.days.items() if day >= oldest}
+            data = {'days': json.loads(json.dumps(self.days))}
+        json_writer.write_json(self.path, data, sort_keys=True)
+
+    def log_summary(self) -> None:
+        with self._lock:
+            today = dict(self.days.get(quota_day(self.clock()), {}))
+        for model, usage in sorted(today.items()):
+            state = "exhausted" if usage['exhausted'] else f"{max(self.daily_limit(model) - usage['requests'], 0)} left"
+            logging.info(f"Quota {model}: {usage['requests']} of {self.daily_limit(model)} requests today "
+                         f"({state}), {usage['tokens']} tokens.")
+
+
+_ledger: Optional[QuotaLedger] = None
+
+
+def configure(path: Optional[str] = QUOTA_FILE) -> QuotaLedger:
+    """
+    Enables quota accounting for this process; GEMINI_DAILY_LIMITS and GEMINI_RPM_LIMITS override the limits.
+    """
+    global _ledger
+    _ledger = QuotaLedger(path, _env_limits(DAILY_LIMITS_ENV), _env_limits(RPM_LIMITS_ENV))
+    return _ledger
+
+
+def get() -> Optional[QuotaLedger]:
+    """
+    The active ledger, or None if quota accounting was not configured (tests, evaluation runs).
+    """
+    return _ledger
+
+
+def exhausted(model: str, error: Exception) -> Optional[QuotaExhausted]:
+    """
+    Records a daily-quota error of the API; returns the exception to raise, or None if no ledger is active.
+    """
+    if _ledger is None:
+        return None
+    _ledger.exhaust(model)
+    return QuotaExhausted(model, str(error))
+
+
+def load_release_dates(episode_links_file: str = EPISODE_LINKS_FILE) -> Dict[str, str]:
+    """
+    Release dates (YYYY-MM-DD) of the known episodes by Apple ID and Spotify ID.
+    """
+    if not os.path.exists(episode_links_file):
+        return {}
+    try:
+        with open(episode_links_file, 'r', encoding='utf-8') as f:
+            episodes = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Could not read episode list {episode_links_file}: {e}")
+        return {}
+    dates = {}
+    for episode in episodes if isinstance(episodes, list) else []:
+        release_date = str(episode.get('release_date') or '')[:10]
+        for key in ('apple_id', 'spotify_id'):
+            if episode.get(key) is not None and release_date:
+                dates[str(episode[key])] = release_date
+    return dates
+
+
+def priority(release_date: Optional[str], stale: bool, today: str) -> int:
+    """
+    Scheduling class of an episode: new episodes, then re-analysis of stale outputs, then historical backfill.
+    """
+    if stale:
+        return PRIORITY_STALE
+    cutoff = (date.fromisoformat(today) - timedelta(days=NEW_EPISODE_DAYS)).isoformat()
+    return PRIORITY_NEW if release_date and release_date >= cutoff else PRIORITY_BACKFILL
+
+
+def prioritize(episode_ids: List[str], release_dates: Dict[str, str], has_output: Callable[[str], bool],
+               is_stale: Callable[[str], bool] = lambda episode_id: False, today: Optional[str] = None) -> List[str]:
+    """
+    Orders the episodes still to analyze by priority class, newest first within a class (undated ones last, by ID).
+
+    An episode with an output is queued only if is_stale says the output is
+    out of date; up-to-date outputs are left out of the queue and its counts.
+    """
+    today = today or quota_day(time.time())
+    episode_ids = [episode_id for episode_id in episode_ids
+                   if not has_output(episode_id) or is_stale(episode_id)]
+    stale = {episode_id for episode_id in episode_ids if has_output(episode_id)}
+
+    def sort_key(episode_id: str):
+        release_date = release_dates.get(episode_id, '')
+        # Newest first: invert the date by sorting on the negated ordinal
+        ordinal = date.fromisoformat(release_date).toordinal() if release_date else 0
+        return (priority(release_date, episode_id in stale, today), -ordinal, episode_id)
+
+    ordered = sorted(episode_ids, key=sort_key)
+    counts: Dict[str, int] = {}
+    for episode_id in ordered:
+        name = PRIORITY_NAMES[sort_key(episode_id)[0]]
+        counts[name] = counts.get(name, 0) + 1
+    summary = ", ".join(f"{counts.get(name, 0)} {name}" for name in PRIORITY_NAMES.values())
+    logging.info(f"Analysis queue: {summary}")
+    return ordered
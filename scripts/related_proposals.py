@@ -0,0 +1,120 @@
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+import json_writer
+from proposal_clusters import STOPWORDS, normalize_text
+
+# 1. Constants
+RELATED_FILE = "docs/related.json"
+TOP_K = 5
+MIN_SIMILARITY = 0.1  # weaker neighbours share little more than a common word
+BLOCK_ROWS = 512  # similarity rows computed at once; memory grows with BLOCK_ROWS x number of proposals
+FIELD_WEIGHTS = {'vorschlag': 2.0, 'tags': 2.0, 'begruendung': 1.0, 'metaebene': 1.0}
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def _words(text: Any) -> List[str]:
+    return [w for w in normalize_text(str(text or '')).split() if len(w) > 2 and w not in STOPWORDS]
+
+
+def proposal_terms(vorschlag_item: Dict[str, Any]) -> Counter:
+    """
+    Weighted term counts of a proposal from its name, tags, reasoning and meta level.
+
+    Canonical tag IDs (after tag_canon) count as one term each, so synonyms
+    match; records that still carry raw 'tags' contribute their words instead.
+    """
+    terms: Counter = Counter()
+    for field in ('vorschlag', 'begruendung', 'metaebene'):
+        for word in _words(vorschlag_item.get(field)):
+            terms[word] += FIELD_WEIGHTS[field]
+    for tag_id in vorschlag_item.get('tag_ids') or []:
+        terms[f"#{tag_id}"] += FIELD_WEIGHTS['tags']
+    tags = vorschlag_item.get('tags') or []
+    if isinstance(tags, list):
+        for tag in tags:
+            for word in _words(tag):
+                terms[word] += FIELD_WEIGHTS['tags']
+    return terms
+
+
+def tfidf_matrix(vorschlaege: List[Dict[str, Any]]) -> sparse.csr_matrix:
+    """
+    Builds the L2-normalized TF-IDF matrix, one row per proposal.
+
+    Term frequencies are dampened logarithmically; the smoothed IDF keeps
+    terms that occur in every proposal from dividing by zero.
+    """
+    vocabulary: Dict[str, int] = {}
+    rows, cols, values = [], [], []
+    for row, item in enumerate(vorschlaege):
+        for term, weight in proposal_terms(item).items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            values.append(1.0 + np.log(weight))
+    n = len(vorschlaege)
+    matrix = sparse.csr_matrix((np.array(values, dtype=np.float32), (rows, cols)),
+                               shape=(n, len(vocabulary)), dtype=np.float32)
+    document_frequency = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = (np.log((1.0 + n) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+    matrix = matrix @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix, dtype=np.float32)
+
+
+def related_proposals(vorschlaege: List[Dict[str, Any]], top_k: int = TOP_K, min_similarity: float = MIN_SIMILARITY,
+                      block_rows: int = BLOCK_ROWS) -> Dict[str, List[List[Any]]]:
+    """
+    Finds the top_k most similar proposals of other episodes for every proposal.
+
+    Cosine similarities are computed block by block (block_rows rows against
+    all proposals as one sparse product), so memory stays bounded by the
+    block instead of growing with the square of the corpus. Proposals of the
+    same episode are left out: they are already listed together. Equal
+    similarities are ordered like the records.
+
+    Returns:
+        Dictionary mapping unique_vorschlag_id to [[neighbour id, similarity], ...], best first;
+        proposals without neighbours above min_similarity are left out
+    """
+    n = len(vorschlaege)
+    if n < 2:
+        return {}
+    ids = [item['unique_vorschlag_id'] for item in vorschlaege]
+    episode_of: Dict[str, int] = {}
+    episodes = np.array([episode_of.setdefault(str(item.get('episode_filename_primary_id') or item_id),
+                                               len(episode_of)) for item, item_id in zip(vorschlaege, ids)])
+    matrix = tfidf_matrix(vorschlaege)
+    transposed = matrix.T.tocsc()
+    k = min(top_k, n - 1)
+    related: Dict[str, List[List[Any]]] = {}
+
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        similarity = (matrix[start:stop] @ transposed).toarray()
+        similarity[episodes[start:stop, None] == episodes[None, :]] = 0.0
+        # A stable sort keeps equal scores in record order
+        candidates = np.argsort(-similarity, axis=1, kind='stable')[:, :k]
+        for offset, row in enumerate(candidates):
+            scores = similarity[offset, row]
+            neighbours = [[ids[j], round(float(score), 3)] for j, score in zip(row, scores) if score >= min_similarity]
+            if neighbours:
+                related[ids[start + offset]] = neighbours
+    logging.info(f"Related proposals: {len(related)} of {n} proposals have neighbours (top {k}).")
+    return related
+
+
+def save_related(related: Dict[str, List[List[Any]]], output_path: Optional[str] = RELATED_FILE) -> bool:
+    """
+    Writes the neighbour lists in compact form for the website, which loads them on demand.
+    """
+    if not output_path:
+        return False
+    return json_writer.write_json(output_path, related, indent=None)
@@ -0,0 +1,331 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import profiling
+import quota_scheduler
+
+# 1. Constants
+DEADLINE_ENV = "GEMINI_REQUEST_DEADLINE"  # seconds a caller waits for one request
+HEDGING_ENV = "GEMINI_HEDGING"  # "0" disables hedged duplicates; deadlines and circuit breaker stay active
+DEFAULT_DEADLINE_SECONDS = 300.0
+HEDGE_PERCENTILE = 95  # send a duplicate once a request takes longer than this percentile of its model
+MIN_LATENCY_SAMPLES = 5  # below this, the percentile is not trusted and no duplicate is sent
+LATENCY_WINDOW = 100  # recent latencies per model the hedge delay is computed from
+MIN_HEDGE_QUOTA = 5  # duplicates only while more requests than this are left of the model's daily budget
+BREAKER_FAILURES = 3  # consecutive transient failures that open a model's circuit
+BREAKER_COOLDOWN_SECONDS = 300.0  # open circuits let one probe request through after this time
+TRANSIENT_RETRY_SECONDS = 10.0  # base delay before retrying a transient error (multiplied by the attempt)
+TRANSIENT_MARKERS = ("500", "502", "503", "504", "INTERNAL", "UNAVAILABLE", "DEADLINE_EXCEEDED",
+                     "timed out", "Timeout", "Connection")
+
+T = TypeVar('T')
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class RequestTimeout(Exception):
+    """
+    Raised when no copy of a request answered within the deadline.
+    """
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of sending a request while a model's circuit is open.
+    """
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit of {model} open after repeated failures, next probe in {retry_in:.0f}s")
+        self.model = model
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether an error is a server-side or network failure worth retrying (not a rate limit or a bad request).
+    """
+    if isinstance(error, RequestTimeout):
+        return True
+    text = str(error)
+    if "429" in text or "RESOURCE_EXHAUSTED" in text:
+        return False
+    return any(marker in text for marker in TRANSIENT_MARKERS)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of values (0.0 for none).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(-(-p * len(ordered) // 100)), 1)  # ceil(p/100 * n)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a model after repeated transient failures.
+
+    Closed: requests pass, and BREAKER_FAILURES consecutive failures open the
+    circuit. Open: requests are rejected with CircuitOpen until the cooldown
+    has passed. Then one probe request passes (half open); its success closes
+    the circuit, its failure opens it for another cooldown.
+    """
+
+    def __init__(self, model: str, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.model = model
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            retry_in = self.opened_at + self.cooldown - self.clock()
+            if self.state == "open" and retry_in <= 0:
+                self.state = "half_open"
+                logging.info(f"Circuit of {self.model}: sending a probe request")
+                return
+            raise CircuitOpen(self.model, max(retry_in, 0.0))
+
+    def success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logging.info(f"Circuit of {self.model} closed again")
+            self.state = "closed"
+            self.failures = 0
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = self.clock()
+                profiling.count(f"circuit_opened_{self.model}")
+                logging.warning(f"Circuit of {self.model} opened after {self.failures} failures, "
+                                f"pausing requests for {self.cooldown:.0f}s")
+
+
+class HedgeStats:
+    """
+    Latency and hedging outcome per model for one run, mirrored into the profile report counters.
+    """
+
+    def __init__(self):
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, model: str) -> Dict[str, Any]:
+        return self.models.setdefault(model, {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'timeouts': 0,
+                                              'failures': 0, 'rejected': 0, 'latencies': [],
+                                              'recent': deque(maxlen=LATENCY_WINDOW)})
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """
+        Seconds after which a request of the model gets a duplicate, or None while too few latencies are known.
+        """
+        with self._lock:
+            recent = list(self._entry(model)['recent'])
+        return percentile(recent, HEDGE_PERCENTILE) if len(recent) >= MIN_LATENCY_SAMPLES else None
+
+    def record(self, model: str, outcome: str, seconds: Optional[float] = None, hedged: bool = False,
+               hedge_won: bool = False) -> None:
+        """
+        Records one call: outcome is "ok", "timeout", "failure" or "rejected" (circuit open).
+        """
+        with self._lock:
+            entry = self._entry(model)
+            entry['requests'] += 1
+            entry['hedged'] += hedged
+            entry['hedge_wins'] += hedge_won
+            if outcome == "ok":
+                entry['latencies'].append(seconds)
+                entry['recent'].append(seconds)
+            elif outcome == "timeout":
+                entry['timeouts'] += 1
+            elif outcome == "failure":
+                entry['failures'] += 1
+            else:
+                entry['rejected'] += 1
+        profiling.count(f"hedging_{outcome}")
+        if hedged:
+            profiling.count("hedged_requests")
+        if hedge_won:
+            profiling.count("hedge_wins")
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = {model: dict(entry, latencies=list(entry['latencies'])) for model, entry in self.models.items()}
+        return {
+            model: {
+                'requests': entry['requests'],
+                'hedged': entry['hedged'],
+                'hedge_hit_rate': round(entry['hedge_wins'] / entry['hedged'], 3) if entry['hedged'] else 0.0,
+                'timeouts': entry['timeouts'],
+                'failures': entry['failures'],
+                'rejected': entry['rejected'],
+                'p50_seconds': round(percentile(entry['latencies'], 50), 3),
+                'p95_seconds': round(percentile(entry['latencies'], 95), 3),
+                'p99_seconds': round(percentile(entry['latencies'], 99), 3),
+            }
+            for model, entry in models.items()
+        }
+
+    def log_summary(self) -> None:
+        for model, entry in self.summary().items():
+            logging.info(f"Requests {model}: {entry['requests']} calls, latency p50 {entry['p50_seconds']}s / "
+                         f"p95 {entry['p95_seconds']}s / p99 {entry['p99_seconds']}s, {entry['hedged']} hedged "
+                         f"(hit rate {entry['hedge_hit_rate']:.0%}), {entry['timeouts']} timeouts, "
+                         f"{entry['failures']} failures, {entry['rejected']} rejected by the circuit breaker")
+
+
+stats = HedgeStats()
+
+
+def quota_headroom(model: str) -> bool:
+    """
+    Whether the daily budget of a model leaves room for a duplicate request (always, without a ledger).
+    """
+    ledger = quota_scheduler.get()
+    return ledger is None or ledger.remaining(model) > MIN_HEDGE_QUOTA
+
+
+class HedgedCaller:
+    """
+    Runs requests with a deadline, hedged duplicates and a circuit breaker per model.
+
+    The request runs in a worker thread. If it has not answered after the
+    model's observed HEDGE_PERCENTILE latency and the quota has headroom, an
+    identical duplicate is started and the first successful answer wins. If
+    no copy answers within the deadline, RequestTimeout is raised. Copies
+    still running are abandoned, not cancelled: a streaming call cannot be
+    interrupted from outside, so its thread ends when the server answers.
+    Transient failures and timeouts count towards the model's circuit breaker.
+
+    Args:
+        deadline: Seconds to wait for an answer
+        hedging: Whether to send duplicates at all
+        headroom: headroom(model) decides whether a duplicate may be sent
+        breaker_clock: Time source of the circuit breakers, replaceable in tests
+    """
+
+    def __init__(self, deadline: float = DEFAULT_DEADLINE_SECONDS, hedging: bool = True,
+                 headroom: Callable[[str], bool] = quota_headroom, hedge_stats: Optional[HedgeStats] = None,
+                 breaker_failures: int = BREAKER_FAILURES, breaker_cooldown: float = BREAKER_COOLDOWN_SECONDS,
+                 breaker_clock: Callable[[], float] = time.monotonic):
+        self.deadline = deadline
+        self.hedging = hedging
+        self.headroom = headroom
+        self.stats = hedge_stats or stats
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_clock = breaker_clock
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self.breakers:
+                self.breakers[model] = CircuitBreaker(model, self.breaker_failures, self.breaker_cooldown,
+                                                      self.breaker_clock)
+            return self.breakers[model]
+
+    def call(self, model: str, request: Callable[[], T]) -> T:
+        breaker = self.breaker(model)
+        try:
+            breaker.check()
+        except CircuitOpen:
+            self.stats.record(model, "rejected")
+            raise
+        answers: queue.Queue = queue.Queue()
+
+        def run(copy: int) -> None:
+            try:
+                answers.put((copy, True, request()))
+            except BaseException as e:
+                answers.put((copy, False, e))
+
+        started = time.monotonic()
+        deadline = started + self.deadline
+        hedge_at = None
+        if self.hedging:
+            delay = self.stats.hedge_delay(model)
+            hedge_at = started + delay if delay is not None else None
+        threading.Thread(target=run, args=(0,), daemon=True, name=f"request-{model}").start()
+        running, hedged = 1, False
+        error: Optional[BaseException] = None
+        while running:
+            wait_until = hedge_at if hedge_at is not None and not hedged else deadline
+            try:
+                copy, ok, value = answers.get(timeout=max(min(wait_until, deadline) - time.monotonic(), 0.0))
+            except queue.Empty:
+                if hedge_at is not None and not hedged and time.monotonic() < deadline:
+                    if self.headroom(model):
+                        logging.info(f"Request to {model} slower than p{HEDGE_PERCENTILE} "
+                                     f"({hedge_at - started:.1f}s), sending a hedged duplicate")
+                        threading.Thread(target=run, args=(1,), daemon=True, name=f"hedge-{model}").start()
+                        running += 1
+                        hedged = True
+                    else:
+                        hedge_at = None  # no headroom: wait for the first copy up to the deadline
+                    continue
+                self.stats.record(model, "timeout", hedged=hedged)
+                breaker.failure()
+                raise RequestTimeout(f"No answer from {model} within {self.deadline:.0f}s")
+            running -= 1
+            if ok:
+                self.stats.record(model, "ok", time.monotonic() - started, hedged=hedged, hedge_won=copy == 1)
+                breaker.success()
+                return value
+            error = value
+        if isinstance(error, quota_scheduler.QuotaExhausted):
+            raise error
+        self.stats.record(model, "failure", hedged=hedged)
+        if is_transient(error):
+            breaker.failure()
+        raise error
+
+
+_caller: Optional[HedgedCaller] = None
+
+
+def configure(deadline: Optional[float] = None, hedging: Optional[bool] = None) -> HedgedCaller:
+    """
+    Enables deadlines, hedging and circuit breakers for this process; $GEMINI_REQUEST_DEADLINE and
+    $GEMINI_HEDGING override the defaults.
+    """
+    global _caller
+    if deadline is None:
+        deadline = float(os.environ.get(DEADLINE_ENV) or DEFAULT_DEADLINE_SECONDS)
+    if hedging is None:
+        hedging = os.environ.get(HEDGING_ENV, "1") != "0"
+    _caller = HedgedCaller(deadline, hedging)
+    return _caller
+
+
+def get() -> Optional[HedgedCaller]:
+    """
+    The active caller, or None if requests run directly (tests, evaluation runs).
+    """
+    return _caller
+
+
+def call(model: str, request: Callable[[], T]) -> T:
+    """
+    Runs a request through the active caller, or directly if none is configured.
+    """
+    if _caller is None:
+        return request()
+    return _caller.call(model, request)
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+# 1. Constants
+SHOWS_FILE = "data/shows.json"
+SHOW_ENV = "SHOW_ID"  # selects the show of a single-show run; the first configured show otherwise
+
+# The show this repository started with. It keeps the flat data layout (empty namespace),
+# so its existing files stay where they are.
+DEFAULT_SHOW: Dict[str, Any] = {
+    'id': "gegenwart",
+    'title': "Die sogenannte Gegenwart",
+    'apple_podcast_id': "1522895163",
+    'spotify_show_id': "09j4UbTqLqpaUr2F7pxIgl",
+    'hosts': [
+        {'name': "Lars", 'full_name': "Lars Weisbrod"},
+        {'name': "Ijoma", 'full_name': "Ijoma Mangold"},
+        {'name': "Nina", 'full_name': "Nina Pauer"},
+    ],
+    'prompt': {
+        'podcast_name': "Gegenwart",
+        'hosts_intro': ("Die Hosts sind Lars Weisbrod und Ijoma Mangold. "
+                        "Manchmal ist statt Ijoma auch Nina Pauer dabei."),
+    },
+    'namespace': "",
+}
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def namespaced(path: str, namespace: str) -> str:
+    """
+    Moves a path into a show's namespace below its top-level directory.
+
+    "data/transcripts" becomes "data/<namespace>/transcripts" and
+    "docs/site_data.json" becomes "docs/<namespace>/site_data.json"; an empty
+    namespace leaves the path unchanged. Paths are relative to the repository.
+    """
+    if not namespace:
+        return path
+    if os.path.isabs(path):
+        raise ValueError(f"Cannot move absolute path {path} into namespace {namespace}")
+    head, _, rest = path.partition('/')
+    return f"{head}/{namespace}/{rest}" if rest else f"{namespace}/{head}"
+
+
+class Show:
+    """
+    Identity of one podcast: platform IDs, hosts, prompt variables and the namespace of its files.
+
+    Args:
+        config: One entry of data/shows.json; missing prompt variables are derived from the hosts
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        if not config.get('id'):
+            raise ValueError(f"Show without id: {config}")
+        self.id = str(config['id'])
+        self.title = config.get('title') or self.id
+        self.apple_podcast_id = config.get('apple_podcast_id')
+        self.spotify_show_id = config.get('spotify_show_id')
+        self.hosts: List[str] = [host['name'] for host in config.get('hosts', [])]
+        if not self.hosts:
+            raise ValueError(f"Show {self.id} has no hosts")
+        self.namespace = config.get('namespace', f"shows/{self.id}")
+        host_list = ", ".join(self.hosts[:-1]) + " oder " + self.hosts[-1] if len(self.hosts) > 1 else self.hosts[0]
+        full_names = [host.get('full_name') or host['name'] for host in config['hosts']]
+        self.prompt_variables: Dict[str, str] = {
+            'podcast_name': self.title,
+            'show_title': self.title,
+            'hosts_intro': f"Die Hosts sind {' und '.join(full_names)}.",
+            'host_list': host_list,
+            'host_choices': "/".join(self.hosts),
+        }
+        self.prompt_variables.update(config.get('prompt', {}))
+
+    @property
+    def default_host(self) -> str:
+        return self.hosts[0]
+
+    def path(self, path: str) -> str:
+        return namespaced(path, self.namespace)
+
+    def paths(self, paths: Dict[str, str]) -> Dict[str, str]:
+        """
+        The pipeline paths of this show, each moved into its namespace.
+        """
+        return {name: self.path(path) for name, path in paths.items()}
+
+    def fetch_env(self, episode_links_file: str) -> Dict[str, str]:
+        """
+        Environment for the fetch scripts, which take the show and their files from it.
+        """
+        episodes_dir = os.path.dirname(episode_links_file)
+        env = {
+            'APPLE_OUTPUT_FILE': os.path.join(episodes_dir, "apple_episode_links.json"),
+            'SPOTIFY_OUTPUT_FILE': os.path.join(episodes_dir, "spotify_episode_links.json"),
+            'EPISODE_LINKS_FILE': episode_links_file,
+            'FETCH_STATE_FILE': os.path.join(episodes_dir, "fetch_state.json"),
+        }
+        if self.apple_podcast_id:
+            env['APPLE_PODCAST_ID'] = str(self.apple_podcast_id)
+        if self.spotify_show_id:
+            env['SPOTIFY_SHOW_ID'] = str(self.spotify_show_id)
+        return env
+
+    def __repr__(self) -> str:
+        return f"Show({self.id!r})"
+
+
+DEFAULT = Show(DEFAULT_SHOW)
+
+
+def load_shows(path: str = SHOWS_FILE) -> List[Show]:
+    """
+    Loads the configured shows; without a configuration file, only the default show.
+    """
+    if not os.path.exists(path):
+        return [DEFAULT]
+    with open(path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    shows = [Show(config) for config in configs]
+    ids = [show.id for show in shows]
+    if len(set(ids)) != len(ids) or len({show.namespace for show in shows}) != len(shows):
+        raise ValueError(f"Show IDs and namespaces in {path} must be unique: {ids}")
+    return shows
+
+
+def get_show(show_id: Optional[str] = None, path: str = SHOWS_FILE) -> Show:
+    """
+    Looks up a show by ID (default: $SHOW_ID, else the first configured show).
+    """
+    shows = load_shows(path)
+    show_id = show_id or os.environ.get(SHOW_ENV)
+    if not show_id:
+        return shows[0]
+    for show in shows:
+        if show.id == show_id:
+            return show
+    raise ValueError(f"Unknown show '{show_id}', configured: {', '.join(show.id for show in shows)}")
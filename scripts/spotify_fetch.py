@@ -2,8 +2,28 @@ import requests
 import json
 import os
 import base64
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Set, Any
+from requests.adapters import HTTPAdapter
+
+import json_writer
+import profiling
+from http_cache import CachedFetcher
+from profiling import stage
+from fetch_state import (
+    FETCH_STATE_FILE,
+    get_known_ids,
+    load_episodes,
+    load_fetch_state,
+    merge_new_episodes,
+    reaches_known_episodes,
+    save_fetch_state,
+    update_watermark,
+)
 
 # Set up logging
 logging.basicConfig(
@@ -12,13 +32,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger('spotify_fetch')
 
-def get_spotify_token(client_id: str, client_secret: str) -> str:
+SPOTIFY_TOKEN_URL = os.environ.get('SPOTIFY_TOKEN_URL', "https://accounts.spotify.com/api/token")
+SPOTIFY_API_URL = os.environ.get('SPOTIFY_API_URL', "https://api.spotify.com/v1")
+MAX_WORKERS = 4  # Concurrent page requests once the total is known
+MAX_RATE_LIMIT_RETRIES = 3
+TOKEN_EXPIRY_MARGIN = 60  # seconds before expiry at which a cached token is renewed
+
+_session: Optional[requests.Session] = None
+_fetcher: Optional[CachedFetcher] = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    """
+    Get the shared HTTP session so that all page requests reuse pooled connections.
+
+    Args:
+        pool_size: Number of connections kept open per host
+
+    Returns:
+        The module-wide requests session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_fetcher() -> CachedFetcher:
+    """
+    Get the cached fetcher for episode pages (configured by HTTP_CACHE_DIR / HTTP_CACHE_OFFLINE).
+    """
+    global _fetcher
+    session = get_session()
+    with _session_lock:
+        if _fetcher is None or _fetcher.session is not session:
+            _fetcher = CachedFetcher.from_env(session=session)
+        return _fetcher
+
+
+class TokenCache:
+    """
+    Keeps client-credentials tokens until shortly before they expire.
+
+    Tokens are held in memory and, if a path is given, persisted to disk so that
+    consecutive runs within the token lifetime do not request a new one.
+    """
+
+    def __init__(self, path: Optional[str] = None, margin_seconds: int = TOKEN_EXPIRY_MARGIN):
+        self.path = path
+        self.margin_seconds = margin_seconds
+        self._tokens: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._tokens = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable token cache {path}: {e}")
+
+    @staticmethod
+    def _key(client_id: str) -> str:
+        return hashlib.sha256(client_id.encode('utf-8')).hexdigest()[:16]
+
+    def get(self, client_id: str) -> Optional[str]:
+        """Return a cached token that is still valid for at least the safety margin."""
+        with self._lock:
+            entry = self._tokens.get(self._key(client_id))
+        if entry and entry.get('expires_at', 0) - self.margin_seconds > time.time():
+            return entry.get('access_token')
+        return None
+
+    def put(self, client_id: str, access_token: str, expires_in: int) -> None:
+        """Store a token together with its absolute expiry time."""
+        with self._lock:
+            self._tokens[self._key(client_id)] = {
+                'access_token': access_token,
+                'expires_at': time.time() + expires_in,
+            }
+            if not self.path:
+                return
+            try:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._tokens, f)
+            except OSError as e:
+                logger.warning(f"Could not persist token cache {self.path}: {e}")
+
+
+_token_cache = TokenCache(os.environ.get('SPOTIFY_TOKEN_CACHE'))
+
+
+def get_spotify_token(
+    client_id: str,
+    client_secret: str,
+    token_cache: Optional[TokenCache] = None,
+    token_url: str = SPOTIFY_TOKEN_URL
+) -> str:
     """
     Get Spotify access token using Client Credentials flow.
 
     Args:
         client_id: Spotify API client ID
         client_secret: Spotify API client secret
+        token_cache: Cache to reuse a still valid token from and to store the new one in
+        token_url: Token endpoint (overridable for the local stub server)
 
     Returns:
         Spotify access token as a string
@@ -26,23 +151,31 @@ def get_spotify_token(client_id: str, client_secret: str) -> str:
     Raises:
         Exception if token cannot be obtained
     """
+    if token_cache is not None:
+        cached_token = token_cache.get(client_id)
+        if cached_token:
+            logger.info("Using cached Spotify access token")
+            return cached_token
+
     logger.info("Getting Spotify access token")
     auth_string = f"{client_id}:{client_secret}"
     auth_bytes = auth_string.encode('utf-8')
     auth_base64 = base64.b64encode(auth_bytes).decode('utf-8')
     
-    url = "https://accounts.spotify.com/api/token"
     headers = {
         "Authorization": f"Basic {auth_base64}",
         "Content-Type": "application/x-www-form-urlencoded"
     }
     data = {"grant_type": "client_credentials"}
     
+    response = None
     try:
-        response = requests.post(url, headers=headers, data=data)
+        response = requests.post(token_url, headers=headers, data=data)
         response.raise_for_status()
         json_result = response.json()
         logger.info("Successfully obtained Spotify access token")
+        if token_cache is not None:
+            token_cache.put(client_id, json_result["access_token"], int(json_result.get("expires_in", 3600)))
         return json_result["access_token"]
     except Exception as e:
         logger.error(f"Error getting Spotify token: {str(e)}")
@@ -50,79 +183,175 @@ def get_spotify_token(client_id: str, client_secret: str) -> str:
             logger.error(f"Response: {response.text}")
         raise
 
-def get_podcast_episodes(client_id: str, client_secret: str, show_id: str) -> List[Dict]:
+
+def parse_spotify_episodes(data: Dict) -> List[Dict]:
+    """
+    Convert one page of the show episodes endpoint into episode dictionaries.
+
+    Args:
+        data: Decoded JSON response of the episodes endpoint
+
+    Returns:
+        List of episode dictionaries
+    """
+    episodes = []
+    for episode in data.get('items', []):
+        if not episode:
+            continue
+        external_urls = episode.get('external_urls', {})
+        episodes.append({
+            "title": episode.get('name'),
+            "url": external_urls.get('spotify'),
+            "episode_id": episode.get('id'),
+            "release_date": episode.get('release_date'),
+            "source": "spotify"
+        })
+    return episodes
+
+
+def fetch_episode_page(url: str, token: str, offset: int, limit: int) -> Dict:
+    """
+    Fetch one page of episodes over the shared session and HTTP cache, waiting out rate limits.
+
+    Args:
+        url: Episodes endpoint of the show
+        token: Spotify access token
+        offset: Index of the first episode of the page
+        limit: Page size
+
+    Returns:
+        Decoded JSON response
+
+    Raises:
+        requests.exceptions.RequestException if the page cannot be fetched
+    """
+    headers = {
+        "Authorization": f"Bearer {token}"
+    }
+    params = {
+        "limit": limit,
+        "offset": offset,
+        "market": "DE"  # Assuming German market for Die Sogenannte Gegenwart
+    }
+    fetcher = get_fetcher()
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        logger.info(f"Making Spotify API request with offset {offset}")
+        response = fetcher.get(url, headers=headers, params=params)
+        profiling.count("spotify_page_requests")
+        if response.status_code == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+            delay = float(response.headers.get('Retry-After', 1))
+            logger.warning(f"Spotify rate limit reached, retrying offset {offset} in {delay:.0f}s")
+            time.sleep(delay)
+            continue
+        response.raise_for_status()
+        return response.json()
+    raise requests.exceptions.HTTPError(f"Rate limit retries exhausted for offset {offset}")
+
+
+def get_podcast_episodes(
+    client_id: str,
+    client_secret: str,
+    show_id: str,
+    known_ids: Optional[Set[str]] = None,
+    watermark: Optional[Dict[str, Any]] = None,
+    max_workers: int = MAX_WORKERS,
+    api_url: str = SPOTIFY_API_URL,
+    token_url: str = SPOTIFY_TOKEN_URL
+) -> List[Dict]:
     """
     Get all episodes for a Spotify podcast using show ID.
 
+    The first page reveals the total number of episodes; in a full fetch the
+    remaining pages are then requested concurrently over pooled connections.
+
     Args:
         client_id: Spotify API client ID
         client_secret: Spotify API client secret
         show_id: Spotify show ID
+        known_ids: IDs of already stored episodes. If given, paging stops as soon
+            as a page reaches known episodes (incremental mode).
+        watermark: Newest known episode of the previous fetch
+        max_workers: Number of pages fetched in parallel in a full fetch
+        api_url: Base URL of the Web API (overridable for the local stub server)
+        token_url: Token endpoint (overridable for the local stub server)
 
     Returns:
         List of episode dictionaries
     """
-    token = get_spotify_token(client_id, client_secret)
+    if get_fetcher().offline:
+        # Pages are served from the HTTP cache, no token needed
+        token = ""
+    else:
+        token = get_spotify_token(client_id, client_secret, token_cache=_token_cache, token_url=token_url)
     logger.info(f"Fetching episodes for Spotify show ID: {show_id}")
     
-    # Initialize variables
-    episodes = []
-    offset = 0
+    url = f"{api_url}/shows/{show_id}/episodes"
     limit = 50  # Spotify's max limit per request
     
-    # Make multiple requests to get all episodes
+    try:
+        data = fetch_episode_page(url, token, 0, limit)
+    except Exception as e:
+        logger.error(f"Error fetching Spotify episodes: {str(e)}")
+        return []
+    
+    episodes = parse_spotify_episodes(data)
+    logger.info(f"Retrieved {len(episodes)} episodes (offset 0)")
+    
+    if known_ids is not None and reaches_known_episodes(episodes, known_ids, 'episode_id', watermark):
+        logger.info("Reached known episodes, stopping incremental fetch at offset 0")
+        return episodes
+    if len(episodes) < limit or not data.get('next'):
+        logger.info(f"No more episodes to fetch, total episodes: {len(episodes)}")
+        return episodes
+    
+    total = data.get('total')
+    if known_ids is not None or not isinstance(total, int) or max_workers <= 1:
+        # Incremental fetches usually stop after the first page, so page sequentially
+        return episodes + _fetch_pages_sequentially(url, token, limit, known_ids, watermark)
+    
+    offsets = list(range(limit, total, limit))
+    logger.info(f"Fetching {len(offsets)} remaining pages of {total} episodes with {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(fetch_episode_page, url, token, offset, limit) for offset in offsets]
+        # Keep the episode order of the API and stop at the first failed page, like sequential paging would
+        for offset, future in zip(offsets, futures):
+            try:
+                page = parse_spotify_episodes(future.result())
+            except Exception as e:
+                logger.error(f"Error fetching Spotify episodes at offset {offset}: {str(e)}")
+                for pending in futures:
+                    pending.cancel()
+                break
+            logger.info(f"Retrieved {len(page)} episodes (offset {offset})")
+            episodes.extend(page)
+    
+    logger.info(f"No more episodes to fetch, total episodes: {len(episodes)}")
+    return episodes
+
+
+def _fetch_pages_sequentially(
+    url: str, token: str, limit: int, known_ids: Optional[Set[str]], watermark: Optional[Dict[str, Any]]
+) -> List[Dict]:
+    """Page through the episodes after the first page one request at a time."""
+    episodes: List[Dict] = []
+    offset = limit
     while True:
-        url = f"https://api.spotify.com/v1/shows/{show_id}/episodes"
-        headers = {
-            "Authorization": f"Bearer {token}"
-        }
-        params = {
-            "limit": limit,
-            "offset": offset,
-            "market": "DE"  # Assuming German market for Die Sogenannte Gegenwart
-        }
-        
         try:
-            logger.info(f"Making Spotify API request with offset {offset}")
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Get episode data
-            new_episodes = []
-            for episode in data.get('items', []):
-                episode_id = episode.get('id')
-                episode_name = episode.get('name')
-                release_date = episode.get('release_date')
-                external_urls = episode.get('external_urls', {})
-                spotify_url = external_urls.get('spotify')
-                
-                new_episodes.append({
-                    "title": episode_name,
-                    "url": spotify_url,
-                    "episode_id": episode_id,
-                    "release_date": release_date,
-                    "source": "spotify"
-                })
-            
-            logger.info(f"Retrieved {len(new_episodes)} episodes (offset {offset})")
-            
-            # Add to total episodes list
-            episodes.extend(new_episodes)
-            
-            # Check if we need to make another request
-            if len(new_episodes) < limit or not data.get('next'):
-                logger.info(f"No more episodes to fetch, total episodes: {len(episodes)}")
-                break
-            
-            offset += limit
-            
+            data = fetch_episode_page(url, token, offset, limit)
         except Exception as e:
             logger.error(f"Error fetching Spotify episodes: {str(e)}")
-            if hasattr(response, 'text'):
-                logger.error(f"Response: {response.text}")
             break
-    
+        new_episodes = parse_spotify_episodes(data)
+        logger.info(f"Retrieved {len(new_episodes)} episodes (offset {offset})")
+        episodes.extend(new_episodes)
+        
+        # In incremental mode, stop once the page reaches episodes we already have
+        if known_ids is not None and reaches_known_episodes(new_episodes, known_ids, 'episode_id', watermark):
+            logger.info(f"Reached known episodes, stopping incremental fetch at offset {offset}")
+            break
+        if len(new_episodes) < limit or not data.get('next'):
+            break
+        offset += limit
     return episodes
 
 def save_episodes(episodes: List[Dict], output_file: str) -> bool:
@@ -138,10 +367,10 @@ def save_episodes(episodes: List[Dict], output_file: str) -> bool:
     """
     try:
         logger.info(f"Saving {len(episodes)} episodes to {output_file}")
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, 'w') as f:
-            json.dump(episodes, f, indent=2)
-        logger.info(f"Successfully saved episodes to {output_file}")
+        if json_writer.write_json(output_file, episodes, ensure_ascii=True):
+            logger.info(f"Successfully saved episodes to {output_file}")
+        else:
+            logger.info(f"Episodes unchanged, not rewritten: {output_file}")
         return True
     except Exception as e:
         logger.error(f"Error saving episodes: {str(e)}")
@@ -151,12 +380,13 @@ def main() -> None:
     """
     Main function to fetch Spotify podcast episodes.
     """
+    profiling.configure("spotify_fetch")
     # Get credentials from environment variables
     client_id = os.environ.get('SPOTIFY_CLIENT_ID')
     client_secret = os.environ.get('SPOTIFY_CLIENT_SECRET')
     show_id = os.environ.get('SPOTIFY_SHOW_ID')  
     
-    if not client_id or not client_secret:
+    if (not client_id or not client_secret) and not get_fetcher().offline:
         logger.error("SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET environment variables are required")
         exit(1)
     
@@ -164,13 +394,36 @@ def main() -> None:
         logger.error("SPOTIFY_SHOW_ID environment variable is required")
         exit(1)
     
+    output_file = os.environ.get('SPOTIFY_OUTPUT_FILE', 'data/episodes/spotify_episode_links.json')
+    state_file = os.environ.get('FETCH_STATE_FILE', FETCH_STATE_FILE)
+    incremental = os.environ.get('INCREMENTAL_FETCH', '').lower() in ('1', 'true', 'yes')
+    
+    state = load_fetch_state(state_file)
+    existing = load_episodes(output_file) if incremental else []
+    
     # Fetch episodes
-    episodes = get_podcast_episodes(client_id, client_secret, show_id)
+    if incremental and existing:
+        known_ids = get_known_ids(existing, 'episode_id')
+        logger.info(f"Incremental mode: {len(known_ids)} known Spotify episodes")
+        with stage("fetch_episodes"):
+            fetched = get_podcast_episodes(client_id, client_secret, show_id, known_ids, state.get('spotify'))
+        episodes, added = merge_new_episodes(existing, fetched, 'episode_id')
+        logger.info(f"Added {added} new Spotify episodes")
+    else:
+        with stage("fetch_episodes"):
+            episodes = get_podcast_episodes(client_id, client_secret, show_id)
+        added = len(episodes)
+    get_fetcher().log_stats()
     
     # Save to file
     if episodes:
-        output_file = os.environ.get('SPOTIFY_OUTPUT_FILE', 'data/episodes/spotify_episode_links.json')
-        save_episodes(episodes, output_file)
+        if added:
+            with stage("save_episodes"):
+                save_episodes(episodes, output_file)
+            update_watermark(state, 'spotify', episodes, 'episode_id')
+            save_fetch_state(state, state_file)
+        else:
+            logger.info("No new Spotify episodes, keeping existing file")
         
         # Set output for GitHub Actions
         if 'GITHUB_OUTPUT' in os.environ:
@@ -0,0 +1,226 @@
+import argparse
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('spotify_stub_server')
+
+EPISODES_PATH = re.compile(r'^/v1/shows/([^/]+)/episodes$')
+
+
+def make_stub_episodes(count: int) -> List[Dict]:
+    """
+    Build a synthetic episode catalogue in the API's order (newest first).
+
+    Args:
+        count: Number of episodes
+
+    Returns:
+        List of raw Spotify episode objects
+    """
+    newest = date(2025, 4, 7)
+    episodes = []
+    for i in range(count):
+        episode_id = f"stub{count - i:05d}"
+        episodes.append({
+            "id": episode_id,
+            "name": f"Stub Episode {count - i}",
+            "release_date": (newest - timedelta(days=7 * i)).isoformat(),
+            "external_urls": {"spotify": f"https://open.spotify.com/episode/{episode_id}"},
+        })
+    return episodes
+
+
+class SpotifyStubServer:
+    """
+    Local stand-in for the Spotify token endpoint and the show episodes endpoint.
+
+    Serves a synthetic catalogue with Spotify's paging fields (items, total, next)
+    and an optional per-request latency that emulates the network round trip, so
+    paging behaviour and throughput can be tested and benchmarked offline. Pages
+    carry an ETag and answer matching If-None-Match requests with 304.
+
+    Usage:
+        with SpotifyStubServer(episode_count=300, latency=0.05) as stub:
+            get_podcast_episodes("id", "secret", "show", api_url=stub.api_url, token_url=stub.token_url)
+    """
+
+    def __init__(self, episode_count: int = 120, latency: float = 0.0, token_ttl: int = 3600,
+                 episodes: Optional[List[Dict]] = None, cache_control: str = "private, max-age=0"):
+        self.episodes = episodes if episodes is not None else make_stub_episodes(episode_count)
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.cache_control = cache_control
+        self.tokens_issued = 0
+        self.page_requests = 0
+        self.not_modified = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.base_url}/api/token"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                if self.path != "/api/token":
+                    self._send_json(404, {"error": "not_found"})
+                    return
+                with stub._lock:
+                    stub.tokens_issued += 1
+                    token = f"stub-token-{stub.tokens_issued}"
+                self._send_json(200, {"access_token": token, "token_type": "Bearer", "expires_in": stub.token_ttl})
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                match = EPISODES_PATH.match(parsed.path)
+                if not match:
+                    self._send_json(404, {"error": "not_found"})
+                    return
+                if not self.headers.get("Authorization", "").startswith("Bearer stub-token-"):
+                    self._send_json(401, {"error": {"status": 401, "message": "Invalid access token"}})
+                    return
+                if stub.latency:
+                    time.sleep(stub.latency)
+                query = parse_qs(parsed.query)
+                limit = int(query.get("limit", ["20"])[0])
+                offset = int(query.get("offset", ["0"])[0])
+                with stub._lock:
+                    stub.page_requests += 1
+                total = len(stub.episodes)
+                next_url = None
+                if offset + limit < total:
+                    next_url = f"{stub.api_url}/shows/{match.group(1)}/episodes?offset={offset + limit}&limit={limit}"
+                payload = {
+                    "items": stub.episodes[offset:offset + limit],
+                    "limit": limit,
+                    "offset": offset,
+                    "total": total,
+                    "next": next_url,
+                }
+                etag = '"' + hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest()[:16] + '"'
+                headers = {"ETag": etag, "Cache-Control": stub.cache_control}
+                if self.headers.get("If-None-Match") == etag:
+                    with stub._lock:
+                        stub.not_modified += 1
+                    self.send_response(304)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self._send_json(200, payload, headers)
+
+        return Handler
+
+    def start(self) -> "SpotifyStubServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "SpotifyStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def run_benchmark(episode_count: int, latency: float, workers: List[int]) -> None:
+    """
+    Compare sequential and concurrent fetching of the whole catalogue against the stub.
+    """
+    import spotify_fetch
+
+    for max_workers in workers:
+        with SpotifyStubServer(episode_count=episode_count, latency=latency) as stub:
+            spotify_fetch._session = None  # fresh connection pool and fetcher per run
+            start = time.perf_counter()
+            episodes = spotify_fetch.get_podcast_episodes(
+                "bench", "bench", "stubshow", max_workers=max_workers,
+                api_url=stub.api_url, token_url=stub.token_url
+            )
+            elapsed = time.perf_counter() - start
+            print(f"workers={max_workers}: {len(episodes)} episodes, {stub.page_requests} requests, "
+                  f"{stub.connections} connections, {elapsed:.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Spotify API stub for offline paging tests and benchmarks")
+    parser.add_argument("--episodes", type=int, default=500, help="Number of episodes in the synthetic catalogue")
+    parser.add_argument("--latency", type=float, default=0.05, help="Artificial latency per page request in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="Worker counts to benchmark")
+    parser.add_argument("--serve", action="store_true", help="Only run the stub server until interrupted")
+    args = parser.parse_args()
+
+    if args.serve:
+        with SpotifyStubServer(episode_count=args.episodes, latency=args.latency) as stub:
+            print(f"Serving stub at {stub.base_url}")
+            print(f"  SPOTIFY_API_URL={stub.api_url} SPOTIFY_TOKEN_URL={stub.token_url}")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+        return
+
+    run_benchmark(args.episodes, args.latency, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from proposal_clusters import STOPWORDS, normalize_text
+
+# 1. Constants
+TRANSCRIPTS_DIR = "data/transcripts"
+ANALYSES_DIR = "data/analyses"
+NGRAM_SIZE = 3
+VORSCHLAG_WEIGHT = 2.0  # the proposal's name is a stronger cue than the paraphrased reasoning
+BEGRUENDUNG_WEIGHT = 1.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+MIN_MATCH_SCORE = 0.25  # below this share of the query weight the model's guess is kept
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def text_ngrams(text: str, n: int = NGRAM_SIZE) -> Set[str]:
+    """
+    Character n-grams of the content words of a text.
+
+    Words are padded with spaces so word starts and ends count, and character
+    n-grams tolerate the spelling variants and slips of the speech recognition.
+    """
+    grams: Set[str] = set()
+    for word in normalize_text(text).split():
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        padded = f" {word} "
+        grams.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def parse_start_zeit(value: Any) -> Optional[int]:
+    """
+    Converts a start_zeit value ("123", "123s", 123) to seconds, or None.
+    """
+    if value is None:
+        return None
+    try:
+        return int(float(str(value).strip().rstrip('s')))
+    except ValueError:
+        return None
+
+
+class TranscriptNgramIndex:
+    """
+    Inverted index from character n-grams to the transcript chunks containing them.
+
+    Args:
+        chunks: The 'transcript' list of a transcript file ({speaker, text, begin_seconds})
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]]):
+        self.begin_seconds: List[int] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        for chunk in chunks:
+            if not isinstance(chunk, dict) or not chunk.get('text'):
+                continue
+            position = len(self.begin_seconds)
+            grams = text_ngrams(chunk['text'])
+            self.begin_seconds.append(int(chunk.get('begin_seconds') or 0))
+            self.lengths.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(position)
+        chunk_count = max(len(self.begin_seconds), 1)
+        self.idf = {gram: math.log(1 + chunk_count / len(positions)) for gram, positions in self.postings.items()}
+        average_length = sum(self.lengths) / chunk_count or 1.0
+        # BM25-style length normalization, so long chunks do not win just by containing more n-grams
+        self.length_norm = [
+            (BM25_K1 + 1) / (1 + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)) for length in self.lengths
+        ]
+
+    def best_match(self, weighted_texts: List[tuple]) -> Optional[Dict[str, Any]]:
+        """
+        Finds the chunk that best matches the query n-grams.
+
+        Chunks are ranked by their idf-weighted n-gram overlap with the query,
+        normalized by chunk length; the returned score is the share of the query
+        weight the chunk covers.
+
+        Args:
+            weighted_texts: (text, weight) pairs forming the query
+
+        Returns:
+            Dictionary with chunk index, begin_seconds and score in [0, 1], or None if nothing matches
+        """
+        query: Dict[str, float] = {}
+        for text, weight in weighted_texts:
+            for gram in text_ngrams(text or ''):
+                query[gram] = max(query.get(gram, 0.0), weight)
+
+        total = sum(weight * self.idf.get(gram, math.log(2)) for gram, weight in query.items())
+        if not total:
+            return None
+
+        coverage: Dict[int, float] = defaultdict(float)
+        for gram, weight in query.items():
+            for position in self.postings.get(gram, ()):
+                coverage[position] += weight * self.idf[gram]
+        if not coverage:
+            return None
+
+        # Highest length-normalized score wins; on ties the earlier chunk, where the discussion starts
+        position = min(coverage, key=lambda p: (-coverage[p] * self.length_norm[p], p))
+        return {'chunk': position, 'begin_seconds': self.begin_seconds[position], 'score': coverage[position] / total}
+
+
+def align_start_times(vorschlaege: List[Dict[str, Any]], transcript_data: Dict[str, Any],
+                      min_score: float = MIN_MATCH_SCORE) -> List[Dict[str, Any]]:
+    """
+    Snaps each proposal's start_zeit to the transcript chunk that best matches it.
+
+    The proposals are updated in place; start_zeit keeps its string format. A
+    proposal whose best match scores below min_score keeps the model's value.
+
+    Returns one report entry per proposal with the model's and the aligned
+    start time, the drift in seconds and the match score.
+    """
+    index = TranscriptNgramIndex(transcript_data.get('transcript', []))
+    report = []
+    for vorschlag in vorschlaege:
+        model_seconds = parse_start_zeit(vorschlag.get('start_zeit'))
+        match = index.best_match([
+            (vorschlag.get('vorschlag'), VORSCHLAG_WEIGHT),
+            (vorschlag.get('begruendung'), BEGRUENDUNG_WEIGHT),
+        ])
+        entry = {
+            'vorschlag': vorschlag.get('vorschlag'),
+            'model_seconds': model_seconds,
+            'aligned_seconds': model_seconds,
+            'drift_seconds': None,
+            'score': round(match['score'], 3) if match else 0.0,
+            'snapped': False,
+        }
+        if match and match['score'] >= min_score:
+            entry['snapped'] = True
+            entry['aligned_seconds'] = match['begin_seconds']
+            if model_seconds is not None:
+                entry['drift_seconds'] = match['begin_seconds'] - model_seconds
+            vorschlag['start_zeit'] = str(match['begin_seconds'])
+        report.append(entry)
+    return report
+
+
+def summarize_drift(report: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Counts snapped proposals and summarizes the absolute drift that was corrected.
+    """
+    drifts = [abs(entry['drift_seconds']) for entry in report if entry['drift_seconds'] is not None]
+    corrected = [d for d in drifts if d > 0]
+    return {
+        'proposals': len(report),
+        'snapped': sum(1 for entry in report if entry['snapped']),
+        'corrected': len(corrected),
+        'mean_abs_drift_seconds': round(sum(drifts) / len(drifts), 1) if drifts else 0.0,
+        'max_abs_drift_seconds': max(drifts) if drifts else 0,
+    }
+
+
+def transcript_path_for(analysis_path: str, transcripts_dir: str) -> str:
+    primary_id = os.path.splitext(os.path.basename(analysis_path))[0]
+    return os.path.join(transcripts_dir, f"{primary_id}_transcript.json")
+
+
+# 3. Main Function
+def main(args):
+    analysis_files = [args.file] if args.file else sorted(glob.glob(os.path.join(args.analyses_dir, "*.json")))
+    full_report = {}
+    for analysis_path in analysis_files:
+        transcript_path = transcript_path_for(analysis_path, args.transcripts_dir)
+        if not os.path.exists(transcript_path):
+            logging.warning(f"No transcript for {analysis_path}, skipping.")
+            continue
+        with open(analysis_path, 'r', encoding='utf-8') as f:
+            analysis_data = json.load(f)
+        with open(transcript_path, 'r', encoding='utf-8') as f:
+            transcript_data = json.load(f)
+
+        start = time.perf_counter()
+        report = align_start_times(analysis_data.get('gegenwartsvorschlaege', []), transcript_data, args.min_score)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        summary = summarize_drift(report)
+        logging.info(
+            f"{os.path.basename(analysis_path)}: {summary['corrected']} of {summary['proposals']} start times "
+            f"corrected, mean drift {summary['mean_abs_drift_seconds']}s, "
+            f"max {summary['max_abs_drift_seconds']}s ({elapsed_ms:.1f} ms)"
+        )
+        full_report[os.path.basename(analysis_path)] = {'summary': summary, 'proposals': report}
+
+        if not args.dry_run:
+            with open(analysis_path, 'w', encoding='utf-8') as f:
+                json.dump(analysis_data, f, indent=2, ensure_ascii=False)
+
+    if args.report_file:
+        with open(args.report_file, 'w', encoding='utf-8') as f:
+            json.dump(full_report, f, indent=2, ensure_ascii=False)
+        logging.info(f"Drift report written to {args.report_file}")
+
+
+# 4. Script Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aligns proposal start times with the transcript (no API calls).")
+    parser.add_argument("--analyses-dir", default=ANALYSES_DIR,
+                        help=f"Directory containing analysis JSON files (default: {ANALYSES_DIR})")
+    parser.add_argument("--transcripts-dir", default=TRANSCRIPTS_DIR,
+                        help=f"Directory containing transcript JSON files (default: {TRANSCRIPTS_DIR})")
+    parser.add_argument("--file", help="Align a single analysis file")
+    parser.add_argument("--min-score", type=float, default=MIN_MATCH_SCORE,
+                        help=f"Minimum match score to replace the model's start time (default: {MIN_MATCH_SCORE})")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the drift, do not rewrite the analyses")
+    parser.add_argument("--report-file", help="Write the per-proposal drift report to this JSON file")
+
+    main(parser.parse_args())
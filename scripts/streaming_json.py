@@ -0,0 +1,92 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List
+
+# 1. Constants
+ITEMS_KEY = "gegenwartsvorschlaege"
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class ItemStreamParser:
+    """
+    Picks complete objects out of a JSON array while the response text is still streaming in.
+
+    The model answers with {"<key>": [{...}, {...}, ...]}, possibly wrapped in a
+    Markdown code block. feed() scans only the new text, tracks string/escape
+    state and brace depth, and returns every array element whose closing brace
+    arrived. If the stream breaks off, 'items' holds everything that was
+    complete and 'closed' stays False.
+
+    Args:
+        key: Name of the array to read
+    """
+
+    def __init__(self, key: str = ITEMS_KEY):
+        self.key_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self.buffer = ""
+        self.items: List[Dict[str, Any]] = []
+        self.closed = False
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = -1
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Adds the next piece of the response and returns the items completed by it.
+        """
+        self.buffer += text or ""
+        completed: List[Dict[str, Any]] = []
+        if not self._in_array:
+            match = self.key_pattern.search(self.buffer)
+            if not match:
+                return completed
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self.buffer
+        while self._pos < len(buffer) and not self.closed:
+            char = buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._item_start = self._pos
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._item_start >= 0:
+                    raw = buffer[self._item_start:self._pos + 1]
+                    self._item_start = -1
+                    try:
+                        item = json.loads(raw)
+                    except json.JSONDecodeError as e:
+                        logging.warning(f"Skipping unreadable array element: {e}")
+                    else:
+                        self.items.append(item)
+                        completed.append(item)
+            elif char == ']' and self._depth == 0:
+                self.closed = True
+            self._pos += 1
+        return completed
+
+
+def complete_items(text: str, key: str = ITEMS_KEY) -> List[Dict[str, Any]]:
+    """
+    Returns the complete array elements of a (possibly truncated) response text.
+    """
+    parser = ItemStreamParser(key)
+    parser.feed(text)
+    return parser.items
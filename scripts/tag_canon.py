@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import json_writer
+from proposal_clusters import normalize_text
+
+# 1. Constants
+TAG_CANON_FILE = "data/tag_canon.json"
+TAG_VOCABULARY_FILE = "docs/tags.json"
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def tag_key(tag: str) -> str:
+    """
+    Normalized comparison key of a tag: case, hyphenation, umlauts and accents are folded.
+
+    'Social-Media', 'social media' and 'SOCIAL MEDIA' all map to 'social media'.
+    """
+    return normalize_text(tag)
+
+
+def load_tag_canon(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads the mapping table.
+
+    The file has two sections: 'synonyms' maps a tag key to the canonical tag
+    name and is maintained by hand; 'tags' maps each canonical tag key to its
+    integer ID and display name and is extended automatically, so IDs stay
+    stable between runs.
+    """
+    canon: Dict[str, Dict[str, Any]] = {'synonyms': {}, 'tags': {}}
+    if not path or not os.path.exists(path):
+        return canon
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Could not read tag mapping {path}: {e}")
+        return canon
+    canon['synonyms'] = {tag_key(k): v for k, v in (data.get('synonyms') or {}).items()}
+    canon['tags'] = data.get('tags') or {}
+    return canon
+
+
+def save_tag_canon(path: Optional[str], canon: Dict[str, Dict[str, Any]]) -> None:
+    if not path:
+        return
+    path_dir = os.path.dirname(path)
+    if path_dir:
+        os.makedirs(path_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'synonyms': dict(sorted(canon['synonyms'].items())),
+            'tags': dict(sorted(canon['tags'].items(), key=lambda item: item[1]['id'])),
+        }, f, indent=2, ensure_ascii=False)
+
+
+def canonical_key(tag: str, synonyms: Dict[str, str]) -> str:
+    """
+    Resolves a raw tag to the key of its canonical tag (following synonym chains).
+    """
+    key = tag_key(tag)
+    seen = set()
+    while key in synonyms and key not in seen:
+        seen.add(key)
+        key = tag_key(synonyms[key])
+    return key
+
+
+def canonicalize_tags(vorschlaege: List[Dict[str, Any]], canon_path: Optional[str] = TAG_CANON_FILE,
+                      drop_raw_tags: bool = True) -> List[Dict[str, Any]]:
+    """
+    Replaces the free-form tags of each record by integer tag IDs.
+
+    Each record gets 'tag_ids' (canonical, de-duplicated, in the original order);
+    the raw 'tags' list is removed unless drop_raw_tags is False. New canonical
+    tags get the next free ID and are written back to the mapping table; their
+    display name is the synonym target, or else the most frequent spelling.
+
+    Returns the vocabulary of the tags in use: [{'id', 'name', 'count'}] sorted by ID.
+    """
+    canon = load_tag_canon(canon_path)
+    synonyms, known_tags = canon['synonyms'], canon['tags']
+
+    spellings: Dict[str, Counter] = {}
+    for item in vorschlaege:
+        for tag in item.get('tags') or []:
+            if not isinstance(tag, str) or not tag_key(tag):
+                continue
+            spellings.setdefault(canonical_key(tag, synonyms), Counter())[tag.strip()] += 1
+
+    targets = {tag_key(name): name for name in synonyms.values()}
+    next_id = max((entry['id'] for entry in known_tags.values()), default=0) + 1
+    for key in sorted(spellings):
+        if key in known_tags:
+            continue
+        # Most frequent spelling wins, ties are broken alphabetically for stable output
+        name = targets.get(key) or min(spellings[key].items(), key=lambda kv: (-kv[1], kv[0]))[0]
+        known_tags[key] = {'id': next_id, 'name': name}
+        next_id += 1
+
+    counts: Counter = Counter()
+    raw_count = 0
+    for item in vorschlaege:
+        tag_ids: List[int] = []
+        for tag in item.get('tags') or []:
+            if not isinstance(tag, str) or not tag_key(tag):
+                continue
+            raw_count += 1
+            tag_id = known_tags[canonical_key(tag, synonyms)]['id']
+            if tag_id not in tag_ids:
+                tag_ids.append(tag_id)
+        item['tag_ids'] = tag_ids
+        counts.update(tag_ids)
+        if drop_raw_tags:
+            item.pop('tags', None)
+
+    save_tag_canon(canon_path, canon)
+
+    vocabulary = sorted(
+        ({'id': entry['id'], 'name': entry['name'], 'count': counts[entry['id']]}
+         for entry in known_tags.values() if counts[entry['id']]),
+        key=lambda entry: entry['id']
+    )
+    distinct_raw = sum(len(variants) for variants in spellings.values())
+    logging.info(f"Canonicalized {raw_count} tags: {distinct_raw} distinct spellings -> {len(vocabulary)} tags.")
+    return vocabulary
+
+
+def save_vocabulary(vocabulary: List[Dict[str, Any]], output_path: str) -> None:
+    """
+    Writes the canonical tag vocabulary that the website resolves 'tag_ids' with.
+    """
+    json_writer.write_json(output_path, vocabulary)
+    logging.info(f"Saved tag vocabulary ({len(vocabulary)} tags) to: {output_path}")
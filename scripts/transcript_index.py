@@ -0,0 +1,256 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from transcript_segmentation import chapter_at, load_chapters
+
+# 1. Constants
+TRANSCRIPTS_DIR = "data/transcripts"
+INDEX_DB = "data/transcript_index.sqlite"
+SLICE_OUTPUT_FILE = "docs/transcript_hits.json"
+DEFAULT_LIMIT = 20
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_files (
+    path TEXT PRIMARY KEY,
+    episode TEXT NOT NULL,
+    episode_title TEXT,
+    sha256 TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_chunks USING fts5(
+    episode UNINDEXED,
+    speaker UNINDEXED,
+    begin_seconds UNINDEXED,
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """
+    Opens (and if necessary creates) the transcript index.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def episode_id_from_path(file_path: str) -> str:
+    """
+    Derives the episode ID from a '<id>_transcript.json' filename.
+    """
+    base_name = os.path.basename(file_path)
+    match = re.match(r'(.+?)_transcript\.json$', base_name)
+    return match.group(1) if match else os.path.splitext(base_name)[0]
+
+
+def file_sha256(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def index_transcripts(conn: sqlite3.Connection, transcripts_dir: str) -> Dict[str, int]:
+    """
+    Brings the index in line with the transcript files.
+
+    Only files whose content hash changed are re-read; files that disappeared are removed.
+    Returns counts of added, updated, unchanged and removed files.
+    """
+    stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+    known = {row['path']: row for row in conn.execute("SELECT path, episode, sha256 FROM indexed_files")}
+    transcript_files = sorted(glob.glob(os.path.join(transcripts_dir, "*_transcript.json")))
+
+    with conn:
+        for file_path in transcript_files:
+            digest = file_sha256(file_path)
+            previous = known.pop(file_path, None)
+            if previous is not None and previous['sha256'] == digest:
+                stats['unchanged'] += 1
+                continue
+
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    transcript_data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.error(f"Skipping unreadable transcript {file_path}: {e}")
+                continue
+
+            episode = episode_id_from_path(file_path)
+            if previous is not None:
+                conn.execute("DELETE FROM transcript_chunks WHERE episode = ?", (previous['episode'],))
+
+            rows = [
+                (episode, chunk.get('speaker'), int(chunk.get('begin_seconds') or 0), chunk.get('text', ''))
+                for chunk in transcript_data.get('transcript', [])
+                if isinstance(chunk, dict) and chunk.get('text')
+            ]
+            conn.executemany(
+                "INSERT INTO transcript_chunks (episode, speaker, begin_seconds, text) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_files (path, episode, episode_title, sha256, chunk_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (file_path, episode, transcript_data.get('episode_title'), digest, len(rows))
+            )
+            stats['updated' if previous is not None else 'added'] += 1
+            logging.info(f"Indexed {len(rows)} chunks from {file_path}")
+
+        for file_path, row in known.items():
+            conn.execute("DELETE FROM transcript_chunks WHERE episode = ?", (row['episode'],))
+            conn.execute("DELETE FROM indexed_files WHERE path = ?", (file_path,))
+            stats['removed'] += 1
+            logging.info(f"Removed {file_path} from the index")
+
+    logging.info(
+        "Index up to date: {added} added, {updated} updated, {unchanged} unchanged, {removed} removed.".format(**stats)
+    )
+    return stats
+
+
+def to_fts_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches all words, so user input cannot break the query syntax.
+    """
+    terms = re.findall(r'\w+', text)
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int = DEFAULT_LIMIT, raw: bool = False) -> List[Dict[str, Any]]:
+    """
+    Returns ranked hits (best first) with episode, speaker, offset in milliseconds, a snippet and the chapter.
+
+    The chapter comes from the episode's chapter index (transcript_segmentation):
+    {'number', 'start_seconds', 'end_seconds', 'keywords'}, or None if the
+    episode has not been segmented.
+
+    Args:
+        conn: Open index connection
+        query: Free text, or an FTS5 expression if raw is True
+        limit: Maximum number of hits
+        raw: Pass the query to FTS5 unchanged (phrases, OR, NEAR, prefix*)
+    """
+    fts_query = query if raw else to_fts_query(query)
+    if not fts_query:
+        return []
+    rows = conn.execute(
+        """
+        SELECT c.episode, c.speaker, c.begin_seconds, f.episode_title, f.path,
+               snippet(transcript_chunks, 3, '[', ']', '…', 16) AS snippet,
+               bm25(transcript_chunks) AS score
+        FROM transcript_chunks c
+        LEFT JOIN indexed_files f ON f.episode = c.episode
+        WHERE transcript_chunks MATCH ?
+        ORDER BY score
+        LIMIT ?
+        """,
+        (fts_query, limit)
+    ).fetchall()
+    chapters = {row['path']: load_chapters(row['path']) for row in rows if row['path']}
+    hits = []
+    for rank, row in enumerate(rows, start=1):
+        chapter = chapter_at(chapters.get(row['path']) or [], int(row['begin_seconds']))
+        hits.append({
+            'rank': rank,
+            'episode': row['episode'],
+            'episode_title': row['episode_title'],
+            'speaker': row['speaker'],
+            'begin_ms': int(row['begin_seconds']) * 1000,
+            'snippet': row['snippet'],
+            'score': round(-row['score'], 4),
+            'chapter': chapter and {key: chapter[key] for key in ('number', 'start_seconds', 'end_seconds',
+                                                                  'keywords')},
+        })
+    return hits
+
+
+def export_slice(conn: sqlite3.Connection, queries: List[str], output_path: str, limit: int = DEFAULT_LIMIT) -> None:
+    """
+    Writes the ranked hits of a fixed set of queries as a static JSON file for the website.
+    """
+    slice_data = {query: search(conn, query, limit) for query in queries}
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(slice_data, f, indent=2, ensure_ascii=False)
+    logging.info(f"Exported hits for {len(queries)} queries to {output_path}")
+
+
+def read_queries(queries: Optional[List[str]], queries_file: Optional[str]) -> List[str]:
+    collected = list(queries or [])
+    if queries_file:
+        with open(queries_file, 'r', encoding='utf-8') as f:
+            collected.extend(line.strip() for line in f if line.strip())
+    return collected
+
+
+# 3. Main Function
+def main(args):
+    conn = connect(args.db)
+    try:
+        if args.command == "index":
+            index_transcripts(conn, args.transcripts_dir)
+        elif args.command == "query":
+            index_transcripts(conn, args.transcripts_dir)
+            hits = search(conn, ' '.join(args.terms), args.limit, raw=args.raw)
+            if args.json:
+                print(json.dumps(hits, indent=2, ensure_ascii=False))
+            else:
+                for hit in hits:
+                    seconds = hit['begin_ms'] // 1000
+                    chapter = hit['chapter']
+                    label = f" [Kapitel {chapter['number']}: {', '.join(chapter['keywords'])}]" if chapter else ""
+                    print(f"{hit['rank']:>3}. {hit['episode']} @ {seconds // 60:d}:{seconds % 60:02d} "
+                          f"({hit['begin_ms']} ms){label} {hit['speaker']}: {hit['snippet']}")
+                if not hits:
+                    print("Keine Treffer.")
+        elif args.command == "export":
+            index_transcripts(conn, args.transcripts_dir)
+            queries = read_queries(args.query, args.queries_file)
+            if not queries:
+                logging.warning("No queries given, nothing to export.")
+                return
+            export_slice(conn, queries, args.output_file, args.limit)
+    finally:
+        conn.close()
+
+
+# 4. Script Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text index over all transcripts (SQLite FTS5).")
+    parser.add_argument("--db", default=INDEX_DB, help=f"Path to the index database (default: {INDEX_DB})")
+    parser.add_argument("--transcripts-dir", default=TRANSCRIPTS_DIR,
+                        help=f"Directory containing transcript JSON files (default: {TRANSCRIPTS_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("index", help="Update the index incrementally")
+
+    query_parser = subparsers.add_parser("query", help="Search the transcripts")
+    query_parser.add_argument("terms", nargs="+", help="Search terms")
+    query_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Maximum number of hits")
+    query_parser.add_argument("--raw", action="store_true", help="Treat the terms as an FTS5 query expression")
+    query_parser.add_argument("--json", action="store_true", help="Print hits as JSON")
+
+    export_parser = subparsers.add_parser("export", help="Export ranked hits of fixed queries as static JSON")
+    export_parser.add_argument("--query", action="append", help="Query to export (repeatable)")
+    export_parser.add_argument("--queries-file", help="File with one query per line")
+    export_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Maximum number of hits per query")
+    export_parser.add_argument("--output-file", default=SLICE_OUTPUT_FILE,
+                               help=f"Path to the exported JSON file (default: {SLICE_OUTPUT_FILE})")
+
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+# 1. Constants
+DEFAULT_PACK_TOKENS = 60000  # transcript tokens per packed request; the instruction block comes on top
+MAX_EPISODES_PER_PACK = 4  # more episodes mean longer answers, which hit max_output_tokens and need continuations
+EPISODE_ID_FIELD = "episode_id"
+EMPTY_EPISODES_KEY = "episoden_ohne_vorschlaege"
+EPISODE_START = "=== EPISODE {episode_id} ==="
+EPISODE_END = "=== ENDE EPISODE {episode_id} ==="
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def pack_episodes(token_counts: Dict[str, int], budget: int = DEFAULT_PACK_TOKENS,
+                  max_episodes: int = MAX_EPISODES_PER_PACK) -> List[List[str]]:
+    """
+    Bin-packs episodes into requests of at most budget tokens and max_episodes episodes.
+
+    First fit in the given order: each episode goes into the first pack it
+    still fits in, so packs keep roughly the priority order of the input.
+    An episode larger than the budget gets a pack of its own.
+
+    Args:
+        token_counts: Estimated transcript tokens by episode ID, in priority order
+
+    Returns:
+        Lists of episode IDs, one per request
+    """
+    packs: List[List[str]] = []
+    loads: List[int] = []
+    for episode_id, tokens in token_counts.items():
+        for index, pack in enumerate(packs):
+            if len(pack) < max_episodes and loads[index] + tokens <= budget:
+                pack.append(episode_id)
+                loads[index] += tokens
+                break
+        else:
+            packs.append([episode_id])
+            loads.append(tokens)
+    return packs
+
+
+def pack_sections(sections: Dict[str, str]) -> str:
+    """
+    Joins the episode sections of one request, each between start and end markers with its ID.
+    """
+    return "\n\n".join(
+        f"{EPISODE_START.format(episode_id=episode_id)}\n{section}\n{EPISODE_END.format(episode_id=episode_id)}"
+        for episode_id, section in sections.items()
+    )
+
+
+def demultiplex(result: Optional[Dict[str, Any]],
+                episode_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Splits a packed answer back into one analysis per episode.
+
+    Every proposal names its episode in 'episode_id'; episodes without
+    proposals are listed under EMPTY_EPISODES_KEY. Proposals that are not
+    objects, have no name or name an episode outside the pack are dropped.
+    An episode is answered if it has a proposal or is listed as empty; all
+    others count as missing and are analyzed on their own.
+
+    Returns:
+        ({episode ID: {"gegenwartsvorschlaege": [...]}} of the answered episodes, missing episode IDs)
+    """
+    if not isinstance(result, dict) or not isinstance(result.get("gegenwartsvorschlaege"), list):
+        return {}, list(episode_ids)
+    wanted = set(episode_ids)
+    analyses: Dict[str, Dict[str, Any]] = {}
+    dropped = 0
+    for item in result["gegenwartsvorschlaege"]:
+        episode_id = str(item.get(EPISODE_ID_FIELD, "")).strip() if isinstance(item, dict) else ""
+        if episode_id not in wanted or not item.get("vorschlag"):
+            dropped += 1
+            continue
+        vorschlag = {key: value for key, value in item.items() if key != EPISODE_ID_FIELD}
+        analyses.setdefault(episode_id, {"gegenwartsvorschlaege": []})["gegenwartsvorschlaege"].append(vorschlag)
+    empty = result.get(EMPTY_EPISODES_KEY)
+    for episode_id in empty if isinstance(empty, list) else []:
+        if str(episode_id) in wanted:
+            analyses.setdefault(str(episode_id), {"gegenwartsvorschlaege": []})
+    if dropped:
+        logging.warning(f"Packed answer: dropped {dropped} proposals without a valid episode of the pack")
+    missing = [episode_id for episode_id in episode_ids if episode_id not in analyses]
+    return {episode_id: analyses[episode_id] for episode_id in episode_ids if episode_id in analyses}, missing
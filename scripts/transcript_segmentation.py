@@ -0,0 +1,264 @@
+import argparse
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import json_writer
+from proposal_clusters import STOPWORDS, normalize_text
+
+# 1. Constants
+TRANSCRIPTS_DIR = "data/transcripts"
+CHAPTERS_SUFFIX = "_chapters.json"
+SEQUENCE_TOKENS = 20  # content words per pseudo-sentence (TextTiling's w)
+BLOCK_SEQUENCES = 8  # pseudo-sentences compared on each side of a gap (TextTiling's k)
+SMOOTHING_WIDTH = 3  # moving-average window over the gap scores
+STEM_LENGTH = 7  # words are compared by their first letters, which folds most German inflections
+MIN_CHAPTER_SECONDS = 240
+MAX_CHAPTERS = 12
+TOP_KEYWORDS = 5
+MIN_KEYWORD_COUNT = 2
+WORDS_PER_SECOND = 2.5  # speaking rate used to estimate where the last chunk ends
+# Filler and function words of spoken German, on top of the proposal stopwords (after normalize_text)
+SPOKEN_STOPWORDS = {
+    'ich', 'du', 'wir', 'ihr', 'mir', 'mich', 'dir', 'dich', 'uns', 'euch', 'ihm', 'ihn', 'ihnen', 'mein', 'meine',
+    'meinen', 'dein', 'deine', 'sein', 'seine', 'ihre', 'unser', 'unsere', 'was', 'wer', 'wie', 'warum', 'wann',
+    'dann', 'denn', 'doch', 'mal', 'halt', 'eben', 'schon', 'eigentlich', 'also', 'genau', 'irgendwie', 'einfach',
+    'gibt', 'gut', 'ganz', 'hat', 'habe', 'haben', 'hast', 'hatte', 'hatten', 'kann', 'kannst', 'koennen',
+    'koennte', 'muss', 'muessen', 'soll', 'sollte', 'will', 'wollen', 'wuerde', 'wuerden', 'waere', 'bin', 'bist',
+    'seid', 'gerade', 'jetzt', 'hier', 'dort', 'etwas', 'nichts', 'alles', 'viel', 'viele', 'weil', 'ueber',
+    'unter', 'vor', 'durch', 'gegen', 'ohne', 'zwei', 'drei', 'keine', 'kein', 'keinen', 'jeder', 'jede',
+    'andere', 'anderen', 'natuerlich', 'vielleicht', 'wirklich', 'sagen', 'sagt', 'gesagt', 'glaube', 'finde',
+    'weiss', 'okay', 'quasi', 'sozusagen', 'dabei', 'darum', 'damit', 'dafuer', 'davon', 'dazu', 'daran',
+    'wieder', 'erst', 'total', 'irgendwas', 'jemand', 'nee', 'aeh', 'aehm', 'mhm', 'naja', 'sowas', 'sondern',
+    'welche', 'welcher', 'welches', 'diesen', 'diesem', 'heute', 'gar', 'weiter', 'eher', 'zwar', 'einem',
+    'dies', 'mache', 'machen', 'macht', 'gemacht', 'geht', 'gehen', 'kommt', 'kommen', 'sehen', 'sieht', 'weisst',
+    'meinst', 'denke', 'denken', 'finden', 'findest', 'gesehen', 'worden', 'wurde', 'wurden', 'waren',
+    'gewesen', 'stimmt', 'richtig', 'klar', 'bisschen', 'deren', 'dessen', 'sich', 'selbst', 'selber',
+    'nein', 'hab', 'waer', 'danke', 'echt', 'drin', 'fand', 'bereits', 'wegen', 'klingt', 'gedacht', 'manches',
+    'vieles', 'diesmal', 'irgendeinen', 'vermutlich', 'interessant',
+}
+
+# 2. Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def content_words(text: str) -> List[str]:
+    return [w for w in normalize_text(text).split()
+            if len(w) > 2 and w not in STOPWORDS and w not in SPOKEN_STOPWORDS and not w.isdigit()]
+
+
+def cosine(left: Counter, right: Counter) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    dot = sum(count * right.get(stem, 0) for stem, count in left.items())
+    norm = math.sqrt(sum(c * c for c in left.values()) * sum(c * c for c in right.values()))
+    return dot / norm if norm else 0.0
+
+
+def gap_scores(sequences: List[Counter], block: int = BLOCK_SEQUENCES) -> List[float]:
+    """
+    Lexical cohesion at every gap between pseudo-sentences: cosine of the word counts of the blocks before and after.
+
+    Gap i lies before sequence i (i >= 1); the blocks shrink at the edges.
+    """
+    scores = []
+    for gap in range(1, len(sequences)):
+        left, right = Counter(), Counter()
+        for sequence in sequences[max(gap - block, 0):gap]:
+            left.update(sequence)
+        for sequence in sequences[gap:gap + block]:
+            right.update(sequence)
+        scores.append(cosine(left, right))
+    return scores
+
+
+def smooth(scores: List[float], width: int = SMOOTHING_WIDTH) -> List[float]:
+    half = width // 2
+    return [sum(scores[max(i - half, 0):i + half + 1]) / len(scores[max(i - half, 0):i + half + 1])
+            for i in range(len(scores))]
+
+
+def depth_scores(scores: List[float]) -> List[float]:
+    """
+    How deep each gap lies in its valley: the rise to the nearest peak on the left plus the one on the right.
+    """
+    depths = []
+    for i, score in enumerate(scores):
+        left = i
+        while left > 0 and scores[left - 1] >= scores[left]:
+            left -= 1
+        right = i
+        while right < len(scores) - 1 and scores[right + 1] >= scores[right]:
+            right += 1
+        depths.append((scores[left] - score) + (scores[right] - score))
+    return depths
+
+
+def segment_transcript(transcript_data: Dict[str, Any], min_chapter_seconds: float = MIN_CHAPTER_SECONDS,
+                       max_chapters: int = MAX_CHAPTERS, top_keywords: int = TOP_KEYWORDS) -> List[Dict[str, Any]]:
+    """
+    Splits a transcript into chapters where its vocabulary shifts (TextTiling).
+
+    The content words of all chunks are cut into pseudo-sentences of
+    SEQUENCE_TOKENS words. At every gap between them, the word counts of the
+    BLOCK_SEQUENCES pseudo-sentences before and after are compared by cosine;
+    after smoothing, gaps deep in a valley of that similarity are topic
+    shifts. Valley bottoms deeper than mean - sd/2 become boundaries, deepest first,
+    as long as chapters stay at least min_chapter_seconds long. Boundaries are
+    moved to the nearest chunk start, since chunks are speaker turns and carry
+    the timestamps.
+
+    Keywords of a chapter are its most frequent content words, weighted by
+    how few other chapters of the episode use them.
+
+    Args:
+        transcript_data: Transcript file content ({'transcript': [{speaker, text, begin_seconds}, ...]})
+
+    Returns:
+        Chapters in order: {'start_seconds', 'end_seconds', 'first_chunk', 'last_chunk', 'keywords'}
+    """
+    chunks = [chunk for chunk in transcript_data.get('transcript', []) if isinstance(chunk, dict)]
+    if not chunks:
+        return []
+
+    words: List[str] = []
+    chunk_starts: List[int] = []  # index of each chunk's first word in words
+    for chunk in chunks:
+        chunk_starts.append(len(words))
+        words.extend(content_words(chunk.get('text') or ''))
+    stems = [word[:STEM_LENGTH] for word in words]
+    sequences = [Counter(stems[i:i + SEQUENCE_TOKENS]) for i in range(0, len(stems), SEQUENCE_TOKENS)]
+    begin_seconds = [int(chunk.get('begin_seconds') or 0) for chunk in chunks]
+    last_words = len((chunks[-1].get('text') or '').split())
+    episode_end = begin_seconds[-1] + int(round(last_words / WORDS_PER_SECOND))
+
+    boundaries: List[int] = []  # chunk indices where a chapter starts, besides 0
+    if len(sequences) > 2 * BLOCK_SEQUENCES:
+        scores = smooth(gap_scores(sequences))
+        depths = depth_scores(scores)
+        mean = sum(depths) / len(depths)
+        cutoff = mean - math.sqrt(sum((d - mean) ** 2 for d in depths) / len(depths)) / 2
+        # Only valley bottoms are boundaries; their slopes have a depth as well
+        valleys = [g for g in range(len(scores)) if (g == 0 or scores[g - 1] > scores[g])
+                   and (g == len(scores) - 1 or scores[g + 1] >= scores[g])]
+        for gap in sorted(valleys, key=lambda g: (-depths[g], g)):
+            if depths[gap] <= max(cutoff, 0.0) or len(boundaries) >= max_chapters - 1:
+                break
+            # Gap g lies before sequence g + 1; snap its first word to the nearest chunk start
+            word = (gap + 1) * SEQUENCE_TOKENS
+            index = bisect.bisect_left(chunk_starts, word)
+            candidates = [i for i in (index - 1, index) if 0 < i < len(chunks)]
+            if not candidates:
+                continue
+            chunk = min(candidates, key=lambda i: (abs(chunk_starts[i] - word), i))
+            starts = [begin_seconds[0]] + [begin_seconds[b] for b in boundaries] + [episode_end]
+            if all(abs(begin_seconds[chunk] - start) >= min_chapter_seconds for start in starts):
+                boundaries.append(chunk)
+    boundaries = sorted(boundaries)
+
+    ranges = list(zip([0] + boundaries, boundaries + [len(chunks)]))
+    counts, surfaces = [], []
+    for first, end in ranges:
+        chapter_words = words[chunk_starts[first]:chunk_starts[end] if end < len(chunks) else len(words)]
+        counts.append(Counter(word[:STEM_LENGTH] for word in chapter_words))
+        surfaces.append(Counter(chapter_words))
+    chapter_frequency = Counter(stem for count in counts for stem in count)
+
+    chapters = []
+    for number, ((first, end), count) in enumerate(zip(ranges, counts)):
+        scored = sorted(
+            ((n * math.log(1 + len(ranges) / chapter_frequency[stem]), stem) for stem, n in count.items()
+             if n >= MIN_KEYWORD_COUNT),
+            key=lambda item: (-item[0], item[1]))
+        keywords = []
+        for _, stem in scored[:top_keywords]:
+            # Show the most frequent spelling of the stem in this chapter
+            keywords.append(min((w for w in surfaces[number] if w[:STEM_LENGTH] == stem),
+                                key=lambda w: (-surfaces[number][w], w)))
+        chapters.append({
+            'start_seconds': begin_seconds[first],
+            'end_seconds': begin_seconds[end] if end < len(chunks) else episode_end,
+            'first_chunk': first,
+            'last_chunk': end - 1,
+            'keywords': keywords,
+        })
+    return chapters
+
+
+def chapters_path(transcript_path: str) -> str:
+    """
+    data/transcripts/<id>_transcript.json -> data/transcripts/<id>_chapters.json
+    """
+    base = transcript_path[:-len("_transcript.json")] if transcript_path.endswith("_transcript.json") \
+        else os.path.splitext(transcript_path)[0]
+    return base + CHAPTERS_SUFFIX
+
+
+def write_chapters(transcript_path: str, transcript_data: Dict[str, Any]) -> bool:
+    """
+    Segments a transcript and stores its chapter index next to it; returns whether the file changed.
+    """
+    chapters = segment_transcript(transcript_data)
+    episode_id = os.path.basename(transcript_path)[:-len("_transcript.json")]
+    return json_writer.write_json(chapters_path(transcript_path), {'episode_id': episode_id, 'chapters': chapters})
+
+
+def load_chapters(transcript_path: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    The stored chapter index of a transcript, or None if it has not been segmented.
+    """
+    path = chapters_path(transcript_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('chapters', [])
+
+
+def chapter_at(chapters: List[Dict[str, Any]], seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    The chapter a position in the episode falls into, with its 1-based number, or None without chapters.
+    """
+    if not chapters:
+        return None
+    number = max(bisect.bisect_right([chapter['start_seconds'] for chapter in chapters], seconds), 1)
+    return dict(chapters[number - 1], number=number)
+
+
+# 3. Main Function
+def main(args):
+    transcript_files = [args.file] if args.file else sorted(
+        glob.glob(os.path.join(args.transcripts_dir, "*_transcript.json")))
+    start = time.perf_counter()
+    chapter_count = written = 0
+    for transcript_path in transcript_files:
+        with open(transcript_path, 'r', encoding='utf-8') as f:
+            transcript_data = json.load(f)
+        if args.dry_run:
+            chapters = segment_transcript(transcript_data)
+            logging.info(f"{os.path.basename(transcript_path)}: " + "; ".join(
+                f"{c['start_seconds']}s {', '.join(c['keywords'])}" for c in chapters))
+        else:
+            written += write_chapters(transcript_path, transcript_data)
+            chapters = load_chapters(transcript_path) or []
+        chapter_count += len(chapters)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Segmented {len(transcript_files)} transcripts into {chapter_count} chapters "
+                 f"({written} files changed) in {elapsed:.2f}s")
+
+
+# 4. Script Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds a chapter index per transcript by lexical cohesion "
+                                                 "(TextTiling, no API calls).")
+    parser.add_argument("--transcripts-dir", default=TRANSCRIPTS_DIR,
+                        help=f"Directory containing transcript JSON files (default: {TRANSCRIPTS_DIR})")
+    parser.add_argument("--file", help="Segment a single transcript file")
+    parser.add_argument("--dry-run", action="store_true", help="Only log the chapters, do not write them")
+
+    main(parser.parse_args())
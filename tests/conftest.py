@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Scripts import their sibling modules by name (they are run as `python scripts/<name>.py`),
+# so the scripts directory has to be importable for the tests as well.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
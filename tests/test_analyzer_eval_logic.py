@@ -0,0 +1,115 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing analyzer_eval
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from analyzer_eval import (
+    EvalClient,
+    ResponseStore,
+    evaluate,
+    load_configs,
+    match_proposals,
+    score_episode,
+    seed_golden,
+)
+from gemini_stub import GeminiStubClient
+
+GOLDEN = [
+    {"vorschlag": "Hundeballwerfer", "vorschlagender": "Lars", "punkt_erhalten": True, "punkt_von": "Ijoma",
+     "start_zeit": "400"},
+    {"vorschlag": "Rasenroboter", "vorschlagender": "Nina", "punkt_erhalten": False, "punkt_von": None,
+     "start_zeit": "900"},
+]
+TRANSCRIPT = {
+    "episode_title": "Folge",
+    "transcript": [
+        {"speaker": "SPEAKER_00", "text": "Mein Gegenwartscheck: der Hundeballwerfer.", "begin_seconds": 400},
+        {"speaker": "SPEAKER_01", "text": "Dafür gebe ich dir einen Punkt.", "begin_seconds": 480},
+    ],
+}
+
+
+def answer(*proposals):
+    return json.dumps({"gegenwartsvorschlaege": list(proposals)})
+
+
+class TestAnalyzerEvalLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.transcripts_dir = os.path.join(self.tmp.name, "transcripts")
+        os.makedirs(self.transcripts_dir)
+        with open(os.path.join(self.transcripts_dir, "111_transcript.json"), 'w', encoding='utf-8') as f:
+            json.dump(TRANSCRIPT, f)
+        self.golden = {"111": {"gegenwartsvorschlaege": GOLDEN}}
+        self.store = ResponseStore(os.path.join(self.tmp.name, "recordings"))
+        self.configs = load_configs(None, ["fast-single-pass"])
+        found = dict(GOLDEN[0], vorschlag="Der Hundeballwerfer", punkt_von="Nina", start_zeit="430",
+                     begruendung="Weil.", tags=["Hunde"])
+        self.live = GeminiStubClient(responder=lambda model, contents: answer(found))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_recorded_run_is_reproduced_offline(self):
+        recorded = evaluate(self.configs, self.golden, EvalClient(self.store, self.live), self.transcripts_dir)
+        replayed = evaluate(self.configs, self.golden, EvalClient(self.store), self.transcripts_dir)
+
+        self.assertEqual(recorded, replayed)
+        self.assertEqual(len(self.live.requests), 1)  # the replay did not touch the API
+        row = replayed["fast-single-pass"]
+        self.assertEqual((row["precision"], row["recall"]), (1.0, 0.5))
+        self.assertEqual(row["punkt_erhalten_accuracy"], 1.0)
+        self.assertEqual(row["punkt_von_accuracy"], 0.0)
+        self.assertEqual(row["start_zeit_mean_abs_error_seconds"], 0.0)  # aligned to the transcript chunk
+        self.assertEqual(row["calls"], 1)
+        self.assertGreater(row["prompt_tokens"], 0)
+        self.assertEqual(row["replay_misses"], 0)
+
+    def test_missing_recording_is_reported_not_sent(self):
+        configs = load_configs(None, ["standard-grounded"])
+        row = evaluate(configs, self.golden, EvalClient(self.store), self.transcripts_dir)["standard-grounded"]
+        self.assertEqual(row["replay_misses"], 1)
+        self.assertEqual(row["calls"], 0)
+        self.assertEqual(row["recall"], 0.0)
+
+    def test_changed_sampling_settings_need_their_own_recording(self):
+        evaluate(self.configs, self.golden, EvalClient(self.store, self.live), self.transcripts_dir)
+        warmer = [dict(self.configs[0], name="warm", temperature=0.7)]
+        row = evaluate(warmer, self.golden, EvalClient(self.store), self.transcripts_dir)["warm"]
+        self.assertEqual(row["replay_misses"], 1)
+
+    def test_matching_is_one_to_one_by_name(self):
+        predicted = [{"vorschlag": "Rasen-Roboter"}, {"vorschlag": "Hundeballwerfer 2000"}, {"vorschlag": "Toaster"}]
+        self.assertEqual(match_proposals(GOLDEN, predicted), [(0, 1), (1, 0)])
+        self.assertEqual(match_proposals(GOLDEN, [{"vorschlag": "Hundeballwerfer"}] * 2), [(0, 0)])
+
+        counts = score_episode(GOLDEN, [dict(GOLDEN[1], start_zeit="1000s")])
+        self.assertEqual(counts["matched"], 1)
+        self.assertEqual(counts["punkt_von_correct"], 1)
+        self.assertEqual(counts["start_zeit_abs_error"], 100)
+        self.assertEqual(counts["start_zeit_within_tolerance"], 0)
+
+    def test_seeded_golden_files_are_marked_unreviewed(self):
+        analyses_dir = os.path.join(self.tmp.name, "analyses")
+        golden_dir = os.path.join(self.tmp.name, "golden")
+        os.makedirs(analyses_dir)
+        with open(os.path.join(analyses_dir, "111.json"), 'w', encoding='utf-8') as f:
+            json.dump({"gegenwartsvorschlaege": GOLDEN}, f)
+
+        self.assertEqual(len(seed_golden(["111", "999"], analyses_dir, golden_dir)), 1)
+        with open(os.path.join(golden_dir, "111.json"), 'r', encoding='utf-8') as f:
+            self.assertIs(json.load(f)["reviewed"], False)
+        self.assertEqual(seed_golden(["111"], analyses_dir, golden_dir), [])  # never overwritten
+
+    def test_unknown_configuration_is_rejected(self):
+        with self.assertRaises(ValueError):
+            load_configs(None, ["gibt-es-nicht"])
+
+
+if __name__ == '__main__':
+    unittest.main()
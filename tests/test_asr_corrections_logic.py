@@ -0,0 +1,87 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing asr_corrections
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import asr_corrections
+from asr_corrections import CorrectionDictionary, spelling_changes
+from gemini_analyzer import proofread_or_correct
+from gemini_stub import GeminiStubClient
+
+TRANSCRIPT = {"episode_title": "Folge",
+              "transcript": [{"speaker": "SPEAKER_00", "text": "Idjoma sagt", "begin_seconds": 0}]}
+
+
+def analysis(name, begruendung, punkt_von="Ijoma"):
+    return {"gegenwartsvorschlaege": [{"vorschlag": name, "vorschlagender": "Lars", "begruendung": begruendung,
+                                       "punkt_erhalten": True, "punkt_von": punkt_von, "tags": ["Technik"],
+                                       "start_zeit": "10"}]}
+
+
+class TestAsrCorrectionsLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dictionary = CorrectionDictionary(os.path.join(self.tmp.name, "asr_corrections.json"))
+        asr_corrections._dictionary = self.dictionary
+        asr_corrections.stats = asr_corrections.SkipStats()
+
+    def tearDown(self):
+        asr_corrections._dictionary = None
+        self.tmp.cleanup()
+
+    def test_spelling_fixes_are_found_but_rewording_is_not(self):
+        self.assertEqual(spelling_changes("Idjoma mag Chat GBT sehr", "Ijoma mag ChatGPT sehr"),
+                         [("Idjoma", "Ijoma"), ("Chat GBT", "ChatGPT")])
+        self.assertEqual(spelling_changes("Ein Hund im Garten", "Eine Katze im Garten"), [])
+
+    def test_correction_is_applied_after_it_was_seen_twice(self):
+        before = analysis("Idjoma-Moment", "Idjoma nutzt TikTok", punkt_von="Idjoma")
+        after = analysis("Ijoma-Moment", "Ijoma nutzt TikTok")
+        self.dictionary.learn(before, after)
+        self.assertEqual(self.dictionary.active_corrections(), {})
+        self.dictionary.learn(before, after)
+        corrected, count = self.dictionary.correct_analysis(analysis("Neu", "Idjoma nutzt TikTok"))
+        self.assertEqual(corrected["gegenwartsvorschlaege"][0]["begruendung"], "Ijoma nutzt TikTok")
+        self.assertEqual(count, 1)
+
+    def test_confirmed_spelling_outweighs_a_rare_correction(self):
+        self.dictionary.learn(analysis("Power", "Power"), analysis("Pauer", "Pauer"))
+        for _ in range(3):
+            self.dictionary.learn(analysis("Power", "Power"), analysis("Power", "Power"))
+        self.assertNotIn("Power", self.dictionary.active_corrections())
+
+    def test_known_terms_skip_the_proofreading_call(self):
+        client = GeminiStubClient(responder=lambda model, contents: "```json\n" + json.dumps(
+            analysis("Hundeballwerfer", "Ijoma kauft einen Hundeballwerfer")) + "\n```")
+        first = analysis("Hundeballwerfer", "Idjoma kauft einen Hundeballwerfer")
+        for _ in range(2):
+            proofread_or_correct(client, first, TRANSCRIPT)
+        self.assertEqual(len(client.requests), 2)
+
+        result = proofread_or_correct(client, first, TRANSCRIPT)
+        self.assertEqual(len(client.requests), 2)  # no third call
+        self.assertEqual(result["gegenwartsvorschlaege"][0]["begruendung"], "Ijoma kauft einen Hundeballwerfer")
+        self.assertEqual(asr_corrections.stats.counts, {'proofread': 2, 'skipped': 1, 'corrections_applied': 1})
+
+        proofread_or_correct(client, analysis("Hundeballwerfer", "Ijoma kauft Quantencomputer"), TRANSCRIPT)
+        self.assertEqual(len(client.requests), 3)  # an unknown term still goes to the proofreading model
+
+    def test_dictionary_survives_a_reload(self):
+        before = analysis("X", "Idjoma")
+        self.dictionary.learn(before, analysis("X", "Ijoma"))
+        self.dictionary.learn(before, analysis("X", "Ijoma"))
+        self.dictionary.save()
+        reloaded = CorrectionDictionary(self.dictionary.path)
+        self.assertEqual(reloaded.active_corrections(), {"Idjoma": "Ijoma"})
+        text, _ = reloaded.correct_transcript(TRANSCRIPT)
+        self.assertEqual(text["transcript"][0]["text"], "Ijoma sagt")
+        self.assertEqual(TRANSCRIPT["transcript"][0]["text"], "Idjoma sagt")  # the input is left alone
+
+
+if __name__ == '__main__':
+    unittest.main()
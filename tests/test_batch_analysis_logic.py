@@ -0,0 +1,141 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add scripts directory to sys.path to allow importing batch_analysis
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import asr_corrections
+import batch_analysis
+import gemini_analyzer
+import gemini_cache
+import quota_scheduler
+import request_hedging
+from asr_corrections import CorrectionDictionary
+from batch_analysis import BatchPending, LocalBatchTransport, read_results, request_line, run_batch
+from gemini_analyzer import MODEL_NAME, process_transcript, run_batch_first_pass
+from gemini_stub import GeminiStubClient
+
+PROPOSAL = {
+    "vorschlag": "Hundeballwerfer", "vorschlagender": "Lars", "ist_hoerer": False, "begruendung": "Weil.",
+    "punkt_erhalten": True, "punkt_von": "Ijoma", "tags": ["Hunde"], "start_zeit": "0",
+}
+
+
+def write_transcript(directory, episode_id, text):
+    path = os.path.join(directory, f"{episode_id}_transcript.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"episode_title": f"Folge {episode_id}", "apple_id": episode_id,
+                   "transcript": [{"speaker": "SPEAKER_00", "text": text, "start": 0.0, "end": 5.0}]}, f)
+    return path
+
+
+class TestBatchAnalysisLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        asr_corrections._dictionary = CorrectionDictionary(os.path.join(self.dir, "asr_corrections.json"))
+
+    def tearDown(self):
+        asr_corrections._dictionary = None
+        self.tmp.cleanup()
+
+    def test_results_are_read_by_key_with_errors_and_truncation(self):
+        path = os.path.join(self.dir, "results.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"key": "a", "response": {"candidates": [{"content": {"parts": [
+                {"text": "gedacht", "thought": True}, {"text": "{}"}]}, "finishReason": "STOP"}]}}) + "\n")
+            f.write(json.dumps({"key": "b", "response": {"candidates": [{"content": {"parts": [
+                {"text": "{\"gegen"}]}, "finish_reason": "MAX_TOKENS"}]}}) + "\n")
+            f.write(json.dumps({"key": "c", "error": {"code": 400}}) + "\n")
+            f.write("kaputt\n")
+        self.assertEqual(read_results(path), {"a": {"text": "{}", "finish_reason": "STOP"},
+                                              "b": {"text": "{\"gegen", "finish_reason": "MAX_TOKENS"},
+                                              "c": {"error": {"code": 400}}})
+
+    def test_unfinished_job_is_resumed_instead_of_resubmitted(self):
+        transport = LocalBatchTransport(os.path.join(self.dir, "jobs"), lambda model, prompt: prompt.upper(),
+                                        polls_until_done=3)
+        lines = {"a": request_line("a", "eins", 0.1, 0.9), "b": request_line("b", "zwei", 0.1, 0.9, grounding=False)}
+        batch_dir = os.path.join(self.dir, "batches")
+        sleeps = []
+
+        with self.assertRaises(BatchPending):
+            run_batch(transport, lines, "model", batch_dir, poll_seconds=10, max_wait_seconds=10, sleep=sleeps.append)
+        results = run_batch(transport, lines, "model", batch_dir, poll_seconds=10, sleep=sleeps.append)
+
+        self.assertEqual(len(transport.submitted), 1)
+        self.assertEqual(sleeps, [10])
+        self.assertEqual({key: result['text'] for key, result in results.items()}, {"a": "EINS", "b": "ZWEI"})
+        # Finished jobs are answered from the stored results
+        self.assertEqual(run_batch(transport, lines, "model", batch_dir, sleep=sleeps.append), results)
+        self.assertEqual(len(transport.submitted), 1)
+
+    def test_batch_results_are_ingested_and_failures_left_for_single_analysis(self):
+        answer = json.dumps({"gegenwartsvorschlaege": [PROPOSAL]})
+
+        def responder(model, prompt):
+            if "Folge 222" in prompt:
+                raise RuntimeError("internal error")
+            return f"```json\n{answer}\n```"
+
+        paths = [write_transcript(self.dir, "111", "Mein Gegenwartscheck: der Hundeballwerfer."),
+                 write_transcript(self.dir, "222", "Mein Gegenwartscheck: noch einer."),
+                 write_transcript(self.dir, "333", "Schon analysiert.")]
+        output_dir = os.path.join(self.dir, "analyses")
+        os.makedirs(output_dir)
+        with open(os.path.join(output_dir, "333.json"), 'w', encoding='utf-8') as f:
+            json.dump({"gegenwartsvorschlaege": [PROPOSAL]}, f)
+        transport = LocalBatchTransport(os.path.join(self.dir, "jobs"), responder)
+        client = GeminiStubClient(responder=lambda model, contents: answer)
+
+        first_passes = run_batch_first_pass(client, paths, output_dir, transport=transport,
+                                            batch_dir=os.path.join(self.dir, "batches"), sleep=lambda seconds: None)
+
+        self.assertEqual(list(first_passes), [paths[0]])
+        self.assertEqual(transport.submitted[0][1], MODEL_NAME)
+        with open(os.path.join(self.dir, "jobs", f"{transport.submitted[0][0]}.input.jsonl"), encoding='utf-8') as f:
+            keys = [json.loads(line)['key'] for line in f]
+        self.assertEqual(keys, ["111", "222"])
+        self.assertFalse(any(request['model'] == MODEL_NAME for request in client.requests))
+
+        self.assertTrue(process_transcript(client, paths[0], output_dir, initial_analysis=first_passes[paths[0]]))
+        with open(os.path.join(output_dir, "111.json"), encoding='utf-8') as f:
+            output = json.load(f)
+        self.assertEqual([item["vorschlag"] for item in output["gegenwartsvorschlaege"]], ["Hundeballwerfer"])
+
+    def test_running_job_leaves_its_episodes_for_the_next_run(self):
+        input_dir = os.path.join(self.dir, "transcripts")
+        output_dir = os.path.join(self.dir, "analyses")
+        os.makedirs(input_dir)
+        for episode_id in ("111", "222"):
+            write_transcript(input_dir, episode_id, "Mein Gegenwartscheck: der Hundeballwerfer.")
+        transport = LocalBatchTransport(os.path.join(self.dir, "jobs"), lambda model, prompt: "{}",
+                                        polls_until_done=5)
+        client = GeminiStubClient(responder=lambda model, contents: "{}")
+        configure_ledger = quota_scheduler.configure
+        argv = ["gemini_analyzer.py", "--batch", "--input-dir", input_dir, "--output-dir", output_dir,
+                "--batch-dir", os.path.join(self.dir, "batches"), "--batch-max-wait", "0"]
+        try:
+            with mock.patch.object(sys, 'argv', argv), \
+                    mock.patch.object(gemini_analyzer, 'setup_gemini_client', return_value=client), \
+                    mock.patch.object(batch_analysis, 'GeminiBatchTransport', return_value=transport), \
+                    mock.patch.object(quota_scheduler, 'configure', lambda: configure_ledger(None)):
+                gemini_analyzer.main()
+                gemini_analyzer.main()
+        finally:
+            gemini_cache.close()
+            quota_scheduler._ledger = None
+            request_hedging._caller = None
+
+        self.assertEqual(len(transport.submitted), 1)  # the second run polls the same job
+        self.assertFalse([call for call in client.calls if call[0] == 'models.generate_content_stream'])
+        self.assertEqual(os.listdir(output_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
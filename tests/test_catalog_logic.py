@@ -0,0 +1,110 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing catalog
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import catalog
+from aggregate_data import load_episode_links, process_analyses
+
+EPISODES = [
+    {"title": "Folge A", "release_date": "2024-03-01", "apple_id": 111, "apple_url": "https://apple/111",
+     "spotify_id": "spA", "spotify_url": "https://spotify/spA"},
+    {"title": "Folge B", "release_date": "2023-12-20", "apple_id": 222, "apple_url": "https://apple/222",
+     "spotify_id": "spB", "spotify_url": "https://spotify/spB"},
+]
+
+
+def proposal(name, proposer, point, tags=("Alltag",), start="120s"):
+    return {"vorschlag": name, "vorschlagender": proposer, "punkt_erhalten": point,
+            "punkt_von": "Ijoma" if point else None, "tags": list(tags), "start_zeit": start}
+
+
+class TestCatalogLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.analyses_dir = os.path.join(self.tmp, "analyses")
+        os.makedirs(self.analyses_dir)
+        self.links_file = os.path.join(self.tmp, "episode_links.json")
+        self.write_json(self.links_file, EPISODES)
+        self.write_analysis("111", {"episode_title": "A", "apple_id": "111", "episode_date": "2024-03-01",
+                                    "gegenwartsvorschlaege": [proposal("Hundeballwerfer", "Lars", True, ["Hunde"]),
+                                                              "kaputt",
+                                                              proposal("Rasenroboter", "Nina", False)]})
+        # Found through its Spotify ID only
+        self.write_analysis("spB", {"episode_title": "B", "spotify_id": "spB",
+                                    "gegenwartsvorschlaege": [proposal("Adventskalender", "Lars", True, start="x")]})
+        # Not in the episode list at all
+        self.write_analysis("999", {"episode_title": "Unbekannt", "episode_date": "2024-06-01",
+                                    "gegenwartsvorschlaege": [proposal("Sprachnachricht", "Lars", True)]})
+        self.conn = catalog.connect(os.path.join(self.tmp, "catalog.sqlite"))
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.tmp)
+
+    def write_json(self, path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def write_analysis(self, name, data):
+        self.write_json(os.path.join(self.analyses_dir, f"{name}.json"), data)
+
+    def sync(self):
+        return catalog.sync(self.conn, self.analyses_dir, self.links_file)
+
+    def test_site_records_match_the_directory_scan(self):
+        self.sync()
+        expected = process_analyses(self.analyses_dir, load_episode_links(self.links_file))
+        records = catalog.site_records(self.conn)
+
+        self.assertEqual(json.dumps(records), json.dumps(expected))
+        self.assertEqual([r['unique_vorschlag_id'] for r in records], ["111_0", "111_2", "999_0", "spB_0"])
+        self.assertEqual(records[3]['episode_title'], "Folge B")
+        self.assertIsNone(records[3]['start_zeit_sekunden'])
+
+    def test_sync_only_rereads_changed_files(self):
+        self.assertEqual(self.sync(), {'added': 3, 'updated': 0, 'unchanged': 0, 'removed': 0})
+        self.write_analysis("111", {"episode_title": "A", "apple_id": "111",
+                                    "gegenwartsvorschlaege": [proposal("Hundeballwerfer", "Lars", False)]})
+        os.remove(os.path.join(self.analyses_dir, "999.json"))
+
+        self.assertEqual(self.sync(), {'added': 0, 'updated': 1, 'unchanged': 1, 'removed': 1})
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM proposals").fetchone()[0], 2)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM proposal_tags").fetchone()[0], 2)
+        self.assertEqual([r['vorschlag'] for r in catalog.find_proposals(self.conn, points_only=True)],
+                         ["Adventskalender"])
+
+    def test_changed_episode_list_is_reloaded(self):
+        self.sync()
+        self.write_json(self.links_file, [dict(EPISODES[0], title="Folge A (neu)")])
+        self.sync()
+        self.assertEqual(catalog.site_records(self.conn)[0]['episode_title'], "Folge A (neu)")
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM episodes").fetchone()[0], 1)
+
+    def test_points_by_proposer_and_year(self):
+        self.sync()
+        names = [r['vorschlag'] for r in catalog.find_proposals(self.conn, proposer="Lars", year=2024,
+                                                                points_only=True)]
+        # Newest episode first; the Spotify-only analysis dates from 2023 through the episode list
+        self.assertEqual(names, ["Sprachnachricht", "Hundeballwerfer"])
+        self.assertEqual([r['vorschlag'] for r in catalog.find_proposals(self.conn, year=2023)], ["Adventskalender"])
+        self.assertEqual([r['vorschlag'] for r in catalog.find_proposals(self.conn, tag="hunde")], ["Hundeballwerfer"])
+        self.assertIs(catalog.find_proposals(self.conn, proposer="Nina")[0]['punkt_erhalten'], False)
+
+    def test_queries_use_the_indexes(self):
+        plan = self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM proposals WHERE vorschlagender = ? AND punkt_erhalten = 1", ("Lars",)
+        ).fetchall()
+        self.assertIn("proposals_proposer", " ".join(row[-1] for row in plan))
+        plan = self.conn.execute("EXPLAIN QUERY PLAN SELECT * FROM episodes WHERE apple_id = ?", ("1",)).fetchall()
+        self.assertIn("episodes_apple_id", " ".join(row[-1] for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing extract_transcripts
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from extract_transcripts import find_ttml_files, parse_begin_time, process_ttml_file, route_ttml_files, ttml_episode_id
+
+SAMPLE_TTML = """<?xml version="1.0" encoding="UTF-8"?>
+<tt xmlns="http://www.w3.org/ns/ttml" xmlns:ttm="http://www.w3.org/ns/ttml#metadata"
+    xmlns:podcasts="http://podcasts.apple.com/transcript-ttml-internal">
+  <body>
+    <div>
+      <p begin="1:05.500" ttm:agent="SPEAKER_1">
+        <span podcasts:unit="sentence"><span>Hallo</span> <span>zusammen.</span></span>
+      </p>
+      <p begin="1:02:03.250" ttm:agent="SPEAKER_2">
+        <span podcasts:unit="sentence"><span>Mein</span> <span>Vorschlag.</span></span>
+      </p>
+      <p begin="7.9" ttm:agent="SPEAKER_1"></p>
+    </div>
+  </body>
+</tt>
+"""
+
+
+class TestExtractTranscriptsLogic(unittest.TestCase):
+
+    def test_parse_begin_time(self):
+        self.assertEqual(parse_begin_time("1:02:03.250"), 3723)
+        self.assertEqual(parse_begin_time("01:05.500"), 65)
+        self.assertEqual(parse_begin_time("7.9"), 7)
+        self.assertEqual(parse_begin_time(""), 0)
+        self.assertEqual(parse_begin_time("kaputt"), 0)
+
+    def test_process_ttml_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            extracted_dir = os.path.join(temp_dir, "extracted")
+            ttml_dir = os.path.join(extracted_dir, "1000534444029", "Cache", "Assets", "TTML")
+            os.makedirs(ttml_dir)
+            with open(os.path.join(ttml_dir, "transcript_1000534444029.ttml-1000534444029.ttml"), "w") as f:
+                f.write(SAMPLE_TTML)
+            transcripts_dir = os.path.join(temp_dir, "transcripts")
+            os.makedirs(transcripts_dir)
+            metadata = {"1000534444029": {"title": "Folge 1", "release_date": "2021-09-06", "spotify_id": "sp1"}}
+
+            ttml_files = find_ttml_files(extracted_dir)
+            self.assertEqual(len(ttml_files), 1)
+            output_file = process_ttml_file(ttml_files[0], metadata, transcripts_dir, extracted_dir)
+
+            self.assertEqual(os.path.basename(output_file), "1000534444029_transcript.json")
+            with open(output_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.assertEqual(data["episode_title"], "Folge 1")
+            self.assertEqual(data["spotify_id"], "sp1")
+            self.assertEqual(data["upload_date"], "2021-09-06")
+            self.assertEqual(data["filename_primary_id"], "1000534444029")
+            self.assertEqual(data["transcript"], [
+                {"speaker": "SPEAKER_1", "text": "Hallo zusammen.", "begin_seconds": 65},
+                {"speaker": "SPEAKER_2", "text": "Mein Vorschlag.", "begin_seconds": 3723},
+            ])
+
+    def test_capture_with_several_episodes_is_routed_by_file_name(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            extracted_dir = os.path.join(temp_dir, "extracted")
+            ttml_dir = os.path.join(extracted_dir, "capture_1", "Cache", "Assets", "TTML")
+            os.makedirs(ttml_dir)
+            for episode_id in ("111", "222"):
+                with open(os.path.join(ttml_dir, f"transcript_{episode_id}.ttml-{episode_id}.ttml"), "w") as f:
+                    f.write(SAMPLE_TTML)
+            transcripts_dir = os.path.join(temp_dir, "transcripts")
+            os.makedirs(transcripts_dir)
+
+            routes = route_ttml_files(find_ttml_files(extracted_dir))
+            self.assertEqual(sorted(routes), ["111", "222"])
+            written = [process_ttml_file(routes[episode_id], {}, transcripts_dir, extracted_dir)
+                       for episode_id in sorted(routes)]
+
+            self.assertEqual([os.path.basename(path) for path in written],
+                             ["111_transcript.json", "222_transcript.json"])
+            with open(written[1], "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.assertEqual(data["apple_id"], "222")
+            self.assertEqual(data["filename_primary_id"], "222")
+
+    def test_duplicate_episode_keeps_the_largest_copy(self):
+        sizes = {"a/transcript_111.ttml-111.ttml": 500, "b/transcript_111.ttml-111.ttml": 200,
+                 "b/transcript_222.ttml-222.ttml": 10, "b/notes.ttml": 10}
+        self.assertEqual(route_ttml_files(list(sizes), sizes),
+                         {"111": "a/transcript_111.ttml-111.ttml", "222": "b/transcript_222.ttml-222.ttml"})
+        self.assertEqual(ttml_episode_id("x/transcript_1000534444029.ttml-1000534444029.ttml"), "1000534444029")
+        self.assertIsNone(ttml_episode_id("x/notes.ttml"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing the fetch modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from fetch_state import (
+    load_fetch_state,
+    save_fetch_state,
+    is_known_page,
+    merge_new_episodes,
+    update_watermark,
+)
+import apple_fetch
+import spotify_fetch
+
+existing_spotify_episodes = [
+    {"title": "Episode 2", "url": "url2", "episode_id": "ep2", "release_date": "2023-01-08", "source": "spotify"},
+    {"title": "Episode 1", "url": "url1", "episode_id": "ep1", "release_date": "2023-01-01", "source": "spotify"},
+]
+
+
+def spotify_page(items, next_url=None):
+    return {
+        "items": [
+            {"id": i, "name": f"Episode {i}", "release_date": d, "external_urls": {"spotify": f"url-{i}"}}
+            for i, d in items
+        ],
+        "next": next_url,
+    }
+
+
+class TestFetchStateLogic(unittest.TestCase):
+
+    def test_is_known_page(self):
+        known = {"ep1", "ep2"}
+        self.assertTrue(is_known_page(existing_spotify_episodes, known, "episode_id"))
+        new = [{"episode_id": "ep3", "release_date": "2023-01-15"}]
+        self.assertFalse(is_known_page(new + existing_spotify_episodes, known, "episode_id"))
+        # Episodes older than the watermark count as known even if their ID is missing locally
+        old = [{"episode_id": "ep0", "release_date": "2022-12-01"}]
+        watermark = {"episode_id": "ep2", "release_date": "2023-01-08"}
+        self.assertTrue(is_known_page(old, known, "episode_id", watermark))
+        self.assertFalse(is_known_page(old, known, "episode_id"))
+
+    def test_apple_ids_are_compared_as_strings(self):
+        self.assertTrue(is_known_page([{"apple_id": 1000534444029}], {"1000534444029"}, "apple_id"))
+
+    def test_merge_new_episodes(self):
+        fetched = [
+            {"title": "Episode 3", "episode_id": "ep3", "release_date": "2023-01-15"},
+            {"title": "Episode 2 (renamed)", "episode_id": "ep2", "release_date": "2023-01-08"},
+        ]
+        merged, added = merge_new_episodes(existing_spotify_episodes, fetched, "episode_id")
+        self.assertEqual(added, 1)
+        self.assertEqual([ep["episode_id"] for ep in merged], ["ep3", "ep2", "ep1"])
+        # Known entries are kept as they were
+        self.assertEqual(merged[1]["title"], "Episode 2")
+
+        unchanged, added = merge_new_episodes(existing_spotify_episodes, fetched[1:], "episode_id")
+        self.assertEqual(added, 0)
+        self.assertIs(unchanged, existing_spotify_episodes)
+
+    def test_watermark_roundtrip(self):
+        state = {}
+        update_watermark(state, "spotify", existing_spotify_episodes, "episode_id")
+        self.assertEqual(state["spotify"], {"episode_id": "ep2", "release_date": "2023-01-08"})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "episodes", "fetch_state.json")
+            self.assertEqual(load_fetch_state(path), {})
+            save_fetch_state(state, path)
+            self.assertEqual(load_fetch_state(path), state)
+
+    # --- Incremental paging ---
+    @patch('requests.Session.get')
+    @patch('spotify_fetch.get_spotify_token', return_value="dummy_token")
+    def test_spotify_incremental_stops_at_known_episodes(self, mock_get_token, mock_get):
+        # A full page (limit 50): two new episodes on top of known ones
+        items = [("ep4", "2023-01-22"), ("ep3", "2023-01-15")] + [("ep2", "2023-01-08")] * 48
+        page1 = MagicMock()
+        page1.json.return_value = spotify_page(items, next_url="next")
+        mock_get.side_effect = [page1, AssertionError("fetched past the known episodes")]
+
+        episodes = spotify_fetch.get_podcast_episodes(
+            "id", "secret", "show", known_ids={"ep1", "ep2"}, watermark={"release_date": "2023-01-08"}
+        )
+
+        self.assertEqual(mock_get.call_count, 1)
+        merged, added = merge_new_episodes(existing_spotify_episodes, episodes, "episode_id")
+        self.assertEqual(added, 2)
+        self.assertEqual([ep["episode_id"] for ep in merged[:3]], ["ep4", "ep3", "ep2"])
+
+    @patch('requests.Session.get')
+    @patch('spotify_fetch.get_spotify_token', return_value="dummy_token")
+    def test_spotify_incremental_pages_while_everything_is_new(self, mock_get_token, mock_get):
+        page1 = MagicMock()
+        page1.json.return_value = spotify_page([(f"new{i}", "2023-02-01") for i in range(50)], next_url="next")
+        page2 = MagicMock()
+        page2.json.return_value = spotify_page([("ep2", "2023-01-08")] * 50, next_url="next")
+        mock_get.side_effect = [page1, page2]
+
+        episodes = spotify_fetch.get_podcast_episodes("id", "secret", "show", known_ids={"ep2"})
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(len(episodes), 100)
+
+    @patch('requests.Session.get')
+    def test_apple_incremental_needs_one_request(self, mock_get):
+        results = [{"wrapperType": "track", "trackId": 1522895163}]
+        # Newest first: one new episode on top of 99 known ones
+        results += [
+            {"wrapperType": "podcastEpisode", "trackId": 1000 - i, "trackName": f"E{i}",
+             "trackViewUrl": f"url{i}", "releaseDate": f"2023-{12 - i // 28:02d}-{28 - i % 28:02d}T05:00:00Z"}
+            for i in range(100)
+        ]
+        response = MagicMock()
+        response.json.return_value = {"results": results}
+        mock_get.return_value = response
+
+        known = {str(1000 - i) for i in range(1, 100)}
+        episodes = apple_fetch.get_podcast_episodes("1522895163", known_ids=known)
+
+        mock_get.assert_called_once()
+        merged, added = merge_new_episodes([{"apple_id": int(i)} for i in known], episodes, "apple_id")
+        self.assertEqual(added, 1)
+        self.assertEqual(episodes[0]["apple_id"], 1000)
+        self.assertEqual(episodes[0]["release_date"], "2023-12-28")
+        self.assertEqual(episodes[0]["source"], "apple")
+
+    @patch('requests.Session.get')
+    def test_apple_full_fetch_stops_on_repeated_page(self, mock_get):
+        results = [
+            {"wrapperType": "podcastEpisode", "trackId": i, "trackName": f"E{i}", "releaseDate": "2023-01-01"}
+            for i in range(100)
+        ]
+        response = MagicMock()
+        response.json.return_value = {"results": results}
+        mock_get.return_value = response
+
+        episodes = apple_fetch.get_podcast_episodes("1522895163")
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(len(episodes), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
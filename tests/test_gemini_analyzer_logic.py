@@ -3,6 +3,7 @@ from unittest.mock import patch, mock_open, MagicMock, call
 import json
 import os
 import sys
+import tempfile
 from datetime import datetime
 
 # Add scripts directory to sys.path to allow importing gemini_analyzer
@@ -176,6 +177,27 @@ class TestGeminiAnalyzerLogic(unittest.TestCase):
         self.assertIn("\"vorschlag\": \"Name des Vorschlags\"", prompt) # Example field
         self.assertIn("WICHTIG:", prompt)
 
+    def test_create_gemini_prompt_lists_chapters_before_transcript(self):
+        chapters = [
+            {"start_seconds": 0, "end_seconds": 312.5, "first_chunk": 0, "last_chunk": 1, "keywords": ["wetter", "urlaub"]},
+            {"start_seconds": 312.5, "end_seconds": 1805, "first_chunk": 2, "last_chunk": 3, "keywords": []},
+        ]
+        prompt = create_gemini_prompt(dict(sample_transcript_data, chapters=chapters))
+        self.assertIn("1. 0:00–5:12: wetter, urlaub\n2. 5:12–30:05: ohne Schlagworte", prompt)
+        self.assertLess(prompt.index("Kapitelübersicht"), prompt.index("SPEAKER_01: Lars speaking."))
+        self.assertNotIn("Kapitelübersicht", create_gemini_prompt(sample_transcript_data))
+
+    def test_load_transcript_attaches_stored_chapters(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            transcript_path = os.path.join(tmp, "123_transcript.json")
+            with open(transcript_path, 'w', encoding='utf-8') as f:
+                json.dump(sample_transcript_data, f)
+            self.assertNotIn("chapters", load_transcript(transcript_path))
+            chapters = [{"start_seconds": 0, "end_seconds": 60, "first_chunk": 0, "last_chunk": 1, "keywords": ["test"]}]
+            with open(os.path.join(tmp, "123_chapters.json"), 'w', encoding='utf-8') as f:
+                json.dump({"episode_id": "123", "chapters": chapters}, f)
+            self.assertEqual(load_transcript(transcript_path)["chapters"], chapters)
+
     # --- Tests for create_output_data ---
     def test_create_output_data_basic_fields(self):
         output = create_output_data(sample_transcript_data, sample_initial_analysis_result)
@@ -0,0 +1,152 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add scripts directory to sys.path to allow importing gemini_cache
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import gemini_cache
+from gemini_analyzer import (
+    ANALYSIS_INSTRUCTIONS,
+    MODEL_NAME,
+    analyze_transcript_with_gemini,
+    create_gemini_prompt,
+    stream_with_cache,
+)
+from gemini_cache import ContextCache
+from gemini_stub import GeminiStubClient
+
+RESPONSE = '{"gegenwartsvorschlaege": [{"vorschlag": "Test"}]}'
+
+
+def make_transcript(title, words=400):
+    return {
+        "episode_title": title,
+        "transcript": [{"speaker": "SPEAKER_00", "text": f"{title} " + "wort " * words, "begin_seconds": 0}],
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestGeminiCacheLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.client = GeminiStubClient(responder=lambda model, contents: RESPONSE, min_cache_tokens=100,
+                                       clock=self.clock)
+        with patch.dict(os.environ, {gemini_cache.CACHE_MIN_TOKENS_ENV: "100"}):
+            self.cache = gemini_cache.configure(self.client)
+        self.cache.clock = self.clock
+
+    def tearDown(self):
+        gemini_cache.close()
+
+    def calls(self, name):
+        return [call for call in self.client.calls if call[0] == name]
+
+    def test_prefix_is_cached_once_for_all_episodes(self):
+        analyze_transcript_with_gemini(self.client, make_transcript("Erste Folge"))
+        analyze_transcript_with_gemini(self.client, make_transcript("Zweite Folge"))
+
+        self.assertEqual(len(self.calls('caches.create')), 1)
+        self.assertEqual(self.cache.stats['cache_requests'], 2)
+        cached = [r.usage_metadata.cached_content_token_count for r in self.client.responses]
+        self.assertTrue(all(cached))
+        self.assertEqual(self.cache.stats['cached_tokens'], sum(cached))
+
+    def test_repeated_episode_gets_its_own_cache(self):
+        transcript = make_transcript("Erste Folge", words=2000)
+        analyze_transcript_with_gemini(self.client, transcript)
+        analyze_transcript_with_gemini(self.client, transcript)
+
+        self.assertEqual(len(self.calls('caches.create')), 2)  # prefix, then prefix + transcript
+        first, second = self.client.responses
+        self.assertGreater(second.usage_metadata.cached_content_token_count,
+                           first.usage_metadata.cached_content_token_count)
+        # Only the short tail is sent with the second request
+        self.assertLess(second.usage_metadata.prompt_token_count - second.usage_metadata.cached_content_token_count,
+                        50)
+
+    def test_grounded_and_ungrounded_requests_use_separate_caches(self):
+        stream_with_cache(self.client, MODEL_NAME, (ANALYSIS_INSTRUCTIONS, "Folge 1", "Antworte."), 0.1, 0.9, "1",
+                          grounding=False)
+        stream_with_cache(self.client, MODEL_NAME, (ANALYSIS_INSTRUCTIONS, "Folge 2", "Antworte."), 0.1, 0.9, "2",
+                          grounding=True)
+
+        created = [cache['tools'] for cache in self.client.caches_by_name.values()]
+        self.assertEqual(len(self.calls('caches.create')), 2)
+        self.assertEqual(sorted(bool(tools) for tools in created), [False, True])
+        # Each request reads the cache created with its own tools
+        grounded, ungrounded = (self.client.caches_by_name[request['config'].cached_content]['tools']
+                                for request in reversed(self.client.requests))
+        self.assertTrue(grounded)
+        self.assertFalse(ungrounded)
+
+    def test_model_without_caching_falls_back_to_full_prompt(self):
+        self.client.caching_models = ["some-other-model"]
+        transcript = make_transcript("Erste Folge")
+        self.assertEqual(analyze_transcript_with_gemini(self.client, transcript), {"gegenwartsvorschlaege": [
+            {"vorschlag": "Test"}]})
+        analyze_transcript_with_gemini(self.client, transcript)
+
+        self.assertEqual(len(self.calls('caches.create')), 1)  # not retried after the first refusal
+        self.assertEqual(self.cache.stats['uncached_requests'], 2)
+        self.assertIsNone(self.client.responses[0].usage_metadata.cached_content_token_count)
+
+    def test_expired_cache_is_dropped_and_request_repeated_without_it(self):
+        def parts(episode):
+            return (ANALYSIS_INSTRUCTIONS, f"Transkript {episode}", "Antworte.")
+
+        stream_with_cache(self.client, MODEL_NAME, parts(1), 0.1, 0.9, "1")
+        # The API dropped the prefix cache behind our back
+        self.client.caches_by_name.clear()
+        streamed = stream_with_cache(self.client, MODEL_NAME, parts(2), 0.1, 0.9, "2")
+
+        self.assertEqual(streamed['text'], RESPONSE)
+        self.assertEqual(len(self.client.requests), 3)
+        self.assertIsNone(self.client.requests[-1]['config'].cached_content)
+        stream_with_cache(self.client, MODEL_NAME, parts(3), 0.1, 0.9, "3")
+        self.assertEqual(len(self.client.caches_by_name), 1)  # recreated on the next request
+
+    def test_ttl_is_extended_while_in_use(self):
+        stream_with_cache(self.client, MODEL_NAME, (ANALYSIS_INSTRUCTIONS, "Folge 1", "Antworte."), 0.1, 0.9, "1")
+        self.clock.now += self.cache.ttl_seconds - 60
+        stream_with_cache(self.client, MODEL_NAME, (ANALYSIS_INSTRUCTIONS, "Folge 2", "Antworte."), 0.1, 0.9, "2")
+
+        self.assertEqual(len(self.calls('caches.update')), 1)
+        self.assertEqual(len(self.calls('caches.create')), 1)
+
+    def test_close_deletes_the_caches_of_the_run(self):
+        analyze_transcript_with_gemini(self.client, make_transcript("Erste Folge"))
+        gemini_cache.close()
+        self.assertEqual(self.client.caches_by_name, {})
+        self.assertIsNone(gemini_cache.get(self.client))
+
+    def test_disabled_caching_sends_the_unchanged_prompt(self):
+        with patch.dict(os.environ, {gemini_cache.CONTEXT_CACHE_ENV: "0"}):
+            self.assertIsNone(gemini_cache.configure(self.client))
+        transcript = make_transcript("Erste Folge")
+        captured = []
+        self.client.responder = lambda model, contents: captured.append(contents) or RESPONSE
+        analyze_transcript_with_gemini(self.client, transcript)
+
+        self.assertEqual(self.calls('caches.create'), [])
+        self.assertEqual(captured[0][0].parts[0].text, create_gemini_prompt(transcript))
+
+    def test_small_content_is_not_offered_for_caching(self):
+        cache = ContextCache(self.client, min_tokens=10 ** 6)
+        request = cache.prepare(MODEL_NAME, ["Anweisungen"], ["Transkript"], ["Antworte."], tools=["tool"])
+        self.assertIsNone(request['cached_content'])
+        self.assertEqual(request['tools'], ["tool"])
+        self.assertEqual(self.calls('caches.create'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import time
+
+# Add scripts directory to sys.path to allow importing http_cache
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from http_cache import CachedFetcher, CacheMiss, cache_key, freshness_lifetime
+from spotify_stub_server import SpotifyStubServer
+
+AUTH = {"Authorization": "Bearer stub-token-1"}
+PARAMS = {"limit": 50, "offset": 0, "market": "DE"}
+
+
+class TestHttpCacheLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_key_ignores_param_order(self):
+        self.assertEqual(cache_key("u", {"a": 1, "b": 2}), cache_key("u", {"b": 2, "a": 1}))
+        self.assertNotEqual(cache_key("u", {"offset": 0}), cache_key("u", {"offset": 50}))
+
+    def test_freshness_lifetime(self):
+        self.assertEqual(freshness_lifetime({"Cache-Control": "public, max-age=300"}), 300)
+        self.assertEqual(freshness_lifetime({"Cache-Control": "max-age=300", "Age": "100"}), 200)
+        self.assertEqual(freshness_lifetime({"Cache-Control": "no-cache, max-age=300"}), 0)
+        self.assertEqual(freshness_lifetime({}), 0)
+
+    def test_unchanged_page_costs_a_304(self):
+        with SpotifyStubServer(episode_count=10) as stub:
+            url = f"{stub.api_url}/shows/show/episodes"
+            fetcher = CachedFetcher(self.cache_dir)
+            first = fetcher.get(url, params=PARAMS, headers=AUTH).json()
+            second = fetcher.get(url, params=PARAMS, headers=AUTH)
+            self.assertTrue(second.from_cache)
+            self.assertEqual(second.json(), first)
+            self.assertEqual(stub.not_modified, 1)
+            self.assertEqual(fetcher.stats["downloaded"], 1)
+            self.assertEqual(fetcher.stats["revalidated"], 1)
+
+    def test_fresh_entry_costs_nothing(self):
+        with SpotifyStubServer(episode_count=10, cache_control="max-age=3600") as stub:
+            url = f"{stub.api_url}/shows/show/episodes"
+            fetcher = CachedFetcher(self.cache_dir)
+            fetcher.get(url, params=PARAMS, headers=AUTH)
+            fetcher.get(url, params=PARAMS, headers=AUTH)
+            self.assertEqual(stub.page_requests, 1)
+            self.assertEqual(fetcher.stats["fresh"], 1)
+            # Once the entry is stale it is revalidated
+            with patch("http_cache.time.time", return_value=time.time() + 7200):
+                fetcher.get(url, params=PARAMS, headers=AUTH)
+            self.assertEqual(stub.not_modified, 1)
+
+    def test_no_store_is_not_cached(self):
+        with SpotifyStubServer(episode_count=10, cache_control="no-store") as stub:
+            url = f"{stub.api_url}/shows/show/episodes"
+            fetcher = CachedFetcher(self.cache_dir)
+            fetcher.get(url, params=PARAMS, headers=AUTH)
+            fetcher.get(url, params=PARAMS, headers=AUTH)
+            self.assertEqual(stub.page_requests, 2)
+            self.assertEqual(stub.not_modified, 0)
+
+    def test_offline_mode_serves_from_cache_only(self):
+        with SpotifyStubServer(episode_count=10) as stub:
+            url = f"{stub.api_url}/shows/show/episodes"
+            expected = CachedFetcher(self.cache_dir).get(url, params=PARAMS, headers=AUTH).json()
+        # The stub is gone, so any network request would fail
+        offline = CachedFetcher(self.cache_dir, offline=True)
+        self.assertEqual(offline.get(url, params=PARAMS).json(), expected)
+        with self.assertRaises(CacheMiss):
+            offline.get(url, params={**PARAMS, "offset": 50})
+
+    def test_errors_are_not_cached(self):
+        with SpotifyStubServer(episode_count=10) as stub:
+            fetcher = CachedFetcher(self.cache_dir)
+            response = fetcher.get(f"{stub.api_url}/shows/show/episodes", params=PARAMS)  # no token
+            self.assertEqual(response.status_code, 401)
+            with self.assertRaises(CacheMiss):
+                CachedFetcher(self.cache_dir, offline=True).get(f"{stub.api_url}/shows/show/episodes", params=PARAMS)
+
+    def test_spotify_fetch_reruns_offline(self):
+        import spotify_fetch
+        with SpotifyStubServer(episode_count=120) as stub:
+            api_url, token_url = stub.api_url, stub.token_url
+            with patch.dict(os.environ, {"HTTP_CACHE_DIR": self.cache_dir}):
+                spotify_fetch._session = None
+                online = spotify_fetch.get_podcast_episodes("id", "secret", "show",
+                                                            api_url=api_url, token_url=token_url)
+        with patch.dict(os.environ, {"HTTP_CACHE_DIR": self.cache_dir, "HTTP_CACHE_OFFLINE": "1"}):
+            spotify_fetch._session = None
+            offline = spotify_fetch.get_podcast_episodes("id", "secret", "show",
+                                                         api_url=api_url, token_url=token_url)
+        spotify_fetch._session = None
+        self.assertEqual(len(online), 120)
+        self.assertEqual(offline, online)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add scripts directory to sys.path to allow importing json_writer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import json_writer
+
+
+class TestJsonWriterLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "out", "data.json")
+        json_writer.counts.update(written=0, skipped=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_content_is_not_rewritten(self):
+        data = {"vorschlag": "Hundeballwerfer", "tags": ["Hunde"]}
+        self.assertTrue(json_writer.write_json(self.path, data))
+        os.utime(self.path, (0, 0))
+
+        self.assertFalse(json_writer.write_json(self.path, dict(data)))
+        self.assertEqual(os.stat(self.path).st_mtime, 0)
+        self.assertTrue(json_writer.write_json(self.path, dict(data, tags=[])))
+        self.assertEqual(json_writer.counts, {'written': 2, 'skipped': 1})
+
+    def test_format_matches_json_dump(self):
+        data = [{"title": "Folge über Ärger", "apple_id": 111}]
+        json_writer.write_json(self.path, data, ensure_ascii=True)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps(data, indent=2))
+
+    def test_floats_are_written_the_same_way_every_time(self):
+        json_writer.write_json(self.path, {"mean": 0.1 + 0.2, "zero": -0.0, "count": 3})
+        self.assertFalse(json_writer.write_json(self.path, {"mean": 0.3, "zero": 0.0, "count": 3}))
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {"mean": 0.3, "zero": 0.0, "count": 3})
+        with self.assertRaises(ValueError):
+            json_writer.write_json(self.path, {"mean": float('nan')})
+
+    def test_failed_write_keeps_the_old_file(self):
+        json_writer.write_json(self.path, {"version": 1})
+        with patch("json_writer.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                json_writer.write_json(self.path, {"version": 2})
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {"version": 1})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["data.json"])  # no temporary file left
+
+
+if __name__ == '__main__':
+    unittest.main()
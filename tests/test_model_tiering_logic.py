@@ -0,0 +1,107 @@
+import unittest
+import json
+import os
+import sys
+from unittest.mock import patch
+
+# Add scripts directory to sys.path to allow importing model_tiering
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import model_tiering
+from gemini_analyzer import MODEL_NAME, analyze_with_model_tiers
+from gemini_stub import GeminiStubClient
+from model_tiering import FAST_MODEL_NAME, TierStats, count_cues, doubtful_fields, escalation_reason
+
+GOOD_PROPOSAL = {
+    "vorschlag": "Hundeballwerfer", "vorschlagender": "Lars", "ist_hoerer": False, "begruendung": "Weil.",
+    "punkt_erhalten": True, "punkt_von": "Ijoma", "tags": ["Hunde"], "start_zeit": "426",
+}
+TRANSCRIPT = {
+    "episode_title": "Folge",
+    "transcript": [
+        {"speaker": "SPEAKER_00", "text": "Mein Gegenwartscheck heute: der Hundeballwerfer.", "begin_seconds": 400},
+        {"speaker": "SPEAKER_01", "text": "Dafür gebe ich dir einen Punkt.", "begin_seconds": 480},
+    ],
+}
+
+
+def analysis(*proposals):
+    return json.dumps({"gegenwartsvorschlaege": list(proposals)})
+
+
+class TestModelTieringLogic(unittest.TestCase):
+
+    def setUp(self):
+        model_tiering.stats = TierStats()
+        self.answers = {}
+        self.client = GeminiStubClient(responder=lambda model, contents: self.answers[model])
+
+    def models_called(self):
+        return [request['model'] for request in self.client.requests]
+
+    def test_good_fast_answer_is_accepted_without_grounding(self):
+        self.answers[FAST_MODEL_NAME] = analysis(GOOD_PROPOSAL)
+        result = analyze_with_model_tiers(self.client, TRANSCRIPT)
+
+        self.assertEqual(result["gegenwartsvorschlaege"][0]["vorschlag"], "Hundeballwerfer")
+        self.assertEqual(self.models_called(), [FAST_MODEL_NAME])
+        self.assertIsNone(self.client.requests[0]['config'].tools)
+        self.assertEqual(model_tiering.stats.summary()["fast"]["hit_rate"], 1.0)
+
+    def test_empty_answer_despite_cues_escalates_to_grounded_model(self):
+        self.answers[FAST_MODEL_NAME] = analysis()
+        self.answers[MODEL_NAME] = analysis(GOOD_PROPOSAL)
+        result = analyze_with_model_tiers(self.client, TRANSCRIPT)
+
+        self.assertEqual(len(result["gegenwartsvorschlaege"]), 1)
+        self.assertEqual(self.models_called(), [FAST_MODEL_NAME, MODEL_NAME])
+        self.assertTrue(self.client.requests[1]['config'].tools)
+        summary = model_tiering.stats.summary()
+        self.assertEqual(summary["fast"]["misses"], {"empty_with_cues": 1})
+        self.assertEqual(summary["standard"]["hit_rate"], 1.0)
+
+    def test_unparseable_answer_escalates_and_readable_answer_is_kept_as_fallback(self):
+        doubtful = dict(GOOD_PROPOSAL, vorschlagender="Hörerin", start_zeit="ca. 7 Minuten")
+        self.answers[FAST_MODEL_NAME] = analysis(doubtful)
+        self.answers[MODEL_NAME] = '{"gegenwartsvorschlaege": ['
+        result = analyze_with_model_tiers(self.client, TRANSCRIPT)
+
+        # The strong tier failed to answer readably, so the fast tier's doubtful answer is used
+        self.assertEqual(result["gegenwartsvorschlaege"][0]["vorschlagender"], "Hörerin")
+        self.assertEqual(model_tiering.stats.summary()["standard"]["misses"], {"parse_failure": 1})
+
+    def test_disabled_tiering_uses_the_standard_model_only(self):
+        self.answers[MODEL_NAME] = analysis(GOOD_PROPOSAL)
+        with patch.dict(os.environ, {model_tiering.MODEL_TIERING_ENV: "0"}):
+            analyze_with_model_tiers(self.client, TRANSCRIPT)
+        self.assertEqual(self.models_called(), [MODEL_NAME])
+
+    def test_escalation_reasons(self):
+        no_cues = {"transcript": [{"text": "Heute nur Smalltalk."}]}
+        self.assertEqual(escalation_reason(None, TRANSCRIPT), "parse_failure")
+        self.assertEqual(escalation_reason({"foo": 1}, TRANSCRIPT), "parse_failure")
+        self.assertEqual(escalation_reason({"gegenwartsvorschlaege": []}, TRANSCRIPT), "empty_with_cues")
+        self.assertIsNone(escalation_reason({"gegenwartsvorschlaege": []}, no_cues))
+        self.assertEqual(escalation_reason({"gegenwartsvorschlaege": [{"tags": []}]}, TRANSCRIPT), "low_confidence")
+        self.assertIsNone(escalation_reason({"gegenwartsvorschlaege": [GOOD_PROPOSAL] * 4}, TRANSCRIPT))
+
+        # One doubtful proposal out of four is tolerated, two are not
+        doubtful = dict(GOOD_PROPOSAL, punkt_von=None)
+        self.assertIsNone(escalation_reason({"gegenwartsvorschlaege": [doubtful] + [GOOD_PROPOSAL] * 3}, TRANSCRIPT))
+        self.assertEqual(
+            escalation_reason({"gegenwartsvorschlaege": [doubtful] * 2 + [GOOD_PROPOSAL] * 2}, TRANSCRIPT),
+            "low_confidence"
+        )
+
+    def test_doubtful_fields_and_cues(self):
+        self.assertEqual(doubtful_fields(GOOD_PROPOSAL), [])
+        self.assertEqual(doubtful_fields(dict(GOOD_PROPOSAL, start_zeit="120s")), [])
+        self.assertEqual(
+            sorted(doubtful_fields(dict(GOOD_PROPOSAL, vorschlagender="Gast", tags="Hunde", start_zeit="bald"))),
+            ["start_zeit", "tags", "vorschlagender"]
+        )
+        self.assertEqual(count_cues(TRANSCRIPT), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+import zipfile
+from datetime import date, timedelta
+
+# Add scripts directory to sys.path to allow importing pipeline
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from gemini_analyzer import analysis_is_stale
+from pipeline import DEFAULT_PATHS, adopt, build_units, load_stamps, plan, run, run_pipelined
+from quota_scheduler import QuotaLedger
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+class TestPipelineLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = {name: os.path.join(self.tmp.name, path) for name, path in DEFAULT_PATHS.items()}
+        write_json(self.paths['episode_links_file'], [{"apple_id": "111", "title": "Eins"}])
+        write_json(self.paths['tag_canon_file'], {"synonyms": {}, "tags": {}})
+        for episode_id in ("111", "222"):
+            write_json(os.path.join(self.paths['transcripts_dir'], f"{episode_id}_transcript.json"),
+                       {"transcript": [{"text": episode_id}]})
+        self.calls = []
+        self.actions = {stage: self.fake_action for stage in
+                        ("fetch-links", "extract", "analyze", "proofread", "aggregate")}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fake_action(self, unit, context):
+        self.calls.append(unit.id)
+        for path in unit.outputs:
+            write_json(path, {"built_from": [open(p).read() for p in unit.inputs if os.path.exists(p)]})
+        return True
+
+    def build(self, **kwargs):
+        self.calls = []
+        return run(build_units(self.paths), self.paths, actions=self.actions, **kwargs)
+
+    def test_first_run_builds_everything_and_second_run_only_the_external_source(self):
+        self.build()
+        self.assertIn("analyze:111", self.calls)
+        self.assertIn("proofread:222", self.calls)
+        self.assertEqual(self.calls[-1], "aggregate:site")
+
+        self.build()
+        self.assertEqual(self.calls, ["fetch-links:episodes"])
+
+    def test_changed_transcript_rebuilds_only_that_episode(self):
+        self.build()
+        transcript = os.path.join(self.paths['transcripts_dir'], "222_transcript.json")
+        analysis = os.path.join(self.paths['analyses_dir'], "222.json")
+        self.assertFalse(analysis_is_stale(transcript, analysis, load_stamps(self.paths['stamps_file'])))
+        write_json(transcript, {"transcript": [{"text": "neu"}]})
+        with self.assertLogs(level='INFO') as logs:
+            units = build_units(self.paths)
+        # Only the changed episode is queued, as stale; the up-to-date one is not counted
+        self.assertIn("Analysis queue: 0 new, 1 stale, 0 backfill", "\n".join(logs.output))
+        pending = [entry['unit'].id for entry in plan(units, load_stamps(self.paths['stamps_file']))]
+        self.assertEqual(pending, ["fetch-links:episodes", "analyze:222", "proofread:222", "aggregate:site"])
+        # The analyzer CLI sees the same: stale until the analysis is rebuilt
+        self.assertTrue(analysis_is_stale(transcript, analysis, load_stamps(self.paths['stamps_file'])))
+        write_json(analysis, {"gegenwartsvorschlaege": []})
+        self.assertFalse(analysis_is_stale(transcript, analysis, load_stamps(self.paths['stamps_file'])))
+        os.remove(analysis)
+
+        self.build()
+        self.assertEqual(self.calls, ["fetch-links:episodes", "analyze:222", "proofread:222", "aggregate:site"])
+
+    def test_unchanged_rebuilt_output_stops_propagation(self):
+        self.build()
+        # Touching the transcript without changing its content does not count as a change
+        path = os.path.join(self.paths['transcripts_dir'], "111_transcript.json")
+        os.utime(path, (0, 0))
+        self.build(selected_stages=["analyze", "proofread"])
+        self.assertEqual(self.calls, [])
+
+    def test_failed_unit_is_not_stamped_and_blocks_dependents(self):
+        def failing_analyze(unit, context):
+            self.calls.append(unit.id)
+            return unit.key != "111" and self.fake_action(unit, context)
+
+        self.actions["analyze"] = failing_analyze
+        result = self.build()
+        self.assertIn("analyze:111", result['failed'])
+        self.assertIn("proofread:111", result['skipped'])
+        self.assertNotIn("analyze:111", load_stamps(self.paths['stamps_file']))
+
+    def test_checkout_without_first_passes_rebuilds_nothing(self):
+        self.build()
+        for episode_id in ("111", "222"):
+            os.remove(os.path.join(self.paths['first_pass_dir'], f"{episode_id}.json"))
+        self.build(selected_stages=["analyze", "proofread"])
+        self.assertEqual(self.calls, [])
+
+    def test_deleted_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.paths['analyses_dir'], "111.json"))
+        self.build(selected_stages=["proofread"])
+        self.assertEqual(self.calls, ["proofread:111"])
+
+    def test_adopt_stamps_existing_analyses_without_first_pass(self):
+        write_json(os.path.join(self.paths['analyses_dir'], "111.json"), {"gegenwartsvorschlaege": []})
+        adopt(build_units(self.paths), self.paths)
+        stamps = load_stamps(self.paths['stamps_file'])
+        self.assertIn("analyze:111", stamps)
+        self.assertIn("proofread:111", stamps)
+        self.assertNotIn("analyze:222", stamps)
+
+        self.build(selected_stages=["analyze", "proofread"])
+        self.assertEqual(self.calls, ["analyze:222", "proofread:222"])
+
+    def test_capture_zip_with_several_episodes_feeds_each_episode(self):
+        os.makedirs(self.paths['raw_dir'])
+        member = "Cache/Assets/TTML/transcript_{0}.ttml-{0}.ttml"
+        with zipfile.ZipFile(os.path.join(self.paths['raw_dir'], "capture_1_cache.zip"), "w") as archive:
+            archive.writestr(member.format("333"), "<tt/>")
+            archive.writestr(member.format("444"), "<tt/>")
+        with zipfile.ZipFile(os.path.join(self.paths['raw_dir'], "capture_2_cache.zip"), "w") as archive:
+            archive.writestr(member.format("444"), "<tt>longer copy</tt>")
+            archive.writestr("Cache/other.json", "{}")
+
+        units = {unit.id: unit for unit in build_units(self.paths)}
+        self.assertEqual([os.path.basename(p) for p in units["extract:capture_1"].outputs], ["333_transcript.json"])
+        self.assertEqual([os.path.basename(p) for p in units["extract:capture_2"].outputs], ["444_transcript.json"])
+        self.assertIn("analyze:444", units)
+        self.assertEqual(build_units(self.paths, ["333"])[1].id, "extract:capture_1")
+
+        def fake_extract(unit, context):
+            self.calls.append(unit.id)
+            for path in unit.outputs:
+                write_json(path, {"transcript": [], "from": unit.key})
+            return True
+
+        self.actions["extract"] = fake_extract
+        self.build()
+        self.assertLess(self.calls.index("extract:capture_2"), self.calls.index("analyze:444"))
+
+    def test_pipelined_run_publishes_before_the_last_analysis_is_done(self):
+        site_updated = threading.Event()
+        waited = {}
+
+        def slow_analyze(unit, context):
+            if unit.key == "222":
+                waited["222"] = site_updated.wait(timeout=10)
+            return self.fake_action(unit, context)
+
+        def aggregate(unit, context):
+            site_updated.set()
+            return self.fake_action(unit, context)
+
+        self.actions.update(analyze=slow_analyze, aggregate=aggregate)
+        result = run_pipelined(build_units(self.paths), self.paths, actions=self.actions, workers=2)
+
+        self.assertTrue(waited["222"])  # the site was rebuilt while episode 222 was still being analyzed
+        self.assertEqual(self.calls.count("aggregate:site"), 2)
+        self.assertEqual(result['failed'] + result['skipped'], [])
+        self.assertEqual(result['built'].count("aggregate:site"), 1)
+        self.calls = []
+        self.build()
+        self.assertEqual(self.calls, ["fetch-links:episodes"])  # stamped like a sequential run
+
+    def test_pipelined_extraction_waits_for_a_free_queue_slot(self):
+        for episode_id in ("333", "444", "555"):
+            write_json(os.path.join(self.paths['transcripts_dir'], f"{episode_id}_transcript.json"),
+                       {"transcript": [{"text": episode_id}]})
+        release = threading.Event()
+        running = []
+
+        def blocked_analyze(unit, context):
+            running.append(unit.key)
+            release.wait(timeout=10)
+            return self.fake_action(unit, context)
+
+        def fetch_links(unit, context):
+            self.calls.append(unit.id)
+            return True
+
+        self.actions.update(analyze=blocked_analyze, **{"fetch-links": fetch_links})
+        thread = threading.Thread(target=run_pipelined, args=(build_units(self.paths), self.paths),
+                                  kwargs={'actions': self.actions, 'workers': 1, 'queue_size': 1})
+        thread.start()
+        try:
+            for _ in range(100):
+                if running:
+                    break
+                threading.Event().wait(0.01)
+            threading.Event().wait(0.2)
+            # One episode in analysis, one waiting in the queue; the producer blocks on the third
+            self.assertEqual(running, ["111"])
+        finally:
+            release.set()
+            thread.join(timeout=10)
+        self.assertEqual(running, ["111", "222", "333", "444", "555"])
+
+    def test_pipelined_failure_skips_only_that_episode(self):
+        def failing_analyze(unit, context):
+            self.calls.append(unit.id)
+            return unit.key != "111" and self.fake_action(unit, context)
+
+        self.actions["analyze"] = failing_analyze
+        result = run_pipelined(build_units(self.paths), self.paths, actions=self.actions)
+        self.assertEqual(result['failed'], ["analyze:111"])
+        self.assertEqual(result['skipped'], ["proofread:111"])
+        self.assertIn("aggregate:site", result['built'])
+        self.assertTrue(os.path.exists(os.path.join(self.paths['analyses_dir'], "222.json")))
+
+
+    def test_exhausted_quota_defers_the_rest_to_the_next_run(self):
+        recent = (date.today() - timedelta(days=2)).isoformat()
+        write_json(self.paths['episode_links_file'], [{"apple_id": "111", "release_date": "2020-01-01"},
+                                                      {"apple_id": "222", "release_date": recent}])
+        ledger = QuotaLedger(None, daily_limits={"model": 1}, sleep=lambda seconds: None)
+
+        def metered_analyze(unit, context):
+            ledger.acquire("model")
+            return self.fake_action(unit, context)
+
+        self.actions["analyze"] = metered_analyze
+        result = self.build()
+        self.assertEqual(self.calls, ["fetch-links:episodes", "analyze:222", "proofread:222", "aggregate:site"])
+        self.assertEqual(result['deferred'], ["analyze:111", "proofread:111"])
+        self.assertEqual(result['failed'] + result['skipped'], [])
+
+        ledger.days.clear()  # the next day's budget
+        result = self.build()
+        self.assertEqual(self.calls, ["fetch-links:episodes", "analyze:111", "proofread:111", "aggregate:site"])
+        self.assertEqual(result['deferred'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add scripts directory to sys.path to allow importing the profiling helpers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import profiling
+from profiling import StageProfiler
+
+
+class TestProfilingLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.report_path = os.path.join(self.temp_dir.name, "report.json")
+        self._saved_profiler = profiling._profiler
+
+    def tearDown(self):
+        profiling._profiler = self._saved_profiler
+        self.temp_dir.cleanup()
+
+    def test_stage_is_noop_when_disabled(self):
+        profiling._profiler = None
+        with profiling.stage("anything"):
+            pass
+        profiling.count("anything")  # must not fail
+
+    def test_configure_requires_report_path(self):
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(profiling.configure("script"))
+
+    def test_nested_and_repeated_stages_are_aggregated(self):
+        profiler = StageProfiler("script", self.report_path)
+        for _ in range(2):
+            with profiler.stage("outer"):
+                with profiler.stage("inner"):
+                    time.sleep(0.01)
+        profiler.count("files", 2)
+
+        self.assertEqual(profiler.stages["outer"]["calls"], 2)
+        self.assertEqual(profiler.stages["outer/inner"]["calls"], 2)
+        outer, inner = profiler.stages["outer"], profiler.stages["outer/inner"]
+        self.assertGreaterEqual(outer["wall_seconds"], inner["wall_seconds"])
+        self.assertGreaterEqual(inner["wall_seconds"], 0.02)
+        self.assertEqual(profiler.counters, {"files": 2})
+
+    def test_stage_records_time_when_it_raises(self):
+        profiler = StageProfiler("script", self.report_path)
+        with self.assertRaises(ValueError):
+            with profiler.stage("failing"):
+                raise ValueError("boom")
+        self.assertEqual(profiler.stages["failing"]["calls"], 1)
+
+    def test_memory_peak_is_recorded(self):
+        profiler = StageProfiler("script", self.report_path, trace_memory=True)
+        with profiler.stage("allocate"):
+            data = [bytearray(1024) for _ in range(1000)]
+        del data
+        self.assertGreater(profiler.stages["allocate"]["peak_memory_bytes"], 1000 * 1024)
+
+    def test_report_appends_runs_and_dumps_cprofile(self):
+        cprofile_dir = os.path.join(self.temp_dir.name, "cprofile")
+        first = StageProfiler("first", self.report_path, cprofile_dir=cprofile_dir)
+        with first.stage("work"):
+            sum(range(1000))
+        first.write_report()
+        first.write_report()  # only written once
+        second = StageProfiler("second", self.report_path)
+        second.write_report()
+
+        with open(self.report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual([run["script"] for run in report["runs"]], ["first", "second"])
+        self.assertIn("work", report["runs"][0]["stages"])
+        self.assertTrue(os.path.exists(os.path.join(cprofile_dir, "first.work.prof")))
+
+
+if __name__ == '__main__':
+    unittest.main()
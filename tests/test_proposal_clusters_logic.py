@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing proposal_clusters
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from proposal_clusters import (
+    assign_clusters,
+    estimated_similarity,
+    minhash_signature,
+    normalize_text,
+    proposal_shingles,
+)
+
+
+def make_vorschlag(unique_id, vorschlag, tags, begruendung, episode_date):
+    return {
+        "unique_vorschlag_id": unique_id,
+        "vorschlag": vorschlag,
+        "tags": tags,
+        "begruendung": begruendung,
+        "episode_date": episode_date,
+    }
+
+
+class TestProposalClustersLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.temp_dir.name, "minhash.json")
+        self.vorschlaege = [
+            make_vorschlag("ep2_vorschlag_0", "Sprachnachrichten",
+                           ["Kommunikation", "Smartphone"],
+                           "Niemand hört sich gerne minutenlange Sprachnachrichten an.", "2023-05-02"),
+            make_vorschlag("ep1_vorschlag_0", "Sprach-Nachrichten",
+                           ["Kommunikation", "Smartphone"],
+                           "Niemand hört sich gerne minutenlange Sprachnachrichten an!", "2023-01-10"),
+            make_vorschlag("ep1_vorschlag_1", "Kaffeevollautomaten",
+                           ["Küche", "Technik"],
+                           "Die Brühgruppe muss ständig entkalkt werden.", "2023-01-10"),
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_normalize_text_folds_umlauts_and_punctuation(self):
+        self.assertEqual(normalize_text("Sprach-Nachrichten hören!"), "sprach nachrichten hoeren")
+
+    def test_similarity_of_identical_and_disjoint_sets(self):
+        sig = minhash_signature({"a", "b", "c"})
+        self.assertEqual(estimated_similarity(sig, sig), 1.0)
+        other = minhash_signature({"x", "y", "z"})
+        self.assertLess(estimated_similarity(sig, other), 0.2)
+
+    def test_proposal_shingles_use_name_tags_and_reasoning(self):
+        shingles = proposal_shingles(self.vorschlaege[2])
+        self.assertIn("kaffeevollautomaten", shingles)
+        self.assertIn("kueche", shingles)
+        self.assertIn("staendig entkalkt", shingles)
+
+    def test_near_duplicates_share_cluster_with_earliest_as_canonical(self):
+        stats = assign_clusters(self.vorschlaege, self.state_path)
+        first, second, other = self.vorschlaege
+        self.assertEqual(first["cluster_id"], second["cluster_id"])
+        self.assertEqual(first["cluster_canonical_id"], "ep1_vorschlag_0")
+        self.assertEqual(first["cluster_size"], 2)
+        self.assertNotEqual(other["cluster_id"], first["cluster_id"])
+        self.assertEqual(other["cluster_canonical_id"], "ep1_vorschlag_1")
+        self.assertEqual(other["cluster_size"], 1)
+        self.assertEqual(stats["clusters"], 1)
+        self.assertEqual(stats["clustered_records"], 2)
+
+    def test_empty_proposals_are_not_clustered_together(self):
+        vorschlaege = [make_vorschlag(f"ep_vorschlag_{i}", "", [], "", "2023-01-01") for i in range(2)]
+        assign_clusters(vorschlaege, None)
+        self.assertNotEqual(vorschlaege[0]["cluster_id"], vorschlaege[1]["cluster_id"])
+
+    def test_incremental_run_reuses_stored_signatures(self):
+        assign_clusters(self.vorschlaege, self.state_path)
+        self.assertTrue(os.path.exists(self.state_path))
+
+        self.vorschlaege.append(make_vorschlag(
+            "ep3_vorschlag_0", "Kaffeevollautomat", ["Küche", "Technik"],
+            "Die Brühgruppe muss ständig entkalkt werden.", "2024-02-01"
+        ))
+        stats = assign_clusters(self.vorschlaege, self.state_path)
+        self.assertEqual(stats["reused"], 3)
+        self.assertEqual(stats["computed"], 1)
+        self.assertEqual(self.vorschlaege[3]["cluster_canonical_id"], "ep1_vorschlag_1")
+
+    def test_changed_record_gets_new_signature(self):
+        assign_clusters(self.vorschlaege, self.state_path)
+        self.vorschlaege[2]["begruendung"] = "Zu laut am Morgen."
+        stats = assign_clusters(self.vorschlaege, self.state_path)
+        self.assertEqual(stats["computed"], 1)
+        self.assertEqual(stats["reused"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
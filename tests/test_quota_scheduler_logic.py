@@ -0,0 +1,131 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing quota_scheduler
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import asr_corrections
+import gemini_analyzer
+import model_tiering
+import quota_scheduler
+from asr_corrections import CorrectionDictionary
+from gemini_stub import GeminiStubClient
+from quota_scheduler import QuotaExhausted, QuotaLedger
+
+NOON_UTC = 1760875200.0  # 2025-10-19 12:00 UTC, 05:00 in Pacific time
+DAY = 86400.0
+
+
+class FakeClock:
+
+    def __init__(self, now=NOON_UTC):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestQuotaSchedulerLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "gemini_quota.json")
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ledger(self, **limits):
+        return QuotaLedger(self.path, daily_limits=limits, rpm_limits={"flash": 60, "pro": 2},
+                           clock=self.clock, sleep=self.clock.sleep)
+
+    def test_budget_is_kept_across_runs_and_resets_the_next_day(self):
+        ledger = self.ledger(flash=2)
+        ledger.acquire("flash")
+        ledger.record_tokens("flash", 1200)
+
+        ledger = self.ledger(flash=2)  # the next run of the same day
+        ledger.acquire("flash")
+        with self.assertRaises(QuotaExhausted) as raised:
+            ledger.acquire("flash")
+        self.assertEqual(raised.exception.model, "flash")
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['days']['2025-10-19']['flash'],
+                             {'requests': 2, 'tokens': 1200, 'exhausted': False})
+
+        self.clock.now += DAY
+        ledger.acquire("flash")
+        self.assertEqual(ledger.remaining("flash"), 1)
+
+    def test_days_follow_pacific_time_and_old_days_are_pruned(self):
+        self.assertEqual(quota_scheduler.quota_day(NOON_UTC - 6 * 3600), "2025-10-18")  # 23:00 Pacific
+        ledger = self.ledger()
+        ledger.acquire("flash")
+        self.clock.now += quota_scheduler.KEEP_DAYS * DAY
+        ledger.acquire("flash")
+        self.assertEqual(list(ledger.days), ["2025-10-26"])
+
+    def test_requests_are_paced_per_model(self):
+        ledger = self.ledger()
+        for _ in range(3):
+            ledger.acquire("pro")
+        ledger.acquire("flash")
+        self.assertEqual(self.clock.slept, [30.0, 30.0])  # 2 rpm for pro; flash was not held back
+
+    def test_reported_daily_quota_marks_the_model_exhausted(self):
+        self.assertTrue(quota_scheduler.is_daily_quota_error(
+            Exception("429 RESOURCE_EXHAUSTED: GenerateRequestsPerDayPerProjectPerModel-FreeTier")))
+        self.assertFalse(quota_scheduler.is_daily_quota_error(Exception("429 RESOURCE_EXHAUSTED: per minute")))
+
+        ledger = self.ledger()
+        ledger.exhaust("pro")
+        self.assertEqual(ledger.remaining("pro"), 0)
+        with self.assertRaises(QuotaExhausted):
+            ledger.acquire("pro")
+
+    def test_new_episodes_come_before_stale_and_backfill(self):
+        release_dates = {"old": "2019-05-01", "older": "2018-01-01", "fresh": "2025-10-12",
+                         "fresher": "2025-10-17", "redo": "2025-10-18", "done": "2025-10-18"}
+        with self.assertLogs(level='INFO') as logs:
+            ordered = quota_scheduler.prioritize(list(release_dates) + ["undated"], release_dates,
+                                                 lambda episode_id: episode_id in ("redo", "done"),
+                                                 lambda episode_id: episode_id == "redo", today="2025-10-19")
+        # Up-to-date outputs are not queued at all
+        self.assertEqual(ordered, ["fresher", "fresh", "redo", "old", "older", "undated"])
+        self.assertIn("Analysis queue: 2 new, 1 stale, 3 backfill", logs.output[-1])
+
+    def test_first_pass_is_kept_when_only_the_proofreading_budget_is_used_up(self):
+        proposal = {"vorschlag": "Hundeballwerfer", "vorschlagender": "Lars", "ist_hoerer": False,
+                    "begruendung": "Weil.", "punkt_erhalten": True, "punkt_von": "Ijoma", "tags": ["Hunde"],
+                    "start_zeit": "0"}
+        transcript_path = os.path.join(self.tmp.name, "111_transcript.json")
+        with open(transcript_path, 'w', encoding='utf-8') as f:
+            json.dump({"episode_title": "Folge 111", "transcript": [
+                {"speaker": "SPEAKER_00", "text": "Mein Gegenwartscheck: der Hundeballwerfer.", "begin_seconds": 0}]}, f)
+        client = GeminiStubClient(responder=lambda model, contents: json.dumps({"gegenwartsvorschlaege": [proposal]}))
+        first_pass_dir = os.path.join(self.tmp.name, "first_pass")
+        asr_corrections._dictionary = CorrectionDictionary(os.path.join(self.tmp.name, "asr_corrections.json"))
+        quota_scheduler._ledger = self.ledger(**{gemini_analyzer.PROOFREADING_MODEL_NAME: 0})
+        try:
+            for _ in range(2):
+                with self.assertRaises(QuotaExhausted):
+                    gemini_analyzer.process_transcript(client, transcript_path, self.tmp.name,
+                                                       first_pass_dir=first_pass_dir)
+        finally:
+            quota_scheduler._ledger = None
+            asr_corrections._dictionary = None
+
+        self.assertEqual([request['model'] for request in client.requests], [model_tiering.fast_model_name()])
+        self.assertTrue(os.path.exists(os.path.join(first_pass_dir, "111.json")))
+
+
+if __name__ == '__main__':
+    unittest.main()
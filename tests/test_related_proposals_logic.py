@@ -0,0 +1,62 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing related_proposals
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from related_proposals import related_proposals, save_related, tfidf_matrix
+
+
+def record(episode, position, name, begruendung="", tag_ids=(), metaebene=None):
+    return {"unique_vorschlag_id": f"{episode}_{position}", "episode_filename_primary_id": episode,
+            "vorschlag": name, "begruendung": begruendung, "tag_ids": list(tag_ids), "metaebene": metaebene}
+
+
+RECORDS = [
+    record("111", 0, "Hundeballwerfer", "Hunde spielen allein im Garten", [1]),
+    record("111", 1, "Hundeschule online", "Hunde lernen per Video", [1]),
+    record("222", 0, "Automatischer Hundeballwerfer", "Der Hund wirft sich den Ball selbst", [1]),
+    record("222", 1, "Rasenroboter", "Roboter maehen den Garten", [2]),
+    record("333", 0, "Maehroboter mit App", "Roboter im Garten per App steuern", [2], "Smart Home"),
+    record("333", 1, "Sprachnachricht", "Niemand telefoniert mehr", [3]),
+]
+
+
+class TestRelatedProposalsLogic(unittest.TestCase):
+
+    def test_neighbours_come_from_other_episodes_best_first(self):
+        related = related_proposals(RECORDS, top_k=2)
+        self.assertEqual(related["111_0"][0][0], "222_0")
+        self.assertEqual(related["222_1"][0][0], "333_0")
+        for record_id, neighbours in related.items():
+            episode = record_id.split("_")[0]
+            self.assertTrue(all(not n.startswith(episode + "_") for n, _ in neighbours))
+            scores = [score for _, score in neighbours]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertNotIn("333_1", related)  # shares nothing with any other proposal
+
+    def test_block_size_does_not_change_the_result(self):
+        self.assertEqual(related_proposals(RECORDS, block_rows=1), related_proposals(RECORDS, block_rows=512))
+
+    def test_rows_are_unit_vectors(self):
+        matrix = tfidf_matrix(RECORDS + [record("444", 0, "")])
+        norms = matrix.multiply(matrix).sum(axis=1).A.ravel()
+        self.assertEqual([round(float(n), 5) for n in norms], [1.0] * 6 + [0.0])
+
+    def test_side_file_is_compact(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "related.json")
+            related = related_proposals(RECORDS)
+            self.assertTrue(save_related(related, path))
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            self.assertNotIn(" ", text)
+            self.assertEqual(json.loads(text), related)
+            self.assertFalse(save_related(related, path))  # unchanged, not rewritten
+
+
+if __name__ == '__main__':
+    unittest.main()
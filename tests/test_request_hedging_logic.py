@@ -0,0 +1,146 @@
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+# Add scripts directory to sys.path to allow importing request_hedging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import gemini_analyzer
+import gemini_cache
+import request_hedging
+from gemini_stub import GeminiStubClient
+from request_hedging import CircuitOpen, HedgedCaller, HedgeStats, RequestTimeout, percentile
+
+
+def seeded_stats(model, seconds, samples=request_hedging.MIN_LATENCY_SAMPLES):
+    stats = HedgeStats()
+    for _ in range(samples):
+        stats.record(model, "ok", seconds)
+    return stats
+
+
+class TestRequestHedgingLogic(unittest.TestCase):
+
+    def tearDown(self):
+        request_hedging._caller = None
+        gemini_cache.close()
+
+    def test_percentiles_use_nearest_rank(self):
+        values = [float(n) for n in range(1, 21)]
+        self.assertEqual(percentile(values, 50), 10.0)
+        self.assertEqual(percentile(values, 95), 19.0)
+        self.assertEqual(percentile(values, 99), 20.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_slow_request_is_hedged_and_first_answer_wins(self):
+        stats = seeded_stats("m", 0.05)
+        calls = []
+        release = threading.Event()
+
+        def request():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)  # the straggler
+                return "langsam"
+            return "schnell"
+
+        caller = HedgedCaller(deadline=5, headroom=lambda model: True, hedge_stats=stats)
+        started = time.monotonic()
+        self.assertEqual(caller.call("m", request), "schnell")
+        release.set()
+
+        self.assertLess(time.monotonic() - started, 2)
+        summary = stats.summary()["m"]
+        self.assertEqual((summary['hedged'], summary['hedge_hit_rate']), (1, 1.0))
+
+    def test_no_hedge_without_headroom_and_timeout_at_deadline(self):
+        stats = seeded_stats("m", 0.01)
+        calls = []
+        release = threading.Event()
+
+        def request():
+            calls.append(1)
+            release.wait(5)
+
+        caller = HedgedCaller(deadline=0.2, headroom=lambda model: False, hedge_stats=stats)
+        with self.assertRaises(RequestTimeout):
+            caller.call("m", request)
+        release.set()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(stats.summary()["m"]['timeouts'], 1)
+
+    def test_circuit_opens_on_sustained_failures_and_probes_after_cooldown(self):
+        now = [0.0]
+        stats = HedgeStats()
+        caller = HedgedCaller(deadline=5, hedging=False, hedge_stats=stats, breaker_failures=3,
+                              breaker_cooldown=60, breaker_clock=lambda: now[0])
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise RuntimeError("503 UNAVAILABLE")
+
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                caller.call("m", failing)
+        with self.assertRaises(CircuitOpen):
+            caller.call("m", failing)
+        self.assertEqual(len(calls), 3)
+
+        # A bad request is not a service failure and does not count
+        self.assertFalse(request_hedging.is_transient(RuntimeError("400 INVALID_ARGUMENT")))
+        self.assertFalse(request_hedging.is_transient(RuntimeError("429 RESOURCE_EXHAUSTED")))
+
+        now[0] = 61
+        self.assertEqual(caller.call("m", lambda: "ok"), "ok")
+        self.assertEqual(caller.breaker("m").state, "closed")
+        self.assertEqual(stats.summary()["m"]['rejected'], 1)
+
+    def test_retries_stop_when_the_circuit_opens(self):
+        request_hedging.configure(deadline=5, hedging=False)
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise RuntimeError("500 INTERNAL")
+
+        with mock.patch.object(gemini_analyzer.time, 'sleep') as sleep:
+            self.assertIsNone(gemini_analyzer.with_rate_limit_retries(failing, "Fehler", model="m"))
+
+        self.assertEqual(len(calls), request_hedging.BREAKER_FAILURES)
+        self.assertEqual(sleep.call_count, request_hedging.BREAKER_FAILURES)
+        self.assertEqual(request_hedging.get().breaker("m").state, "open")
+
+    def test_retries_after_a_timeout_reuse_the_prepared_request(self):
+        release = threading.Event()
+        calls = []
+
+        def responder(model, contents):
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+            return '{"gegenwartsvorschlaege": []}'
+
+        client = GeminiStubClient(responder=responder, min_cache_tokens=100)
+        with mock.patch.dict(os.environ, {gemini_cache.CACHE_MIN_TOKENS_ENV: "100"}):
+            cache = gemini_cache.configure(client)
+        request_hedging._caller = HedgedCaller(deadline=0.2, hedging=False, hedge_stats=HedgeStats())
+        parts = (gemini_analyzer.ANALYSIS_INSTRUCTIONS, "Folge 1", "Antworte.")
+
+        with mock.patch.object(gemini_analyzer.time, 'sleep'):
+            result = gemini_analyzer.generate_vorschlaege(client, "m", parts, lambda items: "", 0.1, 0.9, "1")
+        release.set()
+
+        self.assertEqual(result, {"gegenwartsvorschlaege": []})
+        self.assertEqual(len(calls), 2)
+        # The retry is the same request, not a second use that earns the episode its own cache
+        self.assertEqual([call for call in client.calls if call[0] == 'caches.create'], [('caches.create', "m")])
+        self.assertEqual(list(cache._uses.values()), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
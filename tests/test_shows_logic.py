@@ -0,0 +1,108 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing shows
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+import shows
+from gemini_analyzer import ANALYSIS_INSTRUCTIONS, analysis_instructions, create_output_data, proofreading_instructions
+from pipeline import DEFAULT_PATHS, load_stamps, run_shows
+
+OTHER_SHOW = {
+    "id": "zeitgeist",
+    "title": "Zeitgeist-Check",
+    "apple_podcast_id": "999",
+    "hosts": [{"name": "Anna", "full_name": "Anna Beispiel"}, {"name": "Ben", "full_name": "Ben Muster"}],
+}
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+class TestShowsLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.shows_file = os.path.join(self.tmp.name, "shows.json")
+        write_json(self.shows_file, [shows.DEFAULT_SHOW, OTHER_SHOW])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_paths_move_into_the_namespace_except_for_the_default_show(self):
+        default, other = shows.load_shows(self.shows_file)
+        self.assertEqual(default.paths(DEFAULT_PATHS), DEFAULT_PATHS)
+        self.assertEqual(other.path("data/transcripts"), "data/shows/zeitgeist/transcripts")
+        self.assertEqual(other.path("docs/site_data.json"), "docs/shows/zeitgeist/site_data.json")
+        self.assertEqual(other.path(".cache/proposal_minhash.json"), ".cache/shows/zeitgeist/proposal_minhash.json")
+        with self.assertRaises(ValueError):
+            other.path("/tmp/data/transcripts")
+        env = other.fetch_env(other.path("data/episodes/episode_links.json"))
+        self.assertEqual(env["APPLE_PODCAST_ID"], "999")
+        self.assertEqual(env["APPLE_OUTPUT_FILE"], "data/shows/zeitgeist/episodes/apple_episode_links.json")
+        self.assertNotIn("SPOTIFY_SHOW_ID", env)
+
+    def test_lookup_and_validation(self):
+        self.assertEqual(shows.get_show(None, os.path.join(self.tmp.name, "missing.json")), shows.DEFAULT)
+        self.assertEqual(shows.get_show("zeitgeist", self.shows_file).title, "Zeitgeist-Check")
+        with self.assertRaises(ValueError):
+            shows.get_show("unbekannt", self.shows_file)
+        write_json(self.shows_file, [OTHER_SHOW, OTHER_SHOW])
+        with self.assertRaises(ValueError):
+            shows.load_shows(self.shows_file)
+
+    def test_prompts_and_host_validation_follow_the_show(self):
+        other = shows.Show(OTHER_SHOW)
+        self.assertEqual(analysis_instructions(), ANALYSIS_INSTRUCTIONS)
+        instructions = analysis_instructions(other)
+        self.assertIn('in dem Podcast "Zeitgeist-Check"', instructions)
+        self.assertIn("Die Hosts sind Anna Beispiel und Ben Muster.", instructions)
+        self.assertIn("(Nur Anna oder Ben)", instructions)
+        self.assertNotIn("Ijoma", instructions)
+        self.assertIn('"Zeitgeist-Check"', proofreading_instructions(other))
+
+        analysis = {"gegenwartsvorschlaege": [{"vorschlag": "Hörerpost", "vorschlagender": "Lars",
+                                               "ist_hoerer": True, "hoerer_name": "Clara"}]}
+        output = create_output_data({"episode_title": "Folge 2024"}, analysis, other)
+        self.assertEqual(output["gegenwartsvorschlaege"][0]["vorschlagender"], "Anna")
+
+    def test_shows_run_in_parallel_with_separate_namespaces(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)  # show namespaces apply to repository-relative paths
+        self.addCleanup(os.chdir, cwd)
+        paths = dict(DEFAULT_PATHS)
+        show_list = shows.load_shows(self.shows_file)
+        for show in show_list:
+            show_paths = show.paths(paths)
+            write_json(show_paths['episode_links_file'], [])
+            write_json(show_paths['tag_canon_file'], {"synonyms": {}, "tags": {}})
+            write_json(os.path.join(show_paths['transcripts_dir'], f"{show.id}_transcript.json"), {"transcript": []})
+        calls = []
+
+        def fake_action(unit, context):
+            calls.append((context.show.id, unit.id))
+            for path in unit.outputs:
+                write_json(path, {"show": context.show.id})
+            return True
+
+        actions = {stage: fake_action for stage in ("fetch-links", "extract", "analyze", "proofread", "aggregate")}
+        results = run_shows(show_list, paths, actions=actions)
+
+        self.assertEqual(results["gegenwart"]['built'][-1], "aggregate:site")
+        self.assertIn("analyze:zeitgeist", results["zeitgeist"]['built'])
+        self.assertIn(("zeitgeist", "proofread:zeitgeist"), calls)
+        other_paths = show_list[1].paths(paths)
+        with open(os.path.join(other_paths['analyses_dir'], "zeitgeist.json"), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {"show": "zeitgeist"})
+        self.assertIn("analyze:zeitgeist", load_stamps(other_paths['stamps_file']))
+        self.assertNotIn("analyze:zeitgeist", load_stamps(paths['stamps_file']))
+
+
+if __name__ == '__main__':
+    unittest.main()
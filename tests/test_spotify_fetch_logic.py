@@ -3,6 +3,8 @@ from unittest.mock import patch, MagicMock, mock_open, call
 import json
 import os
 import sys
+import tempfile
+import time
 import requests # Required for requests.exceptions.RequestException
 
 # Add scripts directory to sys.path to allow importing spotify_fetch
@@ -12,8 +14,10 @@ from spotify_fetch import (
     get_spotify_token,
     get_podcast_episodes,
     save_episodes,
+    TokenCache,
     # main # Not explicitly testing main logic here, but could be if needed
 )
+from spotify_stub_server import SpotifyStubServer
 
 # Sample Data for Tests
 sample_spotify_episodes_page1 = {
@@ -71,7 +75,7 @@ class TestSpotifyFetchLogic(unittest.TestCase):
         mock_post.assert_called_once()
 
     # --- Tests for get_podcast_episodes ---
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('spotify_fetch.get_spotify_token', return_value="dummy_token")
     def test_get_podcast_episodes_single_page_success(self, mock_get_token, mock_get):
         mock_response = MagicMock()
@@ -100,7 +104,7 @@ class TestSpotifyFetchLogic(unittest.TestCase):
         )
         mock_response.raise_for_status.assert_called_once()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('spotify_fetch.get_spotify_token', return_value="dummy_token")
     def test_get_podcast_episodes_multi_page_success(self, mock_get_token, mock_get):
         mock_response_page1 = MagicMock()
@@ -131,7 +135,7 @@ class TestSpotifyFetchLogic(unittest.TestCase):
         mock_response_page1.raise_for_status.assert_called_once()
         mock_response_page2.raise_for_status.assert_called_once()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('spotify_fetch.get_spotify_token', return_value="dummy_token")
     def test_get_podcast_episodes_api_error(self, mock_get_token, mock_get):
         mock_response = MagicMock()
@@ -146,7 +150,7 @@ class TestSpotifyFetchLogic(unittest.TestCase):
         mock_response.raise_for_status.assert_called_once()
 
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('spotify_fetch.get_spotify_token', return_value="dummy_token")
     def test_get_podcast_episodes_empty_response(self, mock_get_token, mock_get):
         mock_response = MagicMock()
@@ -201,5 +205,49 @@ class TestSpotifyFetchLogic(unittest.TestCase):
         mock_file_open.assert_called_once_with(output_filepath, 'w', encoding='utf-8')
 
 
+class TestSpotifyFetchAgainstStub(unittest.TestCase):
+
+    def test_concurrent_fetch_returns_all_pages_in_order(self):
+        with SpotifyStubServer(episode_count=173) as stub:
+            episodes = get_podcast_episodes("id", "secret", "show", max_workers=4,
+                                            api_url=stub.api_url, token_url=stub.token_url)
+            self.assertEqual(stub.page_requests, 4)
+        self.assertEqual(len(episodes), 173)
+        self.assertEqual([ep["episode_id"] for ep in episodes], [ep["id"] for ep in stub.episodes])
+        self.assertEqual(episodes[0]["source"], "spotify")
+
+    def test_incremental_fetch_needs_one_request(self):
+        with SpotifyStubServer(episode_count=173) as stub:
+            known = {ep["id"] for ep in stub.episodes[2:]}
+            episodes = get_podcast_episodes("id", "secret", "show", known_ids=known,
+                                            api_url=stub.api_url, token_url=stub.token_url)
+            self.assertEqual(stub.page_requests, 1)
+        self.assertEqual(len(episodes), 50)
+
+    def test_token_is_reused_until_it_expires(self):
+        with SpotifyStubServer(token_ttl=3600) as stub:
+            cache = TokenCache()
+            first = get_spotify_token("id", "secret", token_cache=cache, token_url=stub.token_url)
+            second = get_spotify_token("id", "secret", token_cache=cache, token_url=stub.token_url)
+            self.assertEqual(first, second)
+            self.assertEqual(stub.tokens_issued, 1)
+
+        # A token inside the safety margin is renewed
+        with SpotifyStubServer(token_ttl=30) as stub:
+            cache = TokenCache(margin_seconds=60)
+            get_spotify_token("id", "secret", token_cache=cache, token_url=stub.token_url)
+            get_spotify_token("id", "secret", token_cache=cache, token_url=stub.token_url)
+            self.assertEqual(stub.tokens_issued, 2)
+
+    def test_token_cache_persists_between_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spotify_token.json")
+            TokenCache(path).put("id", "persisted-token", 3600)
+            self.assertEqual(TokenCache(path).get("id"), "persisted-token")
+            self.assertIsNone(TokenCache(path).get("other-id"))
+            with patch('spotify_fetch.time.time', return_value=time.time() + 3600):
+                self.assertIsNone(TokenCache(path).get("id"))
+
+
 if __name__ == '__main__':
     unittest.main()
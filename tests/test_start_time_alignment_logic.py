@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+
+# Add scripts directory to sys.path to allow importing start_time_alignment
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from start_time_alignment import (
+    TranscriptNgramIndex,
+    align_start_times,
+    parse_start_zeit,
+    summarize_drift,
+    text_ngrams,
+)
+
+sample_transcript_data = {
+    "transcript": [
+        {"speaker": "SPEAKER_1", "text": "Herzlich willkommen zur neuen Folge, heute ist Nina wieder dabei.",
+         "begin_seconds": 0},
+        {"speaker": "SPEAKER_2", "text": "Mein erster Punkt ist der Hundeballwerfer. Im Park sieht man die jetzt "
+                                         "überall, sie sehen aus wie ein Schuhlöffel.", "begin_seconds": 426},
+        {"speaker": "SPEAKER_1", "text": "Das stimmt, in Eppendorf hat jeder Hundebesitzer so ein Ding.",
+         "begin_seconds": 470},
+        {"speaker": "SPEAKER_2", "text": "Dann zu meinem zweiten Punkt: Tan Lines, also Bräunungsstreifen, "
+                                         "sind plötzlich wieder ein Statussymbol nach dem Urlaub.", "begin_seconds": 900},
+        {"speaker": "SPEAKER_1", "text": "Wir sprechen noch lange über dieses und jenes, über Urlaub und Sonne, "
+                                         "über das Wetter in Hamburg und die Preise im Supermarkt, über Serien, "
+                                         "Bücher und Filme und über noch viel mehr.", "begin_seconds": 1500},
+    ]
+}
+
+
+class TestStartTimeAlignmentLogic(unittest.TestCase):
+
+    def test_parse_start_zeit(self):
+        self.assertEqual(parse_start_zeit("123"), 123)
+        self.assertEqual(parse_start_zeit("123s"), 123)
+        self.assertEqual(parse_start_zeit(45), 45)
+        self.assertIsNone(parse_start_zeit(None))
+        self.assertIsNone(parse_start_zeit("unbekannt"))
+
+    def test_text_ngrams_tolerate_case_and_umlauts(self):
+        self.assertEqual(text_ngrams("Bräunung"), text_ngrams("braeunung"))
+        self.assertIn(" hu", text_ngrams("Hundeballwerfer"))
+        self.assertEqual(text_ngrams("und die das"), set())
+
+    def test_best_match_finds_chunk(self):
+        index = TranscriptNgramIndex(sample_transcript_data["transcript"])
+        match = index.best_match([("Hundeballwerfer", 2.0)])
+        self.assertEqual(match["begin_seconds"], 426)
+        self.assertGreater(match["score"], 0.9)
+        self.assertIsNone(index.best_match([("", 1.0)]))
+
+    def test_long_chunks_do_not_win_by_length(self):
+        index = TranscriptNgramIndex(sample_transcript_data["transcript"])
+        match = index.best_match([("Tan Lines", 2.0), ("Bräunungsstreifen nach dem Urlaub", 1.0)])
+        self.assertEqual(match["begin_seconds"], 900)
+
+    def test_align_start_times_snaps_and_reports_drift(self):
+        vorschlaege = [
+            {"vorschlag": "Hundeballwerfer", "begruendung": "Sehen aus wie Schuhlöffel, überall im Park.",
+             "start_zeit": "528"},
+            {"vorschlag": "Tan Lines", "begruendung": "Bräunungsstreifen als Statussymbol.", "start_zeit": "1405s"},
+            {"vorschlag": "Quantencomputer", "begruendung": "Kryptografie", "start_zeit": "77"},
+        ]
+        report = align_start_times(vorschlaege, sample_transcript_data)
+
+        self.assertEqual(vorschlaege[0]["start_zeit"], "426")
+        self.assertEqual(vorschlaege[1]["start_zeit"], "900")
+        self.assertEqual(vorschlaege[2]["start_zeit"], "77")  # no match: model value is kept
+        self.assertEqual(report[0]["drift_seconds"], -102)
+        self.assertEqual(report[1]["drift_seconds"], -505)
+        self.assertFalse(report[2]["snapped"])
+
+        summary = summarize_drift(report)
+        self.assertEqual(summary["proposals"], 3)
+        self.assertEqual(summary["snapped"], 2)
+        self.assertEqual(summary["corrected"], 2)
+        self.assertEqual(summary["max_abs_drift_seconds"], 505)
+
+    def test_align_without_model_time(self):
+        vorschlaege = [{"vorschlag": "Hundeballwerfer", "begruendung": "", "start_zeit": None}]
+        report = align_start_times(vorschlaege, sample_transcript_data)
+        self.assertEqual(vorschlaege[0]["start_zeit"], "426")
+        self.assertIsNone(report[0]["drift_seconds"])
+
+
+if __name__ == '__main__':
+    unittest.main()
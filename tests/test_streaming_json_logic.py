@@ -0,0 +1,96 @@
+import unittest
+import json
+import os
+import sys
+
+# Add scripts directory to sys.path to allow importing streaming_json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from gemini_analyzer import analyze_transcript_with_gemini, proofread_analysis_with_gemini
+from gemini_stub import GeminiStubClient
+from streaming_json import ItemStreamParser, complete_items
+
+TRANSCRIPT = {
+    "episode_title": "Folge",
+    "transcript": [{"speaker": "SPEAKER_00", "text": "Mein Gegenwartscheck ...", "begin_seconds": 0}],
+}
+
+
+def proposal(name):
+    return {"vorschlag": name, "vorschlagender": "Lars", "begruendung": "Weil {es} \"so\" ist. " * 10,
+            "tags": ["a", "b"], "start_zeit": "10"}
+
+
+def answer(*names):
+    return "```json\n" + json.dumps({"gegenwartsvorschlaege": [proposal(n) for n in names]}, indent=2) + "\n```"
+
+
+def request_text(contents):
+    return contents[0].parts[0].text
+
+
+class TestStreamingJsonLogic(unittest.TestCase):
+
+    def test_items_are_returned_as_soon_as_they_are_complete(self):
+        text = answer("Eins", "Zwei")
+        parser = ItemStreamParser()
+        arrivals = []
+        for i in range(0, len(text), 7):
+            arrivals.append([item["vorschlag"] for item in parser.feed(text[i:i + 7])])
+
+        completed = [names for names in arrivals if names]
+        self.assertEqual(completed, [["Eins"], ["Zwei"]])
+        # The first item was available before the response ended
+        self.assertLess(arrivals.index(["Eins"]), len(arrivals) - 2)
+        self.assertTrue(parser.closed)
+
+    def test_truncated_text_keeps_only_complete_items(self):
+        text = answer("Eins", "Zwei", "Drei")
+        cut = text[:text.index('"Drei"') + 20]
+        self.assertEqual([item["vorschlag"] for item in complete_items(cut)], ["Eins", "Zwei"])
+        parser = ItemStreamParser()
+        parser.feed(cut)
+        self.assertFalse(parser.closed)
+
+    def test_braces_and_quotes_inside_strings_do_not_confuse_the_parser(self):
+        text = '{"gegenwartsvorschlaege": [{"vorschlag": "A } \\" {", "tags": ["]"]}, {"vorschlag": "B"}]}'
+        self.assertEqual([item["vorschlag"] for item in complete_items(text)], ['A } " {', "B"])
+
+    def test_truncated_analysis_is_continued_with_only_the_missing_items(self):
+        def responder(model, contents):
+            if "abgeschnitten" in request_text(contents):
+                return answer("Drei", "Vier")
+            return answer("Eins", "Zwei", "Drei", "Vier")
+
+        first_answer_tokens = len(answer("Eins", "Zwei", "Drei", "Vier")) // 4
+        client = GeminiStubClient(responder=responder, output_token_limit=first_answer_tokens * 2 // 3)
+        result = analyze_transcript_with_gemini(client, TRANSCRIPT)
+
+        self.assertEqual([item["vorschlag"] for item in result["gegenwartsvorschlaege"]],
+                         ["Eins", "Zwei", "Drei", "Vier"])
+        self.assertEqual(len(client.requests), 2)
+        continuation = request_text(client.requests[1]['contents'])
+        self.assertIn('"Eins", "Zwei"', continuation)
+        self.assertEqual(client.responses[0].finish_reason, "MAX_TOKENS")
+
+    def test_continuations_are_capped(self):
+        client = GeminiStubClient(responder=lambda model, contents: answer("Eins", "Zwei"), output_token_limit=150)
+        result = analyze_transcript_with_gemini(client, TRANSCRIPT)
+        self.assertEqual([item["vorschlag"] for item in result["gegenwartsvorschlaege"]], ["Eins"])
+        self.assertEqual(len(client.requests), 4)  # first request + MAX_CONTINUATIONS
+
+    def test_complete_answer_needs_a_single_request(self):
+        client = GeminiStubClient(responder=lambda model, contents: answer("Eins"))
+        initial = {"gegenwartsvorschlaege": [proposal("Eins")]}
+        result = proofread_analysis_with_gemini(client, initial, TRANSCRIPT)
+        self.assertEqual(result, initial)
+        self.assertEqual([call[0] for call in client.calls], ["models.generate_content_stream"])
+
+    def test_malformed_answer_is_still_a_parse_failure(self):
+        client = GeminiStubClient(responder=lambda model, contents: "Ich kann das nicht.")
+        self.assertIsNone(analyze_transcript_with_gemini(client, TRANSCRIPT))
+        self.assertEqual(len(client.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
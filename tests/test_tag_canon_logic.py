@@ -0,0 +1,74 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing tag_canon
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from tag_canon import canonical_key, canonicalize_tags, load_tag_canon, tag_key
+
+
+class TestTagCanonLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.canon_path = os.path.join(self.temp_dir.name, "tag_canon.json")
+        with open(self.canon_path, 'w', encoding='utf-8') as f:
+            json.dump({"synonyms": {"Soziale Medien": "Social Media", "Trends": "Trend"}, "tags": {}}, f)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_tag_key_folds_case_hyphens_and_umlauts(self):
+        self.assertEqual(tag_key("Social-Media"), "social media")
+        self.assertEqual(tag_key("SOCIAL MEDIA"), "social media")
+        self.assertEqual(tag_key("Mobilität"), "mobilitaet")
+        self.assertEqual(tag_key("Fußball"), tag_key("Fussball"))
+
+    def test_canonical_key_follows_synonyms(self):
+        synonyms = {"soziale medien": "Social Media", "socials": "Soziale Medien"}
+        self.assertEqual(canonical_key("Soziale Medien", synonyms), "social media")
+        self.assertEqual(canonical_key("Socials", synonyms), "social media")
+        self.assertEqual(canonical_key("Mode", synonyms), "mode")
+
+    def test_canonicalize_tags_merges_variants_into_ids(self):
+        vorschlaege = [
+            {"tags": ["Social Media", "Mode"]},
+            {"tags": ["Social-Media", "soziale Medien", "Trends"]},
+            {"tags": ["social media", "Trend"]},
+        ]
+        vocabulary = canonicalize_tags(vorschlaege, self.canon_path)
+
+        names = {entry["id"]: entry["name"] for entry in vocabulary}
+        self.assertEqual(sorted(names.values()), ["Mode", "Social Media", "Trend"])
+        counts = {entry["name"]: entry["count"] for entry in vocabulary}
+        self.assertEqual(counts, {"Mode": 1, "Social Media": 3, "Trend": 2})
+
+        social_id = next(i for i, n in names.items() if n == "Social Media")
+        self.assertEqual(vorschlaege[1]["tag_ids"][0], social_id)
+        self.assertEqual(len(vorschlaege[1]["tag_ids"]), 2)  # duplicates within a record collapse
+        self.assertNotIn("tags", vorschlaege[0])
+
+    def test_ids_are_persisted_and_stable(self):
+        canonicalize_tags([{"tags": ["Mode", "Sprache"]}], self.canon_path)
+        first_ids = {k: v["id"] for k, v in load_tag_canon(self.canon_path)["tags"].items()}
+
+        vorschlaege = [{"tags": ["Alltag", "Sprache"]}]
+        vocabulary = canonicalize_tags(vorschlaege, self.canon_path)
+        stored = load_tag_canon(self.canon_path)["tags"]
+
+        self.assertEqual(stored["sprache"]["id"], first_ids["sprache"])
+        self.assertEqual(stored["alltag"]["id"], max(first_ids.values()) + 1)
+        self.assertEqual([entry["name"] for entry in vocabulary], ["Sprache", "Alltag"])
+
+    def test_raw_tags_can_be_kept(self):
+        vorschlaege = [{"tags": ["Mode"]}, {"vorschlag": "ohne Tags"}]
+        canonicalize_tags(vorschlaege, None, drop_raw_tags=False)
+        self.assertEqual(vorschlaege[0]["tags"], ["Mode"])
+        self.assertEqual(vorschlaege[1]["tag_ids"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
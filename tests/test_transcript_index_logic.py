@@ -0,0 +1,100 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing transcript_index
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from transcript_index import connect, index_transcripts, search, export_slice, to_fts_query
+
+
+def write_transcript(directory, episode_id, chunks, title="Episode"):
+    path = os.path.join(directory, f"{episode_id}_transcript.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"episode_title": title, "transcript": chunks}, f, ensure_ascii=False)
+    return path
+
+
+class TestTranscriptIndexLogic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.transcripts_dir = os.path.join(self.tmp.name, "transcripts")
+        os.makedirs(self.transcripts_dir)
+        write_transcript(self.transcripts_dir, "111", [
+            {"speaker": "SPEAKER_1", "text": "Heute geht es um Social Media und Währungen.", "begin_seconds": 12},
+            {"speaker": "SPEAKER_2", "text": "Gegenwartscheck: Restaurants ohne Währung.", "begin_seconds": 95},
+        ], title="Erste Folge")
+        write_transcript(self.transcripts_dir, "222", [
+            {"speaker": "SPEAKER_1", "text": "Nichts über Geld.", "begin_seconds": 3},
+        ])
+        self.conn = connect(os.path.join(self.tmp.name, "index.sqlite"))
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_hits_carry_episode_and_millisecond_offsets(self):
+        index_transcripts(self.conn, self.transcripts_dir)
+        hits = search(self.conn, "Währung")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0]["episode"], "111")
+        self.assertEqual(hits[0]["episode_title"], "Erste Folge")
+        self.assertEqual(hits[0]["begin_ms"], 95000)
+        self.assertEqual(hits[0]["rank"], 1)
+        self.assertIn("[Währung]", hits[0]["snippet"])
+        # Diacritics are folded and all words must match
+        self.assertEqual(len(search(self.conn, "wahrung restaurants")), 1)
+        self.assertEqual(search(self.conn, "Währung Geld"), [])
+
+    def test_hits_carry_their_chapter(self):
+        chapters = [{"start_seconds": 0, "end_seconds": 60, "first_chunk": 0, "last_chunk": 0, "keywords": ["media"]},
+                    {"start_seconds": 60, "end_seconds": 120, "first_chunk": 1, "last_chunk": 1,
+                     "keywords": ["restaurants", "waehrung"]}]
+        with open(os.path.join(self.transcripts_dir, "111_chapters.json"), 'w', encoding='utf-8') as f:
+            json.dump({"episode_id": "111", "chapters": chapters}, f)
+        index_transcripts(self.conn, self.transcripts_dir)
+
+        self.assertEqual(search(self.conn, "Währung")[0]["chapter"],
+                         {"number": 2, "start_seconds": 60, "end_seconds": 120,
+                          "keywords": ["restaurants", "waehrung"]})
+        self.assertEqual(search(self.conn, "Social")[0]["chapter"]["number"], 1)
+        # Episodes without a chapter index still match
+        self.assertIsNone(search(self.conn, "Geld")[0]["chapter"])
+
+    def test_incremental_update_by_file_hash(self):
+        self.assertEqual(index_transcripts(self.conn, self.transcripts_dir)["added"], 2)
+        self.assertEqual(index_transcripts(self.conn, self.transcripts_dir)["unchanged"], 2)
+
+        write_transcript(self.transcripts_dir, "222", [
+            {"speaker": "SPEAKER_2", "text": "Jetzt doch über Geld und Währung.", "begin_seconds": 7},
+        ])
+        os.remove(os.path.join(self.transcripts_dir, "111_transcript.json"))
+        stats = index_transcripts(self.conn, self.transcripts_dir)
+        self.assertEqual((stats["updated"], stats["removed"]), (1, 1))
+
+        hits = search(self.conn, "Währung")
+        self.assertEqual([(h["episode"], h["begin_ms"]) for h in hits], [("222", 7000)])
+        self.assertEqual(search(self.conn, "Nichts"), [])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(to_fts_query('Social-Media "OR" (x'), '"Social" "Media" "OR" "x"')
+        index_transcripts(self.conn, self.transcripts_dir)
+        self.assertEqual(len(search(self.conn, 'Social-Media (')), 1)
+        self.assertEqual(len(search(self.conn, '"Social Media" OR Geld', raw=True)), 2)
+
+    def test_export_slice(self):
+        index_transcripts(self.conn, self.transcripts_dir)
+        output = os.path.join(self.tmp.name, "docs", "hits.json")
+        export_slice(self.conn, ["Währung", "Geld"], output)
+        with open(output, encoding='utf-8') as f:
+            exported = json.load(f)
+        self.assertEqual(list(exported), ["Währung", "Geld"])
+        self.assertEqual(exported["Geld"][0]["episode"], "222")
+        self.assertEqual(exported["Geld"][0]["begin_ms"], 3000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import os
+import sys
+
+# Add scripts directory to sys.path to allow importing transcript_packing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from gemini_analyzer import MODEL_NAME, analyze_packed, merge_vorschlaege
+from gemini_stub import GeminiStubClient
+from transcript_packing import demultiplex, pack_episodes, pack_sections
+
+PROPOSAL = {
+    "vorschlag": "Hundeballwerfer", "vorschlagender": "Lars", "ist_hoerer": False, "begruendung": "Weil.",
+    "punkt_erhalten": True, "punkt_von": "Ijoma", "tags": ["Hunde"], "start_zeit": "426",
+}
+
+
+def transcript(text):
+    return {"episode_title": f"Folge {text}", "transcript": [{"speaker": "SPEAKER_00", "text": text}]}
+
+
+class TestTranscriptPackingLogic(unittest.TestCase):
+
+    def test_first_fit_respects_budget_and_episode_limit(self):
+        counts = {"a": 50, "b": 40, "c": 30, "d": 20, "e": 500, "f": 10, "g": 10}
+        self.assertEqual(pack_episodes(counts, budget=100, max_episodes=3),
+                         [["a", "b", "f"], ["c", "d", "g"], ["e"]])
+        self.assertEqual(pack_episodes({}, budget=100), [])
+
+    def test_sections_are_delimited_by_episode_id(self):
+        text = pack_sections({"111": "Transkript eins", "222": "Transkript zwei"})
+        self.assertEqual(text, "=== EPISODE 111 ===\nTranskript eins\n=== ENDE EPISODE 111 ===\n\n"
+                               "=== EPISODE 222 ===\nTranskript zwei\n=== ENDE EPISODE 222 ===")
+
+    def test_demultiplex_routes_proposals_and_reports_missing_episodes(self):
+        result = {
+            "gegenwartsvorschlaege": [
+                dict(PROPOSAL, episode_id="222"),
+                dict(PROPOSAL, episode_id="999"),  # not in the pack
+                dict(PROPOSAL),  # no episode
+                "kaputt",
+            ],
+            "episoden_ohne_vorschlaege": ["333"],
+        }
+        analyses, missing = demultiplex(result, ["111", "222", "333"])
+        self.assertEqual(analyses, {"222": {"gegenwartsvorschlaege": [PROPOSAL]},
+                                    "333": {"gegenwartsvorschlaege": []}})
+        self.assertEqual(missing, ["111"])
+        self.assertEqual(demultiplex(None, ["111", "222"]), ({}, ["111", "222"]))
+
+    def test_continuations_keep_equal_names_of_different_episodes(self):
+        merged = merge_vorschlaege([dict(PROPOSAL, episode_id="111")],
+                                   [dict(PROPOSAL, episode_id="111"), dict(PROPOSAL, episode_id="222")])
+        self.assertEqual([item["episode_id"] for item in merged], ["111", "222"])
+
+    def test_packed_request_falls_back_for_unanswered_episodes(self):
+        answer = json.dumps({"gegenwartsvorschlaege": [dict(PROPOSAL, episode_id="111")]})
+        client = GeminiStubClient(responder=lambda model, contents: answer)
+        transcripts = {"111": transcript("Mein Gegenwartscheck: der Hundeballwerfer."),
+                       "222": transcript("Heute ohne Vorschlag.")}
+
+        analyses = analyze_packed(client, transcripts)
+
+        self.assertEqual(list(analyses), ["111"])
+        self.assertNotIn("episode_id", analyses["111"]["gegenwartsvorschlaege"][0])
+        self.assertEqual(len(client.requests), 1)
+        self.assertEqual(client.requests[0]['model'], MODEL_NAME)
+        prompt = json.dumps(str(client.requests[0]['contents']), ensure_ascii=False)
+        self.assertIn("=== EPISODE 222 ===", prompt)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import random
+import sys
+import tempfile
+
+# Add scripts directory to sys.path to allow importing transcript_segmentation
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from transcript_segmentation import chapters_path, depth_scores, load_chapters, segment_transcript, write_chapters
+
+TOPICS = [
+    ["Hundeballwerfer", "Hundebesitzer", "Park", "Leine", "Tennisball", "Wiese", "Dackel", "Gassi"],
+    ["Bräunungsstreifen", "Urlaub", "Sonne", "Strand", "Sonnencreme", "Bikini", "Mallorca", "Statussymbol"],
+    ["Wahlkampf", "Plakate", "Parteien", "Kanzler", "Umfragen", "Bundestag", "Koalition", "Wähler"],
+]
+
+
+def topic_transcript(chunks_per_topic=15, words_per_chunk=30, seconds_per_chunk=20):
+    rng = random.Random(0)
+    chunks = []
+    for topic in TOPICS:
+        for _ in range(chunks_per_topic):
+            text = " ".join(rng.choice(topic) for _ in range(words_per_chunk))
+            chunks.append({"speaker": f"SPEAKER_{len(chunks) % 2}", "text": f"Also {text} und so.",
+                           "begin_seconds": len(chunks) * seconds_per_chunk})
+    return {"transcript": chunks}
+
+
+class TestTranscriptSegmentationLogic(unittest.TestCase):
+
+    def test_depth_is_the_rise_to_the_peaks_on_both_sides(self):
+        depths = depth_scores([0.8, 0.5, 0.2, 0.6, 0.9])
+        self.assertEqual([round(depth, 3) for depth in depths], [0.0, 0.3, 1.3, 0.3, 0.0])
+
+    def test_topic_shifts_become_chapters_at_chunk_starts(self):
+        chapters = segment_transcript(topic_transcript())
+
+        self.assertEqual([chapter['start_seconds'] for chapter in chapters], [0, 300, 600])
+        self.assertEqual([(chapter['first_chunk'], chapter['last_chunk']) for chapter in chapters],
+                         [(0, 14), (15, 29), (30, 44)])
+        self.assertEqual(chapters[0]['end_seconds'], 300)
+        self.assertGreater(chapters[-1]['end_seconds'], 880)
+        for chapter, topic in zip(chapters, TOPICS):
+            self.assertEqual(len(chapter['keywords']), 5)
+            normalized = {word.lower().replace("ä", "ae") for word in topic}
+            self.assertTrue(set(chapter['keywords']) <= normalized, chapter['keywords'])
+
+    def test_chapters_respect_the_minimum_length(self):
+        # Every topic lasts 300 seconds, so no boundary leaves both neighbours 400 seconds long
+        chapters = segment_transcript(topic_transcript(), min_chapter_seconds=400)
+        self.assertEqual([(c['first_chunk'], c['last_chunk']) for c in chapters], [(0, 44)])
+        self.assertEqual(len(segment_transcript(topic_transcript(), max_chapters=2)), 2)
+
+    def test_short_and_empty_transcripts(self):
+        short = {"transcript": [{"speaker": "SPEAKER_1", "text": "Kurze Folge über Hunde im Park.",
+                                 "begin_seconds": 5}]}
+        self.assertEqual(segment_transcript(short),
+                         [{'start_seconds': 5, 'end_seconds': 7, 'first_chunk': 0, 'last_chunk': 0, 'keywords': []}])
+        self.assertEqual(segment_transcript({"transcript": []}), [])
+
+    def test_chapter_index_is_stored_next_to_the_transcript(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            transcript_path = os.path.join(temp_dir, "111_transcript.json")
+            self.assertEqual(chapters_path(transcript_path), os.path.join(temp_dir, "111_chapters.json"))
+            self.assertIsNone(load_chapters(transcript_path))
+
+            self.assertTrue(write_chapters(transcript_path, topic_transcript()))
+            self.assertFalse(write_chapters(transcript_path, topic_transcript()))
+            self.assertEqual(len(load_chapters(transcript_path)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()